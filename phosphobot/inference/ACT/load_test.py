@@ -0,0 +1,128 @@
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "httpx",
+#     "json_numpy",
+#     "numpy",
+#     "loguru",
+# ]
+# ///
+
+"""
+Load test for the ACT policy server: report throughput and latency percentiles for
+increasing numbers of concurrent clients (eg: several robots sharing one GPU box).
+
+```
+uv run server.py --model_id=... --max_batch_size=8 --max_wait_ms=5
+uv run load_test.py --server_url=http://localhost:8080 --concurrency 1 2 4 8 16
+```
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+import json_numpy
+import numpy as np
+from loguru import logger
+
+
+def build_payload(input_features: dict) -> dict:
+    """Random observation matching the input features of the loaded policy."""
+    payload = {}
+    image_index = 0
+    for name, feature in input_features.items():
+        shape = feature["shape"]
+        if "image" in name:
+            # input_features shapes are channel first
+            channels, height, width = shape
+            payload[f"observation.images.{image_index}"] = np.random.randint(
+                0, 255, (height, width, channels), dtype=np.uint8
+            )
+            image_index += 1
+        else:
+            payload[name] = np.random.rand(*shape).astype(np.float32)
+    return {"encoded": json_numpy.dumps(payload)}
+
+
+async def run_client(
+    client: httpx.AsyncClient,
+    payload: dict,
+    nb_requests: int,
+    latencies: List[float],
+) -> None:
+    for _ in range(nb_requests):
+        start = time.perf_counter()
+        response = await client.post("/act", json=payload)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(
+    server_url: str, payload: dict, concurrency: int, nb_requests: int
+) -> dict:
+    latencies: List[float] = []
+    async with httpx.AsyncClient(base_url=server_url, timeout=60) as client:
+        # Warmup
+        await run_client(client, payload, 2, [])
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                run_client(client, payload, nb_requests, latencies)
+                for _ in range(concurrency)
+            ]
+        )
+        duration = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "throughput": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the ACT policy server")
+    parser.add_argument("--server_url", type=str, default="http://localhost:8080")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Numbers of concurrent clients to test",
+    )
+    parser.add_argument(
+        "--nb_requests",
+        type=int,
+        default=50,
+        help="Number of requests sent by each client",
+    )
+    args = parser.parse_args()
+
+    health = httpx.get(f"{args.server_url}/health", timeout=10).json()
+    if not health["policy_loaded"]:
+        raise RuntimeError(f"Policy not loaded on {args.server_url}")
+    payload = build_payload(health["input_features"])
+    logger.info(f"Server batching: {health.get('batching')}")
+
+    results = []
+    for concurrency in args.concurrency:
+        result = await run_level(
+            args.server_url, payload, concurrency, args.nb_requests
+        )
+        logger.info(
+            f"concurrency={result['concurrency']:>3} "
+            f"throughput={result['throughput']:8.1f} req/s "
+            f"p50={result['p50_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms"
+        )
+        results.append(result)
+
+    health = httpx.get(f"{args.server_url}/health", timeout=10).json()
+    logger.success(f"Server batching after the load test: {health.get('batching')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,13 +15,18 @@
 # lerobot = { git = "https://github.com/phospho-app/lerobot" }
 # ///
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 from loguru import logger
 
 logger.info("Starting ACT policy server...")
 
 import argparse
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, List, Optional
 import json
 import cv2
 import json_numpy
@@ -49,6 +54,118 @@ class InferenceRequest(BaseModel):
     encoded: str  # Will contain json_numpy encoded payload with image
 
 
+@dataclass
+class InferenceItem:
+    """One observation to run through the policy."""
+
+    images: List[np.ndarray]
+    current_qpos: np.ndarray
+    image_names: List[str]
+    target_size: tuple[int, int]
+
+
+class MicroBatcher:
+    """
+    Collect concurrent inference requests for up to max_wait_ms and run them as a single
+    batched forward pass, then split the results back to each request.
+
+    Batches run one at a time in a worker thread: the event loop keeps accepting requests
+    while the model runs, and they are batched together in the next forward pass.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait_s = max_wait_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="act")
+        self.nb_batches = 0
+        self.nb_items = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        assert self._queue is not None
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            # Requests that arrived while the previous batch was running are already queued
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _process(self, items: List[Any]) -> List[Any]:
+        try:
+            return self.process_batch(items)
+        except Exception:
+            if len(items) == 1:
+                raise
+            # Don't fail every request of the batch because of one bad observation
+            logger.warning(
+                f"Batch of {len(items)} failed, running the requests one by one"
+            )
+            results: List[Any] = []
+            for item in items:
+                try:
+                    results.extend(self.process_batch([item]))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self._process, items
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+            self.nb_batches += 1
+            self.nb_items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "batches": self.nb_batches,
+            "mean_batch_size": self.nb_items / self.nb_batches
+            if self.nb_batches
+            else 0.0,
+        }
+
+
 def get_safe_torch_device(device_str: str, log: bool = True) -> torch.device:
     """Get a safe torch device, defaulting to CPU if requested device is not available."""
     if device_str == "cuda" and not torch.cuda.is_available():
@@ -146,6 +263,160 @@ def load_policy(model_id: str, revision: str | None = None):
         raise
 
 
+class ImagePreprocessor:
+    """
+    Convert the camera images of a batch to normalized float tensors on the device.
+
+    Images are resized straight into a reusable uint8 host buffer of shape
+    (batch, cameras, H, W, 3), pinned on CUDA, and copied asynchronously to the device.
+    The uint8 -> float conversion and the channel-first permutation happen on the device.
+    On CPU, a single NumPy operation converts the whole buffer to float in [0, 1].
+
+    The buffers are reused by the next batch: call it from the single inference thread only.
+    The forward pass and the final .cpu() call wait for the asynchronous copy to complete.
+    """
+
+    def __init__(self) -> None:
+        self._host_buffer: Optional[np.ndarray] = None
+        self._host_tensor: Optional[torch.Tensor] = None
+        self._float_buffer: Optional[np.ndarray] = None
+        # Cumulative timings, reported by /health
+        self.nb_batches = 0
+        self.total_preprocess_s = 0.0
+        self.total_forward_s = 0.0
+
+    def _buffers(
+        self, nb_items: int, nb_cameras: int, height: int, width: int
+    ) -> np.ndarray:
+        shape = (nb_items, nb_cameras, height, width, 3)
+        if (
+            self._host_buffer is None
+            or self._host_buffer.shape[0] < nb_items
+            or self._host_buffer.shape[1:] != shape[1:]
+        ):
+            capacity = (max(nb_items, batcher.max_batch_size),) + shape[1:]
+            host_tensor = torch.empty(capacity, dtype=torch.uint8)
+            if device is not None and device.type == "cuda":
+                host_tensor = host_tensor.pin_memory()
+            self._host_tensor = host_tensor
+            self._host_buffer = host_tensor.numpy()
+            self._float_buffer = None
+        return self._host_buffer[:nb_items]
+
+    def __call__(
+        self,
+        items: List[InferenceItem],
+        image_names: List[str],
+        target_size: tuple[int, int],
+    ) -> dict[str, torch.Tensor]:
+        assert device is not None
+        width, height = target_size
+        host_buffer = self._buffers(len(items), len(image_names), height, width)
+        for b, item in enumerate(items):
+            for c, image in enumerate(item.images):
+                if image.dtype != np.uint8:
+                    image = np.clip(image, 0, 255).astype(np.uint8)
+                if image.shape[:2] == (height, width):
+                    host_buffer[b, c] = image
+                else:
+                    cv2.resize(image, target_size, dst=host_buffer[b, c])
+
+        if device.type == "cpu":
+            # Fused conversion: uint8 (B, N, H, W, 3) -> float32 (B, N, 3, H, W) in [0, 1]
+            float_shape = (len(items), len(image_names), 3, height, width)
+            if self._float_buffer is None or self._float_buffer.shape != float_shape:
+                self._float_buffer = np.empty(float_shape, dtype=np.float32)
+            np.multiply(
+                host_buffer.transpose(0, 1, 4, 2, 3),
+                np.float32(1 / 255),
+                out=self._float_buffer,
+            )
+            images = torch.from_numpy(self._float_buffer)
+        else:
+            assert self._host_tensor is not None
+            images = (
+                self._host_tensor[: len(items)]
+                .to(device, non_blocking=True)
+                .permute(0, 1, 4, 2, 3)
+                .float()
+                .div_(255.0)
+            )
+        return {name: images[:, i] for i, name in enumerate(image_names)}
+
+    def stats(self) -> dict:
+        if self.nb_batches == 0:
+            return {"preprocess_ms": 0.0, "forward_ms": 0.0}
+        return {
+            "preprocess_ms": self.total_preprocess_s / self.nb_batches * 1000,
+            "forward_ms": self.total_forward_s / self.nb_batches * 1000,
+        }
+
+
+preprocessor = ImagePreprocessor()
+
+
+def process_batch(items: List[InferenceItem]) -> List[np.ndarray]:
+    """
+    Process several observations through the ACT policy in a single forward pass.
+    Returns the actions of each observation, with shape (n_action_steps, 1, action_dim).
+    """
+    global policy, device
+
+    if device is None:
+        raise ValueError(
+            "Device is not set. Please ensure the policy is loaded correctly."
+        )
+    for item in items:
+        if len(item.images) == 0:
+            raise ValueError("No images provided")
+        if not all(
+            len(image.shape) == 3 and image.shape[2] == 3 for image in item.images
+        ):
+            raise ValueError("Invalid image format. Expected RGB image.")
+
+    image_names = items[0].image_names
+    target_size = items[0].target_size
+    try:
+        with torch.no_grad(), torch.autocast(device_type=device.type):
+            start = time.perf_counter()
+            # Prepare state tensor (B, state_dim)
+            state_tensor = torch.from_numpy(
+                np.stack([item.current_qpos for item in items]).astype(
+                    np.float32, copy=False
+                )
+            ).to(device, non_blocking=True)
+
+            # Create batch dictionary
+            batch = {
+                "observation.state": state_tensor,
+            }
+
+            # Images as float tensors (B, C, H, W) in [0, 1]
+            batch.update(preprocessor(items, image_names, target_size))
+            preprocess_s = time.perf_counter() - start
+
+            # Get the actions
+            batch = policy.normalize_inputs(batch)  # type: ignore
+            if policy.config.image_features:  # type: ignore
+                batch = dict(batch)
+                batch["observation.images"] = [
+                    batch[key]
+                    for key in policy.config.image_features  # type: ignore
+                ]
+            actions = policy.model(batch)[0][:, : policy.config.n_action_steps]  # type: ignore
+            actions = policy.unnormalize_outputs({"action": actions})["action"]  # type: ignore
+            actions = actions.cpu().numpy()
+            preprocessor.nb_batches += 1
+            preprocessor.total_preprocess_s += preprocess_s
+            preprocessor.total_forward_s += time.perf_counter() - start - preprocess_s
+            # Split the batch: (B, n_action_steps, action_dim) -> B x (n_action_steps, 1, action_dim)
+            return [actions[i : i + 1].transpose(1, 0, 2) for i in range(len(items))]
+
+    except Exception as e:
+        logger.error(f"Error during inference: {str(e)}")
+        raise
+
+
 def process_image(
     images: List[np.ndarray],
     current_qpos: np.ndarray,
@@ -153,66 +424,19 @@ def process_image(
     target_size: tuple[int, int],
 ) -> np.ndarray:
     """Process image through the ACT policy."""
-    global policy, device
-
-    if len(images) == 0:
-        raise ValueError("No images provided")
+    return process_batch(
+        [
+            InferenceItem(
+                images=images,
+                current_qpos=current_qpos,
+                image_names=image_names,
+                target_size=target_size,
+            )
+        ]
+    )[0]
 
-    if len(images[0].shape) == 3 and images[0].shape[2] == 3:
-        try:
-            if device is None:
-                raise ValueError(
-                    "Device is not set. Please ensure the policy is loaded correctly."
-                )
-            with torch.no_grad(), torch.autocast(device_type=device.type):
-                # Prepare state tensor
-                current_qpos = current_qpos.copy()
-                state_tensor = (
-                    torch.from_numpy(current_qpos)
-                    .view(1, len(current_qpos))
-                    .float()
-                    .to(device)
-                )
 
-                # Create batch dictionary
-                batch = {
-                    "observation.state": state_tensor,
-                }
-
-                # Convert images to tensors (B, C, H, W), normalize
-                processed_images = []
-                for i, image in enumerate(images):
-                    if image.shape[:2] != target_size:
-                        image = cv2.resize(image, target_size)
-                    tensor_image = (
-                        torch.from_numpy(image)
-                        .permute(2, 0, 1)
-                        .unsqueeze(0)
-                        .float()
-                        .to(device)
-                    )
-                    tensor_image = tensor_image / 255.0
-                    processed_images.append(tensor_image)
-                    batch[image_names[i]] = tensor_image
-
-                # Get the actions
-                batch = policy.normalize_inputs(batch)  # type: ignore
-                if policy.config.image_features:  # type: ignore
-                    batch = dict(batch)
-                    batch["observation.images"] = [
-                        batch[key]
-                        for key in policy.config.image_features  # type: ignore
-                    ]
-                actions = policy.model(batch)[0][:, : policy.config.n_action_steps]  # type: ignore
-                actions = policy.unnormalize_outputs({"action": actions})["action"]  # type: ignore
-                actions = actions.transpose(0, 1)
-                return actions.cpu().numpy()
-
-        except Exception as e:
-            logger.error(f"Error during inference: {str(e)}")
-            raise
-    else:
-        raise ValueError("Invalid image format. Expected RGB image.")
+batcher = MicroBatcher(process_batch)
 
 
 @app.post("/act")
@@ -244,16 +468,24 @@ async def inference(request: InferenceRequest) -> str | None:
             shape = input_features[image_names[0]]["shape"]
             target_size = (shape[2], shape[1])
 
-        # Infer actions
-        actions = process_image(
-            current_qpos=payload["observation.state"],
-            images=[
-                payload[f"observation.images.{i}"]
-                for i in range(len(payload.keys()))
-                if f"observation.images.{i}" in payload
-            ],
-            image_names=image_names,
-            target_size=target_size,
+        images = [
+            payload[f"observation.images.{i}"]
+            for i in range(len(payload.keys()))
+            if f"observation.images.{i}" in payload
+        ]
+        if len(images) != len(image_names):
+            raise ValueError(
+                f"Expected {len(image_names)} images, got {len(images)}"
+            )
+
+        # Infer actions, batched with the concurrent requests
+        actions = await batcher.submit(
+            InferenceItem(
+                images=images,
+                current_qpos=np.asarray(payload["observation.state"]),
+                image_names=image_names,
+                target_size=target_size,
+            )
         )
 
         # Encode response using json_numpy
@@ -272,6 +504,8 @@ async def health_check():
         "policy_loaded": policy is not None,
         "device": str(device) if device is not None else None,
         "input_features": input_features if input_features != {} else "not_loaded",
+        "batching": batcher.stats(),
+        "timings": preprocessor.stats(),
     }
 
 
@@ -292,8 +526,22 @@ def main():
     parser.add_argument(
         "--port", type=int, default=8080, help="Port to run the server on"
     )
+    parser.add_argument(
+        "--max_batch_size",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent requests run in one forward pass. Default: 8",
+    )
+    parser.add_argument(
+        "--max_wait_ms",
+        type=float,
+        default=5.0,
+        help="Maximum time to wait for concurrent requests before running a batch. Default: 5",
+    )
 
     args = parser.parse_args()
+    batcher.max_batch_size = max(args.max_batch_size, 1)
+    batcher.max_wait_s = args.max_wait_ms / 1000
     # Load the policy
     load_policy(args.model_id, revision=args.revision)
 
@@ -1,16 +1,18 @@
 import json
 import os
 import shutil
+from collections import OrderedDict
 from copy import deepcopy
 from math import ceil
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import av
 import cv2
 import einops
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import torch
 import torchvision
 import tqdm
@@ -18,7 +20,7 @@ import modal
 from loguru import logger
 from phosphobot.models import InfoModel
 from torch.utils.data import Dataset as TorchDataset
-import multiprocessing
+from torch.utils.data import Sampler
 
 
 from phosphobot.models.lerobot_dataset import FeatureDetails
@@ -45,15 +47,192 @@ class InvalidInputError(Exception):
     pass
 
 
+# LRUCache, SequentialVideoDecoder and EpisodeBatchSampler are also defined in
+# scripts/datasets/lerobot_stats_compute.py, which runs in its own uv project,
+# without phosphobot. Keep the two copies in sync.
+
+
+class LRUCache:
+    """Mapping with a maximum number of entries. The least recently used entry is evicted first."""
+
+    def __init__(self, maxsize: int, on_evict: Optional[Callable[[Any], None]] = None):
+        self.maxsize = max(maxsize, 1)
+        self.on_evict = on_evict
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def get(self, key: Any) -> Any:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            _, evicted = self._data.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+
+
+class SequentialVideoDecoder:
+    """
+    Decode the video of an episode in order, keeping the container open between calls.
+
+    The frame of a row is the frame closest to the row timestamp. Decoded frames are kept
+    as uint8 in a bounded LRU cache. Reading the rows in order decodes every frame once,
+    instead of reopening the video and seeking to a keyframe for every row. Going back
+    past the cache reopens the video from the start.
+    """
+
+    def __init__(
+        self,
+        video_path: Path | str,
+        timestamps: List[float],
+        max_cached_frames: int = 256,
+        tolerance_s: float = 1,
+        backend: str = "pyav",
+    ):
+        self.video_path = str(video_path)
+        self.timestamps = timestamps
+        self.tolerance_s = tolerance_s
+        self.backend = backend
+        self.frames = LRUCache(max_cached_frames)
+        self._reader: Any = None
+        self._frames_iterator: Optional[Iterator[dict]] = None
+        # Index of the next row to decode
+        self._next_row = 0
+        # Last two frames read from the video, as (pts, data)
+        self._previous: Optional[tuple] = None
+        self._current: Optional[tuple] = None
+
+    def _open(self) -> None:
+        self.close()
+        torchvision.set_video_backend(self.backend)
+        self._reader = torchvision.io.VideoReader(self.video_path, "video")
+        self._frames_iterator = iter(self._reader)
+        self._next_row = 0
+        self._previous = None
+        self._current = None
+
+    def close(self) -> None:
+        if self._reader is not None and self.backend == "pyav":
+            self._reader.container.close()
+        self._reader = None
+        self._frames_iterator = None
+
+    def _decode_next_row(self) -> torch.Tensor:
+        assert self._frames_iterator is not None
+        timestamp = self.timestamps[self._next_row]
+        # Read frames until we reach the timestamp of the row
+        while self._current is None or self._current[0] < timestamp:
+            try:
+                frame = next(self._frames_iterator)
+            except StopIteration:
+                break
+            self._previous = self._current
+            self._current = (frame["pts"], frame["data"])
+
+        if self._current is None:
+            raise ValueError(f"No frame could be decoded from {self.video_path}")
+        closest = self._current
+        if self._previous is not None and abs(self._previous[0] - timestamp) < abs(
+            self._current[0] - timestamp
+        ):
+            closest = self._previous
+        if abs(closest[0] - timestamp) >= self.tolerance_s:
+            logger.warning(
+                f"Query timestamp {timestamp} is {abs(closest[0] - timestamp):.4f}s away from the closest frame "
+                f"({self.tolerance_s=}). This might be due to synchronization issues during data collection."
+                f"\nvideo: {self.video_path}"
+            )
+        return closest[1]
+
+    def get_frame(self, row_idx: int) -> torch.Tensor:
+        """Frame of the row as a uint8 tensor in channel-first format"""
+        frame = self.frames.get(row_idx)
+        if frame is not None:
+            return frame
+
+        if self._frames_iterator is None or row_idx < self._next_row:
+            self._open()
+        while self._next_row <= row_idx:
+            self.frames.put(self._next_row, self._decode_next_row())
+            self._next_row += 1
+        return self.frames.get(row_idx)
+
+
+def close_decoders(decoders: Dict[str, SequentialVideoDecoder]) -> None:
+    for decoder in decoders.values():
+        decoder.close()
+
+
+class EpisodeBatchSampler(Sampler):
+    """
+    Yield batches of indexes such that all the steps of an episode are loaded by the same
+    DataLoader worker, in order.
+
+    The DataLoader hands the batch i to the worker i % num_workers. The episodes are split in
+    num_workers groups of similar number of steps, and the batches of the groups are interleaved.
+    """
+
+    def __init__(self, episode_nb_steps: List[int], batch_size: int, num_workers: int = 0):
+        nb_groups = max(num_workers, 1)
+        groups: List[List[int]] = [[] for _ in range(nb_groups)]
+        group_nb_steps = [0] * nb_groups
+        episode_start = 0
+        for nb_steps in episode_nb_steps:
+            group = int(np.argmin(group_nb_steps))
+            groups[group].extend(range(episode_start, episode_start + nb_steps))
+            group_nb_steps[group] += nb_steps
+            episode_start += nb_steps
+
+        group_batches = [
+            [indexes[i : i + batch_size] for i in range(0, len(indexes), batch_size)]
+            for indexes in groups
+        ]
+        self.batches: List[List[int]] = []
+        for i in range(max(len(batches) for batches in group_batches)):
+            for batches in group_batches:
+                if i < len(batches):
+                    self.batches.append(batches[i])
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self.batches)
+
+
 class ParquetEpisodesDataset(TorchDataset):
-    """Custom Dataset for loading parquet files from a directory with video frame caching."""
+    """
+    Custom Dataset for loading parquet files from a directory.
 
-    def __init__(self, dataset_path: Path):
+    Use it with EpisodeBatchSampler: the videos of each episode are then decoded once, sequentially.
+    The memory used by each worker is bounded by the parquet and video decoders LRU caches.
+    """
+
+    def __init__(
+        self,
+        dataset_path: Path,
+        max_cached_parquets: int = 16,
+        max_cached_episodes: int = 2,
+        max_cached_frames: int = 256,
+    ):
         """
-        Initialize the dataset by loading parquet files and pre-decoding video frames.
+        Initialize the dataset by indexing the parquet files and the videos of each episode.
 
         Args:
             dataset_path (Path): Path to the folder containing data, videos, and meta subfolders.
+            max_cached_parquets (int): Number of parquet files kept in memory by each worker.
+            max_cached_episodes (int): Number of episodes whose videos are kept open by each worker.
+            max_cached_frames (int): Number of decoded frames kept in memory for each video.
         """
         logger.info(f"Loading Torch dataset from {dataset_path}")
         self.dataset_dir = dataset_path
@@ -67,7 +246,10 @@ class ParquetEpisodesDataset(TorchDataset):
 
         self.file_paths = sorted(self.data_dir.rglob("*.parquet"))
         self.video_paths = sorted(self.videos_dir.rglob("*.mp4"))
-        self.parquet_cache: dict[str, pd.DataFrame] = {}
+        self.max_cached_frames = max_cached_frames
+        self.parquet_cache = LRUCache(max_cached_parquets)
+        # episode_idx -> {video_key: SequentialVideoDecoder}
+        self.video_decoders = LRUCache(max_cached_episodes, on_evict=close_decoders)
 
         if not self.file_paths:
             raise ValueError(f"No parquet files found in {dataset_path}")
@@ -91,8 +273,8 @@ class ParquetEpisodesDataset(TorchDataset):
         global_idx = 0
         for file_path in self.file_paths:
             episode_idx = int(file_path.stem.split("_")[-1])
-            df = self.read_parquet(str(file_path))
-            nb_steps = len(df)
+            # Only read the footer of the parquet file to get the number of rows
+            nb_steps = pq.ParquetFile(file_path).metadata.num_rows
             self.episode_nb_steps.append(nb_steps)
             self.steps_per_episode[episode_idx] = nb_steps
 
@@ -121,60 +303,38 @@ class ParquetEpisodesDataset(TorchDataset):
         videos_folders = os.path.join(self.videos_dir, "chunk-000")
         self.video_keys = os.listdir(videos_folders)  # e.g., ["camera1", "camera2"]
 
-        # New: Episode info mapping
-        self.episode_info: dict = {}
-        for global_idx, info in self.index_mapping.items():
-            ep_idx = info["episode_idx"]
-            if ep_idx not in self.episode_info:
-                self.episode_info[ep_idx] = {
-                    "file_path": info["file_path"],
-                    "videos_paths": info["videos_paths"],
-                    "timestamps": None,
-                }
-
-        # Per-worker caching state
-        self.current_episode_idx = None
-        self.current_episode_frames = None
-        self.worker_cache: dict = {}
-
-    def _load_episode_frames(self, episode_idx: int) -> Dict[str, torch.Tensor]:
-        """Load and cache frames for a single episode"""
-        # Check worker-specific cache first
-        worker_id = multiprocessing.current_process().pid
-        if worker_id in self.worker_cache:
-            if self.worker_cache[worker_id]["episode_idx"] == episode_idx:
-                return self.worker_cache[worker_id]["frames"]
-
-        # Load timestamps if not cached
-        if self.episode_info[episode_idx]["timestamps"] is None:
-            df = self.read_parquet(str(self.episode_info[episode_idx]["file_path"]))
-            self.episode_info[episode_idx]["timestamps"] = df["timestamp"].tolist()
-
-        # Decode frames
-        decoded_frames = {}
-        for video_key, video_path in self.episode_info[episode_idx][
-            "videos_paths"
-        ].items():
-            frames = decode_video_frames_torchvision(
-                video_path, self.episode_info[episode_idx]["timestamps"]
-            )
-            decoded_frames[video_key] = (frames * 255).to(torch.uint8)  # Store as uint8
-
-        # Update worker cache (only keep current episode)
-        self.worker_cache[worker_id] = {
-            "episode_idx": episode_idx,
-            "frames": decoded_frames,
-        }
-        return decoded_frames
+    def get_video_decoders(
+        self, episode_idx: int, file_path: str, videos_paths: Dict[str, Path]
+    ) -> Dict[str, SequentialVideoDecoder]:
+        decoders = self.video_decoders.get(episode_idx)
+        if decoders is None:
+            timestamps = self.read_parquet(file_path)["timestamp"].tolist()
+            decoders = {
+                key: SequentialVideoDecoder(
+                    video_path, timestamps, max_cached_frames=self.max_cached_frames
+                )
+                for key, video_path in videos_paths.items()
+            }
+            self.video_decoders.put(episode_idx, decoders)
+        return decoders
+
+    def get_batch_sampler(
+        self, batch_size: int, num_workers: int = 0
+    ) -> EpisodeBatchSampler:
+        return EpisodeBatchSampler(
+            self.episode_nb_steps, batch_size=batch_size, num_workers=num_workers
+        )
 
     def __len__(self) -> int:
         return self.total_length
 
     def read_parquet(self, file_path: str) -> pd.DataFrame:
-        # Cache the parquet files to avoid reading them multiple times
-        if file_path not in self.parquet_cache:
-            self.parquet_cache[file_path] = pd.read_parquet(file_path, engine="pyarrow")
-        return self.parquet_cache[file_path]
+        # Cache the recently used parquet files to avoid reading them for every row
+        df = self.parquet_cache.get(file_path)
+        if df is None:
+            df = pd.read_parquet(file_path, engine="pyarrow")
+            self.parquet_cache.put(file_path, df)
+        return df
 
     def __getitem__(self, idx: int) -> dict[str, torch.Tensor]:
         if idx >= self.total_length:
@@ -182,10 +342,10 @@ class ParquetEpisodesDataset(TorchDataset):
 
         episode_idx = self.index_mapping[idx]["episode_idx"]
         row_idx = self.index_mapping[idx]["row_idx"]
-        file_path = self.index_mapping[idx]["file_path"]
+        file_path = str(self.index_mapping[idx]["file_path"])
 
         # Read specific row from parquet
-        df = self.read_parquet(str(file_path))
+        df = self.read_parquet(file_path)
         row_data = df.iloc[row_idx]
 
         # Prepare sample dictionary
@@ -200,12 +360,14 @@ class ParquetEpisodesDataset(TorchDataset):
             else:
                 sample[col_name] = torch.tensor([value], dtype=torch.float32)
 
-        # Load frames for this episode
-        frames = self._load_episode_frames(episode_idx)
-
-        # Retrieve cached frames
+        # Frames are decoded sequentially for the whole episode
+        decoders = self.get_video_decoders(
+            episode_idx=episode_idx,
+            file_path=file_path,
+            videos_paths=self.index_mapping[idx]["videos_paths"],
+        )
         for video_key in self.video_keys:
-            frame = frames[video_key][row_idx]
+            frame = decoders[video_key].get_frame(row_idx)
             # Convert uint8 to float32 and normalize
             sample[video_key] = frame.float() / 255.0
 
@@ -342,15 +504,16 @@ def compute_stats(
     if max_num_samples is None:
         max_num_samples = len(dataset)
 
+    # Each worker decodes the videos of its own episodes, sequentially
+    batch_sampler = dataset.get_batch_sampler(
+        batch_size=batch_size, num_workers=num_workers
+    )
+
     # Example DataLoader that returns dictionaries of tensors
-    generator = torch.Generator()
-    generator.manual_seed(1337)
     dataloader = torch.utils.data.DataLoader(
         dataset,
         num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
+        batch_sampler=batch_sampler,
     )
     stats_patterns = get_stats_einops_patterns(dataset, dataloader)
 
@@ -372,7 +535,7 @@ def compute_stats(
     error_raised = False
     for i, batch in tqdm.tqdm(
         enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
+        total=min(len(dataloader), ceil(max_num_samples / batch_size)),
         desc="Compute mean, min, max",
     ):
         this_batch_size = len(batch["index"])
@@ -405,22 +568,20 @@ def compute_stats(
                 min[key], einops.reduce(batch[key], pattern, "min")
             )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
+        if running_item_count >= max_num_samples:
             break
 
     dataloader = torch.utils.data.DataLoader(
         dataset,
         num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
+        batch_sampler=batch_sampler,
     )
     first_batch_ = None
     running_item_count = 0  # for online std computation
     error_raised = False
     for i, batch in tqdm.tqdm(
         enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
+        total=min(len(dataloader), ceil(max_num_samples / batch_size)),
         desc="Compute std",
     ):
         this_batch_size = len(batch["index"])
@@ -447,7 +608,7 @@ def compute_stats(
                 std[key] + this_batch_size * (batch_std - std[key]) / running_item_count
             )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
+        if running_item_count >= max_num_samples:
             break
 
     for key in stats_patterns:
@@ -9,24 +9,35 @@ from pydantic import BaseModel
 from phosphobot.models import ChatRequest, ChatResponse
 
 
+RobotMove = Literal[
+    "move_left",
+    "move_right",
+    "move_forward",
+    "move_backward",
+    "move_up",
+    "move_down",
+    "move_gripper_up",
+    "move_gripper_down",
+    "close_gripper",
+    "open_gripper",
+    # "nothing",
+]
+
+
 class GeminiAgentResponse(BaseModel):
     # Alternative solution: https://ai.google.dev/gemini-api/docs/function-calling?example=meetings
     # A tool call could be more powerful to let the agent pick the amplitude of movement
     # and maybe more directions at once.
 
-    next_robot_move: Literal[
-        "move_left",
-        "move_right",
-        "move_forward",
-        "move_backward",
-        "move_up",
-        "move_down",
-        "move_gripper_up",
-        "move_gripper_down",
-        "close_gripper",
-        "open_gripper",
-        # "nothing",
-    ]
+    next_robot_move: RobotMove
+
+
+class GeminiAgentPlanResponse(BaseModel):
+    """
+    Several commands in a row, used when the client asks for max_steps > 1.
+    """
+
+    next_robot_moves: List[RobotMove]
 
 
 class GeminiAgent:
@@ -43,7 +54,9 @@ class GeminiAgent:
         self.thinking_budget = thinking_budget
         self.model_id = model_id
 
-    def get_prompt(self, command_history: Optional[List[str]]) -> str:
+    def get_prompt(
+        self, command_history: Optional[List[str]], max_steps: int = 1
+    ) -> str:
         prompt = f"""You control a green robot arm from an ego-centric 3D point of view. You must guide the robot arm using \
 step by step commands to complete the task: "{self.task_description}"
 You control the robot arm in 3D space by moving the end effector. The end effector of the robot arm has a gripper that you can open and close. \
@@ -56,10 +69,14 @@ Use the image to localize the end effector, understand the task, and give the co
             prompt += (
                 "\n Your previous commands were: " + "\n".join(command_history) + "\n"
             )
+        if max_steps > 1:
+            prompt += f"""
+Give the commands for the next {max_steps} steps at most, in the order they must be executed. \
+Give fewer commands if you are not confident about the position of the end effector after them.
+"""
         return prompt
 
-    @property
-    def config(self) -> genai.types.GenerateContentConfig:
+    def get_config(self, max_steps: int = 1) -> genai.types.GenerateContentConfig:
         """
         Get the configuration for the model.
         """
@@ -68,7 +85,9 @@ Use the image to localize the end effector, understand the task, and give the co
                 thinking_budget=self.thinking_budget
             ),
             response_mime_type="application/json",
-            response_schema=GeminiAgentResponse,
+            response_schema=GeminiAgentPlanResponse
+            if max_steps > 1
+            else GeminiAgentResponse,
         )
 
     async def run(self, chat_request: ChatRequest) -> ChatResponse:
@@ -83,7 +102,10 @@ Use the image to localize the end effector, understand the task, and give the co
 
         # Build the content list with prompt and images
         contents: List[Union[genai.types.Part, str]] = [
-            self.get_prompt(command_history=chat_request.command_history)
+            self.get_prompt(
+                command_history=chat_request.command_history,
+                max_steps=chat_request.max_steps,
+            )
         ]
         # Images are base64 encoded strings
         contents.extend([genai.types.Part.from_text(text=image) for image in images])
@@ -98,7 +120,7 @@ Use the image to localize the end effector, understand the task, and give the co
                 response = await self.genai_client.aio.models.generate_content(
                     model=self.model_id,
                     contents=contents,  # type: ignore
-                    config=self.config,
+                    config=self.get_config(max_steps=chat_request.max_steps),
                 )
                 break  # Success, exit retry loop
             except ServerError as e:
@@ -162,12 +184,21 @@ Use the image to localize the end effector, understand the task, and give the co
         # )
         # self.chat_history.append({"role": "model", "parts": [response.text]})
         raw = response.text
-        command: Optional[GeminiAgentResponse] = response.parsed  # type: ignore
+        parsed = response.parsed
+        next_commands: List[str] = []
+        command: Optional[GeminiAgentResponse]
+        if isinstance(parsed, GeminiAgentPlanResponse):
+            moves = parsed.next_robot_moves[: chat_request.max_steps]
+            command = GeminiAgentResponse(next_robot_move=moves[0]) if moves else None
+            next_commands = list(moves[1:])
+        else:
+            command = parsed  # type: ignore
 
         return ChatResponse(
             endpoint="move_relative",
             endpoint_params=self._get_movement_parameters(command),
             command=command.next_robot_move if command else None,
+            next_commands=next_commands,
         )
 
     def _get_movement_parameters(
@@ -1,7 +1,7 @@
 import asyncio
 import time
 from collections import deque
-from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple
 
 if TYPE_CHECKING:
     # We only need BaseManipulator for type checking
@@ -17,8 +17,14 @@ from loguru import logger
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 from phosphobot.am.base import ActionModel
+from phosphobot.am.fanout import RobotFanout
 from phosphobot.camera import AllCameras
 from phosphobot.control_signal import AIControlSignal
+from phosphobot.metrics import (
+    ai_action_queue_depth,
+    ai_inference_errors_total,
+    ai_inference_seconds,
+)
 from phosphobot.models import ModelConfigurationResponse
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
@@ -391,29 +397,16 @@ class ACT(ActionModel):
     def fetch_frame(
         cls, all_cameras: AllCameras, camera_id: int, resolution: list[int]
     ) -> np.ndarray:
-        import cv2
-
-        rgb_frame = all_cameras.get_rgb_frame(
-            camera_id=camera_id,
-            resize=(resolution[2], resolution[1]),
+        """
+        Get the BGR frame of one camera, resized to resolution (channels, height,
+        width). The frame is black if the camera is not available.
+        """
+        batch, available = all_cameras.get_frames_batch(
+            [camera_id], resize=(resolution[2], resolution[1]), channel_order="bgr"
         )
-        if rgb_frame is not None:
-            # Convert to BGR
-            image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-            # Ensure dtype is uint8 (if it isn’t already)
-            converted_array = image.astype(np.uint8)
-            return converted_array
-
-        else:
+        if not available[0]:
             logger.warning(f"Camera {camera_id} not available. Sending all black.")
-            return np.zeros(
-                (
-                    resolution[2],
-                    resolution[1],
-                    resolution[0],
-                ),
-                dtype=np.uint8,
-            )
+        return batch[0]
 
     @background_task_log_exceptions
     async def control_loop(
@@ -444,124 +437,144 @@ class ACT(ActionModel):
 
         signal_marked_as_started = False
         actions_queue: deque = deque([])
+        fanout = RobotFanout(robots, model="act")
+        # Batches of frames, reused between ticks
+        frame_buffers: Dict[Tuple[int, int], np.ndarray] = {}
 
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
-
-            start_time = time.perf_counter()
-
-            # Get the images from the cameras based on the config
-            # For now, just put as many cameras as the model config
-            image_inputs: Dict[str, np.ndarray] = {}
-            for i, camera_name in enumerate(config.input_features.video_keys):
-                if cameras_keys_mapping is None:
-                    camera_id = i
-                else:
-                    camera_id = cameras_keys_mapping.get(camera_name, i)
-
-                video_resolution = config.input_features.features[camera_name].shape
-                frame_array = ACT.fetch_frame(
-                    all_cameras=all_cameras,
-                    camera_id=camera_id,
-                    resolution=video_resolution,
+        try:
+            while control_signal.is_in_loop():
+                logger.debug(
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
                 )
-                image_inputs[camera_name] = frame_array
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
 
-            # Number of cameras
-            if len(image_inputs) != len(config.input_features.video_keys):
-                logger.warning(
-                    f"Model has {len(config.input_features.video_keys)} cameras but {len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {config.input_features.video_keys} cameras but {len(image_inputs)} cameras are plugged."
-                )
+                start_time = time.perf_counter()
 
-            # Number of robots
-            number_of_robots = len(robots)
-            number_of_robots_in_config = config.input_features.number_of_arms
-            if number_of_robots != number_of_robots_in_config:
-                logger.warning("No robot connected. Exiting AI control loop.")
-                control_signal.stop()
-                raise Exception("No robot connected. Exiting AI control loop.")
-
-            # Concatenate all robot states
-            state = robots[0].read_joints_position(unit="rad")
-            for robot in robots[1:]:
-                state = np.concatenate(
-                    (state, robot.read_joints_position(unit="rad")), axis=0
+                # Get the images from the cameras based on the config
+                # For now, just put as many cameras as the model config
+                cameras: Dict[str, Tuple[int, Tuple[int, int]]] = {}
+                for i, camera_name in enumerate(config.input_features.video_keys):
+                    if cameras_keys_mapping is None:
+                        camera_id = i
+                    else:
+                        camera_id = cameras_keys_mapping.get(camera_name, i)
+
+                    video_resolution = config.input_features.features[camera_name].shape
+                    cameras[camera_name] = (
+                        camera_id,
+                        (video_resolution[2], video_resolution[1]),
+                    )
+                if (
+                    config.input_features.env_key is not None
+                    and selected_camera_id is not None
+                ):
+                    cameras["image_for_bboxes"] = (selected_camera_id, (224, 224))
+
+                # All the frames in one call, converted once to BGR
+                image_inputs = all_cameras.get_frames_by_key(
+                    cameras, channel_order="bgr", buffers=frame_buffers
                 )
+                image_for_bboxes = image_inputs.pop("image_for_bboxes", None)
 
-            inputs: dict[str, np.ndarray | str] = {
-                config.input_features.state_key: state,
-                **image_inputs,
-            }
-
-            if config.input_features.env_key is not None:
-                if prompt is None or selected_camera_id is None:
-                    raise ValueError(
-                        f"detect_instruction and camera_id_to_use must be provided when env_key is set, got {prompt} and {selected_camera_id}"
+                # Number of cameras
+                if len(image_inputs) != len(config.input_features.video_keys):
+                    logger.warning(
+                        f"Model has {len(config.input_features.video_keys)} cameras but {len(image_inputs)} cameras are plugged."
+                    )
+                    control_signal.stop()
+                    raise Exception(
+                        f"Model has {config.input_features.video_keys} cameras but {len(image_inputs)} cameras are plugged."
                     )
-                inputs["detect_instruction"] = prompt
 
-                frame_array = ACT.fetch_frame(
-                    all_cameras=all_cameras,
-                    camera_id=selected_camera_id,
-                    resolution=[3, 224, 224],
-                )
-                inputs["image_for_bboxes"] = frame_array
-
-            try:
-                if len(actions_queue) == 0:
-                    actions = await self.async_sample_actions(inputs)
-                    actions_queue.extend(actions)
-                actions = actions_queue.popleft()
-            except RetryError:
-                logger.warning("Could not detect the target object. Retrying...")
-                continue
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model: {e}. Exiting AI control loop."
-                )
-                control_signal.stop()
-                break
+                # Number of robots
+                number_of_robots = len(robots)
+                number_of_robots_in_config = config.input_features.number_of_arms
+                if number_of_robots != number_of_robots_in_config:
+                    logger.warning("No robot connected. Exiting AI control loop.")
+                    control_signal.stop()
+                    raise Exception("No robot connected. Exiting AI control loop.")
 
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
+                # Concatenate all robot states, read in parallel
+                state = np.concatenate(
+                    await fanout.read_joints_position(unit="rad"), axis=0
+                )
 
-            for action in actions:
-                # Early stop
-                if not control_signal.is_in_loop():
+                inputs: dict[str, np.ndarray | str] = {
+                    config.input_features.state_key: state,
+                    **image_inputs,
+                }
+
+                if config.input_features.env_key is not None:
+                    if prompt is None or selected_camera_id is None:
+                        raise ValueError(
+                            f"detect_instruction and camera_id_to_use must be provided when env_key is set, got {prompt} and {selected_camera_id}"
+                        )
+                    inputs["detect_instruction"] = prompt
+                    if image_for_bboxes is not None:
+                        inputs["image_for_bboxes"] = image_for_bboxes
+
+                try:
+                    if len(actions_queue) == 0:
+                        with ai_inference_seconds.labels(model="act").time():
+                            actions = await self.async_sample_actions(inputs)
+                        actions_queue.extend(actions)
+                    actions = actions_queue.popleft()
+                    ai_action_queue_depth.labels(model="act").set(len(actions_queue))
+                except RetryError:
+                    logger.warning("Could not detect the target object. Retrying...")
+                    continue
+                except Exception as e:
+                    ai_inference_errors_total.labels(model="act").inc()
+                    logger.warning(
+                        f"Failed to get actions from model: {e}. Exiting AI control loop."
+                    )
+                    control_signal.stop()
                     break
 
-                # Send the new joint position to the robot
-                action_list = action.tolist()
-
-                unit: Literal["rad", "motor_units", "degrees", "other"]
-                if angle_format == "radians":
-                    unit = "rad"
-                else:
-                    unit = angle_format
-
-                for robot_index in range(len(robots)):
-                    robots[robot_index].write_joint_positions(
-                        angles=action_list[robot_index * 6 : robot_index * 6 + 6],
-                        unit=unit,
-                        min_value=min_angle,
-                        max_value=max_angle,
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                for action in actions:
+                    # Early stop
+                    if not control_signal.is_in_loop():
+                        break
+
+                    # Send the new joint position to the robot
+                    action_list = action.tolist()
+
+                    unit: Literal["rad", "motor_units", "degrees", "other"]
+                    if angle_format == "radians":
+                        unit = "rad"
+                    else:
+                        unit = angle_format
+
+                    # All the arms receive their command at the same time
+                    await fanout.write_joint_positions(
+                        [
+                            {
+                                "angles": action_list[
+                                    robot_index * 6 : robot_index * 6 + 6
+                                ],
+                                "unit": unit,
+                                "min_value": min_angle,
+                                "max_value": max_angle,
+                            }
+                            for robot_index in range(len(robots))
+                        ]
                     )
 
-                # Wait fps time
-                elapsed_time = time.perf_counter() - start_time
-                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-                await asyncio.sleep(sleep_time)
-                start_time = time.perf_counter()
-
-            nb_iter += 1
+                    # Wait fps time
+                    elapsed_time = time.perf_counter() - start_time
+                    sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                    await asyncio.sleep(sleep_time)
+                    start_time = time.perf_counter()
+
+                nb_iter += 1
+                if nb_iter % 100 == 0:
+                    fanout.log_latencies()
+        finally:
+            fanout.close()
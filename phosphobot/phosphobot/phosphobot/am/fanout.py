@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from phosphobot.hardware.base import BaseManipulator
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.metrics import ai_robot_bus_seconds
+
+
+class RobotFanout:
+    """
+    Reads and writes the robots of an AI control loop concurrently, with one worker
+    thread per robot. The bus transactions of the robots overlap instead of adding up,
+    and the writes of a tick are released at the same deadline so that the arms stay
+    in sync.
+
+    Call close() when the control loop ends. The worker threads also exit when the
+    fanout is garbage collected, eg: when the loop exits on an exception.
+    """
+
+    def __init__(
+        self,
+        robots: List["BaseManipulator"],
+        model: str,
+        write_lead_s: float = 0.002,
+    ) -> None:
+        """
+        :param model: Name of the model, used as a label of the latency metric.
+        :param write_lead_s: Delay before the writes are released, so that every worker
+            is waiting at the deadline.
+        """
+        self.robots = robots
+        self.model = model
+        self.write_lead_s = write_lead_s
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(robots)), thread_name_prefix="robot-fanout"
+        )
+        # Last bus latency of each robot, by operation
+        self.latencies: Dict[str, List[float]] = {
+            "read": [0.0] * len(robots),
+            "write": [0.0] * len(robots),
+        }
+        self._latencies_lock = threading.Lock()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _timed(
+        self, operation: str, robot_index: int, function: Callable[[], Any]
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            duration = time.perf_counter() - start
+            with self._latencies_lock:
+                self.latencies[operation][robot_index] = duration
+            ai_robot_bus_seconds.labels(
+                model=self.model, robot=str(robot_index), operation=operation
+            ).observe(duration)
+
+    async def read_joints_position(self, **kwargs: Any) -> List[np.ndarray]:
+        """
+        Call read_joints_position(**kwargs) on all the robots in parallel.
+        Returns the positions in the order of the robots.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self._executor,
+                    self._timed,
+                    "read",
+                    robot_index,
+                    lambda robot=robot: robot.read_joints_position(**kwargs),
+                )
+                for robot_index, robot in enumerate(self.robots)
+            ]
+        )
+
+    async def write_joint_positions(
+        self,
+        commands: List[Optional[Dict[str, Any]]],
+        deadline: Optional[float] = None,
+    ) -> None:
+        """
+        Call write_joint_positions(**commands[i]) on each robot i. The writes start at
+        the same deadline (time.perf_counter() clock). Robots with a None command are
+        not written.
+        """
+        write_deadline = (
+            time.perf_counter() + self.write_lead_s if deadline is None else deadline
+        )
+
+        def write_at_deadline(
+            robot_index: int, robot: "BaseManipulator", command: Dict[str, Any]
+        ) -> None:
+            delay = write_deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._timed(
+                "write", robot_index, lambda: robot.write_joint_positions(**command)
+            )
+
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self._executor, write_at_deadline, robot_index, robot, command
+                )
+                for robot_index, (robot, command) in enumerate(
+                    zip(self.robots, commands)
+                )
+                if command is not None
+            ],
+            return_exceptions=True,
+        )
+        # Raise after all the writes are done, so that one failing arm doesn't leave
+        # the others with an inconsistent command
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def log_latencies(self) -> None:
+        with self._latencies_lock:
+            latencies = {
+                operation: [f"{1000 * value:.1f}ms" for value in values]
+                for operation, values in self.latencies.items()
+            }
+        logger.debug(f"{self.model} robots bus latency: {latencies}")
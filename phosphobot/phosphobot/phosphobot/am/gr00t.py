@@ -17,7 +17,6 @@ from typing import (
     Literal,
     Optional,
     Tuple,
-    Union,
 )
 
 if TYPE_CHECKING:
@@ -26,7 +25,6 @@ if TYPE_CHECKING:
     from phosphobot.hardware.base import BaseManipulator
 
 import numpy as np
-import pandas as pd
 import zmq
 from fastapi import HTTPException
 from huggingface_hub import HfApi, snapshot_download
@@ -42,9 +40,12 @@ from phosphobot.am.base import (
     generate_readme,
     resize_dataset,
 )
+from phosphobot.am.fanout import RobotFanout
 from phosphobot.camera import AllCameras
 from phosphobot.control_signal import AIControlSignal
+from phosphobot.metrics import ai_inference_errors_total, ai_inference_seconds
 from phosphobot.models import ModelConfigurationResponse
+from phosphobot.parquet_validation import validate_parquet_folder
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
 # Code from: https://github.com/NVIDIA/Isaac-GR00T/blob/main/gr00t/eval/service.py#L111
@@ -736,210 +737,214 @@ class Gr00tN1(ActionModel):
         The loop runs at the specified fps and speed.
         """
 
-        import cv2
-
         nb_iter = 0
         config = model_spawn_config.hf_model_config
         signal_marked_as_started = False
+        fanout = RobotFanout(robots, model="gr00t")
+        # Batches of frames, reused between ticks
+        frame_buffers: Dict[Tuple[int, int], np.ndarray] = {}
 
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
+        try:
+            while control_signal.is_in_loop():
+                logger.debug(
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}"
+                )
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
 
-            start_time = time.perf_counter()
+                start_time = time.perf_counter()
 
-            # Get the images from the cameras based on the config
-            # For now, just put as many cameras as the model config
-            image_inputs: Dict[str, np.ndarray] = {}
-            for i, (camera_name, video) in enumerate(
-                config.embodiment.modalities.video.items()
-            ):
-                if cameras_keys_mapping is None:
-                    camera_id = i
-                else:
-                    camera_id = cameras_keys_mapping.get(
-                        f"video.{camera_name}", cameras_keys_mapping.get(camera_name, i)
+                # Get the images from the cameras based on the config
+                # For now, just put as many cameras as the model config
+                cameras: Dict[str, Tuple[int, Tuple[int, int]]] = {}
+                for i, (camera_name, video) in enumerate(
+                    config.embodiment.modalities.video.items()
+                ):
+                    if cameras_keys_mapping is None:
+                        camera_id = i
+                    else:
+                        camera_id = cameras_keys_mapping.get(
+                            f"video.{camera_name}",
+                            cameras_keys_mapping.get(camera_name, i),
+                        )
+                    cameras[f"video.{camera_name}"] = (
+                        camera_id,
+                        (video.resolution[0], video.resolution[1]),
                     )
 
-                rgb_frame = all_cameras.get_rgb_frame(
-                    camera_id=camera_id, resize=video.resolution
+                # All the frames in one call, converted once to BGR
+                frames = all_cameras.get_frames_by_key(
+                    cameras, channel_order="bgr", buffers=frame_buffers
                 )
-                if rgb_frame is not None:
-                    # Convert to BGR
-                    image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-                    # Add a batch dimension (from (240, 320, 3) to (1, 240, 320, 3))
-                    converted_array = np.expand_dims(image, axis=0)
-                    # Ensure dtype is uint8 (if it isn't already)
-                    converted_array = converted_array.astype(np.uint8)
-                    image_inputs[f"video.{camera_name}"] = converted_array
+                # Add a batch dimension (from (240, 320, 3) to (1, 240, 320, 3))
+                image_inputs: Dict[str, np.ndarray] = {
+                    key: frame[np.newaxis] for key, frame in frames.items()
+                }
 
-                else:
+                # Number of cameras
+                if len(image_inputs) != len(config.embodiment.modalities.video.keys()):
                     logger.warning(
-                        f"Camera {camera_name} not available. Sending all black."
+                        f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
                     )
-                    image_inputs[f"video.{camera_name}"] = np.zeros(
-                        (1, video.resolution[1], video.resolution[0], video.channels),
-                        dtype=np.uint8,
+                    control_signal.stop()
+                    raise Exception(
+                        f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
                     )
 
-            # Number of cameras
-            if len(image_inputs) != len(config.embodiment.modalities.video.keys()):
-                logger.warning(
-                    f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {len(config.embodiment.modalities.video.keys())} cameras but {len(image_inputs)} cameras are plugged."
+                # Number of robots
+                number_of_robots = len(robots)
+                number_of_robots_in_config = (
+                    config.embodiment.statistics.state.number_of_arms
                 )
+                if number_of_robots != number_of_robots_in_config:
+                    logger.warning("No robot connected. Exiting AI control loop.")
+                    control_signal.stop()
+                    raise Exception("No robot connected. Exiting AI control loop.")
 
-            # Number of robots
-            number_of_robots = len(robots)
-            number_of_robots_in_config = (
-                config.embodiment.statistics.state.number_of_arms
-            )
-            if number_of_robots != number_of_robots_in_config:
-                logger.warning("No robot connected. Exiting AI control loop.")
-                control_signal.stop()
-                raise Exception("No robot connected. Exiting AI control loop.")
-
-            # Concatenate all robot states
-            state = robots[0].read_joints_position(
-                unit=unit, max_value=max_angle, min_value=min_angle
-            )
-            for robot in robots[1:]:
+                # Concatenate all robot states, read in parallel
                 state = np.concatenate(
-                    (
-                        state,
-                        robot.read_joints_position(
-                            unit=unit, max_value=max_angle, min_value=min_angle
-                        ),
+                    await fanout.read_joints_position(
+                        unit=unit, max_value=max_angle, min_value=min_angle
                     ),
                     axis=0,
                 )
 
-            inputs = {
-                **image_inputs,
-                "annotation.human.action.task_description": prompt,
-            }
-
-            state_index = 0
-            for (
-                component_name,
-                stats,
-            ) in config.embodiment.statistics.state.active_components.items():
-                num_elements = len(stats.max)
-                component_state = state[state_index : state_index + num_elements]
-                inputs[f"state.{component_name}"] = component_state.reshape(
-                    1, num_elements
-                )
-                state_index += num_elements
-            try:
-                actions = self(inputs)
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model: {e}. Exiting AI control loop."
-                )
-                control_signal.stop()
-                break
-
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
-
-            nb_actions_too_large = 0
-            for action in actions:
-                # Early stop
-                if not control_signal.is_in_loop():
-                    break
-                # Send the new joint position to the robot
-                action_list = action.tolist()
-                for robot_index in range(len(robots)):
-                    target_position = action_list[robot_index * 6 : robot_index * 6 + 6]
-
-                    # If the distance between the current and target position is too high, skip the action
-                    current_position = robots[robot_index].read_joints_position(
-                        unit=unit,
-                        max_value=max_angle,
-                        min_value=min_angle,
-                        source="sim",
+                inputs = {
+                    **image_inputs,
+                    "annotation.human.action.task_description": prompt,
+                }
+
+                state_index = 0
+                for (
+                    component_name,
+                    stats,
+                ) in config.embodiment.statistics.state.active_components.items():
+                    num_elements = len(stats.max)
+                    component_state = state[state_index : state_index + num_elements]
+                    inputs[f"state.{component_name}"] = component_state.reshape(
+                        1, num_elements
                     )
-                    max_transition_angles: np.ndarray
-                    if unit == "degrees":
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angles = np.array([90.0] * 5 + [180.0])
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + 180) % 360 - 180
-                        )
+                    state_index += num_elements
+                try:
+                    with ai_inference_seconds.labels(model="gr00t").time():
+                        actions = self(inputs)
+                except Exception as e:
+                    ai_inference_errors_total.labels(model="gr00t").inc()
+                    logger.warning(
+                        f"Failed to get actions from model: {e}. Exiting AI control loop."
+                    )
+                    control_signal.stop()
+                    break
 
-                    elif unit == "rad":
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angles = np.array([np.pi / 2] * 5 + [np.pi])
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + np.pi) % (2 * np.pi)
-                            - np.pi
-                        )
-                    elif (
-                        unit == "other"
-                        and max_angle is not None
-                        and min_angle is not None
-                    ):
-                        # The last joint is the gripper, which can open/close
-                        max_transition_angle = (max_angle - min_angle) / 2
-                        max_transition_angles = np.array(
-                            [max_transition_angle] * 5 + [max_angle - min_angle]
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                nb_actions_too_large = 0
+                for action in actions:
+                    # Early stop
+                    if not control_signal.is_in_loop():
+                        break
+                    # Send the new joint position to the robot
+                    action_list = action.tolist()
+                    commands: List[Optional[Dict[str, Any]]] = []
+                    for robot_index in range(len(robots)):
+                        target_position = action_list[
+                            robot_index * 6 : robot_index * 6 + 6
+                        ]
+
+                        # If the distance between the current and target position is too high, skip the action
+                        current_position = robots[robot_index].read_joints_position(
+                            unit=unit,
+                            max_value=max_angle,
+                            min_value=min_angle,
+                            source="sim",
                         )
-                        current_to_target_diff = np.abs(
-                            (target_position - current_position + max_angle)
-                            % (max_angle - min_angle)
-                            - max_transition_angle
-                        )
-                    else:
-                        raise ValueError(f"Unknown unit: {unit}")
-
-                    if np.any(current_to_target_diff > max_transition_angles):
-                        largest_diff = np.max(current_to_target_diff)
-                        largest_diff_index = np.argmax(current_to_target_diff)
-                        error_message = (
-                            f"Skipping action for robot {robot_index} because the to joint position {largest_diff_index} difference is too large: {largest_diff} > {max_transition_angles[largest_diff_index]} in units {unit}"
-                            + f"\nCurrent position: {current_position}"
-                            + f"\nTarget position: {target_position}\n"
-                            + "Possible reasons for this error:"
-                            + "\n1. Make sure you selected the *right angle unit* in the control page (angle, degrees, other)."
-                            + "\n2. Inspect your dataset joints positions to ensure they are within the expected range."
-                            + "\n3. There was an issue in the model output, please check the model training and data quality."
-                        )
-                        if nb_actions_too_large <= 20:
-                            logger.warning(error_message)
-                            nb_actions_too_large += 1
-                            continue
+                        max_transition_angles: np.ndarray
+                        if unit == "degrees":
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angles = np.array([90.0] * 5 + [180.0])
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + 180) % 360 - 180
+                            )
+
+                        elif unit == "rad":
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angles = np.array([np.pi / 2] * 5 + [np.pi])
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + np.pi)
+                                % (2 * np.pi)
+                                - np.pi
+                            )
+                        elif (
+                            unit == "other"
+                            and max_angle is not None
+                            and min_angle is not None
+                        ):
+                            # The last joint is the gripper, which can open/close
+                            max_transition_angle = (max_angle - min_angle) / 2
+                            max_transition_angles = np.array(
+                                [max_transition_angle] * 5 + [max_angle - min_angle]
+                            )
+                            current_to_target_diff = np.abs(
+                                (target_position - current_position + max_angle)
+                                % (max_angle - min_angle)
+                                - max_transition_angle
+                            )
                         else:
-                            control_signal.stop()
-                            raise Exception(error_message)
-                    else:
-                        logger.debug(
-                            f"Writing joint position to robot {robot_index}: {target_position}"
+                            raise ValueError(f"Unknown unit: {unit}")
+
+                        if np.any(current_to_target_diff > max_transition_angles):
+                            largest_diff = np.max(current_to_target_diff)
+                            largest_diff_index = np.argmax(current_to_target_diff)
+                            error_message = (
+                                f"Skipping action for robot {robot_index} because the to joint position {largest_diff_index} difference is too large: {largest_diff} > {max_transition_angles[largest_diff_index]} in units {unit}"
+                                + f"\nCurrent position: {current_position}"
+                                + f"\nTarget position: {target_position}\n"
+                                + "Possible reasons for this error:"
+                                + "\n1. Make sure you selected the *right angle unit* in the control page (angle, degrees, other)."
+                                + "\n2. Inspect your dataset joints positions to ensure they are within the expected range."
+                                + "\n3. There was an issue in the model output, please check the model training and data quality."
+                            )
+                            if nb_actions_too_large <= 20:
+                                logger.warning(error_message)
+                                nb_actions_too_large += 1
+                                commands.append(None)
+                                continue
+                            else:
+                                control_signal.stop()
+                                raise Exception(error_message)
+                        else:
+                            logger.debug(
+                                f"Writing joint position to robot {robot_index}: {target_position}"
+                            )
+
+                        commands.append(
+                            {
+                                "angles": target_position,
+                                "unit": unit,
+                                "max_value": max_angle,
+                                "min_value": min_angle,
+                            }
                         )
+                        nb_actions_too_large = 0
 
-                    robots[robot_index].write_joint_positions(
-                        angles=target_position,
-                        unit=unit,
-                        max_value=max_angle,
-                        min_value=min_angle,
-                    )
-                    nb_actions_too_large = 0
+                    # All the arms receive their command at the same time
+                    await fanout.write_joint_positions(commands)
 
-                # Wait fps time
-                elapsed_time = time.perf_counter() - start_time
-                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-                await asyncio.sleep(sleep_time)
-                start_time = time.perf_counter()
+                    # Wait fps time
+                    elapsed_time = time.perf_counter() - start_time
+                    sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                    await asyncio.sleep(sleep_time)
+                    start_time = time.perf_counter()
 
-            nb_iter += 1
+                nb_iter += 1
+                if nb_iter % 100 == 0:
+                    fanout.log_latencies()
+        finally:
+            fanout.close()
 
 
 class Gr00tTrainerConfig(BaseTrainerConfig):
@@ -948,93 +953,26 @@ class Gr00tTrainerConfig(BaseTrainerConfig):
     training_params: TrainingParamsGr00T
 
 
-def check_for_nans_null_in_value(value: Union[list, tuple, pd.DataFrame]) -> bool:
-    """
-    Check if a value contains NaN/null, including nested lists
-    """
-    if isinstance(value, (list, tuple)):
-        for item in value:
-            if check_for_nans_null_in_value(item):
-                return True
-    else:
-        if pd.isna(value).any():
-            return True
-        if pd.isnull(value).any():
-            return True
-
-    return False
-
-
 def check_parquet_files(folder_path: Path) -> None:
     """
     Check all parquet files in a folder for NaN/null values in the action/observation column
 
     Raise an error if any NaN/null values in the action/observation column.
+    The files are checked in parallel and all the issues are reported at once.
     """
-    folder_path = Path(folder_path)
-
-    if not folder_path.exists():
-        raise FileNotFoundError(f"Folder '{folder_path}' does not exist.")
-
-    # Find all parquet files
-    parquet_files = list(folder_path.glob("*.parquet"))
-
-    if not parquet_files:
-        raise FileNotFoundError(f"No parquet files found in '{folder_path}'")
-
-    print(f"Found {len(parquet_files)} parquet file(s) to check:")
-    print("-" * 50)
-
-    total_issues = 0
-
-    for file_path in parquet_files:
-        try:
-            # Read the parquet file
-            df = pd.read_parquet(file_path)
-
-            # Check if action column exists
-            if "action" not in df.columns:
-                raise ValueError(
-                    f"File '{file_path.name}' does not contain 'action' column."
-                )
-            if "observation.state" not in df.columns:
-                raise ValueError(
-                    f"File '{file_path.name}' does not contain 'observation.state' column."
-                )
-
-            # Check for issues in the action column
-            issues_found = 0
-            problematic_rows = []
-
-            for idx, value in enumerate(df["action"]):
-                if check_for_nans_null_in_value(value):
-                    issues_found += 1
-                    problematic_rows.append(idx)
-
-            for idx, value in enumerate(df["observation.state"]):
-                if check_for_nans_null_in_value(value):
-                    issues_found += 1
-                    problematic_rows.append(idx)
-
-            if issues_found > 0:
-                print(
-                    f"❌ {file_path.name}: Found {issues_found} rows with NaN/null in action column"
-                )
-                print(
-                    f"   Problematic rows: {problematic_rows[:10]}{'...' if len(problematic_rows) > 10 else ''}"
-                )
-                total_issues += issues_found
-            else:
-                print(f"✅ {file_path.name}: No NaN/null values found in action column")
-
-        except Exception as e:
-            print(f"❌ {file_path.name}: Error reading file - {str(e)}")
-
-    print("-" * 50)
-    print(f"Total issues found across all files: {total_issues}")
-    if total_issues > 0:
+    report = validate_parquet_folder(str(folder_path))
+
+    print(report.summary())
+    value_issues = report.value_issues
+    if len(value_issues) < len(report.issues):
+        logger.warning(
+            "The index columns of the dataset are inconsistent. "
+            "Repair the dataset to fix them."
+        )
+    if value_issues:
         raise ValueError(
-            f"Found {total_issues} NaN/null values in action/observation columns across all files. Please fix the data before re-training."
+            f"Found {len(value_issues)} issues in action/observation columns across all files. Please fix the data before re-training:\n"
+            + "\n".join(str(issue) for issue in value_issues)
         )
 
 
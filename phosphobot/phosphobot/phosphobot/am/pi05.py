@@ -11,7 +11,6 @@ if TYPE_CHECKING:
 
 import functools
 
-import cv2
 import msgpack
 import numpy as np
 import websockets.sync.client
@@ -24,8 +23,14 @@ from websockets.exceptions import InvalidMessage
 from phosphobot.am.base import (
     ActionModel,
 )
+from phosphobot.am.fanout import RobotFanout
 from phosphobot.camera import AllCameras
 from phosphobot.control_signal import AIControlSignal
+from phosphobot.metrics import (
+    ai_action_queue_depth,
+    ai_inference_errors_total,
+    ai_inference_seconds,
+)
 from phosphobot.models import ModelConfigurationResponse
 from phosphobot.utils import background_task_log_exceptions, get_hf_token
 
@@ -206,6 +211,7 @@ def fetch_camera_images(
     config: Pi05SpawnConfig,
     all_cameras: AllCameras,
     cameras_keys_mapping: Dict[str, int] | None = None,
+    buffers: Dict[Tuple[int, int], np.ndarray] | None = None,
 ) -> Dict[str, np.ndarray]:
     """
     Fetch images from cameras based on the model configuration.
@@ -214,26 +220,28 @@ def fetch_camera_images(
         config: The model configuration containing video keys and resolutions
         all_cameras: Camera manager instance
         cameras_keys_mapping: [Optional] mapping of camera names to camera IDs
+        buffers: [Optional] batches of frames reused between calls. The returned
+            images are overwritten by the next call with the same buffers.
 
     Returns:
         Dictionary mapping camera names to captured image arrays
     """
-    image_inputs: Dict[str, np.ndarray] = {}
+    cameras: Dict[str, Tuple[int, Tuple[int, int]]] = {}
     for i, camera_name in enumerate(config.image_keys):
         if cameras_keys_mapping is None:
             camera_id = i
         else:
             camera_id = cameras_keys_mapping.get(camera_name, i)
 
-        video_resolution = [3, 224, 224]  # Default resolution (C, H, W)
-        frame_array = Pi05.fetch_frame(
-            all_cameras=all_cameras,
-            camera_id=camera_id,
-            resolution=video_resolution,
+        # Default resolution (W, H)
+        cameras[camera_name.replace("observation.", "observation/")] = (
+            camera_id,
+            (224, 224),
         )
-        image_inputs[camera_name.replace("observation.", "observation/")] = frame_array
 
-    return image_inputs
+    return all_cameras.get_frames_by_key(
+        cameras, channel_order="bgr", buffers=buffers
+    )
 
 
 class RetryError(Exception):
@@ -414,27 +422,16 @@ class Pi05(ActionModel):
     def fetch_frame(
         cls, all_cameras: AllCameras, camera_id: int, resolution: list[int]
     ) -> np.ndarray:
-        rgb_frame = all_cameras.get_rgb_frame(
-            camera_id=camera_id,
-            resize=(resolution[2], resolution[1]),
+        """
+        Get the BGR frame of one camera, resized to resolution (channels, height,
+        width). The frame is black if the camera is not available.
+        """
+        batch, available = all_cameras.get_frames_batch(
+            [camera_id], resize=(resolution[2], resolution[1]), channel_order="bgr"
         )
-        if rgb_frame is not None:
-            # Convert to BGR
-            image = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
-            # Ensure dtype is uint8 (if it isn’t already)
-            converted_array = image.astype(np.uint8)
-            return converted_array
-
-        else:
+        if not available[0]:
             logger.warning(f"Camera {camera_id} not available. Sending all black.")
-            return np.zeros(
-                (
-                    resolution[2],
-                    resolution[1],
-                    resolution[0],
-                ),
-                dtype=np.uint8,
-            )
+        return batch[0]
 
     @background_task_log_exceptions
     async def control_loop(
@@ -462,124 +459,137 @@ class Pi05(ActionModel):
 
         signal_marked_as_started = False
         actions_queue: deque = deque([])
+        fanout = RobotFanout(robots, model="pi0.5")
+        # Batches of frames, reused between ticks
+        frame_buffers: Dict[Tuple[int, int], np.ndarray] = {}
 
-        while control_signal.is_in_loop():
-            logger.debug(
-                f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
-            )
-            if control_signal.status == "paused":
-                logger.debug("AI control loop paused")
-                await asyncio.sleep(0.1)
-                continue
-
-            start_time = time.perf_counter()
-
-            # Get the images from the cameras based on the config
-            image_inputs = fetch_camera_images(
-                config=model_spawn_config,
-                all_cameras=all_cameras,
-                cameras_keys_mapping=cameras_keys_mapping,
-            )
-
-            # Verify number of cameras
-            if len(image_inputs) != len(model_spawn_config.image_keys):
-                logger.warning(
-                    f"Model has {len(model_spawn_config.image_keys)} cameras but "
-                    f"{len(image_inputs)} cameras are plugged."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {len(model_spawn_config.image_keys)} cameras but "
-                    f"{len(image_inputs)} cameras are plugged."
-                )
-
-            # Concatenate all robot states
-            robot_idx_joints_mapping = {}
-            state = robots[0].read_joints_position(unit="rad")
-            robot_idx_joints_mapping[0] = state.shape[0]
-            for robot in robots[1:]:
-                state = np.concatenate(
-                    (state, robot.read_joints_position(unit="rad")), axis=0
-                )
-                robot_idx_joints_mapping[len(robot_idx_joints_mapping)] = (
-                    robot.read_joints_position(unit="rad").shape[0]
-                )
-
-            # Verify number of joints
-            number_of_joints_in_config = model_spawn_config.action_dim
-            number_of_connected_joints = sum(robot_idx_joints_mapping.values()) # num_actuated_joints is not reliable here, some robots like the piper have a separate gripper
-            if number_of_connected_joints != number_of_joints_in_config:
-                logger.warning(
-                    f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
-                )
-                control_signal.stop()
-                raise Exception(
-                    f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
-                )
-
-            # Prepare model input
-            inputs: dict[str, np.ndarray | str] = {
-                "observation/state": state,
-                "prompt": prompt,
-                **image_inputs,
-            }
-
-            try:
-                if len(actions_queue) == 0:
-                    actions_dict = self.client.infer(obs=inputs)
-                    if isinstance(actions_dict, dict) and "actions" in actions_dict:
-                        actions = np.array(actions_dict["actions"])
-                    else:
-                        raise ValueError(
-                            f"Invalid response from model server: {actions_dict}"
-                        )
-                    actions_queue.extend(actions)
-                actions = actions_queue.popleft()  # actions will be of size action_dim, by default 32, this is expected, we ignore the ones > number of joints
-            except Exception as e:
-                logger.warning(
-                    f"Failed to get actions from model, exiting AI control loop.\nError: {e}"
-                )
-                control_signal.stop()
-                break
-
-            if not signal_marked_as_started:
-                control_signal.set_running()
-                signal_marked_as_started = True
-
-            # Early stop
-            if not control_signal.is_in_loop():
-                break
-
-            unit: Literal["rad", "motor_units", "degrees", "other"]
-            if angle_format == "radians":
-                unit = "rad"
-            else:
-                unit = angle_format
-
-            actions_list = actions.tolist()
-
-            for robot_index in range(len(robots)):
-                rolling_count = 0
-                angles = actions_list[
-                        rolling_count : rolling_count
-                        + robot_idx_joints_mapping[robot_index]
-                    ]
+        try:
+            while control_signal.is_in_loop():
                 logger.debug(
-                    f"Sending actions to robot {robot_index}: {angles} in {unit}"
+                    f"AI control loop iteration {nb_iter}, status: {control_signal.status}, with id {control_signal.id}"
                 )
-                robots[robot_index].write_joint_positions(
-                    angles=angles,
-                    unit=unit,
-                    joints_ids=None,
-                    min_value=min_angle,
-                    max_value=max_angle,
+                if control_signal.status == "paused":
+                    logger.debug("AI control loop paused")
+                    await asyncio.sleep(0.1)
+                    continue
+
+                start_time = time.perf_counter()
+
+                # Get the images from the cameras based on the config
+                image_inputs = fetch_camera_images(
+                    config=model_spawn_config,
+                    all_cameras=all_cameras,
+                    cameras_keys_mapping=cameras_keys_mapping,
+                    buffers=frame_buffers,
                 )
-                rolling_count += robot_idx_joints_mapping[robot_index]
 
-            # Wait fps time
-            elapsed_time = time.perf_counter() - start_time
-            sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
-            await asyncio.sleep(sleep_time)
-            start_time = time.perf_counter()
-
-            nb_iter += 1
+                # Verify number of cameras
+                if len(image_inputs) != len(model_spawn_config.image_keys):
+                    logger.warning(
+                        f"Model has {len(model_spawn_config.image_keys)} cameras but "
+                        f"{len(image_inputs)} cameras are plugged."
+                    )
+                    control_signal.stop()
+                    raise Exception(
+                        f"Model has {len(model_spawn_config.image_keys)} cameras but "
+                        f"{len(image_inputs)} cameras are plugged."
+                    )
+
+                # Concatenate all robot states, read in parallel
+                robots_state = await fanout.read_joints_position(unit="rad")
+                robot_idx_joints_mapping = {
+                    robot_index: robot_state.shape[0]
+                    for robot_index, robot_state in enumerate(robots_state)
+                }
+                state = np.concatenate(robots_state, axis=0)
+
+                # Verify number of joints
+                number_of_joints_in_config = model_spawn_config.action_dim
+                number_of_connected_joints = sum(robot_idx_joints_mapping.values()) # num_actuated_joints is not reliable here, some robots like the piper have a separate gripper
+                if number_of_connected_joints != number_of_joints_in_config:
+                    logger.warning(
+                        f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
+                    )
+                    control_signal.stop()
+                    raise Exception(
+                        f"Model has {number_of_joints_in_config} joints but {number_of_connected_joints} joints are connected with {len(robots)} robots."
+                    )
+
+                # Prepare model input
+                inputs: dict[str, np.ndarray | str] = {
+                    "observation/state": state,
+                    "prompt": prompt,
+                    **image_inputs,
+                }
+
+                try:
+                    if len(actions_queue) == 0:
+                        with ai_inference_seconds.labels(model="pi0.5").time():
+                            actions_dict = self.client.infer(obs=inputs)
+                        if isinstance(actions_dict, dict) and "actions" in actions_dict:
+                            actions = np.array(actions_dict["actions"])
+                        else:
+                            raise ValueError(
+                                f"Invalid response from model server: {actions_dict}"
+                            )
+                        actions_queue.extend(actions)
+                    actions = actions_queue.popleft()  # actions will be of size action_dim, by default 32, this is expected, we ignore the ones > number of joints
+                    ai_action_queue_depth.labels(model="pi0.5").set(len(actions_queue))
+                except Exception as e:
+                    ai_inference_errors_total.labels(model="pi0.5").inc()
+                    logger.warning(
+                        f"Failed to get actions from model, exiting AI control loop.\nError: {e}"
+                    )
+                    control_signal.stop()
+                    break
+
+                if not signal_marked_as_started:
+                    control_signal.set_running()
+                    signal_marked_as_started = True
+
+                # Early stop
+                if not control_signal.is_in_loop():
+                    break
+
+                unit: Literal["rad", "motor_units", "degrees", "other"]
+                if angle_format == "radians":
+                    unit = "rad"
+                else:
+                    unit = angle_format
+
+                actions_list = actions.tolist()
+
+                commands: List[Optional[Dict[str, Any]]] = []
+                rolling_count = 0
+                for robot_index in range(len(robots)):
+                    angles = actions_list[
+                            rolling_count : rolling_count
+                            + robot_idx_joints_mapping[robot_index]
+                        ]
+                    logger.debug(
+                        f"Sending actions to robot {robot_index}: {angles} in {unit}"
+                    )
+                    commands.append(
+                        {
+                            "angles": angles,
+                            "unit": unit,
+                            "joints_ids": None,
+                            "min_value": min_angle,
+                            "max_value": max_angle,
+                        }
+                    )
+                    rolling_count += robot_idx_joints_mapping[robot_index]
+                # All the arms receive their command at the same time
+                await fanout.write_joint_positions(commands)
+
+                # Wait fps time
+                elapsed_time = time.perf_counter() - start_time
+                sleep_time = max(0, 1.0 / (fps * speed) - elapsed_time)
+                await asyncio.sleep(sleep_time)
+                start_time = time.perf_counter()
+
+                nb_iter += 1
+                if nb_iter % 100 == 0:
+                    fanout.log_latencies()
+        finally:
+            fanout.close()
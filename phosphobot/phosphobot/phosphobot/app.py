@@ -6,7 +6,7 @@ import sys
 from asyncio import CancelledError
 from contextlib import asynccontextmanager
 from random import random
-from typing import Any, AsyncGenerator, Callable
+from typing import Any, AsyncGenerator, Callable, Optional
 
 import sentry_sdk
 import typer
@@ -14,7 +14,7 @@ import uvicorn
 from fastapi import Depends, FastAPI, HTTPException, Request, applications
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 from rich import print
@@ -33,11 +33,17 @@ from phosphobot.endpoints import (
     training_router,
     update_router,
 )
-from phosphobot.hardware import get_sim
+from phosphobot.hardware import PyBulletSimulation, get_sim
+from phosphobot.metrics import registry
 from phosphobot.models import ServerStatus
 from phosphobot.posthog import posthog, posthog_pageview
 from phosphobot.recorder import Recorder, get_recorder
 from phosphobot.robot import RobotConnectionManager, get_rcm
+from phosphobot.startup import (
+    init_subsystem,
+    init_subsystem_in_background,
+    startup_profiler,
+)
 from phosphobot.teleoperation import get_udp_server
 from phosphobot.types import SimulationMode
 from phosphobot.utils import (
@@ -60,17 +66,31 @@ def init_telemetry() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Initialize telemetry
-    init_telemetry()
-    udp_server = get_udp_server()
-    # Initialize pybullet simulation
-    sim = get_sim()
-    # Initialize rcm
-    rcm = get_rcm()
+    init_subsystem("telemetry", init_telemetry)
+    udp_server = init_subsystem("udp_server", get_udp_server)
+
+    rcm: Optional[RobotConnectionManager] = None
+    sim: Optional[PyBulletSimulation] = None
+    if config.LAZY_STARTUP:
+        # The simulation and the robots are initialized on first use
+        # (eg: the first call to /status). Login to HF in the background.
+        logger.info("Lazy startup: subsystems will be initialized on first use")
+        init_subsystem_in_background("hf_login", login_to_hf)
+    else:
+        # Initialize pybullet simulation
+        sim = init_subsystem("simulation", get_sim)
+        # Initialize rcm
+        rcm = init_subsystem("robot_connection_manager", get_rcm)
+
+        try:
+            init_subsystem("hf_login", login_to_hf)
+        except Exception as e:
+            logger.debug(f"Failed to login to Hugging Face: {e}")
+
+    if config.PROFILE_STARTUP:
+        startup_profiler.stop_imports()
+        startup_profiler.report()
 
-    try:
-        login_to_hf()
-    except Exception as e:
-        logger.debug(f"Failed to login to Hugging Face: {e}")
     try:
         server_ip = get_local_ip()
         logger.success(
@@ -195,6 +215,17 @@ async def status(
     return server_status
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Metrics of the motor buses, cameras, leader follower loop, teleoperation
+    and AI control in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 app.include_router(control_router)
 app.include_router(camera_router)
 app.include_router(recording_router)
@@ -223,6 +254,7 @@ def posthog_middleware(request: Request, call_next: Callable) -> JSONResponse:
         "/move/relative",
         "/move/absolute",
         "/status",
+        "/metrics",
         "/joints/read",
         "/joints/write",
         "/torque/read",
@@ -286,14 +318,18 @@ def start_server(
     port: int = 80,
     reload: bool = False,
     simulation: SimulationMode = SimulationMode.headless,
+    kinematic_simulation: bool = True,
     only_simulation: bool = False,
     simulate_cameras: bool = False,
     realsense: bool = True,
     can: bool = True,
     cameras: bool = True,
+    shm_frames: bool = True,
     max_opencv_index: int = 10,
     max_can_interfaces: int = 4,
     profile: bool = False,
+    profile_startup: bool = False,
+    lazy_startup: bool = False,
     crash_telemetry: bool = True,
     usage_telemetry: bool = True,
     telemetry: bool = True,
@@ -356,12 +392,16 @@ def start_server(
     logger.info("Loguru file logging is configured. Server starting...")
 
     config.SIM_MODE = simulation
+    config.SIM_KINEMATIC = kinematic_simulation
     config.ONLY_SIMULATION = only_simulation
     config.SIMULATE_CAMERAS = simulate_cameras
     config.ENABLE_REALSENSE = realsense
     config.ENABLE_CAMERAS = cameras
+    config.SHM_FRAMES = shm_frames
     config.PORT = port
     config.PROFILE = profile
+    config.PROFILE_STARTUP = profile_startup
+    config.LAZY_STARTUP = lazy_startup
     config.CRASH_TELEMETRY = crash_telemetry  # Enable crash telemetry by default
     config.USAGE_TELEMETRY = usage_telemetry  # Enable usage telemetry by default
     config.ENABLE_CAN = can
@@ -8,7 +8,9 @@ import subprocess
 import threading
 import time
 from abc import ABC, abstractmethod
-from functools import lru_cache
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import (
     Any,
@@ -29,10 +31,27 @@ from fastapi import Request
 from loguru import logger
 
 from phosphobot.configs import config
+from phosphobot.frame_ring import (
+    FRAME_RING_IDLE_S,
+    FRAME_RING_READER_TIMEOUT_S,
+    FrameRing,
+    unlink_stale_rings,
+)
+from phosphobot.metrics import (
+    camera_failed_frames_total,
+    camera_fps,
+    camera_frames_total,
+    camera_stream_send_seconds,
+)
 from phosphobot.models import AllCamerasStatus, SingleCameraStatus
+from phosphobot.models.camera import FrameRingInfo, FrameRingsResponse
+from phosphobot.step_sync import nearest_sample
+from phosphobot.stream_control import AdaptiveStreamController, get_encode_executor
 from phosphobot.types import CameraTypes
 
 cameras = None
+# Number of recent frames kept by each camera, to pick the frame nearest to a time
+FRAME_HISTORY_SIZE = 4
 
 
 def get_camera_names() -> List[str]:
@@ -340,6 +359,36 @@ class BaseCamera(ABC):
         """Get the latest depth frame from the camera."""
         raise NotImplementedError("Depth frame not available")
 
+    def get_rgb_frame_near(
+        self, reference_ts: float, resize: Optional[tuple[int, int]] = None
+    ) -> Tuple[Optional[cv2.typing.MatLike], Optional[float]]:
+        """
+        Get the frame captured nearest to reference_ts (time.perf_counter() clock).
+        Returns the RGB frame and its acquisition timestamp.
+
+        Cameras that don't keep their recent frames return the latest frame,
+        timestamped now.
+        """
+        frame = self.get_rgb_frame(resize=resize)
+        return frame, time.perf_counter() if frame is not None else None
+
+    def get_frame_into(
+        self, out: np.ndarray, channel_order: Literal["rgb", "bgr"] = "rgb"
+    ) -> bool:
+        """
+        Write the latest frame, resized to the shape of out (height, width, 3), into
+        out. Returns False if no frame is available: out is then left untouched.
+        """
+        height, width = out.shape[:2]
+        frame = self.get_rgb_frame(resize=(width, height))
+        if frame is None:
+            return False
+        if channel_order == "bgr":
+            cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=out)
+        else:
+            out[...] = frame
+        return True
+
     def get_jpeg_rgb_frame(
         self,
         target_size: Optional[tuple[int, int]],
@@ -369,31 +418,70 @@ class BaseCamera(ABC):
         quality: Optional[int],
         is_video_frame: bool = True,
         request: Optional[Request] = None,
+        adaptive: bool = True,
     ) -> AsyncGenerator:
-        """Generator for video frames"""
+        """
+        Generator for video frames
+
+        The frames are encoded in a thread pool. With adaptive, the quality, the
+        resolution and the frame rate follow the speed at which the client reads
+        the stream: quality and target_size are then the maximums.
+        """
+        loop = asyncio.get_running_loop()
+        controller = (
+            AdaptiveStreamController(max_fps=self.fps, max_quality=quality or 95)
+            if adaptive
+            else None
+        )
+        base_size = target_size
+        if base_size is None and hasattr(self, "width") and hasattr(self, "height"):
+            base_size = (self.width, self.height)
+        send_metric = camera_stream_send_seconds.labels(camera=self.camera_name)
         try:
             while self.is_active and (
                 request is None or not await request.is_disconnected()
             ):
                 time_start = time.perf_counter()
-                frame = self.get_jpeg_rgb_frame(
-                    is_video_frame=is_video_frame,
-                    target_size=target_size,
-                    quality=quality,
+                frame_size, frame_quality = target_size, quality
+                fps: float = self.fps
+                if controller is not None:
+                    settings = controller.settings
+                    frame_quality, fps = settings.quality, settings.fps
+                    if base_size is not None and settings.scale < 1:
+                        frame_size = (
+                            max(16, round(base_size[0] * settings.scale)),
+                            max(16, round(base_size[1] * settings.scale)),
+                        )
+                frame = await loop.run_in_executor(
+                    get_encode_executor(),
+                    partial(
+                        self.get_jpeg_rgb_frame,
+                        is_video_frame=is_video_frame,
+                        target_size=frame_size,
+                        quality=frame_quality,
+                    ),
                 )
                 if frame is not None:
-                    yield (
+                    chunk = (
                         b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
                     )
+                    # The generator resumes once the client has taken the chunk
+                    send_start = time.perf_counter()
+                    yield chunk
+                    send_seconds = time.perf_counter() - send_start
+                    send_metric.observe(send_seconds)
+                    if controller is not None:
+                        controller.observe(send_seconds)
                 else:
                     logger.warning(
                         f"{self.camera_name} Skipped frame due to capture error"
                     )
                     # Prevent tight loop
                     await asyncio.sleep(0.02)
-                # Wait according to the fps
+                # Wait according to the fps. A slow send delays the next frame: the
+                # frames in between are skipped.
                 time_spent = time.perf_counter() - time_start
-                time_to_wait = max(0, 1 / self.fps - time_spent)
+                time_to_wait = max(0, 1 / fps - time_spent)
                 await asyncio.sleep(time_to_wait)
         except GeneratorExit:
             logger.info(f"{self.camera_name} Generator exited")
@@ -405,6 +493,11 @@ class BaseCamera(ABC):
             self.stop()
 
 
+def frame_ring_prefix() -> str:
+    """Prefix of the names of the shared memory rings of this server."""
+    return f"phosphobot_{config.PORT}_camera_"
+
+
 class VideoCamera(threading.Thread, BaseCamera):
     camera_type: CameraTypes = "classic"
     camera_id: Optional[int] = None
@@ -412,6 +505,13 @@ class VideoCamera(threading.Thread, BaseCamera):
     lock: threading.Lock
     _stop_event: threading.Event
     video: Optional[cv2.VideoCapture] = None
+    # Shared memory copy of the frames, for the processes running on the same machine
+    frame_ring: Optional[FrameRing] = None
+    _frame_ring_failed: bool = False
+    # time.monotonic() of the last request of the ring by a reader
+    _frame_ring_requested_at: Optional[float] = None
+    # Last BGR frames with their acquisition timestamp (time.perf_counter() clock)
+    frame_history: "deque[Tuple[float, np.ndarray]]"
 
     def __init__(
         self,
@@ -422,6 +522,7 @@ class VideoCamera(threading.Thread, BaseCamera):
     ):
         threading.Thread.__init__(self)
         BaseCamera.__init__(self)
+        self.frame_history = deque(maxlen=FRAME_HISTORY_SIZE)
 
         if camera_type:
             self.camera_type = camera_type
@@ -447,6 +548,57 @@ class VideoCamera(threading.Thread, BaseCamera):
     def camera_name(self) -> str:
         return f"VideoCamera {self.camera_type} {self.camera_id}"
 
+    @property
+    def frame_ring_name(self) -> str:
+        # Stable across restarts: a ring left by a crashed server is reclaimed
+        return f"{frame_ring_prefix()}{self.camera_id}"
+
+    def request_frame_ring(self) -> None:
+        """
+        A local reader wants the frames: the camera thread creates the ring at its
+        next frame, and writes to it while it's read.
+        """
+        self._frame_ring_requested_at = time.monotonic()
+
+    def _set_last_frame(self, frame: np.ndarray) -> None:
+        """
+        Store a new BGR frame, timestamped at acquisition. Called by the camera thread.
+        """
+        self.last_frame = frame
+        self.frame_history.append((time.perf_counter(), frame))
+
+    def _publish_frame(self, frame: np.ndarray) -> None:
+        """
+        Copy the frame to the shared memory ring, if a reader uses it. Called by the
+        camera thread only.
+        """
+        if not config.SHM_FRAMES or self._frame_ring_failed or frame.ndim != 3:
+            return
+        if self.frame_ring is not None and (
+            self.frame_ring.shape != frame.shape
+            or self.frame_ring.idle_s > FRAME_RING_IDLE_S
+        ):
+            # The resolution changed, or the readers are gone
+            self.frame_ring.close()
+            self.frame_ring = None
+        if self.frame_ring is None:
+            requested_at = self._frame_ring_requested_at
+            if requested_at is None or time.monotonic() - requested_at > 1.0:
+                return
+            try:
+                self.frame_ring = FrameRing.create(
+                    self.frame_ring_name,
+                    shape=cast(Tuple[int, int, int], frame.shape),
+                )
+            except Exception as e:
+                logger.warning(
+                    f"{self.camera_name}: Shared memory frames are disabled: {e}"
+                )
+                self._frame_ring_failed = True
+                return
+        if self.frame_ring.idle_s <= FRAME_RING_READER_TIMEOUT_S:
+            self.frame_ring.write(frame)
+
     def stop(self) -> None:
         """Stop the video stream"""
         logger.debug(f"{self.camera_name}: Stopping. is_active={self.is_active}")
@@ -509,6 +661,15 @@ Camera type: {self.camera_type}""")
         if not self.is_active:
             return None
 
+        frames_metric = camera_frames_total.labels(camera_id=self.camera_id)
+        failed_frames_metric = camera_failed_frames_total.labels(
+            camera_id=self.camera_id
+        )
+        fps_metric = camera_fps.labels(camera_id=self.camera_id)
+        # Delivered fps is computed over windows of about one second
+        fps_window_start = time.perf_counter()
+        fps_window_frames = 0
+
         with self.lock:
             while (
                 not self._stop_event.is_set()
@@ -532,11 +693,27 @@ Camera type: {self.camera_type}""")
                     if success:
                         break
 
-                if not success:
+                if not success or frame is None:
                     logger.warning(f"{self.camera_name}: Failed to grab frame")
                     self.last_frame = None
+                    failed_frames_metric.inc()
                 else:
-                    self.last_frame = frame
+                    self._set_last_frame(frame)
+                    self._publish_frame(frame)
+                    frames_metric.inc()
+                    fps_window_frames += 1
+
+                now = time.perf_counter()
+                if now - fps_window_start >= 1.0:
+                    fps_metric.set(fps_window_frames / (now - fps_window_start))
+                    fps_window_start = now
+                    fps_window_frames = 0
+
+            fps_metric.set(0)
+            # The ring is closed by the thread that writes it
+            if self.frame_ring is not None:
+                self.frame_ring.close()
+                self.frame_ring = None
 
     def get_rgb_frame(
         self, resize: Optional[tuple[int, int]] = None
@@ -562,6 +739,53 @@ Camera type: {self.camera_type}""")
 
         return frame
 
+    def get_rgb_frame_near(
+        self, reference_ts: float, resize: Optional[tuple[int, int]] = None
+    ) -> Tuple[Optional[cv2.typing.MatLike], Optional[float]]:
+        # Subclasses that override get_rgb_frame, like the RealSense ones, don't
+        # run VideoCamera.__init__ nor fill the history
+        frame_history = getattr(self, "frame_history", None)
+        sample = (
+            nearest_sample(list(frame_history), reference_ts)
+            if frame_history is not None
+            else None
+        )
+        if self.last_frame is None or sample is None:
+            return BaseCamera.get_rgb_frame_near(self, reference_ts, resize=resize)
+        timestamp, frame = sample
+        # Only the selected frame is converted
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if resize is not None:
+            frame = cv2.resize(src=frame, dsize=resize, interpolation=cv2.INTER_AREA)
+        return frame, timestamp
+
+    def get_frame_into(
+        self, out: np.ndarray, channel_order: Literal["rgb", "bgr"] = "rgb"
+    ) -> bool:
+        # The capture thread replaces last_frame: keep a reference to one frame
+        last_frame = self.last_frame
+        if last_frame is None:
+            # Subclasses that override get_rgb_frame never set last_frame
+            return BaseCamera.get_frame_into(self, out, channel_order=channel_order)
+        height, width = out.shape[:2]
+        if last_frame.shape[:2] == (height, width):
+            resized = last_frame
+        elif channel_order == "bgr":
+            # last_frame is BGR: resize straight into the output buffer
+            cv2.resize(
+                last_frame, (width, height), dst=out, interpolation=cv2.INTER_AREA
+            )
+            return True
+        else:
+            resized = cv2.resize(
+                last_frame, (width, height), interpolation=cv2.INTER_AREA
+            )
+        if channel_order == "bgr":
+            out[...] = resized
+        else:
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=out)
+        return True
+
 
 class DummyCamera(VideoCamera):
     camera_type: Literal["dummy", "dummy_stereo"] = "dummy"
@@ -606,6 +830,18 @@ class DummyCamera(VideoCamera):
 
         return frame
 
+    def get_rgb_frame_near(
+        self, reference_ts: float, resize: Optional[tuple[int, int]] = None
+    ) -> Tuple[Optional[cv2.typing.MatLike], Optional[float]]:
+        # The white frame has no capture time
+        return self.get_rgb_frame(resize=resize), reference_ts
+
+    def get_frame_into(
+        self, out: np.ndarray, channel_order: Literal["rgb", "bgr"] = "rgb"
+    ) -> bool:
+        out.fill(255)
+        return True
+
     def stop(self) -> None:
         """Stop the video stream"""
         logger.debug(f"{self.camera_name}: Stopping. is_active={self.is_active}")
@@ -1006,7 +1242,9 @@ class ZMQCamera(VideoCamera):
         frame = np.frombuffer(frame_bytes, dtype=np.dtype(data["dtype"]))
         reconstructed_frame = frame.reshape(data["shape"])
         with self.lock:
-            self.last_frame = cv2.cvtColor(reconstructed_frame, cv2.COLOR_RGB2BGR)
+            self._set_last_frame(
+                cv2.cvtColor(reconstructed_frame, cv2.COLOR_RGB2BGR)
+            )
 
     def run(self) -> None:
         """Polls the ZMQ PULL socket and manually filters messages by topic."""
@@ -1079,6 +1317,8 @@ class AllCameras:
     # If it's None, record everything. Otherwise, record only the corresponding cameras
     _cameras_ids_to_record: List[int]
     _is_detecting: bool = False
+    # Fills the frames of get_frames_batch in parallel. Created on first use.
+    _frames_executor: Optional[ThreadPoolExecutor] = None
 
     def __init__(self, disabled_cameras: Optional[List[int]] = None):
         """
@@ -1091,6 +1331,10 @@ class AllCameras:
         else:
             self.disabled_cameras = []
 
+        if config.SHM_FRAMES:
+            # Rings left by a server that crashed on the same port
+            unlink_stale_rings(frame_ring_prefix())
+
         self.detect_cameras()
 
         # Add atexit hook to stop the cameras
@@ -1450,6 +1694,9 @@ class AllCameras:
     def stop(self) -> None:
         for camera in self.cameras:
             camera.stop()
+        if self._frames_executor is not None:
+            self._frames_executor.shutdown(wait=False)
+            self._frames_executor = None
 
     def get_camera_by_id(self, id: int) -> Optional[BaseCamera]:
         if id not in self.camera_ids:
@@ -1491,6 +1738,98 @@ class AllCameras:
 
         return frame
 
+    def get_frames_batch(
+        self,
+        camera_ids: List[int],
+        resize: Tuple[int, int],
+        channel_order: Literal["rgb", "bgr"] = "rgb",
+        out: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, List[bool]]:
+        """
+        Get the latest frames of several cameras, stacked in a single batch.
+
+        Args:
+            camera_ids: The cameras to read, in the order of the batch.
+            resize: (width, height) of the frames in the batch.
+            channel_order: "rgb" or "bgr". The frames are converted once, straight
+                into the batch.
+            out: Batch returned by a previous call. It is filled in place if its
+                shape matches, so that the control loops don't allocate each tick.
+
+        Returns the batch of shape (N, height, width, 3) and dtype uint8, and for each
+        camera whether a frame was available. The frames of the cameras that are not
+        available are black.
+        """
+        width, height = resize
+        shape = (len(camera_ids), height, width, 3)
+        if out is None or out.shape != shape or out.dtype != np.uint8:
+            out = np.empty(shape, dtype=np.uint8)
+
+        def fill(index: int) -> bool:
+            camera = self.get_camera_by_id(camera_ids[index])
+            available = camera is not None and camera.get_frame_into(
+                out[index], channel_order=channel_order
+            )
+            if not available:
+                out[index].fill(0)
+            return available
+
+        # Resizing and color conversion release the GIL: fill the cameras in parallel
+        if len(camera_ids) > 1:
+            if self._frames_executor is None:
+                self._frames_executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="camera-batch"
+                )
+            available = list(self._frames_executor.map(fill, range(len(camera_ids))))
+        else:
+            available = [fill(index) for index in range(len(camera_ids))]
+
+        return out, available
+
+    def get_frames_by_key(
+        self,
+        cameras: Dict[str, Tuple[int, Tuple[int, int]]],
+        channel_order: Literal["rgb", "bgr"] = "rgb",
+        buffers: Optional[Dict[Tuple[int, int], np.ndarray]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get the frames of a model input in one call.
+
+        Args:
+            cameras: For each key of the model input, the camera id and the
+                (width, height) of the frame.
+            channel_order: "rgb" or "bgr"
+            buffers: Dict kept by the caller between ticks. The frames are written in
+                one batch per target size, stored in this dict and reused.
+
+        Returns for each key a (height, width, 3) uint8 view of the batch. The views
+        are overwritten by the next call with the same buffers. The frames of the
+        cameras that are not available are black.
+        """
+        if buffers is None:
+            buffers = {}
+        keys_by_size: Dict[Tuple[int, int], List[str]] = {}
+        for key, (_, size) in cameras.items():
+            keys_by_size.setdefault(tuple(size), []).append(key)  # type: ignore
+
+        frames: Dict[str, np.ndarray] = {}
+        for size, keys in keys_by_size.items():
+            camera_ids = [cameras[key][0] for key in keys]
+            batch, available = self.get_frames_batch(
+                camera_ids,
+                resize=size,
+                channel_order=channel_order,
+                out=buffers.get(size),
+            )
+            buffers[size] = batch
+            for index, key in enumerate(keys):
+                if not available[index]:
+                    logger.warning(
+                        f"Camera {camera_ids[index]} not available. Sending all black."
+                    )
+                frames[key] = batch[index]
+        return frames
+
     def get_rgb_frames_for_all_cameras(
         self, resize: Optional[Tuple[int, int]] = None
     ) -> Dict[str, Optional[cv2.typing.MatLike]]:
@@ -1515,6 +1854,40 @@ class AllCameras:
                 frames[f"{camera.camera_id}"] = frame
         return frames
 
+    def request_frame_rings(self) -> None:
+        """
+        Ask the video cameras to write their frames to shared memory.
+        """
+        for camera in self.video_cameras:
+            if camera.is_active:
+                camera.request_frame_ring()
+
+    def get_frame_rings(self) -> FrameRingsResponse:
+        """
+        Describe the shared memory rings of the video cameras.
+        """
+        rings: List[FrameRingInfo] = []
+        complete = True
+        for camera in self.video_cameras:
+            if camera.is_active is False:
+                continue
+            frame_ring = camera.frame_ring
+            if frame_ring is None or camera.camera_id is None:
+                complete = False
+                continue
+            height, width, channels = frame_ring.shape
+            rings.append(
+                FrameRingInfo(
+                    camera_id=camera.camera_id,
+                    camera_type=camera.camera_type,
+                    name=frame_ring.name,
+                    height=height,
+                    width=width,
+                    channels=channels,
+                )
+            )
+        return FrameRingsResponse(rings=rings, complete=complete)
+
     @property
     def cameras_ids_to_record(self) -> List[int]:
         """
@@ -1,5 +1,7 @@
 import asyncio
+import base64
 import contextlib
+import time
 from collections import deque
 from typing import (
     Any,
@@ -13,13 +15,38 @@ from typing import (
     Union,
 )
 
+import cv2
 import httpx
+import numpy as np
 from loguru import logger
 
+from phosphobot.chat.plan_cache import PlanCache, frame_fingerprint, image_fingerprint
 from phosphobot.configs import config
+from phosphobot.frame_ring import LocalFrameReader
 from phosphobot.models import ChatRequest, ChatResponse
+from phosphobot.models.camera import FrameRingsResponse
 from phosphobot.utils import get_local_ip
 
+# Relative moves of the commands the agent (or the keyboard) can send to the robot
+COMMAND_MAP: Dict[str, Dict[str, float]] = {
+    "move_left": {"rz": 10.0},
+    "move_right": {"rz": -10.0},
+    "move_forward": {"x": 5.0},
+    "move_backward": {"x": -5.0},
+    "move_up": {"z": 5.0},
+    "move_down": {"z": -5.0},
+    "move_gripper_up": {"rx": 10.0},
+    "move_gripper_down": {"rx": -10.0},
+    "close_gripper": {"open": 0.0},
+    "open_gripper": {"open": 1.0},
+}
+
+
+def encode_frame(frame: np.ndarray) -> str:
+    """JPEG and base64 encoding of a frame, like the /frames endpoint."""
+    _, buffer = cv2.imencode(".jpg", frame)
+    return base64.b64encode(buffer.tobytes()).decode("utf-8")
+
 
 class PhosphobotClient:
     def __init__(
@@ -32,11 +59,22 @@ class PhosphobotClient:
         :param log_to_ui: Enable/disable logging to UI.
         """
         self.server_url = f"http://{get_local_ip()}:{config.PORT}"
-        self.client = httpx.AsyncClient(base_url=self.server_url, timeout=5.0)
+        # Keep the connection open between the steps of the agent, which can be several
+        # seconds apart while the model thinks
+        self.client = httpx.AsyncClient(
+            base_url=self.server_url,
+            timeout=5.0,
+            limits=httpx.Limits(keepalive_expiry=60.0),
+        )
 
         self._write_to_log = write_to_log
         self._log_to_ui = log_to_ui
 
+        # Shared memory access to the frames when the server runs on this machine
+        self._frame_reader: Optional[LocalFrameReader] = None
+        self._frame_reader_unavailable = False
+        self._next_frame_reader_check = 0.0
+
     def _log(self, message: str, who: str = "system") -> None:
         """Internal logging helper."""
         if self._log_to_ui and self._write_to_log:
@@ -86,22 +124,87 @@ class PhosphobotClient:
             json={"x": x, "y": y, "z": z, "rx": rx, "ry": ry, "rz": rz, "open": open},
         )
 
+    async def _get_frame_reader(self) -> Optional[LocalFrameReader]:
+        """
+        Attach to the shared memory rings of the server. Returns None if the server
+        doesn't run on this machine or if some cameras have no ring.
+        """
+        if self._frame_reader is not None:
+            return self._frame_reader
+        if self._frame_reader_unavailable:
+            return None
+        if time.monotonic() < self._next_frame_reader_check:
+            return None
+        self._next_frame_reader_check = time.monotonic() + 10.0
+
+        try:
+            response = await self.client.get("/frames/shm", timeout=3.0)
+            response.raise_for_status()
+            rings = FrameRingsResponse.model_validate(response.json())
+        except httpx.HTTPStatusError:
+            # Older server without shared memory frames
+            self._frame_reader_unavailable = True
+            return None
+        except httpx.RequestError:
+            return None
+        if not rings.complete or not rings.rings:
+            return None
+
+        try:
+            self._frame_reader = LocalFrameReader(rings)
+        except (FileNotFoundError, ValueError, OSError) as e:
+            logger.debug(f"Shared memory frames are not available: {e}")
+            self._frame_reader_unavailable = True
+            return None
+        logger.info("Reading the camera frames from shared memory")
+        return self._frame_reader
+
+    async def get_camera_frames(
+        self, resize: Optional[Tuple[int, int]] = None
+    ) -> Optional[Dict[int, np.ndarray]]:
+        """
+        BGR frames of the cameras, read from shared memory, without any encoding.
+        Returns None if the server doesn't share its frames with this process.
+        """
+        frame_reader = await self._get_frame_reader()
+        if frame_reader is None:
+            return None
+        frames = frame_reader.read(resize=resize)
+        if frames is None:
+            # The server stopped or the cameras changed: attach again later
+            frame_reader.close()
+            self._frame_reader = None
+            return None
+        # Same cameras as get_camera_image: the halves of the stereo cameras are skipped
+        return {
+            int(camera_id): frame
+            for camera_id, frame in frames.items()
+            if camera_id.isdigit()
+        }
+
     async def get_camera_image(
         self,
         camera_ids: Optional[List[int]] = None,
         resize: Optional[Tuple[int, int]] = None,
     ) -> Optional[Dict[int, str]]:
-        params = {}
-        if resize:
-            params["resize_x"], params["resize_y"] = resize
+        frames = await self.get_camera_frames(resize=resize)
+        if frames is not None:
+            reponse_json = {
+                str(camera_id): encode_frame(frame)
+                for camera_id, frame in frames.items()
+            }
+        else:
+            params = {}
+            if resize:
+                params["resize_x"], params["resize_y"] = resize
 
-        response = await self._safe_request(
-            "GET", "/frames", params=params, timeout=3.0
-        )
-        if response is None:
-            return None
+            response = await self._safe_request(
+                "GET", "/frames", params=params, timeout=3.0
+            )
+            if response is None:
+                return None
+            reponse_json = response.json()
 
-        reponse_json = response.json()
         output: Dict[int, str] = {}
 
         for camera_id in camera_ids or reponse_json.keys():
@@ -158,8 +261,15 @@ class RoboticAgent:
         self,
         images_sizes: Optional[Tuple[int, int]] = (256, 256),
         write_to_log: Optional[Callable[[str, str], None]] = None,
+        plan_steps: int = 3,
     ):
+        """
+        :param plan_steps: Number of commands requested to the model in one call. The next
+            plan is fetched while the commands of the current one are executed.
+        """
         self.resize = images_sizes
+        self.plan_steps = plan_steps
+        self.plan_cache = PlanCache()
 
         self.task_description: Optional[str] = None
         self.dataset_name: str = "chat_dataset"
@@ -173,6 +283,12 @@ class RoboticAgent:
         # For managing AI API call cancellation
         self._current_ai_task: Optional[asyncio.Task] = None
         self._ai_cancellation_event = asyncio.Event()
+        # Plan fetched in the background while the queued commands are executed
+        self._prefetch_task: Optional[asyncio.Task] = None
+        # Instruction of the queued AI commands and of the prefetched plan
+        self._plan_instruction: Optional[str] = None
+        self._chat_logged = False
+        self.nb_ai_calls = 0
 
     def add_action(self, action: Union[ChatResponse, str]) -> None:
         """
@@ -215,6 +331,7 @@ class RoboticAgent:
         """
         # Signal cancellation to any waiter
         self._ai_cancellation_event.set()
+        self._drop_plan()
 
         # If there's a running task, cancel it (the _get_ai_response handler will await it and swallow CancelledError)
         if self._current_ai_task and not self._current_ai_task.done():
@@ -225,6 +342,107 @@ class RoboticAgent:
                 logger.exception("Failed to cancel current AI task")
         logger.info("Signalled cancellation for ongoing AI API call")
 
+    def _drop_plan(self) -> None:
+        """
+        Forget the AI commands that are queued or being fetched. Manual commands are kept.
+        """
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_task = None
+        manual_commands = [
+            action
+            for action in self.action_queue
+            if not isinstance(action, ChatResponse)
+        ]
+        self.action_queue.clear()
+        self.action_queue.extend(manual_commands)
+
+    def _plan_to_actions(self, chat_response: ChatResponse) -> List[ChatResponse]:
+        """
+        Split a multi-step response into one action per command.
+        """
+        actions = [chat_response]
+        for command in chat_response.next_commands:
+            params = COMMAND_MAP.get(command)
+            if params is None:
+                logger.warning(
+                    f"Unknown planned command {command}. Dropping the rest of the plan."
+                )
+                break
+            actions.append(
+                ChatResponse(
+                    command=command, endpoint="move_relative", endpoint_params=params
+                )
+            )
+        return actions
+
+    async def _fetch_plan(
+        self, command_history: List[str], pending_commands: List[str]
+    ) -> Optional[Tuple[ChatRequest, ChatResponse, bool]]:
+        """
+        Get the next commands for the current camera images, from the plan cache or from
+        the model. pending_commands are the commands queued but not executed yet: they
+        are sent to the model after the executed command_history.
+
+        Returns (chat_request, chat_response, from_cache), or None if no plan was received.
+        """
+        assert self.task_description is not None
+        instruction = self.task_description
+        # Frames from shared memory are only encoded if they are sent to the model
+        frames = await self.phosphobot_client.get_camera_frames(resize=self.resize)
+        image_list: Optional[List[str]] = None
+        if frames:
+            fingerprint: Optional[int] = frame_fingerprint(next(iter(frames.values())))
+        else:
+            images = await self.phosphobot_client.get_camera_image(resize=self.resize)
+            if not images:
+                return None
+            image_list = list(images.values())
+            fingerprint = image_fingerprint(image_list[0])
+
+        chat_request = ChatRequest(
+            prompt=instruction,
+            images=image_list,
+            command_history=command_history + pending_commands,
+            max_steps=self.plan_steps,
+        )
+        # The same image after other commands is another state of the robot
+        recent_commands = command_history[-self.plan_steps :]
+        cached_commands = self.plan_cache.get(
+            instruction, fingerprint, pending_commands, recent_commands
+        )
+        if cached_commands:
+            return (
+                chat_request,
+                ChatResponse(
+                    command=cached_commands[0],
+                    endpoint="move_relative",
+                    endpoint_params=COMMAND_MAP.get(cached_commands[0]),
+                    next_commands=cached_commands[1 : self.plan_steps],
+                ),
+                True,
+            )
+
+        if frames:
+            chat_request.images = [encode_frame(frame) for frame in frames.values()]
+        if not self._chat_logged:
+            # Log the initial chat request
+            await self.phosphobot_client.log_chat(chat_request=chat_request)
+            self._chat_logged = True
+
+        self.nb_ai_calls += 1
+        chat_response = await self._get_ai_response(chat_request)
+        if chat_response is None or chat_response.command is None:
+            return None
+        self.plan_cache.put(
+            instruction,
+            fingerprint,
+            [chat_response.command] + chat_response.next_commands,
+            pending_commands,
+            recent_commands,
+        )
+        return chat_request, chat_response, False
+
     async def _get_ai_response(
         self, chat_request: ChatRequest
     ) -> Optional[ChatResponse]:
@@ -327,19 +545,7 @@ class RoboticAgent:
         """
         Execute a manual command by moving the robot.
         """
-        command_map = {
-            "move_left": {"rz": 10.0},
-            "move_right": {"rz": -10.0},
-            "move_forward": {"x": 5.0},
-            "move_backward": {"x": -5.0},
-            "move_up": {"z": 5.0},
-            "move_down": {"z": -5.0},
-            "move_gripper_up": {"rx": 10.0},
-            "move_gripper_down": {"rx": -10.0},
-            "close_gripper": {"open": 0.0},
-            "open_gripper": {"open": 1.0},
-        }
-        next_robot_move = command_map.get(command)
+        next_robot_move = COMMAND_MAP.get(command)
         if next_robot_move is None:
             logger.warning(
                 f"Invalid manual command received: {command}. Skipping execution."
@@ -408,10 +614,38 @@ class RoboticAgent:
 
         step_count = 0
         max_steps = 50
-        chat_logged = False
+        self._chat_logged = False
 
         while step_count < max_steps:
+            # Forget the plan if the instruction changed
+            if self._plan_instruction != self.task_description:
+                self._drop_plan()
+                self._plan_instruction = self.task_description
+
+            pending_commands = [
+                action.command
+                for action in self.action_queue
+                if isinstance(action, ChatResponse) and action.command is not None
+            ]
+            # Speculative execution: fetch the next plan while the queued commands run
+            if (
+                self.control_mode == "ai"
+                and pending_commands
+                and self._prefetch_task is None
+            ):
+                self._prefetch_task = asyncio.create_task(
+                    self._fetch_plan(list(self.command_history), pending_commands)
+                )
+
             # Process any available actions from the queue
+            if self.action_queue and isinstance(self.action_queue[0], ChatResponse):
+                step_count += 1
+                yield (
+                    "log",
+                    {
+                        "text": f"Step {step_count}/{max_steps} - AI mode - {self.action_queue[0].command}"
+                    },
+                )
             action_processed = await self.process_action_queue()
 
             if action_processed is True:
@@ -419,60 +653,62 @@ class RoboticAgent:
 
             # Queue is empty: Add a new action based on the current mode
             if self.control_mode == "ai":
-                # AI MODE: Generate new action if queue is empty
-                step_count += 1
-                yield (
-                    "log",
-                    {
-                        "text": f"Step {step_count}/{max_steps} - AI mode - Generating command..."
-                    },
-                )
-                # Run the agent
-                images = await self.phosphobot_client.get_camera_image(
-                    resize=self.resize
-                )
-                if not images:
+                # AI MODE: Use the prefetched plan, or generate a new one
+                if self._prefetch_task is None:
                     yield (
-                        "step_output",
-                        {"output": "No images received from cameras. Skipping step."},
+                        "log",
+                        {
+                            "text": f"Step {step_count + 1}/{max_steps} - AI mode - Generating commands..."
+                        },
                     )
-                    continue  # Skip this step if no images
-
-                # Check again if we've been switched to keyboard mode
-                if self.control_mode == "keyboard":
-                    continue
-
-                chat_request = ChatRequest(
-                    prompt=self.task_description,
-                    # Convert dict to list of base64 strings
-                    images=list(images.values()),
-                    command_history=self.command_history,
-                )
-                if not chat_logged:
-                    # Log the initial chat request
-                    await self.phosphobot_client.log_chat(chat_request=chat_request)
-                    chat_logged = True
-
-                # Get AI response with cancellation support
-                chat_response = await self._get_ai_response(chat_request)
-
-                # Check if we've been switched to keyboard mode during the API call
-                if self.control_mode == "keyboard" or chat_response is None:
+                    self._prefetch_task = asyncio.create_task(
+                        self._fetch_plan(list(self.command_history), [])
+                    )
+                prefetch_task = self._prefetch_task
+                try:
+                    plan = await prefetch_task
+                except asyncio.CancelledError:
+                    if not prefetch_task.cancelled():
+                        raise
+                    plan = None
+                if self._prefetch_task is prefetch_task:
+                    self._prefetch_task = None
+
+                # Check if we've been switched to keyboard mode or got a new instruction during the API call
+                if (
+                    self.control_mode == "keyboard"
+                    or plan is None
+                    or self._plan_instruction != self.task_description
+                ):
+                    if plan is None and self.control_mode == "ai":
+                        # Count failed calls so that the run always ends
+                        step_count += 1
+                        yield (
+                            "step_output",
+                            {"output": "No command received. Skipping step."},
+                        )
                     continue
 
+                chat_request, chat_response, from_cache = plan
                 yield (
                     "step_output",
-                    {"output": f"AI command: {chat_response.model_dump()}"},
+                    {
+                        "output": f"AI command{' (cached)' if from_cache else ''}: {chat_response.model_dump()}"
+                    },
                 )
+                # Cached plans are recorded like the replies of the model
                 self.add_to_chat_history(
                     chat_request=chat_request, chat_response=chat_response
                 )
-                # Add the AI command to the queue for execution
-                self.add_action(chat_response)
+                # Add the AI commands to the queue for execution
+                for action in self._plan_to_actions(chat_response):
+                    self.add_action(action)
             else:
                 # KEYBOARD MODE: Wait for user input without consuming a step
                 await asyncio.sleep(0.1)
 
+        self._drop_plan()
+
         # Stop recording
         yield "start_step", {"desc": "🔴 Recording stopped."}
         await self.phosphobot_client.stop_recording()
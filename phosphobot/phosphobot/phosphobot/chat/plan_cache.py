@@ -0,0 +1,127 @@
+"""
+Local cache of the plans returned by the chat agent model.
+
+The camera image is reduced to a 64 bits perceptual hash (average hash of an 8x8 grayscale
+thumbnail). A plan is reused when the instruction, the last executed commands and the
+commands still pending are the same, and the hash of the current image is within a few bits
+of the image the plan was made for: the robot is back in the same situation.
+
+A plan is only reused once the scene changed since it was made or last reused. If the
+robot is stuck (e.g. the plan doesn't move anything in view), the model is asked again
+instead of replaying the same plan forever.
+"""
+
+import base64
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+
+def frame_fingerprint(frame: np.ndarray) -> int:
+    """
+    Average hash of a BGR or grayscale frame.
+    """
+    thumbnail = cv2.resize(frame, (8, 8), interpolation=cv2.INTER_AREA)
+    if thumbnail.ndim == 3:
+        thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+    bits = (thumbnail > thumbnail.mean()).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def image_fingerprint(image_b64: str) -> Optional[int]:
+    """
+    Average hash of a base64 encoded image. Returns None if the image can't be decoded.
+    """
+    try:
+        buffer = np.frombuffer(base64.b64decode(image_b64), dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    except Exception as e:
+        logger.debug(f"Failed to decode image for fingerprint: {e}")
+        return None
+    if image is None:
+        return None
+    return frame_fingerprint(image)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class CachedPlan:
+    commands: List[str]
+    # A different scene was seen since the plan was made or last reused
+    scene_changed: bool = False
+
+
+PlanKey = Tuple[str, Tuple[str, ...], Tuple[str, ...], int]
+
+
+class PlanCache:
+    """
+    LRU cache of (instruction, recent commands, pending commands, image fingerprint) ->
+    list of commands.
+    """
+
+    def __init__(self, maxsize: int = 128, max_distance: int = 3) -> None:
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self._plans: OrderedDict[PlanKey, CachedPlan] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def _observe(self, fingerprint: int) -> None:
+        """Mark the plans made for another scene than the current one."""
+        for key, plan in self._plans.items():
+            if hamming_distance(key[3], fingerprint) > self.max_distance:
+                plan.scene_changed = True
+
+    def get(
+        self,
+        instruction: str,
+        fingerprint: Optional[int],
+        pending_commands: Sequence[str] = (),
+        recent_commands: Sequence[str] = (),
+    ) -> Optional[List[str]]:
+        if fingerprint is None:
+            return None
+        self._observe(fingerprint)
+        context = (instruction, tuple(recent_commands), tuple(pending_commands))
+        best_key = None
+        best_distance = self.max_distance + 1
+        for key, plan in self._plans.items():
+            if key[:3] != context or not plan.scene_changed:
+                continue
+            distance = hamming_distance(key[3], fingerprint)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        if best_key is None:
+            return None
+        self._plans.move_to_end(best_key)
+        plan = self._plans[best_key]
+        plan.scene_changed = False
+        return list(plan.commands)
+
+    def put(
+        self,
+        instruction: str,
+        fingerprint: Optional[int],
+        commands: List[str],
+        pending_commands: Sequence[str] = (),
+        recent_commands: Sequence[str] = (),
+    ) -> None:
+        if fingerprint is None or not commands:
+            return
+        key = (instruction, tuple(recent_commands), tuple(pending_commands), fingerprint)
+        self._plans[key] = CachedPlan(commands=list(commands))
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        self._plans.clear()
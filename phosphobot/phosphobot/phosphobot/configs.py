@@ -41,6 +41,11 @@ class Configuration(BaseModel):
 
     # Profiling (creates a profile.html file in the root directory)
     PROFILE: bool = False
+    # Log the import and initialization time of each module and subsystem at startup
+    PROFILE_STARTUP: bool = False
+    # Defer the initialization of the simulation, robots and Hugging Face login
+    # until they are first used
+    LAZY_STARTUP: bool = False
 
     # Recording
     MAIN_CAMERA_ID: Optional[int] = None  # defaults to min(detected cameras)
@@ -49,12 +54,23 @@ class Configuration(BaseModel):
     ENABLE_REALSENSE: bool = True
     ENABLE_CAMERAS: bool = True
     ENABLE_CAN: bool = True  # Enable CAN scanning
+    # Share the camera frames with the processes on the same machine
+    SHM_FRAMES: bool = True
     # Enable crash reporting and usage telemetry
     CRASH_TELEMETRY: bool = False
     USAGE_TELEMETRY: bool = False
 
+    # Teleoperation: command the robot at a fixed rate from a smoothed and
+    # extrapolated target, instead of on every packet
+    TELEOP_MOTION_SMOOTHING: bool = False
+
     # How simulation should be run
     SIM_MODE: SimulationMode = SimulationMode.headless
+    # Headless simulation: set the joint states directly instead of stepping the physics
+    SIM_KINEMATIC: bool = True
+    # Headless simulation: load each robot in its own physics client. This isolates
+    # the robots but doesn't make the kinematics faster: PyBullet holds the GIL.
+    SIM_CLIENT_PER_ROBOT: bool = False
     # Only simulation: Only use the simulation
     ONLY_SIMULATION: bool = False
     SIMULATE_CAMERAS: bool = False
@@ -68,6 +84,8 @@ class Configuration(BaseModel):
 
     # Private mode
     DEFAULT_HF_PRIVATE_MODE: bool = False
+    # Maximum average upload rate of the datasets to the Hub, in bytes per second
+    HF_UPLOAD_BANDWIDTH_LIMIT: Optional[int] = None
 
     # These fields will be set after loading the user config
     DEFAULT_DATASET_NAME: str = "example_dataset"
@@ -1,5 +1,6 @@
 import asyncio
 import base64
+import time
 from typing import Dict, Optional
 
 from fastapi import (
@@ -13,6 +14,7 @@ from loguru import logger
 
 from phosphobot.camera import AllCameras, ZMQCamera, get_all_cameras
 from phosphobot.models import AddZMQCameraRequest
+from phosphobot.models.camera import FrameRingsResponse
 
 router = APIRouter(tags=["camera"])
 
@@ -21,7 +23,9 @@ router = APIRouter(tags=["camera"])
     "/video/{camera_id}",
     description="Stream video feed of the specified camera. "
     + "If no camera id is provided, the default camera is used. "
-    + "Specify a target size and quality using query parameters.",
+    + "Specify a target size and quality using query parameters. "
+    + "With adaptive (default), they are maximums: the quality, size and frame rate "
+    + "are lowered when the client can't keep up.",
     responses={
         200: {"description": "Streaming video feed of the specified camera."},
         404: {"description": "Camera not available"},
@@ -34,6 +38,7 @@ def video_feed_for_camera(
     height: Optional[int] = None,
     width: Optional[int] = None,
     quality: Optional[int] = None,
+    adaptive: bool = True,
     cameras: AllCameras = Depends(get_all_cameras),
 ) -> StreamingResponse | HTTPException:
     """
@@ -69,6 +74,7 @@ def video_feed_for_camera(
     stream_params = {
         "target_size": target_size,
         "quality": quality,
+        "adaptive": adaptive,
     }
 
     camera = cameras.get_camera_by_id(camera_id)
@@ -77,7 +83,10 @@ def video_feed_for_camera(
     logger.info(f"Starting video feed with params {stream_params}")
     return StreamingResponse(
         camera.generate_rgb_frames(
-            target_size=target_size, quality=quality, request=request
+            target_size=target_size,
+            quality=quality,
+            request=request,
+            adaptive=adaptive,
         ),
         media_type="multipart/x-mixed-replace; boundary=frame",
     )
@@ -162,6 +171,30 @@ async def get_all_camera_frames(
     return response
 
 
+@router.get(
+    "/frames/shm",
+    response_model=FrameRingsResponse,
+    description="Names and shapes of the shared memory rings where the cameras write their frames. "
+    + "Processes running on the same machine can read the frames without encoding them. "
+    + "The rings are created by this call, and the cameras stop writing to them when they are not read. "
+    + "Frames are BGR uint8. Use the /frames endpoint if the rings are not complete or can't be attached.",
+)
+async def get_frame_rings(
+    cameras: AllCameras = Depends(get_all_cameras),
+) -> FrameRingsResponse:
+    """
+    Describe the shared memory rings of the cameras.
+    """
+    cameras.request_frame_rings()
+    # The cameras create their ring at their next frame
+    deadline = time.monotonic() + 1.0
+    rings = cameras.get_frame_rings()
+    while not rings.complete and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        rings = cameras.get_frame_rings()
+    return rings
+
+
 @router.post(
     "/cameras/refresh",
     response_model=dict,
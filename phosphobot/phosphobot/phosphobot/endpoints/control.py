@@ -2,7 +2,7 @@ import asyncio
 import json
 import traceback
 from copy import copy
-from typing import Optional, cast
+from typing import List, Optional, cast
 
 import httpx
 import json_numpy  # type: ignore
@@ -13,6 +13,7 @@ from fastapi import (
     BackgroundTasks,
     Depends,
     HTTPException,
+    Query,
     WebSocket,
     WebSocketDisconnect,
 )
@@ -23,7 +24,9 @@ from supabase_auth.types import Session as SupabaseSession
 from phosphobot.ai_control import CustomAIControlSignal, setup_ai_control
 from phosphobot.camera import AllCameras, get_all_cameras
 from phosphobot.control_signal import ControlSignal
+from phosphobot.gravity_compensation import start_gravity_compensation_loop
 from phosphobot.hardware.base import BaseManipulator
+from phosphobot.joint_stream import JointStateStream, get_joint_state_stream
 from phosphobot.leader_follower import RobotPair, start_leader_follower_loop
 from phosphobot.models import (
     AIControlStatusResponse,
@@ -35,6 +38,7 @@ from phosphobot.models import (
     FeedbackRequest,
     JointsReadRequest,
     JointsReadResponse,
+    JointsStreamRequest,
     JointsWriteRequest,
     MoveAbsoluteRequest,
     RelativeEndEffectorPosition,
@@ -731,6 +735,61 @@ async def read_joints(
     )
 
 
+@router.websocket("/joints/stream/ws")
+async def joints_stream_ws(
+    websocket: WebSocket,
+    robot_ids: Optional[List[int]] = Query(None),
+    rate: float = 30.0,
+    stream: JointStateStream = Depends(get_joint_state_stream),
+) -> None:
+    """
+    Push the joints, end effector and gripper state of the robots as binary frames
+    at the requested rate. The layout of the frames is described in
+    phosphobot.joint_stream. Send a JointsStreamRequest as JSON to change the robots
+    or the rate. All the clients share the same reading of the robots.
+    """
+    try:
+        request = JointsStreamRequest(robot_ids=robot_ids, rate=rate)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    await websocket.accept()
+    subscription = stream.subscribe(robot_ids=request.robot_ids, rate=request.rate)
+
+    async def send_frames() -> None:
+        while True:
+            frame = await subscription.frames.get()
+            await websocket.send_bytes(frame)
+
+    async def receive_requests() -> None:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                request = JointsStreamRequest.model_validate_json(data)
+            except ValueError as e:
+                logger.warning(f"Invalid joint stream request: {e}")
+                continue
+            stream.update(subscription, robot_ids=request.robot_ids, rate=request.rate)
+
+    tasks = [
+        asyncio.create_task(send_frames()),
+        asyncio.create_task(receive_requests()),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exception = task.exception()
+            if exception is not None and not isinstance(
+                exception, WebSocketDisconnect
+            ):
+                logger.warning(f"Joint stream websocket closed: {exception}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        stream.unsubscribe(subscription)
+
+
 @router.post(
     "/joints/write",
     response_model=StatusResponse,
@@ -938,9 +997,10 @@ async def start_gravity(
 
     signal_gravity_control.start()
 
-    # Add background task to run the control loop
+    # Start the control loop in a dedicated thread
     background_tasks.add_task(
-        background_task_log_exceptions(robot.gravity_compensation_loop),
+        start_gravity_compensation_loop,
+        robot=robot,
         control_signal=signal_gravity_control,
     )
     return StatusResponse()
@@ -1386,7 +1446,7 @@ async def update_teleop_settings(
     """
     Update teleoperation settings.
     """
-    settings_dict = settings.model_dump()
+    settings_dict = settings.model_dump(exclude_none=True)
 
     for attr_name, value in settings_dict.items():
         if hasattr(teleop_manager, attr_name):
@@ -25,6 +25,7 @@ from phosphobot.models import (
     DatasetShuffleRequest,
     DatasetSplitRequest,
     DeleteEpisodeRequest,
+    DeleteEpisodesResponse,
     EpisodesModel,
     HFDownloadDatasetRequest,
     HFWhoamIResponse,
@@ -640,15 +641,21 @@ async def list_datasets() -> DatasetListResponse:
 
 
 @router.post("/episode/delete")
-async def delete_episode(query: DeleteEpisodeRequest) -> StatusResponse:
+async def delete_episode(query: DeleteEpisodeRequest) -> DeleteEpisodesResponse:
     """
-    Delete an episode from the dataset.
+    Delete one or several episodes from the dataset.
     Parameters:
-    - episode_id: int: The episode ID to delete.
     - path: str: The path to the dataset folder.
+    - episode_id: int: The episode ID to delete.
+    - episode_ids: List[int]: Several episode IDs to delete at once.
+    - compact: bool: Renumber the remaining episodes right away.
+
+    The deleted episodes are tombstoned: the other episodes keep their index until
+    the dataset is compacted, which is done before pushing it to the Hugging Face Hub.
     """
 
-    logger.info(f"Deleting episode {query.episode_id} from {query.path}")
+    episode_ids = query.all_episode_ids
+    logger.info(f"Deleting episodes {episode_ids} from {query.path}")
 
     try:
         dataset = LeRobotDataset(path=os.path.join(ROOT_DIR, query.path))
@@ -665,9 +672,17 @@ async def delete_episode(query: DeleteEpisodeRequest) -> StatusResponse:
             detail="This feature is not available for v2 datasets. Please use the v2.1 dataset format.",
         )
 
-    # Delete the data file
-    dataset.delete_episode(episode_id=query.episode_id, update_hub=True)
-    return StatusResponse(status="ok")
+    try:
+        deleted_episodes = dataset.delete_episodes(
+            episode_ids=episode_ids, compact=query.compact
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return DeleteEpisodesResponse(
+        deleted_episodes=deleted_episodes,
+        compacted=not dataset.load_tombstones(),
+    )
 
 
 @router.post("/dataset/sync")
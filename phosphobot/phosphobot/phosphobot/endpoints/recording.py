@@ -17,6 +17,7 @@ from phosphobot.models import (
     BaseDataset,
     BaseEpisode,
     InfoModel,
+    RecordingMetricsResponse,
     RecordingPlayRequest,
     RecordingStartRequest,
     RecordingStopRequest,
@@ -286,6 +287,27 @@ async def stop_recording_episode(
     )
 
 
+@router.get("/recording/metrics", response_model=RecordingMetricsResponse)
+async def get_recording_metrics(
+    recorder: Recorder = Depends(get_recorder),
+) -> RecordingMetricsResponse:
+    """
+    Get the per-stage timings of the recording loop for the current or last episode:
+    latency percentiles and histograms, missed deadlines and dropped frames.
+    """
+    if recorder.metrics is None:
+        raise HTTPException(
+            status_code=400,
+            detail="No recording metrics available. Start a recording first.",
+        )
+
+    return RecordingMetricsResponse(
+        is_recording=recorder.is_recording,
+        episode_index=recorder.episode.episode_index if recorder.episode else None,
+        **recorder.metrics.summary(),
+    )
+
+
 @router.post("/recording/play", response_model=StatusResponse)
 async def play_recording(
     query: RecordingPlayRequest,
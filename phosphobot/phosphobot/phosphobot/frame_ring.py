@@ -0,0 +1,328 @@
+"""
+Shared memory ring buffer of camera frames.
+
+The camera thread of the server writes each frame it grabs in the next slot of the ring.
+Processes running on the same machine (eg: the chat agent, local scripts) attach to the
+ring by name and read the latest frame without going through HTTP, JPEG and base64.
+
+The rings are only created once a reader asked for them (/frames/shm), and the readers
+stamp the ring each time they read. The camera stops copying its frames when nobody read
+them for FRAME_RING_READER_TIMEOUT_S, and removes the ring after FRAME_RING_IDLE_S.
+
+Layout of the shared memory block:
+- header: magic, version, number of slots, height, width, channels (uint32)
+- sequence number of the latest complete frame (uint64, 0 when no frame was written)
+- time of the last read by a reader (float64, time.time() clock)
+- sequence number and timestamp of the frame in each slot (uint64, float64)
+- the slots: (slots, height, width, channels) uint8, BGR like OpenCV frames
+
+The writer zeroes the sequence number of a slot before overwriting it. A reader checks
+that the sequence number of the slot didn't change while it copied the frame.
+"""
+
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from phosphobot.models.camera import FrameRingInfo, FrameRingsResponse
+
+FRAME_RING_MAGIC = 0x52464850  # "PHFR"
+FRAME_RING_VERSION = 2
+_HEADER_SIZE = 64
+# The writer skips the frames when no reader read the ring for this long
+FRAME_RING_READER_TIMEOUT_S = 10.0
+# and removes the ring after this long
+FRAME_RING_IDLE_S = 60.0
+# Shared memory blocks are listed there on Linux
+_SHM_FOLDER = "/dev/shm"
+
+
+def _aligned(size: int, alignment: int = 64) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing block without registering it to the resource tracker of this
+    process. Otherwise, the block is unlinked when the reader exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            pass
+        return shm
+
+
+class FrameRing:
+    """
+    Single writer, multiple readers ring of frames of a fixed shape.
+
+    Use FrameRing.create in the camera process and FrameRing.attach in the readers.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        self.closed = False
+
+        header = np.ndarray((8,), dtype=np.uint32, buffer=shm.buf, offset=0)
+        if header[0] != FRAME_RING_MAGIC or header[1] != FRAME_RING_VERSION:
+            raise ValueError(f"{shm.name} is not a frame ring")
+        self.slots = int(header[2])
+        self.shape: Tuple[int, int, int] = (
+            int(header[3]),
+            int(header[4]),
+            int(header[5]),
+        )
+
+        self._latest_seq = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=32)
+        self._last_read = np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=40)
+        self._slot_seq = np.ndarray(
+            (self.slots,), dtype=np.uint64, buffer=shm.buf, offset=_HEADER_SIZE
+        )
+        self._slot_timestamp = np.ndarray(
+            (self.slots,),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=_HEADER_SIZE + 8 * self.slots,
+        )
+        self._frames = np.ndarray(
+            (self.slots, *self.shape),
+            dtype=np.uint8,
+            buffer=shm.buf,
+            offset=_aligned(_HEADER_SIZE + 16 * self.slots),
+        )
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(
+        cls, name: str, shape: Tuple[int, int, int], slots: int = 4
+    ) -> "FrameRing":
+        """
+        Create the ring. If a block with the same name exists (eg: left by a crashed
+        server), it is replaced. It counts as read now: it is created for a reader.
+        """
+        height, width, channels = shape
+        size = _aligned(_HEADER_SIZE + 16 * slots) + slots * height * width * channels
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = _open_untracked(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((8,), dtype=np.uint32, buffer=shm.buf, offset=0)
+        header[:] = [
+            FRAME_RING_MAGIC,
+            FRAME_RING_VERSION,
+            slots,
+            height,
+            width,
+            channels,
+            0,
+            0,
+        ]
+        np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=32)[0] = 0
+        np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=40)[0] = time.time()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        """
+        Attach to the ring created by another process.
+
+        Raises FileNotFoundError if the ring doesn't exist on this machine.
+        """
+        shm = _open_untracked(name)
+        try:
+            return cls(shm, owner=False)
+        except Exception:
+            shm.close()
+            raise
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._latest_seq[0])
+
+    @property
+    def idle_s(self) -> float:
+        """Seconds since a reader last read the ring."""
+        return time.time() - float(self._last_read[0])
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Copy the frame in the next slot. Returns its sequence number.
+        """
+        seq = self.latest_seq + 1
+        slot = seq % self.slots
+        # Readers of this slot will see that it changed
+        self._slot_seq[slot] = 0
+        self._frames[slot] = frame
+        self._slot_timestamp[slot] = time.time() if timestamp is None else timestamp
+        self._slot_seq[slot] = seq
+        self._latest_seq[0] = seq
+        return seq
+
+    def read(
+        self, copy: bool = True, max_retries: int = 3
+    ) -> Optional[Tuple[np.ndarray, float, int]]:
+        """
+        Read the latest frame. Returns (frame, timestamp, sequence number), or None if
+        no frame was written yet.
+
+        With copy=False, the frame is a view on the shared memory: it is overwritten
+        after slots - 1 new frames. Check is_current(seq) after using it.
+        """
+        if not self.owner:
+            # Tell the writer that the frames are used
+            self._last_read[0] = time.time()
+        for _ in range(max_retries):
+            seq = self.latest_seq
+            if seq == 0:
+                return None
+            slot = seq % self.slots
+            if int(self._slot_seq[slot]) != seq:
+                # The writer wrapped around the ring in the meantime
+                continue
+            timestamp = float(self._slot_timestamp[slot])
+            frame = self._frames[slot].copy() if copy else self._frames[slot]
+            if not copy or int(self._slot_seq[slot]) == seq:
+                return frame, timestamp, seq
+        return None
+
+    def wait_for_frame(
+        self, timeout: float, max_age_s: float
+    ) -> Optional[Tuple[np.ndarray, float, int]]:
+        """
+        Read the latest frame without copy, waiting up to timeout for a frame newer
+        than max_age_s. The writer resumes at its next frame after a read.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            latest = self.read(copy=False)
+            if latest is not None and time.time() - latest[1] <= max_age_s:
+                return latest
+            if time.monotonic() >= deadline:
+                return latest
+            time.sleep(0.005)
+
+    def is_current(self, seq: int) -> bool:
+        """
+        Whether the slot of the frame seq still holds this frame.
+        """
+        return int(self._slot_seq[seq % self.slots]) == seq
+
+    def close(self) -> None:
+        """
+        Detach from the ring. The owner also removes it.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        # Drop the views before closing the memory map
+        del self._latest_seq, self._last_read, self._slot_seq
+        del self._slot_timestamp, self._frames
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def unlink_stale_rings(prefix: str) -> List[str]:
+    """
+    Remove the rings whose name starts with prefix, eg: left by a server that crashed.
+    Returns their names. Only on Linux, elsewhere they are replaced when created again.
+    """
+    if not os.path.isdir(_SHM_FOLDER):
+        return []
+    removed = []
+    for name in os.listdir(_SHM_FOLDER):
+        if not name.startswith(prefix):
+            continue
+        try:
+            os.remove(os.path.join(_SHM_FOLDER, name))
+            removed.append(name)
+        except OSError:
+            pass
+    return removed
+
+
+class LocalFrameReader:
+    """
+    Read the latest frame of every camera of a local phosphobot server, from the rings
+    listed by its /frames/shm endpoint. The keys and the frames are the same as the
+    /frames endpoint, before the JPEG encoding: BGR uint8, stereo cameras split in
+    {camera_id}_left and {camera_id}_right.
+
+    Raises FileNotFoundError if the rings can't be attached (eg: the server runs on
+    another machine).
+    """
+
+    def __init__(self, rings: FrameRingsResponse) -> None:
+        self.rings: List[Tuple[FrameRingInfo, FrameRing]] = []
+        try:
+            for info in rings.rings:
+                self.rings.append((info, FrameRing.attach(info.name)))
+        except Exception:
+            self.close()
+            raise
+
+    def read(
+        self,
+        resize: Optional[Tuple[int, int]] = None,
+        max_age_s: float = 1.0,
+        wait_s: float = 0.5,
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Returns None if a camera has no frame newer than max_age_s after wait_s: the
+        server stopped or the camera doesn't grab frames anymore. The wait only happens
+        after FRAME_RING_READER_TIMEOUT_S without reads, when the camera paused its ring.
+        """
+        frames: Dict[str, np.ndarray] = {}
+        for info, ring in self.rings:
+            latest = ring.wait_for_frame(timeout=wait_s, max_age_s=max_age_s)
+            if latest is None:
+                return None
+            frame, timestamp, seq = latest
+            if time.time() - timestamp > max_age_s:
+                return None
+
+            if info.camera_type == "stereo":
+                width = frame.shape[1]
+                views = {
+                    f"{info.camera_id}_left": frame[:, : width // 2],
+                    f"{info.camera_id}_right": frame[:, width // 2 :],
+                }
+            else:
+                views = {f"{info.camera_id}": frame}
+            for key, view in views.items():
+                # The resize reads the shared memory directly, without an extra copy
+                if resize is not None:
+                    frames[key] = cv2.resize(view, resize, interpolation=cv2.INTER_AREA)
+                else:
+                    frames[key] = view.copy()
+
+            if not ring.is_current(seq):
+                # The writer wrapped around the ring while we were reading
+                return None
+        return frames
+
+    def close(self) -> None:
+        for _, ring in self.rings:
+            ring.close()
+        self.rings = []
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.control_signal import ControlSignal
+from phosphobot.hardware import SO100Hardware
+from phosphobot.metrics import (
+    RollingWindow,
+    gravity_compensation_loop_seconds,
+    gravity_compensation_overruns_total,
+    gravity_compensation_period_seconds,
+)
+from phosphobot.utils import background_task_log_exceptions
+
+# PID gains and compensation gain of each joint, for a 6V power supply
+P_GAINS = [3, 6, 6, 3, 3, 3]
+D_GAINS = [9, 9, 9, 9, 9, 9]
+DEFAULT_P_GAINS = [12, 20, 20, 20, 20, 20]
+DEFAULT_D_GAINS = [36, 36, 36, 32, 32, 32]
+ALPHA = np.array([0, 0.2, 0.2, 0.1, 0.2, 0.2])
+
+
+class GravityCompensationThread(threading.Thread):
+    """
+    A dedicated thread to run the gravity compensation loop of a SO-100.
+
+    The loop doesn't touch the asyncio event loop nor the simulation: the gravity
+    torques are computed with NumPy from the URDF inertials, and the iterations are
+    scheduled on absolute deadlines, so the HTTP traffic doesn't add jitter.
+    """
+
+    def __init__(
+        self,
+        robot: SO100Hardware,
+        control_signal: ControlSignal,
+        frequency: float = 200.0,
+    ) -> None:
+        super().__init__(name="gravity-compensation")
+        self.robot = robot
+        self.control_signal = control_signal
+        self.loop_period = 1 / frequency
+        # Timing of the last iterations, in seconds
+        self.loop_durations = RollingWindow(1000)
+        self.periods = RollingWindow(1000)
+        self.overruns = 0
+        self._default_p_gains: List[int] = DEFAULT_P_GAINS
+        self._default_d_gains: List[int] = DEFAULT_D_GAINS
+
+    def _raise_priority(self) -> None:
+        """
+        Best effort: ask the OS for a real-time priority for this thread.
+        This needs the CAP_SYS_NICE capability on Linux.
+        """
+        try:
+            os.sched_setscheduler(
+                threading.get_native_id(),
+                os.SCHED_FIFO,
+                os.sched_param(os.sched_get_priority_min(os.SCHED_FIFO)),
+            )
+            logger.debug("Gravity compensation thread runs with SCHED_FIFO priority")
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Gravity compensation thread keeps default priority: {e}")
+
+    def _setup_robot(self) -> bool:
+        """Sets the PID gains of the compensation. Returns False if not possible."""
+        current_voltage = self.robot.current_voltage()
+        if current_voltage is None:
+            logger.warning(
+                "Unable to read motor voltage. Check that your robot is plugged to power."
+            )
+            return False
+        voltage = "6V" if np.mean(current_voltage) < 9.0 else "12V"
+
+        p_gains, d_gains = P_GAINS, D_GAINS
+        if voltage == "12V":
+            p_gains = [int(p / 2) for p in p_gains]
+            d_gains = [int(d / 2) for d in d_gains]
+            self._default_p_gains = [6, 6, 6, 10, 10, 10]
+            self._default_d_gains = [30, 15, 15, 30, 30, 30]
+
+        self.robot.enable_torque()
+        for i in range(6):
+            self.robot._set_pid_gains_motors(
+                servo_id=i + 1, p_gain=p_gains[i], i_gain=0, d_gain=d_gains[i]
+            )
+            time.sleep(0.05)
+        return True
+
+    def _cleanup_robot(self) -> None:
+        """Resets the PID gains to their default values."""
+        for i in range(6):
+            self.robot._set_pid_gains_motors(
+                servo_id=i + 1,
+                p_gain=self._default_p_gains[i],
+                i_gain=0,
+                d_gain=self._default_d_gains[i],
+            )
+            time.sleep(0.05)
+
+    def _step(self) -> None:
+        """Commands the joints to their position plus the gravity torques."""
+        pos_rad = self.robot.read_joints_position(unit="rad")
+        if np.isnan(pos_rad).any():
+            logger.warning("Joint positions contain NaN values. Skipping.")
+            return
+        tau_g = self.robot.gravity_torques(pos_rad)
+        num_joints = len(pos_rad)
+        theta_des_rad = pos_rad + ALPHA[:num_joints] * tau_g[:num_joints]
+        self.robot.write_joint_positions(theta_des_rad.tolist(), unit="rad")
+
+    def run(self) -> None:
+        last_start_time: Optional[float] = None
+        try:
+            # Inside the try: the gains are reset even if the setup fails halfway
+            if not self._setup_robot():
+                self.control_signal.stop()
+                return
+            self._raise_priority()
+            logger.info(
+                f"Starting gravity compensation of {self.robot.name} at "
+                f"{1 / self.loop_period:.0f} Hz"
+            )
+
+            deadline = time.perf_counter()
+            while self.control_signal.is_in_loop():
+                start_time = time.perf_counter()
+                if last_start_time is not None:
+                    self.periods.add(start_time - last_start_time)
+                    gravity_compensation_period_seconds.observe(
+                        start_time - last_start_time
+                    )
+                last_start_time = start_time
+
+                self._step()
+
+                end_time = time.perf_counter()
+                self.loop_durations.add(end_time - start_time)
+                gravity_compensation_loop_seconds.observe(end_time - start_time)
+
+                deadline += self.loop_period
+                if end_time > deadline:
+                    # Missed the deadline: restart the schedule from now instead of
+                    # running the late iterations back to back
+                    self.overruns += 1
+                    gravity_compensation_overruns_total.inc()
+                    deadline = end_time
+                else:
+                    time.sleep(deadline - end_time)
+        except Exception as e:
+            logger.error(f"Error in gravity compensation loop: {e}")
+            self.control_signal.stop()
+        finally:
+            self._cleanup_robot()
+            logger.info(f"Gravity control stopped. Timing: {self.timing_summary()}")
+
+    def timing_summary(self) -> dict:
+        """Statistics of the last iterations, in milliseconds."""
+        return {
+            "loop_ms": self.loop_durations.summary(scale=1000),
+            "period_ms": self.periods.summary(scale=1000),
+            "overruns": self.overruns,
+        }
+
+
+@background_task_log_exceptions
+async def start_gravity_compensation_loop(
+    robot: SO100Hardware,
+    control_signal: ControlSignal,
+) -> None:
+    """
+    FastAPI background task that starts the gravity compensation loop in a
+    dedicated thread, and returns right away.
+    """
+    control_thread = GravityCompensationThread(
+        robot=robot, control_signal=control_signal
+    )
+    control_thread.start()
+    logger.info("Gravity compensation thread has been started.")
@@ -78,6 +78,8 @@ class BaseManipulator(BaseRobot):
     is_connected: bool = False
     is_moving: bool = False
     _add_debug_lines: bool = False
+    # Whether self.sim is a physics client of this robot only
+    _owns_sim_client: bool = False
 
     # Gripper status. This is the value of the last closing command.
     GRIPPER_JOINT_INDEX: int
@@ -230,6 +232,10 @@ class BaseManipulator(BaseRobot):
         
         # Only load URDF in simulation if we're in simulation mode or only_simulation is True
         if only_simulation or cfg.ONLY_SIMULATION:
+            if cfg.SIM_CLIENT_PER_ROBOT:
+                # The kinematics of this robot don't contend with the other robots
+                self.sim = self.sim.create_client()
+                self._owns_sim_client = self.sim is not get_sim()
             if reset_simulation_bool:
                 self.sim.reset()
 
@@ -327,6 +333,15 @@ class BaseManipulator(BaseRobot):
         else:
             self.config = None
 
+    def close_sim_client(self) -> None:
+        """
+        Stop the physics client of this robot, if it has its own. The shared
+        simulation keeps running.
+        """
+        if self._owns_sim_client:
+            self.sim.stop()
+            self._owns_sim_client = False
+
     def __del__(self) -> None:
         try:
             loop = asyncio.get_event_loop()
@@ -786,10 +801,7 @@ class BaseManipulator(BaseRobot):
         """
         if self.is_connected:
             q_target = self._radians_vec_to_motor_units(q_target_rad)
-            if (
-                self.write_group_motor_position.__qualname__
-                != BaseManipulator.write_group_motor_position.__qualname__
-            ):
+            if self._has_group_write():
                 # Use the batched motor write if available
                 self.write_group_motor_position(q_target, enable_gripper)
             else:
@@ -803,6 +815,20 @@ class BaseManipulator(BaseRobot):
                     self.write_motor_position(servo_id=servo_id, units=q_target[i])
                     time.sleep(0.01)
 
+        self._move_joints_in_sim(q_target_rad, enable_gripper)
+
+    def _has_group_write(self) -> bool:
+        """
+        Whether the robot writes all its motors in a single transaction.
+        """
+        return (
+            self.write_group_motor_position.__qualname__
+            != BaseManipulator.write_group_motor_position.__qualname__
+        )
+
+    def _move_joints_in_sim(
+        self, q_target_rad: np.ndarray, enable_gripper: bool
+    ) -> None:
         # Filter out the gripper_joint_index
         if not enable_gripper:
             joint_indices = [
@@ -823,6 +849,54 @@ class BaseManipulator(BaseRobot):
         # Update the simulation
         self.sim.step()
 
+    def set_motors_positions_and_gripper(
+        self, q_target_rad: np.ndarray, open_command: float
+    ) -> None:
+        """
+        Same as control_gripper(open_command) followed by set_motors_positions,
+        but the gripper and the joint goals are sent in a single group write.
+
+        The gripper value of q_target_rad is replaced by the open_command.
+        Robots without a group write, or with their own way of moving the joints
+        or the gripper, fall back to the two calls.
+        """
+        overridden = any(
+            getattr(type(self), name) is not getattr(BaseManipulator, name)
+            for name in (
+                "set_motors_positions",
+                "control_gripper",
+                "write_gripper_command",
+                "_radians_vec_to_motor_units",
+            )
+        )
+        if (
+            overridden
+            or not self.is_connected
+            or self.config is None
+            or not self._has_group_write()
+            or len(q_target_rad) <= self.GRIPPER_JOINT_INDEX
+        ):
+            self.control_gripper(open_command=open_command)
+            self.set_motors_positions(q_target_rad=q_target_rad, enable_gripper=False)
+            return
+
+        # Same clamping as control_gripper: don't close further on a gripped object
+        self.update_object_gripping_status()
+        if not self.is_object_gripped:
+            open_command_clipped = np.clip(open_command, 0, 1)
+        else:
+            open_command_clipped = np.clip(open_command, self.closing_gripper_value, 1)
+        self.closing_gripper_value = open_command_clipped
+
+        q_target = self._radians_vec_to_motor_units(q_target_rad)
+        q_target[self.GRIPPER_JOINT_INDEX] = self._gripper_command_to_motor_units(
+            open_command_clipped
+        )
+        self.write_group_motor_position(q_target, enable_gripper=True)
+
+        self.move_gripper_in_sim(open=open_command_clipped)
+        self._move_joints_in_sim(q_target_rad, enable_gripper=False)
+
     def read_gripper_command(self) -> float:
         """
         Read if gripper is open or closed.
@@ -916,14 +990,11 @@ class BaseManipulator(BaseRobot):
             # Write the joint positions
             self.set_motors_positions(q_target_rad=np_angles_rad, enable_gripper=True)
 
-    def write_gripper_command(self, command: float) -> None:
+    def _gripper_command_to_motor_units(self, command: float) -> int:
         """
-        Open or close the gripper.
-
-        command: 0 to close, 1 to open
+        Convert an open command of the gripper (0 to close, 1 to open) to the
+        position of the gripper motor.
         """
-        if not self.is_connected:
-            return
         if self.config is None:
             raise ValueError(
                 "Robot configuration is not set. Run the calibration first."
@@ -934,9 +1005,19 @@ class BaseManipulator(BaseRobot):
             self.config.servos_calibration_position[-1], 0, self.RESOLUTION
         )
         close_position = np.clip(self.config.servos_offsets[-1], 0, self.RESOLUTION)
-        command = int(close_position + (open_position - close_position) * command)
+        units = int(close_position + (open_position - close_position) * command)
+        return int(np.clip(units, 0, self.RESOLUTION))
+
+    def write_gripper_command(self, command: float) -> None:
+        """
+        Open or close the gripper.
+
+        command: 0 to close, 1 to open
+        """
+        if not self.is_connected:
+            return
         self.write_motor_position(
-            self.gripper_servo_id, np.clip(command, 0, self.RESOLUTION)
+            self.gripper_servo_id, self._gripper_command_to_motor_units(command)
         )
         self.update_object_gripping_status()
 
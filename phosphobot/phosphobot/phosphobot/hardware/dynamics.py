@@ -0,0 +1,290 @@
+"""
+Gravity torques of a fixed base robot, computed with NumPy from the inertials of its
+URDF, without a physics engine.
+
+This is the static case of the recursive Newton-Euler algorithm: with zero joint
+velocities and accelerations, the forward pass only propagates the link poses, and
+the backward pass accumulates the mass and the first mass moment of each subtree.
+The torque of a revolute joint is the moment of the weight of its subtree around
+its axis. The URDF is parsed once: a call only does the two passes.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+MOVABLE_JOINT_TYPES = ("revolute", "continuous", "prismatic")
+
+
+def _floats(value: Optional[str], default: Sequence[float]) -> np.ndarray:
+    if value is None:
+        return np.array(default, dtype=np.float64)
+    return np.array([float(x) for x in value.split()], dtype=np.float64)
+
+
+def rpy_to_matrix(rpy: np.ndarray) -> np.ndarray:
+    """
+    Rotation matrix of URDF roll, pitch, yaw angles (fixed axes X, Y, Z).
+    """
+    roll, pitch, yaw = rpy
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    return np.array(
+        [
+            [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+            [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+            [-sp, cp * sr, cp * cr],
+        ]
+    )
+
+
+def quaternion_to_matrix(quaternion: Sequence[float]) -> np.ndarray:
+    """
+    Rotation matrix of a [x, y, z, w] quaternion. The quaternion is normalized.
+    """
+    x, y, z, w = np.asarray(quaternion, dtype=np.float64) / np.linalg.norm(
+        quaternion
+    )
+    return np.array(
+        [
+            [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+            [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+            [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+        ]
+    )
+
+
+class GravityModel:
+    """
+    Gravity torques of the movable joints of a URDF, in the order of the PyBullet
+    joint indices (the order of the child links in the file).
+
+    Example:
+    ```python
+    model = GravityModel.from_urdf(SO100Hardware.URDF_FILE_PATH, [0, 0, 1, 1])
+    tau_g = model.gravity_torques(joint_positions_rad)
+    ```
+    """
+
+    def __init__(
+        self,
+        joint_types: List[str],
+        parents: List[int],
+        origin_rotations: np.ndarray,
+        origin_translations: np.ndarray,
+        axes: np.ndarray,
+        masses: np.ndarray,
+        centers_of_mass: np.ndarray,
+        movable: List[int],
+        base_rotation: np.ndarray,
+        gravity: np.ndarray,
+    ) -> None:
+        """
+        The joints are in topological order: the parent joint of joint i is
+        parents[i] (-1 for the base). The mass and center of mass of joint i are the
+        ones of its child link. movable[k] is the joint of the k-th degree of freedom.
+        """
+        self.joint_types = joint_types
+        self.parents = parents
+        self.origin_rotations = origin_rotations
+        self.origin_translations = origin_translations
+        self.axes = axes
+        self.masses = masses
+        self.centers_of_mass = centers_of_mass
+        self.movable = movable
+        self.base_rotation = base_rotation
+        self.gravity = gravity
+        # Degree of freedom of each joint, -1 for the fixed joints
+        self._dof = [-1] * len(joint_types)
+        for dof, joint in enumerate(movable):
+            self._dof[joint] = dof
+
+        # Precompiled transforms
+        n = len(joint_types)
+        self._identity = np.eye(4)
+        self._base_frame = np.eye(4)
+        self._base_frame[:3, :3] = base_rotation
+        self._origin_frames = np.tile(np.eye(4), (n, 1, 1))
+        self._origin_frames[:, :3, :3] = origin_rotations
+        self._origin_frames[:, :3, 3] = origin_translations
+        self._skew_axes = np.zeros((n, 4, 4))
+        for i, (x, y, z) in enumerate(axes):
+            self._skew_axes[i, :3, :3] = [[0, -z, y], [z, 0, -x], [-y, x, 0]]
+        self._skew_axes_squared = self._skew_axes @ self._skew_axes
+        self._com_homogeneous = np.hstack([centers_of_mass, np.ones((n, 1))])
+        self._is_revolute = [t in ("revolute", "continuous") for t in joint_types]
+        self._is_prismatic_dof = np.array(
+            [joint_types[i] == "prismatic" for i in movable], dtype=bool
+        )
+
+    @property
+    def num_dofs(self) -> int:
+        return len(self.movable)
+
+    @classmethod
+    def from_urdf(
+        cls,
+        urdf_path: str,
+        base_orientation: Optional[Sequence[float]] = None,
+        gravity: Sequence[float] = (0.0, 0.0, -9.81),
+    ) -> "GravityModel":
+        """
+        Args:
+            urdf_path: Path to the URDF file.
+            base_orientation: [x, y, z, w] quaternion of the base in the world.
+            gravity: Gravity vector in the world.
+        """
+        root = ET.parse(urdf_path).getroot()
+
+        link_order: Dict[str, int] = {}
+        inertials: Dict[str, tuple] = {}
+        for link in root.findall("link"):
+            name = link.attrib["name"]
+            link_order[name] = len(link_order)
+            inertial = link.find("inertial")
+            if inertial is None:
+                inertials[name] = (0.0, np.zeros(3))
+                continue
+            mass = inertial.find("mass")
+            origin = inertial.find("origin")
+            inertials[name] = (
+                float(mass.attrib["value"]) if mass is not None else 0.0,
+                _floats(
+                    origin.attrib.get("xyz") if origin is not None else None, [0, 0, 0]
+                ),
+            )
+
+        joints_by_parent: Dict[str, List[ET.Element]] = {}
+        child_links = set()
+        for joint in root.findall("joint"):
+            parent = joint.find("parent").attrib["link"]  # type: ignore[union-attr]
+            joints_by_parent.setdefault(parent, []).append(joint)
+            child = joint.find("child").attrib["link"]  # type: ignore[union-attr]
+            child_links.add(child)
+
+        roots = [name for name in link_order if name not in child_links]
+        if len(roots) != 1:
+            raise ValueError(f"Expected a single root link in {urdf_path}: {roots}")
+
+        # Breadth first: the parent of a joint always comes before the joint
+        joint_types: List[str] = []
+        parents: List[int] = []
+        rotations, translations, axes, masses, coms = [], [], [], [], []
+        child_order: List[int] = []
+        queue = [(roots[0], -1)]
+        while queue:
+            link_name, parent_index = queue.pop(0)
+            for joint in joints_by_parent.get(link_name, []):
+                origin = joint.find("origin")
+                axis = joint.find("axis")
+                child = joint.find("child").attrib["link"]  # type: ignore[union-attr]
+                axis_xyz = _floats(
+                    axis.attrib.get("xyz") if axis is not None else None, [1, 0, 0]
+                )
+                mass, com = inertials[child]
+
+                joint_types.append(joint.attrib["type"])
+                parents.append(parent_index)
+                rotations.append(
+                    rpy_to_matrix(
+                        _floats(
+                            origin.attrib.get("rpy") if origin is not None else None,
+                            [0, 0, 0],
+                        )
+                    )
+                )
+                translations.append(
+                    _floats(
+                        origin.attrib.get("xyz") if origin is not None else None,
+                        [0, 0, 0],
+                    )
+                )
+                axes.append(axis_xyz / np.linalg.norm(axis_xyz))
+                masses.append(mass)
+                coms.append(com)
+                child_order.append(link_order[child])
+                queue.append((child, len(joint_types) - 1))
+
+        movable = sorted(
+            (i for i, t in enumerate(joint_types) if t in MOVABLE_JOINT_TYPES),
+            key=lambda i: child_order[i],
+        )
+        return cls(
+            joint_types=joint_types,
+            parents=parents,
+            origin_rotations=np.array(rotations),
+            origin_translations=np.array(translations),
+            axes=np.array(axes),
+            masses=np.array(masses),
+            centers_of_mass=np.array(coms),
+            movable=movable,
+            base_rotation=quaternion_to_matrix(base_orientation)
+            if base_orientation is not None
+            else np.eye(3),
+            gravity=np.asarray(gravity, dtype=np.float64),
+        )
+
+    def gravity_torques(
+        self, positions: Union[Sequence[float], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Joint torques (N.m, or N for the prismatic joints) that hold the robot still
+        at the given joint positions, against gravity.
+
+        Args:
+            positions: Position of each degree of freedom, in radians (or meters).
+                Missing positions are 0.
+        """
+        n = len(self.joint_types)
+        q_values = np.asarray(positions, dtype=np.float64)
+
+        # Forward pass: homogeneous transforms of the joint frames and child links
+        joint_frames = np.empty((n, 4, 4))
+        link_frames = np.empty((n, 4, 4))
+        for i in range(n):
+            parent = self.parents[i]
+            parent_frame = self._base_frame if parent < 0 else link_frames[parent]
+            joint_frames[i] = parent_frame @ self._origin_frames[i]
+
+            dof = self._dof[i]
+            q = q_values[dof] if 0 <= dof < q_values.size else 0.0
+            if self._is_revolute[i]:
+                # Rodrigues' formula: I + sin(q) K + (1 - cos(q)) K^2
+                motion = (
+                    self._identity
+                    + np.sin(q) * self._skew_axes[i]
+                    + (1 - np.cos(q)) * self._skew_axes_squared[i]
+                )
+                link_frames[i] = joint_frames[i] @ motion
+            elif self.joint_types[i] == "prismatic":
+                link_frames[i] = joint_frames[i]
+                link_frames[i, :3, 3] += joint_frames[i, :3, :3] @ self.axes[i] * q
+            else:
+                link_frames[i] = joint_frames[i]
+
+        # Backward pass: mass and first mass moment of the subtree of each joint
+        centers_of_mass = np.einsum("nij,nj->ni", link_frames, self._com_homogeneous)
+        subtree_mass = self.masses.copy()
+        subtree_moment = self.masses[:, None] * centers_of_mass[:, :3]
+        for i in range(n - 1, -1, -1):
+            parent = self.parents[i]
+            if parent >= 0:
+                subtree_mass[parent] += subtree_mass[i]
+                subtree_moment[parent] += subtree_moment[i]
+
+        movable = self.movable
+        rotations = joint_frames[movable, :3, :3]
+        axes = np.einsum("nij,nj->ni", rotations, self.axes[movable])
+        levers = (
+            subtree_moment[movable]
+            - subtree_mass[movable, None] * joint_frames[movable, :3, 3]
+        )
+        torques = -np.einsum("ni,ni->n", axes, np.cross(levers, self.gravity))
+        prismatic = self._is_prismatic_dof
+        if prismatic.any():
+            torques[prismatic] = -subtree_mass[movable][prismatic] * (
+                axes[prismatic] @ self.gravity
+            )
+        return torques
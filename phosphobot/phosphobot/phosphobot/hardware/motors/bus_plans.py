@@ -0,0 +1,210 @@
+"""
+Precompiled transactions of the Feetech and Dynamixel motor buses.
+
+A plan is built once per (data_name, motor set): the sync read or write group of the
+SDK with its params, the motor ids, the control table address and a preallocated
+output array. The calibration of a motor set is compiled into arrays, so that it is
+applied to all the motors at once.
+"""
+
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SyncReadPlan:
+    """
+    A GroupSyncRead compiled for a data_name and a set of motors.
+    """
+
+    def __init__(
+        self,
+        sdk: ModuleType,
+        port_handler,
+        packet_handler,
+        data_name: str,
+        motor_names: Sequence[str],
+        motor_ids: Sequence[int],
+        motor_positions: Sequence[int],
+        addr: int,
+        bytes: int,
+    ) -> None:
+        """
+        :param motor_positions: Index of each motor in the motors of the bus.
+        """
+        self.data_name = data_name
+        self.motor_names = list(motor_names)
+        self.motor_ids = list(motor_ids)
+        self.motor_positions = np.asarray(motor_positions, dtype=np.intp)
+        self.addr = addr
+        self.bytes = bytes
+        self.comm_success = sdk.COMM_SUCCESS
+        self.group = sdk.GroupSyncRead(port_handler, packet_handler, addr, bytes)
+        for motor_id in self.motor_ids:
+            self.group.addParam(motor_id)
+        # Filled by each read
+        self.values = np.zeros(len(self.motor_ids), dtype=np.int64)
+        self.nb_calls = 0
+        self.last_duration_s = 0.0
+
+    def read(self, num_retry: int) -> Tuple[int, np.ndarray]:
+        """
+        Run the transaction. Returns the communication result of the SDK and the
+        values, in the order of the motors. The values array is reused by the next read.
+        """
+        comm = self.comm_success
+        for _ in range(num_retry):
+            comm = self.group.txRxPacket()
+            if comm == self.comm_success:
+                break
+        if comm != self.comm_success:
+            return comm, self.values
+
+        get_data = self.group.getData
+        self.values[:] = [
+            get_data(motor_id, self.addr, self.bytes) for motor_id in self.motor_ids
+        ]
+        self.nb_calls += 1
+        return comm, self.values
+
+
+class SyncWritePlan:
+    """
+    A GroupSyncWrite compiled for a data_name and a set of motors. The params are
+    added by the first write and changed by the next ones.
+    """
+
+    def __init__(
+        self,
+        sdk: ModuleType,
+        port_handler,
+        packet_handler,
+        data_name: str,
+        motor_names: Sequence[str],
+        motor_ids: Sequence[int],
+        addr: int,
+        bytes: int,
+    ) -> None:
+        self.data_name = data_name
+        self.motor_names = list(motor_names)
+        self.motor_ids = list(motor_ids)
+        self.addr = addr
+        self.bytes = bytes
+        self.comm_success = sdk.COMM_SUCCESS
+        self.group = sdk.GroupSyncWrite(port_handler, packet_handler, addr, bytes)
+        self._params_added = False
+        self.nb_calls = 0
+        self.last_duration_s = 0.0
+
+    def write(
+        self,
+        values: np.ndarray,
+        to_bytes: Callable[[int, int], list],
+        num_retry: int = 1,
+    ) -> int:
+        """
+        Send the values, in the order of the motors. to_bytes(value, bytes) converts
+        a value to the params of the SDK. Returns the communication result.
+        """
+        for motor_id, value in zip(self.motor_ids, values.tolist(), strict=True):
+            data = to_bytes(int(value), self.bytes)
+            if self._params_added:
+                self.group.changeParam(motor_id, data)
+            else:
+                self.group.addParam(motor_id, data)
+        self._params_added = True
+
+        comm = self.comm_success
+        for _ in range(num_retry):
+            comm = self.group.txPacket()
+            if comm == self.comm_success:
+                break
+        self.nb_calls += 1
+        return comm
+
+
+class CalibrationPlan:
+    """
+    The calibration of a set of motors, compiled into an affine transform per motor:
+    calibrated = steps * scale + offset. DEGREE motors are converted from steps to
+    degrees, LINEAR motors from steps to a percentage.
+    """
+
+    def __init__(
+        self,
+        calibration: dict,
+        motor_names: Sequence[str],
+        motors: Dict[str, Tuple[int, str]],
+        model_resolution: Dict[str, int],
+        degree_bounds: Tuple[float, float],
+        linear_bounds: Tuple[float, float],
+    ) -> None:
+        n = len(motor_names)
+        self.motor_names = list(motor_names)
+        self.is_degree = np.zeros(n, dtype=bool)
+        self.scale = np.ones(n, dtype=np.float64)
+        self.offset = np.zeros(n, dtype=np.float64)
+
+        for i, name in enumerate(motor_names):
+            calib_idx = calibration["motor_names"].index(name)
+            calib_mode = calibration["calib_mode"][calib_idx]
+            if calib_mode == "DEGREE":
+                # degrees = (steps * sign + homing_offset) / (resolution // 2) * 180
+                self.is_degree[i] = True
+                sign = -1 if calibration["drive_mode"][calib_idx] else 1
+                homing_offset = calibration["homing_offset"][calib_idx]
+                _, model = motors[name]
+                degrees_per_step = 180 / (model_resolution[model] // 2)
+                self.scale[i] = sign * degrees_per_step
+                self.offset[i] = homing_offset * degrees_per_step
+            elif calib_mode == "LINEAR":
+                # percents = (steps - start_pos) / (end_pos - start_pos) * 100
+                start_pos = calibration["start_pos"][calib_idx]
+                end_pos = calibration["end_pos"][calib_idx]
+                self.scale[i] = 100 / (end_pos - start_pos)
+                self.offset[i] = -start_pos * self.scale[i]
+            else:
+                raise KeyError(calib_mode)
+
+        self.lower_bound = np.where(
+            self.is_degree, degree_bounds[0], linear_bounds[0]
+        ).astype(np.float32)
+        self.upper_bound = np.where(
+            self.is_degree, degree_bounds[1], linear_bounds[1]
+        ).astype(np.float32)
+
+    def apply(self, values: np.ndarray) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Convert the motor steps to degrees or percentages (float32). Returns the
+        values and the index of the first motor out of its bounds, if any.
+        """
+        calibrated = (values * self.scale + self.offset).astype(np.float32)
+        out_of_range = np.flatnonzero(
+            (calibrated < self.lower_bound) | (calibrated > self.upper_bound)
+        )
+        return calibrated, int(out_of_range[0]) if out_of_range.size else None
+
+    def revert(self, values: np.ndarray) -> np.ndarray:
+        """
+        Inverse of apply: convert degrees or percentages to motor steps (int32).
+        """
+        steps = (np.asarray(values, dtype=np.float64) - self.offset) / self.scale
+        return np.round(steps).astype(np.int32)
+
+
+def plan_key(data_name: str, motor_names: Sequence[str]) -> Tuple[str, ...]:
+    return (data_name, *motor_names)
+
+
+def motor_set(
+    motors: Dict[str, Tuple[int, str]], motor_names: List[str]
+) -> Tuple[List[int], List[str], List[int]]:
+    """
+    Returns the ids, the models and the index in the motors of the bus of each motor.
+    """
+    all_names = list(motors)
+    motor_ids = [motors[name][0] for name in motor_names]
+    models = [motors[name][1] for name in motor_names]
+    positions = [all_names.index(name) for name in motor_names]
+    return motor_ids, models, positions
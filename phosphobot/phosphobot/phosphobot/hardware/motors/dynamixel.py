@@ -17,15 +17,24 @@
 import enum
 import logging
 import math
+import threading
 import time
 from copy import deepcopy
-from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import tqdm
 from loguru import logger
 
+from phosphobot.hardware.motors.bus_plans import (
+    CalibrationPlan,
+    SyncReadPlan,
+    SyncWritePlan,
+    motor_set,
+    plan_key,
+)
+from phosphobot.metrics import time_motor_bus_transaction
+
 PROTOCOL_VERSION = 2.0
 BAUDRATE = 1_000_000
 TIMEOUT_MS = 1000
@@ -203,29 +212,6 @@ def convert_to_bytes(value, bytes, mock=False):
     return data
 
 
-def get_group_sync_key(data_name, motor_names):
-    group_key = f"{data_name}_" + "_".join(motor_names)
-    return group_key
-
-
-def get_result_name(fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    rslt_name = f"{fn_name}_{group_key}"
-    return rslt_name
-
-
-def get_queue_name(fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    queue_name = f"{fn_name}_{group_key}"
-    return queue_name
-
-
-def get_log_name(var_name, fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    log_name = f"{var_name}_{fn_name}_{group_key}"
-    return log_name
-
-
 def assert_same_address(model_ctrl_table, motor_models, data_name):
     all_addr = []
     all_bytes = []
@@ -332,9 +318,19 @@ class DynamixelMotorsBus:
         self.packet_handler = None
         self.calibration = None
         self.is_connected = False
-        self.group_readers = {}
-        self.group_writers = {}
-        self.logs = {}
+        # Transaction plans, compiled once per (data_name, *motor_names)
+        self.group_readers: Dict[tuple, SyncReadPlan] = {}
+        self.group_writers: Dict[tuple, SyncWritePlan] = {}
+        self._calibration_plans: Dict[tuple, CalibrationPlan] = {}
+        # The plans reuse their SDK group and output array: one transaction at a time
+        self._bus_lock = threading.RLock()
+
+    def _get_sdk(self):
+        if self.mock:
+            import tests.mock_dynamixel_sdk as dxl
+        else:
+            import dynamixel_sdk as dxl
+        return dxl
 
     def connect(self):
         if self.is_connected:
@@ -342,10 +338,7 @@ class DynamixelMotorsBus:
                 f"DynamixelMotorsBus({self.port}) is already connected. Do not call `motors_bus.connect()` twice."
             )
 
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        dxl = self._get_sdk()
 
         self.port_handler = dxl.PortHandler(self.port)
         self.packet_handler = dxl.PacketHandler(PROTOCOL_VERSION)
@@ -359,13 +352,13 @@ class DynamixelMotorsBus:
         self.port_handler.setPacketTimeoutMillis(TIMEOUT_MS)
 
     def reconnect(self):
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        dxl = self._get_sdk()
 
         self.port_handler = dxl.PortHandler(self.port)
         self.packet_handler = dxl.PacketHandler(PROTOCOL_VERSION)
+        # The plans are bound to the previous port handler
+        self.group_readers = {}
+        self.group_writers = {}
 
         if not self.port_handler.openPort():
             raise OSError(f"Failed to open port '{self.port}'.")
@@ -428,6 +421,22 @@ class DynamixelMotorsBus:
 
     def set_calibration(self, calibration: dict[str, list]):
         self.calibration = calibration
+        self._calibration_plans = {}
+
+    def _get_calibration_plan(self, motor_names: List[str]) -> CalibrationPlan:
+        key = tuple(motor_names)
+        plan = self._calibration_plans.get(key)
+        if plan is None:
+            plan = CalibrationPlan(
+                self.calibration,
+                motor_names,
+                self.motors,
+                self.model_resolution,
+                degree_bounds=(LOWER_BOUND_DEGREE, UPPER_BOUND_DEGREE),
+                linear_bounds=(LOWER_BOUND_LINEAR, UPPER_BOUND_LINEAR),
+            )
+            self._calibration_plans[key] = plan
+        return plan
 
     def apply_calibration_autocorrect(
         self, values: np.ndarray | list, motor_names: Optional[List[str]]
@@ -463,61 +472,38 @@ class DynamixelMotorsBus:
         if motor_names is None:
             motor_names = self.motor_names
 
-        # Convert from unsigned int32 original range [0, 2**32] to signed float32 range
-        values = values.astype(np.float32)
-
-        for i, name in enumerate(motor_names):
-            calib_idx = self.calibration["motor_names"].index(name)
-            calib_mode = self.calibration["calib_mode"][calib_idx]
-
-            if CalibrationMode[calib_mode] == CalibrationMode.DEGREE:
-                drive_mode = self.calibration["drive_mode"][calib_idx]
-                homing_offset = self.calibration["homing_offset"][calib_idx]
-                _, model = self.motors[name]
-                resolution = self.model_resolution[model]
-
-                # Update direction of rotation of the motor to match between leader and follower.
-                # In fact, the motor of the leader for a given joint can be assembled in an
-                # opposite direction in term of rotation than the motor of the follower on the same joint.
-                if drive_mode:
-                    values[i] *= -1
-
-                # Convert from range [-2**31, 2**31] to
-                # nominal range [-resolution//2, resolution//2] (e.g. [-2048, 2048])
-                values[i] += homing_offset
-
-                # Convert from range [-resolution//2, resolution//2] to
-                # universal float32 centered degree range [-180, 180]
-                # (e.g. 2048 / (4096 // 2) * 180 = 180)
-                values[i] = values[i] / (resolution // 2) * HALF_TURN_DEGREE
-
-                if (values[i] < LOWER_BOUND_DEGREE) or (values[i] > UPPER_BOUND_DEGREE):
-                    raise JointOutOfRangeError(
-                        f"Wrong motor position range detected for {name}. "
-                        f"Expected to be in nominal range of [-{HALF_TURN_DEGREE}, {HALF_TURN_DEGREE}] degrees (a full rotation), "
-                        f"with a maximum range of [{LOWER_BOUND_DEGREE}, {UPPER_BOUND_DEGREE}] degrees to account for joints that can rotate a bit more, "
-                        f"but present value is {values[i]} degree. "
-                        "This might be due to a cable connection issue creating an artificial 360 degrees jump in motor values. "
-                        "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
-                    )
-
-            elif CalibrationMode[calib_mode] == CalibrationMode.LINEAR:
-                start_pos = self.calibration["start_pos"][calib_idx]
-                end_pos = self.calibration["end_pos"][calib_idx]
-
-                # Rescale the present position to a nominal range [0, 100] %,
-                # useful for joints with linear motions like Aloha gripper
-                values[i] = (values[i] - start_pos) / (end_pos - start_pos) * 100
-
-                if (values[i] < LOWER_BOUND_LINEAR) or (values[i] > UPPER_BOUND_LINEAR):
-                    raise JointOutOfRangeError(
-                        f"Wrong motor position range detected for {name}. "
-                        f"Expected to be in nominal range of [0, 100] % (a full linear translation), "
-                        f"with a maximum range of [{LOWER_BOUND_LINEAR}, {UPPER_BOUND_LINEAR}] % to account for some imprecision during calibration, "
-                        f"but present value is {values[i]} %. "
-                        "This might be due to a cable connection issue creating an artificial jump in motor values. "
-                        "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
-                    )
+        # Convert from unsigned int32 original range [0, 2**32] to signed float32 range.
+        # All the motors are converted at once:
+        # - DEGREE: the direction of rotation is updated to match between leader and
+        #   follower (the motor of the leader for a given joint can be assembled in an
+        #   opposite direction than the motor of the follower), the homing offset moves
+        #   the values to the nominal range ]-resolution, resolution[ (e.g. ]-2048, 2048[)
+        #   which is converted to the universal float32 centered degree range ]-180, 180[
+        # - LINEAR: the present position is rescaled to a nominal range [0, 100] %,
+        #   useful for joints with linear motions like Aloha gripper
+        plan = self._get_calibration_plan(motor_names)
+        values, out_of_range = plan.apply(np.asarray(values))
+
+        if out_of_range is not None:
+            name = motor_names[out_of_range]
+            value = values[out_of_range]
+            if plan.is_degree[out_of_range]:
+                raise JointOutOfRangeError(
+                    f"Wrong motor position range detected for {name}. "
+                    f"Expected to be in nominal range of [-{HALF_TURN_DEGREE}, {HALF_TURN_DEGREE}] degrees (a full rotation), "
+                    f"with a maximum range of [{LOWER_BOUND_DEGREE}, {UPPER_BOUND_DEGREE}] degrees to account for joints that can rotate a bit more, "
+                    f"but present value is {value} degree. "
+                    "This might be due to a cable connection issue creating an artificial 360 degrees jump in motor values. "
+                    "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
+                )
+            raise JointOutOfRangeError(
+                f"Wrong motor position range detected for {name}. "
+                f"Expected to be in nominal range of [0, 100] % (a full linear translation), "
+                f"with a maximum range of [{LOWER_BOUND_LINEAR}, {UPPER_BOUND_LINEAR}] % to account for some imprecision during calibration, "
+                f"but present value is {value} %. "
+                "This might be due to a cable connection issue creating an artificial jump in motor values. "
+                "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
+            )
 
         return values
 
@@ -636,6 +622,8 @@ class DynamixelMotorsBus:
 
                 # A full turn corresponds to 360 degrees but also to 4096 steps for a motor resolution of 4096.
                 self.calibration["homing_offset"][calib_idx] += resolution * factor
+                # The compiled calibrations use the previous homing offset
+                self._calibration_plans = {}
 
     def revert_calibration(
         self, values: np.ndarray | list, motor_names: Optional[List[str]]
@@ -644,47 +632,18 @@ class DynamixelMotorsBus:
         if motor_names is None:
             motor_names = self.motor_names
 
-        for i, name in enumerate(motor_names):
-            calib_idx = self.calibration["motor_names"].index(name)
-            calib_mode = self.calibration["calib_mode"][calib_idx]
-
-            if CalibrationMode[calib_mode] == CalibrationMode.DEGREE:
-                drive_mode = self.calibration["drive_mode"][calib_idx]
-                homing_offset = self.calibration["homing_offset"][calib_idx]
-                _, model = self.motors[name]
-                resolution = self.model_resolution[model]
-
-                # Convert from nominal 0-centered degree range [-180, 180] to
-                # 0-centered resolution range (e.g. [-2048, 2048] for resolution=4096)
-                values[i] = values[i] / HALF_TURN_DEGREE * (resolution // 2)
-
-                # Substract the homing offsets to come back to actual motor range of values
-                # which can be arbitrary.
-                values[i] -= homing_offset
-
-                # Remove drive mode, which is the rotation direction of the motor, to come back to
-                # actual motor rotation direction which can be arbitrary.
-                if drive_mode:
-                    values[i] *= -1
-
-            elif CalibrationMode[calib_mode] == CalibrationMode.LINEAR:
-                start_pos = self.calibration["start_pos"][calib_idx]
-                end_pos = self.calibration["end_pos"][calib_idx]
-
-                # Convert from nominal lnear range of [0, 100] % to
-                # actual motor range of values which can be arbitrary.
-                values[i] = values[i] / 100 * (end_pos - start_pos) + start_pos
-
-        values = np.round(values).astype(np.int32)
-        return values
+        # DEGREE: convert from the nominal 0-centered degree range [-180, 180] to the
+        # 0-centered resolution range (e.g. [-2048, 2048] for resolution=4096), then
+        # remove the homing offset and the drive mode to come back to the actual motor
+        # values, which can be arbitrary.
+        # LINEAR: convert from the nominal linear range of [0, 100] % to the actual
+        # motor range of values.
+        return self._get_calibration_plan(motor_names).revert(values)
 
     def read_with_motor_ids(
         self, motor_models, motor_ids, data_name, num_retry=NUM_READ_RETRY
     ):
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        dxl = self._get_sdk()
 
         return_list = True
         if not isinstance(motor_ids, list):
@@ -719,87 +678,77 @@ class DynamixelMotorsBus:
             return values[0]
 
     def read(self, data_name, motor_names: Optional[Union[List[str], str]] = None):
-        if not self.is_connected:
-            raise ValueError(
-                f"DynamixelMotorsBus({self.port}) is not connected. You need to run `motors_bus.connect()`."
-            )
-
-        start_time = time.perf_counter()
-
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        with self._bus_lock:
+            with time_motor_bus_transaction("dynamixel", self.port, "read"):
+                return self._perform_read(data_name, motor_names)
 
+    def _get_read_plan(
+        self, data_name: str, motor_names: Optional[Union[List[str], str]]
+    ) -> SyncReadPlan:
         if motor_names is None:
             motor_names = self.motor_names
 
         if isinstance(motor_names, str):
             motor_names = [motor_names]
 
-        motor_ids = []
-        models = []
-        for name in motor_names:
-            motor_idx, model = self.motors[name]
-            motor_ids.append(motor_idx)
-            models.append(model)
-
-        assert_same_address(self.model_ctrl_table, models, data_name)
-        addr, bytes = self.model_ctrl_table[model][data_name]
-        group_key = get_group_sync_key(data_name, motor_names)
-
-        if data_name not in self.group_readers:
-            # create new group reader
-            self.group_readers[group_key] = dxl.GroupSyncRead(
-                self.port_handler, self.packet_handler, addr, bytes
+        key = plan_key(data_name, motor_names)
+        plan = self.group_readers.get(key)
+        if plan is None:
+            # Compiled once: the checks and the lookups don't run on every read
+            motor_ids, models, positions = motor_set(self.motors, motor_names)
+            assert_same_address(self.model_ctrl_table, models, data_name)
+            addr, bytes = self.model_ctrl_table[models[0]][data_name]
+            plan = SyncReadPlan(
+                self._get_sdk(),
+                self.port_handler,
+                self.packet_handler,
+                data_name,
+                motor_names,
+                motor_ids,
+                positions,
+                addr,
+                bytes,
             )
-            for idx in motor_ids:
-                self.group_readers[group_key].addParam(idx)
+            self.group_readers[key] = plan
+        return plan
 
-        for _ in range(NUM_READ_RETRY):
-            comm = self.group_readers[group_key].txRxPacket()
-            if comm == dxl.COMM_SUCCESS:
-                break
+    def _perform_read(
+        self, data_name, motor_names: Optional[Union[List[str], str]] = None
+    ):
+        if not self.is_connected:
+            raise ValueError(
+                f"DynamixelMotorsBus({self.port}) is not connected. You need to run `motors_bus.connect()`."
+            )
 
-        if comm != dxl.COMM_SUCCESS:
+        start_time = time.perf_counter()
+
+        plan = self._get_read_plan(data_name, motor_names)
+        comm, raw_values = plan.read(NUM_READ_RETRY)
+        if comm != plan.comm_success:
             raise ConnectionError(
-                f"Read failed due to communication error on port {self.port} for group_key {group_key}: "
+                f"Read failed due to communication error on port {self.port} for {data_name} of {plan.motor_names}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
             )
 
-        values = []
-        for idx in motor_ids:
-            value = self.group_readers[group_key].getData(idx, addr, bytes)
-            values.append(value)
-
-        values = np.array(values)
-
         # Convert to signed int to use range [-2048, 2048] for our motor positions.
+        # The returned array is never the buffer of the plan.
         if data_name in CONVERT_UINT32_TO_INT32_REQUIRED:
-            values = values.astype(np.int32)
+            values = raw_values.astype(np.int32)
+        else:
+            values = raw_values.copy()
 
         if data_name in CALIBRATION_REQUIRED and self.calibration is not None:
-            values = self.apply_calibration_autocorrect(values, motor_names)
+            values = self.apply_calibration_autocorrect(values, plan.motor_names)
 
-        # log the number of seconds it took to read the data from the motors
-        delta_ts_name = get_log_name(
-            "delta_timestamp_s", "read", data_name, motor_names
-        )
-        self.logs[delta_ts_name] = time.perf_counter() - start_time
-
-        # log the utc time at which the data was received
-        ts_utc_name = get_log_name("timestamp_utc", "read", data_name, motor_names)
-        self.logs[ts_utc_name] = datetime.now(timezone.utc)
+        # The number of seconds it took to read the data from the motors
+        plan.last_duration_s = time.perf_counter() - start_time
 
         return values
 
     def write_with_motor_ids(
         self, motor_models, motor_ids, data_name, values, num_retry=NUM_WRITE_RETRY
     ):
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        dxl = self._get_sdk()
 
         if not isinstance(motor_ids, list):
             motor_ids = [motor_ids]
@@ -830,75 +779,72 @@ class DynamixelMotorsBus:
         values: Union[int, float, np.ndarray],
         motor_names: Optional[Union[List[str], str]] = None,
     ):
-        if not self.is_connected:
-            raise ValueError(
-                f"DynamixelMotorsBus({self.port}) is not connected. You need to run `motors_bus.connect()`."
-            )
-
-        start_time = time.perf_counter()
-
-        if self.mock:
-            import tests.mock_dynamixel_sdk as dxl
-        else:
-            import dynamixel_sdk as dxl
+        with self._bus_lock:
+            with time_motor_bus_transaction("dynamixel", self.port, "write"):
+                return self._perform_write(data_name, values, motor_names)
 
+    def _get_write_plan(
+        self, data_name: str, motor_names: Optional[Union[List[str], str]]
+    ) -> SyncWritePlan:
         if motor_names is None:
             motor_names = self.motor_names
 
         if isinstance(motor_names, str):
             motor_names = [motor_names]
 
-        if isinstance(values, (int, float, np.integer)):
-            values = [int(values)] * len(motor_names)
-
-        values = np.array(values)
+        key = plan_key(data_name, motor_names)
+        plan = self.group_writers.get(key)
+        if plan is None:
+            motor_ids, models, _ = motor_set(self.motors, motor_names)
+            assert_same_address(self.model_ctrl_table, models, data_name)
+            addr, bytes = self.model_ctrl_table[models[0]][data_name]
+            plan = SyncWritePlan(
+                self._get_sdk(),
+                self.port_handler,
+                self.packet_handler,
+                data_name,
+                motor_names,
+                motor_ids,
+                addr,
+                bytes,
+            )
+            self.group_writers[key] = plan
+        return plan
 
-        motor_ids = []
-        models = []
-        for name in motor_names:
-            motor_idx, model = self.motors[name]
-            motor_ids.append(motor_idx)
-            models.append(model)
+    def _perform_write(
+        self,
+        data_name,
+        values: Union[int, float, np.ndarray],
+        motor_names: Optional[Union[List[str], str]] = None,
+    ):
+        if not self.is_connected:
+            raise ValueError(
+                f"DynamixelMotorsBus({self.port}) is not connected. You need to run `motors_bus.connect()`."
+            )
 
-        if data_name in CALIBRATION_REQUIRED and self.calibration is not None:
-            values = self.revert_calibration(values, motor_names)
+        start_time = time.perf_counter()
 
-        values = values.tolist()
+        plan = self._get_write_plan(data_name, motor_names)
 
-        assert_same_address(self.model_ctrl_table, models, data_name)
-        addr, bytes = self.model_ctrl_table[model][data_name]
-        group_key = get_group_sync_key(data_name, motor_names)
+        if isinstance(values, (int, float, np.integer)):
+            values = np.full(len(plan.motor_ids), int(values))
 
-        init_group = data_name not in self.group_readers
-        if init_group:
-            self.group_writers[group_key] = dxl.GroupSyncWrite(
-                self.port_handler, self.packet_handler, addr, bytes
-            )
+        values = np.asarray(values)
 
-        for idx, value in zip(motor_ids, values, strict=True):
-            data = convert_to_bytes(value, bytes, self.mock)
-            if init_group:
-                self.group_writers[group_key].addParam(idx, data)
-            else:
-                self.group_writers[group_key].changeParam(idx, data)
+        if data_name in CALIBRATION_REQUIRED and self.calibration is not None:
+            values = self.revert_calibration(values, plan.motor_names)
 
-        comm = self.group_writers[group_key].txPacket()
-        if comm != dxl.COMM_SUCCESS:
+        comm = plan.write(
+            values, lambda value, bytes: convert_to_bytes(value, bytes, self.mock)
+        )
+        if comm != plan.comm_success:
             raise ConnectionError(
-                f"Write failed due to communication error on port {self.port} for group_key {group_key}: "
+                f"Write failed due to communication error on port {self.port} for {data_name} of {plan.motor_names}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
             )
 
-        # log the number of seconds it took to write the data to the motors
-        delta_ts_name = get_log_name(
-            "delta_timestamp_s", "write", data_name, motor_names
-        )
-        self.logs[delta_ts_name] = time.perf_counter() - start_time
-
-        # TODO(rcadene): should we log the time before sending the write command?
-        # log the utc time when the write has been completed
-        ts_utc_name = get_log_name("timestamp_utc", "write", data_name, motor_names)
-        self.logs[ts_utc_name] = datetime.now(timezone.utc)
+        # The number of seconds it took to write the data to the motors
+        plan.last_duration_s = time.perf_counter() - start_time
 
     def disconnect(self):
         if not self.is_connected:
@@ -906,14 +852,15 @@ class DynamixelMotorsBus:
                 f"DynamixelMotorsBus({self.port}) is not connected. Try running `motors_bus.connect()` first."
             )
 
-        if self.port_handler is not None:
-            self.port_handler.closePort()
-            self.port_handler = None
+        with self._bus_lock:
+            if self.port_handler is not None:
+                self.port_handler.closePort()
+                self.port_handler = None
 
-        self.packet_handler = None
-        self.group_readers = {}
-        self.group_writers = {}
-        self.is_connected = False
+            self.packet_handler = None
+            self.group_readers = {}
+            self.group_writers = {}
+            self.is_connected = False
 
     def __del__(self):
         if getattr(self, "is_connected", False):
@@ -29,11 +29,18 @@ import scservo_sdk as scs
 import tqdm
 from loguru import logger
 
+from phosphobot.hardware.motors.bus_plans import (
+    CalibrationPlan,
+    SyncReadPlan,
+    SyncWritePlan,
+    motor_set,
+    plan_key,
+)
 from phosphobot.hardware.motors.motor_utils import (
     RobotDeviceAlreadyConnectedError,
     RobotDeviceNotConnectedError,
-    capture_timestamp_utc,
 )
+from phosphobot.metrics import time_motor_bus_transaction
 
 PROTOCOL_VERSION = 0
 BAUDRATE = 1_000_000
@@ -191,29 +198,6 @@ def convert_to_bytes(value, bytes, mock=False):
     return data
 
 
-def get_group_sync_key(data_name, motor_names):
-    group_key = f"{data_name}_" + "_".join(motor_names)
-    return group_key
-
-
-def get_result_name(fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    rslt_name = f"{fn_name}_{group_key}"
-    return rslt_name
-
-
-def get_queue_name(fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    queue_name = f"{fn_name}_{group_key}"
-    return queue_name
-
-
-def get_log_name(var_name, fn_name, data_name, motor_names):
-    group_key = get_group_sync_key(data_name, motor_names)
-    log_name = f"{var_name}_{fn_name}_{group_key}"
-    return log_name
-
-
 def assert_same_address(model_ctrl_table, motor_models, data_name):
     all_addr = []
     all_bytes = []
@@ -319,9 +303,10 @@ class FeetechMotorsBus:
         self.packet_handler = None
         self.calibration = None
         self.is_connected = False
-        self.group_readers = {}
-        self.group_writers = {}
-        self.logs = {}
+        # Transaction plans, compiled once per (data_name, *motor_names)
+        self.group_readers: Dict[tuple, SyncReadPlan] = {}
+        self.group_writers: Dict[tuple, SyncWritePlan] = {}
+        self._calibration_plans: Dict[tuple, CalibrationPlan] = {}
 
         self.track_positions = {}
 
@@ -345,21 +330,22 @@ class FeetechMotorsBus:
                 error = None
 
                 try:
-                    # --- Task Dispatcher ---
-                    if action == "connect":
-                        self._perform_connect()
-                    elif action == "disconnect":
-                        self._perform_disconnect()
-                    elif action == "read":
-                        result = self._perform_read(*args, **kwargs)
-                    elif action == "write":
-                        self._perform_write(*args, **kwargs)
-                    elif action == "read_with_motor_ids":
-                        result = self._perform_read_with_motor_ids(*args, **kwargs)
-                    elif action == "write_with_motor_ids":
-                        self._perform_write_with_motor_ids(*args, **kwargs)
-                    elif action == "set_bus_baudrate":
-                        self._perform_set_bus_baudrate(*args, **kwargs)
+                    with time_motor_bus_transaction("feetech", self.port, action):
+                        # --- Task Dispatcher ---
+                        if action == "connect":
+                            self._perform_connect()
+                        elif action == "disconnect":
+                            self._perform_disconnect()
+                        elif action == "read":
+                            result = self._perform_read(*args, **kwargs)
+                        elif action == "write":
+                            self._perform_write(*args, **kwargs)
+                        elif action == "read_with_motor_ids":
+                            result = self._perform_read_with_motor_ids(*args, **kwargs)
+                        elif action == "write_with_motor_ids":
+                            self._perform_write_with_motor_ids(*args, **kwargs)
+                        elif action == "set_bus_baudrate":
+                            self._perform_set_bus_baudrate(*args, **kwargs)
 
                 except Exception as e:
                     error = e
@@ -479,6 +465,22 @@ class FeetechMotorsBus:
 
     def set_calibration(self, calibration: dict[str, list]):
         self.calibration = calibration
+        self._calibration_plans = {}
+
+    def _get_calibration_plan(self, motor_names: List[str]) -> CalibrationPlan:
+        key = tuple(motor_names)
+        plan = self._calibration_plans.get(key)
+        if plan is None:
+            plan = CalibrationPlan(
+                self.calibration,
+                motor_names,
+                self.motors,
+                self.model_resolution,
+                degree_bounds=(LOWER_BOUND_DEGREE, UPPER_BOUND_DEGREE),
+                linear_bounds=(LOWER_BOUND_LINEAR, UPPER_BOUND_LINEAR),
+            )
+            self._calibration_plans[key] = plan
+        return plan
 
     def apply_calibration_autocorrect(
         self, values: np.ndarray | list, motor_names: Optional[List[str]]
@@ -514,60 +516,38 @@ class FeetechMotorsBus:
         if motor_names is None:
             motor_names = self.motor_names
 
-        # Convert from unsigned int32 original range [0, 2**32] to signed float32 range
-        values = values.astype(np.float32)
-
-        for i, name in enumerate(motor_names):
-            calib_idx = self.calibration["motor_names"].index(name)
-            calib_mode = self.calibration["calib_mode"][calib_idx]
-
-            if CalibrationMode[calib_mode] == CalibrationMode.DEGREE:
-                drive_mode = self.calibration["drive_mode"][calib_idx]
-                homing_offset = self.calibration["homing_offset"][calib_idx]
-                _, model = self.motors[name]
-                resolution = self.model_resolution[model]
-
-                # Update direction of rotation of the motor to match between leader and follower.
-                # In fact, the motor of the leader for a given joint can be assembled in an
-                # opposite direction in term of rotation than the motor of the follower on the same joint.
-                if drive_mode:
-                    values[i] *= -1
-
-                # Convert from range [-2**31, 2**31[ to
-                # nominal range ]-resolution, resolution[ (e.g. ]-2048, 2048[)
-                values[i] += homing_offset
-
-                # Convert from range ]-resolution, resolution[ to
-                # universal float32 centered degree range ]-180, 180[
-                values[i] = values[i] / (resolution // 2) * HALF_TURN_DEGREE
-
-                if (values[i] < LOWER_BOUND_DEGREE) or (values[i] > UPPER_BOUND_DEGREE):
-                    raise JointOutOfRangeError(
-                        f"Wrong motor position range detected for {name}. "
-                        f"Expected to be in nominal range of [-{HALF_TURN_DEGREE}, {HALF_TURN_DEGREE}] degrees (a full rotation), "
-                        f"with a maximum range of [{LOWER_BOUND_DEGREE}, {UPPER_BOUND_DEGREE}] degrees to account for joints that can rotate a bit more, "
-                        f"but present value is {values[i]} degree. "
-                        "This might be due to a cable connection issue creating an artificial 360 degrees jump in motor values. "
-                        "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
-                    )
-
-            elif CalibrationMode[calib_mode] == CalibrationMode.LINEAR:
-                start_pos = self.calibration["start_pos"][calib_idx]
-                end_pos = self.calibration["end_pos"][calib_idx]
-
-                # Rescale the present position to a nominal range [0, 100] %,
-                # useful for joints with linear motions like Aloha gripper
-                values[i] = (values[i] - start_pos) / (end_pos - start_pos) * 100
-
-                if (values[i] < LOWER_BOUND_LINEAR) or (values[i] > UPPER_BOUND_LINEAR):
-                    raise JointOutOfRangeError(
-                        f"Wrong motor position range detected for {name}. "
-                        f"Expected to be in nominal range of [0, 100] % (a full linear translation), "
-                        f"with a maximum range of [{LOWER_BOUND_LINEAR}, {UPPER_BOUND_LINEAR}] % to account for some imprecision during calibration, "
-                        f"but present value is {values[i]} %. "
-                        "This might be due to a cable connection issue creating an artificial jump in motor values. "
-                        "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
-                    )
+        # Convert from unsigned int32 original range [0, 2**32] to signed float32 range.
+        # All the motors are converted at once:
+        # - DEGREE: the direction of rotation is updated to match between leader and
+        #   follower (the motor of the leader for a given joint can be assembled in an
+        #   opposite direction than the motor of the follower), the homing offset moves
+        #   the values to the nominal range ]-resolution, resolution[ (e.g. ]-2048, 2048[)
+        #   which is converted to the universal float32 centered degree range ]-180, 180[
+        # - LINEAR: the present position is rescaled to a nominal range [0, 100] %,
+        #   useful for joints with linear motions like Aloha gripper
+        plan = self._get_calibration_plan(motor_names)
+        values, out_of_range = plan.apply(np.asarray(values))
+
+        if out_of_range is not None:
+            name = motor_names[out_of_range]
+            value = values[out_of_range]
+            if plan.is_degree[out_of_range]:
+                raise JointOutOfRangeError(
+                    f"Wrong motor position range detected for {name}. "
+                    f"Expected to be in nominal range of [-{HALF_TURN_DEGREE}, {HALF_TURN_DEGREE}] degrees (a full rotation), "
+                    f"with a maximum range of [{LOWER_BOUND_DEGREE}, {UPPER_BOUND_DEGREE}] degrees to account for joints that can rotate a bit more, "
+                    f"but present value is {value} degree. "
+                    "This might be due to a cable connection issue creating an artificial 360 degrees jump in motor values. "
+                    "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
+                )
+            raise JointOutOfRangeError(
+                f"Wrong motor position range detected for {name}. "
+                f"Expected to be in nominal range of [0, 100] % (a full linear translation), "
+                f"with a maximum range of [{LOWER_BOUND_LINEAR}, {UPPER_BOUND_LINEAR}] % to account for some imprecision during calibration, "
+                f"but present value is {value} %. "
+                "This might be due to a cable connection issue creating an artificial jump in motor values. "
+                "You need to recalibrate by running: `python lerobot/scripts/control_robot.py calibrate`"
+            )
 
         return values
 
@@ -687,6 +667,8 @@ class FeetechMotorsBus:
 
                 # A full turn corresponds to 360 degrees but also to 4096 steps for a motor resolution of 4096.
                 self.calibration["homing_offset"][calib_idx] += resolution * factor
+                # The compiled calibrations use the previous homing offset
+                self._calibration_plans = {}
 
     def revert_calibration(
         self, values: np.ndarray | list, motor_names: Optional[List[str]]
@@ -695,84 +677,67 @@ class FeetechMotorsBus:
         if motor_names is None:
             motor_names = self.motor_names
 
-        for i, name in enumerate(motor_names):
-            calib_idx = self.calibration["motor_names"].index(name)
-            calib_mode = self.calibration["calib_mode"][calib_idx]
-
-            if CalibrationMode[calib_mode] == CalibrationMode.DEGREE:
-                drive_mode = self.calibration["drive_mode"][calib_idx]
-                homing_offset = self.calibration["homing_offset"][calib_idx]
-                _, model = self.motors[name]
-                resolution = self.model_resolution[model]
-
-                # Convert from nominal 0-centered degree range [-180, 180] to
-                # 0-centered resolution range (e.g. [-2048, 2048] for resolution=4096)
-                values[i] = values[i] / HALF_TURN_DEGREE * (resolution // 2)
-
-                # Substract the homing offsets to come back to actual motor range of values
-                # which can be arbitrary.
-                values[i] -= homing_offset
-
-                # Remove drive mode, which is the rotation direction of the motor, to come back to
-                # actual motor rotation direction which can be arbitrary.
-                if drive_mode:
-                    values[i] *= -1
-
-            elif CalibrationMode[calib_mode] == CalibrationMode.LINEAR:
-                start_pos = self.calibration["start_pos"][calib_idx]
-                end_pos = self.calibration["end_pos"][calib_idx]
-
-                # Convert from nominal lnear range of [0, 100] % to
-                # actual motor range of values which can be arbitrary.
-                values[i] = values[i] / 100 * (end_pos - start_pos) + start_pos
-
-        values = np.round(values).astype(np.int32)
-        return values
+        # DEGREE: convert from the nominal 0-centered degree range [-180, 180] to the
+        # 0-centered resolution range (e.g. [-2048, 2048] for resolution=4096), then
+        # remove the homing offset and the drive mode to come back to the actual motor
+        # values, which can be arbitrary.
+        # LINEAR: convert from the nominal linear range of [0, 100] % to the actual
+        # motor range of values.
+        return self._get_calibration_plan(motor_names).revert(values)
 
     def avoid_rotation_reset(self, values, motor_names, data_name):
+        if motor_names is None:
+            motor_names = self.motor_names
+        _, _, positions = motor_set(self.motors, motor_names)
+        return self._avoid_rotation_reset(
+            values, np.asarray(positions, dtype=np.intp), data_name
+        )
+
+    def _avoid_rotation_reset(
+        self, values: np.ndarray, positions: np.ndarray, data_name: str
+    ) -> np.ndarray:
+        """
+        Unwrap the positions that jumped by a full rotation since the previous read.
+        positions is the index of each motor in the motors of the bus.
+        """
         if data_name not in self.track_positions:
             self.track_positions[data_name] = {
-                "prev": [None] * len(self.motor_names),
-                # Assume False at initialization
-                "below_zero": [False] * len(self.motor_names),
-                "above_max": [False] * len(self.motor_names),
+                "prev": np.zeros(len(self.motor_names), dtype=np.int64),
+                # No previous value at initialization
+                "initialized": np.zeros(len(self.motor_names), dtype=bool),
             }
 
         track = self.track_positions[data_name]
+        prev = track["prev"][positions]
 
-        if motor_names is None:
-            motor_names = self.motor_names
-
-        for i, name in enumerate(motor_names):
-            idx = self.motor_names.index(name)
-
-            if track["prev"][idx] is None:
-                track["prev"][idx] = values[i]
-                continue
-
-            # Detect a full rotation occured
-            if abs(track["prev"][idx] - values[i]) > 2048:
-                # Position went below 0 and got reset to 4095
-                if track["prev"][idx] < values[i]:
-                    # So we set negative value by adding a full rotation
-                    values[i] -= 4096
-
-                # Position went above 4095 and got reset to 0
-                elif track["prev"][idx] > values[i]:
-                    # So we add a full rotation
-                    values[i] += 4096
+        # Detect a full rotation occured. If the position went below 0 and got reset
+        # to 4095, set a negative value by removing a full rotation. If the position
+        # went above 4095 and got reset to 0, add a full rotation.
+        difference = values.astype(np.int64) - prev
+        jumped = track["initialized"][positions] & (np.abs(difference) > 2048)
+        if jumped.any():
+            values = values - (4096 * np.sign(difference) * jumped).astype(values.dtype)
 
-            track["prev"][idx] = values[i]
+        track["prev"][positions] = values
+        track["initialized"][positions] = True
 
         return values
 
     # --- Private Implementation Methods (Worker-Thread Only) ---
     # These contain the actual hardware logic and are NOT called directly.
 
+    def _get_sdk(self):
+        if self.mock:
+            import tests.mock_scservo_sdk as mock_scs
+
+            return mock_scs
+        return scs
+
     def _perform_connect(self):
-        self.port_handler = scs.PortHandler(self.port)
+        sdk = self._get_sdk()
+        self.port_handler = sdk.PortHandler(self.port)
         self.port_handler.setPacketTimeoutMillis(TIMEOUT_MS)
-        self.packet_handler = scs.PacketHandler(PROTOCOL_VERSION)
+        self.packet_handler = sdk.PacketHandler(PROTOCOL_VERSION)
         if not self.port_handler.openPort():
             raise OSError(f"Failed to open port '{self.port}'.")
 
@@ -781,6 +746,9 @@ class FeetechMotorsBus:
             self.port_handler.closePort()
         self.port_handler = None
         self.packet_handler = None
+        # The plans are bound to the port handler
+        self.group_readers = {}
+        self.group_writers = {}
 
     def _perform_read_with_motor_ids(
         self, motor_models, motor_ids, data_name, num_retry=NUM_READ_RETRY
@@ -790,18 +758,19 @@ class FeetechMotorsBus:
             return_list = False
             motor_ids = [motor_ids]
 
+        sdk = self._get_sdk()
         assert_same_address(self.model_ctrl_table, self.motor_models, data_name)
         addr, bytes = self.model_ctrl_table[motor_models[0]][data_name]
-        group = scs.GroupSyncRead(self.port_handler, self.packet_handler, addr, bytes)
+        group = sdk.GroupSyncRead(self.port_handler, self.packet_handler, addr, bytes)
         for idx in motor_ids:
             group.addParam(idx)
 
         for _ in range(num_retry):
             comm = group.txRxPacket()
-            if comm == scs.COMM_SUCCESS:
+            if comm == sdk.COMM_SUCCESS:
                 break
 
-        if comm != scs.COMM_SUCCESS:
+        if comm != sdk.COMM_SUCCESS:
             raise ConnectionError(
                 f"Read failed due to communication error on port {self.port_handler.port_name} for indices {motor_ids}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
@@ -817,6 +786,36 @@ class FeetechMotorsBus:
         else:
             return values[0]
 
+    def _get_read_plan(
+        self, data_name: str, motor_names: Optional[Union[List[str], str]]
+    ) -> SyncReadPlan:
+        if motor_names is None:
+            motor_names = self.motor_names
+
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+
+        key = plan_key(data_name, motor_names)
+        plan = self.group_readers.get(key)
+        if plan is None:
+            # Compiled once: the checks and the lookups don't run on every read
+            motor_ids, models, positions = motor_set(self.motors, motor_names)
+            assert_same_address(self.model_ctrl_table, models, data_name)
+            addr, bytes = self.model_ctrl_table[models[0]][data_name]
+            plan = SyncReadPlan(
+                self._get_sdk(),
+                self.port_handler,
+                self.packet_handler,
+                data_name,
+                motor_names,
+                motor_ids,
+                positions,
+                addr,
+                bytes,
+            )
+            self.group_readers[key] = plan
+        return plan
+
     def _perform_read(
         self, data_name, motor_names: Optional[Union[List[str], str]] = None
     ):
@@ -827,68 +826,31 @@ class FeetechMotorsBus:
 
         start_time = time.perf_counter()
 
-        if motor_names is None:
-            motor_names = self.motor_names
-
-        if isinstance(motor_names, str):
-            motor_names = [motor_names]
-
-        motor_ids = []
-        models = []
-        for name in motor_names:
-            motor_idx, model = self.motors[name]
-            motor_ids.append(motor_idx)
-            models.append(model)
-
-        assert_same_address(self.model_ctrl_table, models, data_name)
-        addr, bytes = self.model_ctrl_table[model][data_name]
-        group_key = get_group_sync_key(data_name, motor_names)
-
-        if data_name not in self.group_readers:
-            # create new group reader
-            self.group_readers[group_key] = scs.GroupSyncRead(
-                self.port_handler, self.packet_handler, addr, bytes
-            )
-            for idx in motor_ids:
-                self.group_readers[group_key].addParam(idx)
-
-        for _ in range(NUM_READ_RETRY):
-            comm = self.group_readers[group_key].txRxPacket()
-            if comm == scs.COMM_SUCCESS:
-                break
-
-        if comm != scs.COMM_SUCCESS:
+        plan = self._get_read_plan(data_name, motor_names)
+        comm, raw_values = plan.read(NUM_READ_RETRY)
+        if comm != plan.comm_success:
             raise ConnectionError(
-                f"Read failed due to communication error on port {self.port} for group_key {group_key}: "
+                f"Read failed due to communication error on port {self.port} for {data_name} of {plan.motor_names}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
             )
 
-        values = []
-        for idx in motor_ids:
-            value = self.group_readers[group_key].getData(idx, addr, bytes)
-            values.append(value)
-
-        values = np.array(values)
-
         # Convert to signed int to use range [-2048, 2048] for our motor positions.
+        # The returned array is never the buffer of the plan.
         if data_name in CONVERT_UINT32_TO_INT32_REQUIRED:
-            values = values.astype(np.int32)
+            values = raw_values.astype(np.int32)
+        else:
+            values = raw_values.copy()
 
         if data_name in CALIBRATION_REQUIRED:
-            values = self.avoid_rotation_reset(values, motor_names, data_name)
+            values = self._avoid_rotation_reset(
+                values, plan.motor_positions, data_name
+            )
 
         if data_name in CALIBRATION_REQUIRED and self.calibration is not None:
-            values = self.apply_calibration_autocorrect(values, motor_names)
-
-        # log the number of seconds it took to read the data from the motors
-        delta_ts_name = get_log_name(
-            "delta_timestamp_s", "read", data_name, motor_names
-        )
-        self.logs[delta_ts_name] = time.perf_counter() - start_time
+            values = self.apply_calibration_autocorrect(values, plan.motor_names)
 
-        # log the utc time at which the data was received
-        ts_utc_name = get_log_name("timestamp_utc", "read", data_name, motor_names)
-        self.logs[ts_utc_name] = capture_timestamp_utc()
+        # The number of seconds it took to read the data from the motors
+        plan.last_duration_s = time.perf_counter() - start_time
 
         return values
 
@@ -900,24 +862,53 @@ class FeetechMotorsBus:
         if not isinstance(values, list):
             values = [values]
 
+        sdk = self._get_sdk()
         assert_same_address(self.model_ctrl_table, motor_models, data_name)
         addr, bytes = self.model_ctrl_table[motor_models[0]][data_name]
-        group = scs.GroupSyncWrite(self.port_handler, self.packet_handler, addr, bytes)
+        group = sdk.GroupSyncWrite(self.port_handler, self.packet_handler, addr, bytes)
         for idx, value in zip(motor_ids, values, strict=True):
             data = convert_to_bytes(value, bytes, self.mock)
             group.addParam(idx, data)
 
         for _ in range(num_retry):
             comm = group.txPacket()
-            if comm == scs.COMM_SUCCESS:
+            if comm == sdk.COMM_SUCCESS:
                 break
 
-        if comm != scs.COMM_SUCCESS:
+        if comm != sdk.COMM_SUCCESS:
             raise ConnectionError(
                 f"Write failed due to communication error on port {self.port_handler.port_name} for indices {motor_ids}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
             )
 
+    def _get_write_plan(
+        self, data_name: str, motor_names: Optional[Union[List[str], str]]
+    ) -> SyncWritePlan:
+        if motor_names is None:
+            motor_names = self.motor_names
+
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+
+        key = plan_key(data_name, motor_names)
+        plan = self.group_writers.get(key)
+        if plan is None:
+            motor_ids, models, _ = motor_set(self.motors, motor_names)
+            assert_same_address(self.model_ctrl_table, models, data_name)
+            addr, bytes = self.model_ctrl_table[models[0]][data_name]
+            plan = SyncWritePlan(
+                self._get_sdk(),
+                self.port_handler,
+                self.packet_handler,
+                data_name,
+                motor_names,
+                motor_ids,
+                addr,
+                bytes,
+            )
+            self.group_writers[key] = plan
+        return plan
+
     def _perform_write(
         self,
         data_name,
@@ -931,63 +922,27 @@ class FeetechMotorsBus:
 
         start_time = time.perf_counter()
 
-        if motor_names is None:
-            motor_names = self.motor_names
-
-        if isinstance(motor_names, str):
-            motor_names = [motor_names]
+        plan = self._get_write_plan(data_name, motor_names)
 
         if isinstance(values, (int, float, np.integer)):
-            values = [int(values)] * len(motor_names)
+            values = np.full(len(plan.motor_ids), int(values))
 
-        values = np.array(values)
-
-        motor_ids = []
-        models = []
-        for name in motor_names:
-            motor_idx, model = self.motors[name]
-            motor_ids.append(motor_idx)
-            models.append(model)
+        values = np.asarray(values)
 
         if data_name in CALIBRATION_REQUIRED and self.calibration is not None:
-            values = self.revert_calibration(values, motor_names)
-
-        values = values.tolist()
+            values = self.revert_calibration(values, plan.motor_names)
 
-        assert_same_address(self.model_ctrl_table, models, data_name)
-        addr, bytes = self.model_ctrl_table[model][data_name]
-        group_key = get_group_sync_key(data_name, motor_names)
-
-        init_group = data_name not in self.group_readers
-        if init_group:
-            self.group_writers[group_key] = scs.GroupSyncWrite(
-                self.port_handler, self.packet_handler, addr, bytes
-            )
-
-        for idx, value in zip(motor_ids, values, strict=True):
-            data = convert_to_bytes(value, bytes, self.mock)
-            if init_group:
-                self.group_writers[group_key].addParam(idx, data)
-            else:
-                self.group_writers[group_key].changeParam(idx, data)
-
-        comm = self.group_writers[group_key].txPacket()
-        if comm != scs.COMM_SUCCESS:
+        comm = plan.write(
+            values, lambda value, bytes: convert_to_bytes(value, bytes, self.mock)
+        )
+        if comm != plan.comm_success:
             raise ConnectionError(
-                f"Write failed due to communication error on port {self.port} for group_key {group_key}: "
+                f"Write failed due to communication error on port {self.port} for {data_name} of {plan.motor_names}: "
                 f"{self.packet_handler.getTxRxResult(comm)}"
             )
 
-        # log the number of seconds it took to write the data to the motors
-        delta_ts_name = get_log_name(
-            "delta_timestamp_s", "write", data_name, motor_names
-        )
-        self.logs[delta_ts_name] = time.perf_counter() - start_time
-
-        # TODO(rcadene): should we log the time before sending the write command?
-        # log the utc time when the write has been completed
-        ts_utc_name = get_log_name("timestamp_utc", "write", data_name, motor_names)
-        self.logs[ts_utc_name] = capture_timestamp_utc()
+        # The number of seconds it took to write the data to the motors
+        plan.last_duration_s = time.perf_counter() - start_time
 
     def _perform_set_bus_baudrate(self, baudrate):
         present_bus_baudrate = self.port_handler.getBaudRate()
@@ -1,13 +1,8 @@
 import platform
 import time
-from datetime import datetime, timezone
 from typing import Callable
 
 
-def capture_timestamp_utc() -> datetime:
-    return datetime.now(timezone.utc)
-
-
 def busy_wait(seconds: float) -> None:
     if platform.system() == "Darwin":
         # On Mac, `time.sleep` is not accurate and we need to use this while loop trick,
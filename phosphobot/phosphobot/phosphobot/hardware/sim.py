@@ -25,6 +25,7 @@ except ImportError:
     logger.warning("PyBullet not installed - simulation features will be disabled")
 
 sim = None
+_sim_lock = threading.Lock()
 
 
 class PyBulletSimulation:
@@ -35,12 +36,15 @@ class PyBulletSimulation:
     def __init__(
         self,
         sim_mode: SimulationMode = SimulationMode.headless,
+        kinematic: bool = False,
     ) -> None:
         """
         Initialize the PyBullet simulation environment.
 
         Args:
             sim_mode (SimulationMode): Simulation mode - "headless" or "gui"
+            kinematic (bool): Only in headless mode. Joint states are reset directly
+                and link states are computed on demand: the physics is never stepped.
         """
         if not PYBULLET_AVAILABLE:
             raise ImportError(
@@ -48,7 +52,11 @@ class PyBulletSimulation:
                 "Or run without simulation mode if you have physical hardware."
             )
         self.sim_mode = sim_mode
+        # The GUI displays the dynamics of the scene, so it always steps the physics
+        self.kinematic = kinematic and sim_mode == SimulationMode.headless
         self.connected = False
+        # Address of the physics server of this simulation in PyBullet
+        self.client_id = -1
         self.robots: dict = {}  # Store loaded robots
         self._running = False
         self._step_thread: Optional[threading.Thread] = None
@@ -64,9 +72,10 @@ class PyBulletSimulation:
         Initialize the pybullet simulation environment based on the configuration.
         """
         if self.sim_mode == SimulationMode.headless:
-            p.connect(p.DIRECT)
-            p.setGravity(0, 0, -9.81)
-            p.setTimeStep(1.0 / 10)  # 10 Hz simulation
+            self.client_id = p.connect(p.DIRECT)
+            p.setGravity(0, 0, -9.81, physicsClientId=self.client_id)
+            # 10 Hz simulation
+            p.setTimeStep(1.0 / 10, physicsClientId=self.client_id)
             self.connected = True
             logger.debug("Simulation: headless mode enabled")
 
@@ -110,7 +119,7 @@ class PyBulletSimulation:
 
             # Wait for 1 second to allow the simulation to start
             time.sleep(1)
-            p.connect(p.SHARED_MEMORY)
+            self.client_id = p.connect(p.SHARED_MEMORY)
             self.connected = True
             logger.debug("Simulation: GUI mode enabled")
 
@@ -121,26 +130,43 @@ class PyBulletSimulation:
             import pybullet_data
 
             data_path = pybullet_data.getDataPath()
-            p.setAdditionalSearchPath(data_path)
+            p.setAdditionalSearchPath(data_path, physicsClientId=self.client_id)
             logger.debug(f"Added pybullet_data search path: {data_path}")
         except ImportError:
             pass
         except Exception as e:
             logger.debug(f"Failed to set additional search path for pybullet_data: {e}")
 
+    def create_client(self) -> "PyBulletSimulation":
+        """
+        Create an isolated physics client, with the same settings, for the kinematics
+        and dynamics of one robot or worker. The clients don't share any state, so
+        they can be used from different threads without cross-talk.
+
+        In GUI mode, the robots must be in the displayed scene: the simulation itself
+        is returned.
+        """
+        if self.sim_mode == SimulationMode.gui:
+            return self
+        return PyBulletSimulation(sim_mode=self.sim_mode, kinematic=self.kinematic)
+
     def start_stepping(self) -> None:
         if self._running:
             logger.debug("Simulation stepping already running")
             return
 
-        if not self.connected or not p.isConnected():
+        if self.kinematic:
+            logger.debug("Kinematic simulation: no background stepping")
+            return
+
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot start stepping")
             return
 
         self._running = True
 
         def _loop() -> None:
-            while self._running and self.connected and p.isConnected():
+            while self._running and self.is_connected():
                 steps_to_do = 0
                 with self._lock:
                     if self._pending_steps > 0:
@@ -149,7 +175,7 @@ class PyBulletSimulation:
 
                 if steps_to_do > 0:
                     for _ in range(steps_to_do):
-                        p.stepSimulation()
+                        p.stepSimulation(physicsClientId=self.client_id)
                 else:
                     time.sleep(0.01)  # avoid busy loop
 
@@ -169,8 +195,12 @@ class PyBulletSimulation:
     def step(self, steps: int = 60) -> None:
         """
         Increment the pending step counter (non-blocking).
+        In kinematic mode, the joint states are already set: nothing to step.
         """
-        if not self.connected or not p.isConnected():
+        if self.kinematic:
+            return
+
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot enqueue step")
             return
 
@@ -182,8 +212,8 @@ class PyBulletSimulation:
         Cleanup the simulation environment.
         """
         self.stop_stepping()
-        if self.connected and p.isConnected():
-            p.disconnect()
+        if self.is_connected():
+            p.disconnect(physicsClientId=self.client_id)
             self.connected = False
             logger.info("Simulation disconnected")
 
@@ -208,11 +238,11 @@ class PyBulletSimulation:
         """
         Reset the simulation environment.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot reset")
             return
 
-        p.resetSimulation()
+        p.resetSimulation(physicsClientId=self.client_id)
         self.robots.clear()
         logger.info("Simulation reset")
 
@@ -227,11 +257,13 @@ class PyBulletSimulation:
             joint_id (int): The ID of the joint to set.
             joint_position (float): The position to set the joint to.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot set joint state")
             return
 
-        p.resetJointState(robot_id, joint_id, joint_position)
+        p.resetJointState(
+            robot_id, joint_id, joint_position, physicsClientId=self.client_id
+        )
 
     def inverse_dynamics(
         self,
@@ -252,14 +284,18 @@ class PyBulletSimulation:
         Returns:
             list: Joint torques
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning(
                 "Simulation is not connected, cannot perform inverse dynamics"
             )
             return []
 
         joint_angles = p.calculateInverseDynamics(
-            robot_id, positions, velocities, accelerations
+            robot_id,
+            positions,
+            velocities,
+            accelerations,
+            physicsClientId=self.client_id,
         )
         return joint_angles
 
@@ -286,7 +322,7 @@ class PyBulletSimulation:
         if axis_orientation is None:
             axis_orientation = [0, 0, 0, 1]
 
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot load URDF")
             raise RuntimeError(
                 f"Can't load URDF {urdf_path} - simulation not connected."
@@ -303,9 +339,10 @@ class PyBulletSimulation:
             baseOrientation=axis_orientation,
             useFixedBase=use_fixed_base,
             flags=flags,
+            physicsClientId=self.client_id,
         )
 
-        num_joints = p.getNumJoints(robot_id)
+        num_joints = p.getNumJoints(robot_id, physicsClientId=self.client_id)
         actuated_joints = []
 
         for i in range(num_joints):
@@ -338,15 +375,25 @@ class PyBulletSimulation:
             joint_indices (list[int]): The indices of the joints to set.
             target_positions (list[float]): The positions to set the joints to.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot set joint states")
             return
 
+        if self.kinematic:
+            # The joints are moved instantly, instead of being driven by the motors
+            # over the next physics steps
+            for joint_index, position in zip(joint_indices, target_positions):
+                p.resetJointState(
+                    robot_id, joint_index, position, physicsClientId=self.client_id
+                )
+            return
+
         p.setJointMotorControlArray(
             bodyIndex=robot_id,
             jointIndices=joint_indices,
             controlMode=p.POSITION_CONTROL,
             targetPositions=target_positions,
+            physicsClientId=self.client_id,
         )
 
     def get_joints_states(self, robot_id: int, joint_indices: List[int]) -> List[float]:
@@ -360,11 +407,13 @@ class PyBulletSimulation:
         Returns:
             list[float]: List of joint positions.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot get joint states")
             return []
 
-        joint_states = p.getJointStates(robot_id, joint_indices)
+        joint_states = p.getJointStates(
+            robot_id, joint_indices, physicsClientId=self.client_id
+        )
         joint_positions = [state[0] for state in joint_states]
         return joint_positions
 
@@ -379,11 +428,13 @@ class PyBulletSimulation:
         Returns:
             list: pybullet list describing the joint state.s
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot get joint state")
             return []
 
-        joint_state = p.getJointState(robot_id, joint_index)
+        joint_state = p.getJointState(
+            robot_id, joint_index, physicsClientId=self.client_id
+        )
         return joint_state
 
     def inverse_kinematics(
@@ -419,7 +470,7 @@ class PyBulletSimulation:
         Returns:
             list: Joint angles computed by inverse kinematics.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning(
                 "Simulation is not connected, cannot perform inverse kinematics"
             )
@@ -437,6 +488,7 @@ class PyBulletSimulation:
                 jointRanges=joint_ranges,
                 maxNumIterations=max_num_iterations,
                 residualThreshold=residual_threshold,
+                physicsClientId=self.client_id,
             )
 
         return p.calculateInverseKinematics(
@@ -452,6 +504,7 @@ class PyBulletSimulation:
             jointRanges=joint_ranges,
             maxNumIterations=max_num_iterations,
             residualThreshold=residual_threshold,
+            physicsClientId=self.client_id,
         )
 
     def get_link_state(
@@ -464,16 +517,21 @@ class PyBulletSimulation:
             robot_id (int): The ID of the robot in the simulation.
             link_index (int): The index of the link to get.
             compute_forward_kinematics (bool): Whether to compute forward kinematics.
+                Always computed in kinematic mode, since the link states are only
+                updated by the physics steps.
 
         Returns:
             list: pybullet list describing the link state.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot get link state")
             return []
 
         link_state = p.getLinkState(
-            robot_id, link_index, computeForwardKinematics=compute_forward_kinematics
+            robot_id,
+            link_index,
+            computeForwardKinematics=compute_forward_kinematics or self.kinematic,
+            physicsClientId=self.client_id,
         )
         return link_state
 
@@ -488,11 +546,13 @@ class PyBulletSimulation:
         Returns:
             list: pybullet list describing the joint info.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot get joint info")
             return []
 
-        joint_info = p.getJointInfo(robot_id, joint_index)
+        joint_info = p.getJointInfo(
+            robot_id, joint_index, physicsClientId=self.client_id
+        )
         return joint_info
 
     def add_debug_text(
@@ -507,7 +567,7 @@ class PyBulletSimulation:
             text_color_RGB (list): The color of the text in RGB format.
             life_time (int, optional): The lifetime of the debug text in seconds. Defaults to 3.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot add debug text")
             return
 
@@ -516,6 +576,7 @@ class PyBulletSimulation:
             textPosition=text_position,
             textColorRGB=text_color_RGB,
             lifeTime=life_time,
+            physicsClientId=self.client_id,
         )
 
     def add_debug_points(
@@ -534,7 +595,7 @@ class PyBulletSimulation:
             point_size (int, optional): The size of the points. Defaults to 4.
             life_time (int, optional): The lifetime of the debug points in seconds. Defaults to 3.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot add debug points")
             return
 
@@ -543,6 +604,7 @@ class PyBulletSimulation:
             pointColorsRGB=point_colors_RGB,
             pointSize=point_size,
             lifeTime=life_time,
+            physicsClientId=self.client_id,
         )
 
     def add_debug_lines(
@@ -563,7 +625,7 @@ class PyBulletSimulation:
             line_width (int, optional): The width of the line. Defaults to 4.
             life_time (int, optional): The lifetime of the debug line in seconds. Defaults to 3.
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot add debug lines")
             return
 
@@ -573,6 +635,7 @@ class PyBulletSimulation:
             lineColorRGB=line_color_RGB,
             lineWidth=line_width,
             lifeTime=life_time,
+            physicsClientId=self.client_id,
         )
 
     def get_robot_info(self, robot_id: int) -> dict:
@@ -603,7 +666,7 @@ class PyBulletSimulation:
         Returns:
             bool: True if connected, False otherwise
         """
-        return self.connected and p.isConnected()
+        return self.connected and p.isConnected(physicsClientId=self.client_id)
 
     def set_gravity(self, gravity_vector: Optional[List[float]] = None) -> None:
         """
@@ -615,11 +678,11 @@ class PyBulletSimulation:
         if gravity_vector is None:
             gravity_vector = [0, 0, -9.81]
 
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot set gravity")
             return
 
-        p.setGravity(*gravity_vector)
+        p.setGravity(*gravity_vector, physicsClientId=self.client_id)
 
     def get_dynamics_info(self, robot_id: int, link_index: int = -1) -> List:
         """
@@ -632,11 +695,13 @@ class PyBulletSimulation:
         Returns:
             list: Dynamics information
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot get dynamics info")
             return []
 
-        return p.getDynamicsInfo(robot_id, link_index)
+        return p.getDynamicsInfo(
+            robot_id, link_index, physicsClientId=self.client_id
+        )
 
     def change_dynamics(
         self, robot_id: int, link_index: int = -1, **kwargs: Dict[str, Any]
@@ -649,11 +714,13 @@ class PyBulletSimulation:
             link_index (int): The link index (-1 for base)
             **kwargs: Dynamics properties to change (mass, friction, etc.)
         """
-        if not self.connected or not p.isConnected():
+        if not self.is_connected():
             logger.warning("Simulation is not connected, cannot change dynamics")
             return
 
-        p.changeDynamics(robot_id, link_index, **kwargs)
+        p.changeDynamics(
+            robot_id, link_index, physicsClientId=self.client_id, **kwargs
+        )
 
 
 class MockSimulation:
@@ -672,6 +739,7 @@ class MockSimulation:
     def inverse_kinematics(self, *args, **kwargs): return []
     def get_link_state(self, *args, **kwargs): return None
     def set_gravity(self, *args, **kwargs): pass
+    def create_client(self): return self
     def start_stepping(self): pass
     def stop_stepping(self): pass
     def __getattr__(self, name): return lambda *args, **kwargs: None
@@ -680,13 +748,17 @@ class MockSimulation:
 def get_sim() -> PyBulletSimulation:
     global sim
 
-    if sim is None:
-        from phosphobot.configs import config
-        
-        if not PYBULLET_AVAILABLE:
-            logger.warning("PyBullet not available - using mock simulation")
-            sim = MockSimulation()  # type: ignore
-        else:
-            sim = PyBulletSimulation(sim_mode=config.SIM_MODE)
+    # With the lazy startup, the first requests can ask for it concurrently
+    with _sim_lock:
+        if sim is None:
+            from phosphobot.configs import config
+
+            if not PYBULLET_AVAILABLE:
+                logger.warning("PyBullet not available - using mock simulation")
+                sim = MockSimulation()  # type: ignore
+            else:
+                sim = PyBulletSimulation(
+                    sim_mode=config.SIM_MODE, kinematic=config.SIM_KINEMATIC
+                )
 
     return sim  # type: ignore
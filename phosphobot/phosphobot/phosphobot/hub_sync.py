@@ -0,0 +1,497 @@
+"""
+Incremental upload of a dataset folder to the Hugging Face Hub.
+
+Pushing the whole folder after each episode hashes every file of the dataset and
+sends one big commit. Instead, a manifest per folder and repository remembers:
+- the hashes of the local files, with their size and modification time, so that
+  only the new or modified files are hashed again
+- the hashes of the files on the Hub at the last known commit of main
+
+A sync uploads the files whose hash differs from the Hub, in batches: the blobs
+of the batches are uploaded in parallel, the commits are made in order. The meta
+files and the deletions go in the last commit, so the meta files on the Hub never
+reference files that are not uploaded yet. The manifest is saved after each
+commit: an interrupted sync resumes with the remaining batches.
+
+If main moved since the last sync (another client pushed, or the repository was
+recreated), the state of the Hub is read again from the file tree of the repo.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from huggingface_hub import CommitOperationAdd, CommitOperationDelete, HfApi
+from loguru import logger
+
+from phosphobot.utils import get_hf_token, get_home_app_path
+
+MANIFEST_VERSION = 1
+# Files removed from the Hub when they are not in the local folder anymore.
+# The other files of the repo (.gitattributes, files added on the Hub) are kept.
+MANAGED_FOLDERS = ("data/", "videos/", "meta/")
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hashes(path: str) -> Tuple[str, str]:
+    """SHA-256 and git blob SHA-1 of a file, in a single read."""
+    sha256 = hashlib.sha256()
+    git_sha1 = hashlib.sha1()
+    git_sha1.update(f"blob {os.path.getsize(path)}\0".encode())
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+            git_sha1.update(chunk)
+    return sha256.hexdigest(), git_sha1.hexdigest()
+
+
+class RateLimiter:
+    """
+    Token bucket over the uploaded bytes: a cap of the average upload rate, not of
+    the instantaneous one. acquire(nbytes) is called before a batch is uploaded and
+    blocks until the batch fits in bytes_per_second on average, after a first
+    second of data. The batch itself is then uploaded at full speed.
+    """
+
+    def __init__(self, bytes_per_second: float) -> None:
+        self.bytes_per_second = bytes_per_second
+        self._available = bytes_per_second
+        self._last_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def acquire(self, nbytes: int) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            self._available = min(
+                self.bytes_per_second,
+                self._available + (now - self._last_time) * self.bytes_per_second,
+            )
+            self._last_time = now
+            self._available -= nbytes
+            wait_time = max(0.0, -self._available / self.bytes_per_second)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+@dataclass
+class SyncResult:
+    uploaded: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    nb_commits: int = 0
+    bytes_uploaded: int = 0
+
+
+class HubSyncManifest:
+    """
+    Local and remote state of a dataset folder and its repository, saved as JSON.
+
+    local: path in repo -> size, mtime_ns, sha256, git_sha1 of the local file
+    remote: path in repo -> sha256 and/or git_sha1 of the file on the Hub
+    head: commit of main that remote describes
+    branches: branch -> commit of main it was last copied from
+    """
+
+    def __init__(self, path: str, folder_path: str, repo_id: str) -> None:
+        self.path = path
+        self.folder_path = folder_path
+        self.repo_id = repo_id
+        self.head: Optional[str] = None
+        self.local: Dict[str, dict] = {}
+        self.remote: Dict[str, dict] = {}
+        self.branches: Dict[str, str] = {}
+
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring the corrupted hub sync manifest {path}: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("repo_id") != repo_id:
+            return
+        if data.get("folder_path") == folder_path:
+            self.local = data.get("local", {})
+        self.head = data.get("head")
+        self.remote = data.get("remote", {})
+        self.branches = data.get("branches", {})
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "folder_path": self.folder_path,
+                    "repo_id": self.repo_id,
+                    "head": self.head,
+                    "local": self.local,
+                    "remote": self.remote,
+                    "branches": self.branches,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def is_on_hub(self, path_in_repo: str) -> bool:
+        local, remote = self.local.get(path_in_repo), self.remote.get(path_in_repo)
+        if local is None or remote is None:
+            return False
+        if "sha256" in remote:
+            return remote["sha256"] == local["sha256"]
+        return remote.get("git_sha1") == local["git_sha1"]
+
+
+def _is_meta(path_in_repo: str) -> bool:
+    """Files committed last: everything but the episode data and videos."""
+    return not path_in_repo.startswith(("data/", "videos/"))
+
+
+class HubSync:
+    """
+    Syncs a local dataset folder to the main branch of a dataset repository.
+
+    Example:
+    ```python
+    hub_sync = get_hub_sync(dataset.folder_full_path, dataset.repo_id)
+    hub_sync.request_sync(branches=["v2.1"])  # in the background
+    hub_sync.wait()
+    ```
+
+    Args:
+        folder_path: Local dataset folder.
+        repo_id: Dataset repository. It must exist.
+        api: Client of the Hub.
+        manifest_path: Where the manifest is saved.
+        max_workers: Number of batches uploaded in parallel.
+        batch_max_files: Maximum number of files per commit.
+        batch_max_bytes: Maximum size of the files of a commit.
+        bandwidth_limit: Maximum average upload rate, in bytes per second. The
+            waits are between the batches, a batch is not throttled.
+    """
+
+    def __init__(
+        self,
+        folder_path: Union[str, Path],
+        repo_id: str,
+        api: HfApi,
+        manifest_path: str,
+        max_workers: int = 4,
+        batch_max_files: int = 100,
+        batch_max_bytes: int = 512 * 1024 * 1024,
+        bandwidth_limit: Optional[float] = None,
+    ) -> None:
+        self.folder_path = str(folder_path)
+        self.repo_id = repo_id
+        self.api = api
+        self.manifest = HubSyncManifest(manifest_path, self.folder_path, repo_id)
+        self.max_workers = max_workers
+        self.batch_max_files = batch_max_files
+        self.batch_max_bytes = batch_max_bytes
+        self.rate_limiter = RateLimiter(bandwidth_limit) if bandwidth_limit else None
+
+        self._sync_lock = threading.Lock()
+        # Background syncs
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = False
+        self._pending_full = False
+        self._pending_branches: Set[str] = set()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def _scan_local(self) -> Dict[str, dict]:
+        """
+        Local files by path in repo. Only the files whose size or modification
+        time changed since the last scan are hashed.
+        """
+        stats: Dict[str, os.stat_result] = {}
+        for root, dirs, files in os.walk(self.folder_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if name.startswith(".") or name.endswith(".tmp"):
+                    continue
+                full_path = os.path.join(root, name)
+                path_in_repo = os.path.relpath(full_path, self.folder_path)
+                stats[path_in_repo.replace(os.sep, "/")] = os.stat(full_path)
+
+        def hash_file(path_in_repo: str) -> Tuple[str, dict]:
+            stat = stats[path_in_repo]
+            sha256, git_sha1 = file_hashes(os.path.join(self.folder_path, path_in_repo))
+            return path_in_repo, {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+                "git_sha1": git_sha1,
+            }
+
+        local = {}
+        to_hash = []
+        for path_in_repo, stat in stats.items():
+            cached = self.manifest.local.get(path_in_repo)
+            if (
+                cached is not None
+                and cached["size"] == stat.st_size
+                and cached["mtime_ns"] == stat.st_mtime_ns
+            ):
+                local[path_in_repo] = cached
+            else:
+                to_hash.append(path_in_repo)
+        # hashlib releases the GIL on large buffers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            local.update(executor.map(hash_file, to_hash))
+        self.manifest.local = local
+        return local
+
+    def _read_remote(self) -> Dict[str, dict]:
+        """Hashes of the files on main, from the file tree of the repo."""
+        remote = {}
+        for item in self.api.list_repo_tree(
+            repo_id=self.repo_id, recursive=True, repo_type="dataset"
+        ):
+            blob_id = getattr(item, "blob_id", None)
+            if blob_id is None:
+                # Folder
+                continue
+            lfs = getattr(item, "lfs", None)
+            remote[item.path] = (
+                {"sha256": lfs.sha256} if lfs is not None else {"git_sha1": blob_id}
+            )
+        return remote
+
+    def plan(self, full: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        Files to upload and files to delete on the Hub.
+
+        Args:
+            full: Read the state of the Hub again, even if main didn't move.
+        """
+        head = self.api.repo_info(repo_id=self.repo_id, repo_type="dataset").sha
+        if full or self.manifest.head is None or head != self.manifest.head:
+            logger.debug(f"Reading the files of {self.repo_id} at {head}")
+            self.manifest.remote = self._read_remote()
+            self.manifest.head = head
+
+        local = self._scan_local()
+        to_upload = sorted(p for p in local if not self.manifest.is_on_hub(p))
+        to_delete = sorted(
+            p
+            for p in self.manifest.remote
+            if p not in local and p.startswith(MANAGED_FOLDERS)
+        )
+        return to_upload, to_delete
+
+    def _batches(self, paths: List[str]) -> List[List[str]]:
+        batches: List[List[str]] = []
+        batch_bytes = 0
+        for path in paths:
+            size = self.manifest.local[path]["size"]
+            if (
+                not batches
+                or len(batches[-1]) >= self.batch_max_files
+                or batch_bytes + size > self.batch_max_bytes
+            ):
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append(path)
+            batch_bytes += size
+        return batches
+
+    def _additions(self, batch: List[str]) -> List[CommitOperationAdd]:
+        return [
+            CommitOperationAdd(
+                path_in_repo=path,
+                path_or_fileobj=os.path.join(self.folder_path, path),
+            )
+            for path in batch
+        ]
+
+    def _preupload(self, batch: List[str]) -> List[CommitOperationAdd]:
+        """Upload the blobs of a batch, without committing them."""
+        additions = self._additions(batch)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(
+                sum(self.manifest.local[path]["size"] for path in batch)
+            )
+        self.api.preupload_lfs_files(
+            repo_id=self.repo_id, additions=additions, repo_type="dataset"
+        )
+        return additions
+
+    def _commit(
+        self,
+        operations: list,
+        uploaded: List[str],
+        deleted: List[str],
+        result: SyncResult,
+    ) -> None:
+        commit = self.api.create_commit(
+            repo_id=self.repo_id,
+            repo_type="dataset",
+            operations=operations,
+            commit_message=f"Sync {len(uploaded)} files, delete {len(deleted)} files",
+            parent_commit=self.manifest.head,
+        )
+        for path in uploaded:
+            local = self.manifest.local[path]
+            self.manifest.remote[path] = {
+                "sha256": local["sha256"],
+                "git_sha1": local["git_sha1"],
+            }
+            result.bytes_uploaded += local["size"]
+        for path in deleted:
+            self.manifest.remote.pop(path, None)
+        self.manifest.head = commit.oid
+        self.manifest.save()
+        result.uploaded.extend(uploaded)
+        result.deleted.extend(deleted)
+        result.nb_commits += 1
+
+    def _copy_main_to_branches(self, branches: Iterable[str]) -> None:
+        for branch in branches:
+            if self.manifest.branches.get(branch) == self.manifest.head:
+                continue
+            try:
+                self.api.delete_branch(
+                    repo_id=self.repo_id, repo_type="dataset", branch=branch
+                )
+            except Exception:
+                logger.info(f"Branch {branch} did not exist, creating fresh.")
+            self.api.create_branch(
+                repo_id=self.repo_id,
+                repo_type="dataset",
+                revision="main",
+                branch=branch,
+            )
+            self.manifest.branches[branch] = self.manifest.head  # type: ignore
+            self.manifest.save()
+            logger.info(f"Branch {branch} of {self.repo_id} synced with main.")
+
+    def sync(self, full: bool = False, branches: Iterable[str] = ()) -> SyncResult:
+        """
+        Upload the new and modified files, delete the removed ones, then copy main
+        to the branches. Blocking.
+
+        Args:
+            full: Read the state of the Hub again, even if main didn't move.
+            branches: Branches recreated from main after the sync.
+        """
+        with self._sync_lock:
+            result = SyncResult()
+            to_upload, to_delete = self.plan(full=full)
+            if to_upload or to_delete:
+                logger.info(
+                    f"Syncing {self.folder_path} to {self.repo_id}: "
+                    f"{len(to_upload)} files to upload, {len(to_delete)} to delete"
+                )
+                data_batches = self._batches([p for p in to_upload if not _is_meta(p)])
+                meta_files = [p for p in to_upload if _is_meta(p)]
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = [
+                        executor.submit(self._preupload, batch)
+                        for batch in data_batches
+                    ]
+                    for batch, future in zip(data_batches, futures):
+                        self._commit(future.result(), batch, [], result)
+                # Last commit: the meta files, which reference the data, and the
+                # deletions
+                if meta_files or to_delete:
+                    self._commit(
+                        [
+                            *self._additions(meta_files),
+                            *(CommitOperationDelete(path_in_repo=p) for p in to_delete),
+                        ],
+                        meta_files,
+                        to_delete,
+                        result,
+                    )
+            else:
+                self.manifest.save()
+            self._copy_main_to_branches(branches)
+            return result
+
+    def request_sync(self, full: bool = False, branches: Iterable[str] = ()) -> None:
+        """
+        Sync in a background thread. The requests made during a sync are merged
+        into a single next sync.
+        """
+        with self._lock:
+            self._pending = True
+            self._pending_full |= full
+            self._pending_branches.update(branches)
+            self._idle.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"hub-sync-{self.repo_id}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    self._idle.set()
+                    return
+                full, branches = self._pending_full, self._pending_branches
+                self._pending = False
+                self._pending_full = False
+                self._pending_branches = set()
+            try:
+                result = self.sync(full=full, branches=branches)
+                if result.nb_commits:
+                    logger.success(
+                        f"Synced {self.repo_id}: {len(result.uploaded)} files "
+                        f"uploaded, {len(result.deleted)} deleted"
+                    )
+            except Exception as e:
+                logger.warning(
+                    f"Sync of {self.repo_id} interrupted, it will resume on the "
+                    f"next sync: {e}"
+                )
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background syncs. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+
+_hub_syncs: Dict[Tuple[str, str], HubSync] = {}
+_hub_syncs_lock = threading.Lock()
+
+
+def get_manifest_path(folder_path: str, repo_id: str) -> str:
+    """
+    One manifest per folder and repository: two folders pushed to the same
+    repository don't overwrite the local hashes of each other.
+    """
+    folder_hash = hashlib.sha1(folder_path.encode()).hexdigest()[:12]
+    file_name = f"{repo_id.replace('/', '--')}--{folder_hash}.json"
+    return str(get_home_app_path() / "hub_sync" / file_name)
+
+
+def get_hub_sync(
+    folder_path: Union[str, Path], repo_id: str, api: Optional[HfApi] = None
+) -> HubSync:
+    """The HubSync of a dataset folder and a repository, created on first use."""
+    from phosphobot.configs import config
+
+    key = (str(Path(folder_path).resolve()), repo_id)
+    with _hub_syncs_lock:
+        hub_sync = _hub_syncs.get(key)
+        if hub_sync is None:
+            hub_sync = HubSync(
+                folder_path=key[0],
+                repo_id=repo_id,
+                api=api or HfApi(token=get_hf_token()),
+                manifest_path=get_manifest_path(*key),
+                bandwidth_limit=config.HF_UPLOAD_BANDWIDTH_LIMIT,
+            )
+            _hub_syncs[key] = hub_sync
+        return hub_sync
@@ -0,0 +1,248 @@
+"""
+Binary joint state stream for the /joints/stream/ws websocket.
+
+All the subscribers share one reading of the robots per tick: the robots are read at
+the rate of the fastest subscriber, and each subscriber gets the latest state of its
+robots at its own rate. A slow subscriber skips states instead of queueing them.
+
+Frame layout (little endian):
+- header: magic b"PHJS", version (uint8), reserved (uint8), number of robots (uint16),
+  timestamp in seconds since epoch (float64)
+- then for each robot: robot id (uint16), number of joints n (uint16), followed by
+  n + 7 float32: joints in radians, end effector x, y, z in meters, rx, ry, rz in
+  radians (relative to the position of /move/init if it was called), gripper opening
+  between 0 and 1. Values that are not available are NaN.
+"""
+
+import asyncio
+import math
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from phosphobot.hardware.base import BaseManipulator, BaseRobot
+from phosphobot.robot import RobotConnectionManager, get_rcm
+
+JOINT_STREAM_MAGIC = b"PHJS"
+JOINT_STREAM_VERSION = 1
+_HEADER = struct.Struct("<4sBBHd")
+_ROBOT_HEADER = struct.Struct("<HH")
+# x, y, z, rx, ry, rz, gripper
+_NB_END_EFFECTOR_VALUES = 7
+
+
+@dataclass
+class RobotState:
+    robot_id: int
+    joints: np.ndarray
+    # x, y, z, rx, ry, rz, gripper
+    end_effector: np.ndarray
+
+
+def encode_joint_state_frame(timestamp: float, states: List[RobotState]) -> bytes:
+    parts = [
+        _HEADER.pack(JOINT_STREAM_MAGIC, JOINT_STREAM_VERSION, 0, len(states), timestamp)
+    ]
+    for state in states:
+        parts.append(_ROBOT_HEADER.pack(state.robot_id, len(state.joints)))
+        parts.append(
+            np.concatenate([state.joints, state.end_effector])
+            .astype("<f4", copy=False)
+            .tobytes()
+        )
+    return b"".join(parts)
+
+
+def decode_joint_state_frame(data: bytes) -> Tuple[float, List[RobotState]]:
+    """
+    Decode a binary frame of the /joints/stream/ws websocket.
+    Returns the timestamp and the state of each robot.
+    """
+    magic, version, _, nb_robots, timestamp = _HEADER.unpack_from(data, 0)
+    if magic != JOINT_STREAM_MAGIC or version != JOINT_STREAM_VERSION:
+        raise ValueError(f"Not a joint state frame (magic={magic!r}, version={version})")
+    offset = _HEADER.size
+    states: List[RobotState] = []
+    for _ in range(nb_robots):
+        robot_id, nb_joints = _ROBOT_HEADER.unpack_from(data, offset)
+        offset += _ROBOT_HEADER.size
+        values = np.frombuffer(
+            data,
+            dtype="<f4",
+            count=nb_joints + _NB_END_EFFECTOR_VALUES,
+            offset=offset,
+        )
+        offset += values.nbytes
+        states.append(
+            RobotState(
+                robot_id=robot_id,
+                joints=values[:nb_joints],
+                end_effector=values[nb_joints:],
+            )
+        )
+    return timestamp, states
+
+
+def read_robot_state(robot_id: int, robot: BaseRobot) -> RobotState:
+    """
+    Read the joints of the robot once. The end effector comes from the simulation, like
+    /end-effector/read: it doesn't read the motors again.
+    """
+    end_effector = np.full(_NB_END_EFFECTOR_VALUES, np.nan, dtype=np.float32)
+    joints = np.zeros(0, dtype=np.float32)
+    if hasattr(robot, "read_joints_position"):
+        joints = np.asarray(
+            robot.read_joints_position(unit="rad", source="robot"), dtype=np.float32
+        )
+
+    if isinstance(robot, BaseManipulator):
+        position, orientation, gripper = robot.get_end_effector_state(sync=False)
+        initial_position = getattr(robot, "initial_position", None)
+        initial_orientation_rad = getattr(robot, "initial_orientation_rad", None)
+        if initial_position is not None and initial_orientation_rad is not None:
+            position = position - initial_position
+            orientation = orientation - initial_orientation_rad
+        end_effector[:3] = position
+        end_effector[3:6] = orientation
+        end_effector[6] = gripper
+    elif hasattr(robot, "closing_gripper_value"):
+        end_effector[6] = robot.closing_gripper_value
+
+    return RobotState(robot_id=robot_id, joints=joints, end_effector=end_effector)
+
+
+@dataclass(eq=False)
+class Subscription:
+    # None means all the connected robots
+    robot_ids: Optional[List[int]]
+    period: float
+    next_due: float = 0.0
+    # Only the latest frame is kept
+    frames: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=1))
+
+    def push(self, frame: bytes) -> None:
+        if self.frames.full():
+            self.frames.get_nowait()
+        self.frames.put_nowait(frame)
+
+
+class JointStateStream:
+    """
+    Reads the robots for all the subscribers of the joint state websocket.
+    """
+
+    def __init__(self, rcm: RobotConnectionManager) -> None:
+        self.rcm = rcm
+        self.subscriptions: List[Subscription] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.nb_reads = 0
+
+    def subscribe(self, robot_ids: Optional[List[int]], rate: float) -> Subscription:
+        subscription = Subscription(robot_ids=robot_ids, period=1 / rate)
+        self.subscriptions.append(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        return subscription
+
+    def update(
+        self, subscription: Subscription, robot_ids: Optional[List[int]], rate: float
+    ) -> None:
+        subscription.robot_ids = robot_ids
+        subscription.period = 1 / rate
+        self._wakeup.set()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        self._wakeup.set()
+
+    async def _get_robots(self, due: List[Subscription]) -> Dict[int, BaseRobot]:
+        robots: Dict[int, BaseRobot] = {}
+        if any(subscription.robot_ids is None for subscription in due):
+            for robot_id, robot in enumerate(await self.rcm.robots):
+                robots[robot_id] = robot
+        for subscription in due:
+            for robot_id in subscription.robot_ids or []:
+                if robot_id in robots:
+                    continue
+                try:
+                    robots[robot_id] = await self.rcm.get_robot(robot_id)
+                except Exception as e:
+                    logger.debug(f"Joint stream: robot {robot_id} unavailable: {e}")
+        return robots
+
+    @staticmethod
+    def _read_states(robots: Dict[int, BaseRobot]) -> Dict[int, RobotState]:
+        states: Dict[int, RobotState] = {}
+        for robot_id, robot in robots.items():
+            try:
+                states[robot_id] = read_robot_state(robot_id, robot)
+            except Exception as e:
+                logger.warning(f"Joint stream: failed to read robot {robot_id}: {e}")
+        return states
+
+    async def tick(self, due: List[Subscription]) -> None:
+        """
+        Read the robots needed by the due subscriptions once and push their frames.
+        """
+        robots = await self._get_robots(due)
+        # The serial reads block: don't stall the event loop
+        states = await asyncio.to_thread(self._read_states, robots)
+        self.nb_reads += 1
+        timestamp = time.time()
+        for subscription in due:
+            robot_ids = (
+                sorted(states)
+                if subscription.robot_ids is None
+                else [i for i in subscription.robot_ids if i in states]
+            )
+            subscription.push(
+                encode_joint_state_frame(
+                    timestamp, [states[robot_id] for robot_id in robot_ids]
+                )
+            )
+
+    async def _run(self) -> None:
+        while self.subscriptions:
+            now = time.monotonic()
+            due = [s for s in self.subscriptions if s.next_due <= now]
+            if due:
+                try:
+                    await self.tick(due)
+                except Exception as e:
+                    logger.warning(f"Joint stream: tick failed: {e}")
+                for subscription in due:
+                    # Align the ticks on a common clock, so that the subscribers with
+                    # the same rate (or multiple rates) share the same reads. A slow
+                    # tick skips the missed periods instead of catching up.
+                    subscription.next_due = (
+                        math.floor(now / subscription.period) + 1
+                    ) * subscription.period
+                continue
+
+            self._wakeup.clear()
+            next_due = min(s.next_due for s in self.subscriptions)
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=max(0.0, next_due - now)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+joint_state_stream: Optional[JointStateStream] = None
+
+
+def get_joint_state_stream() -> JointStateStream:
+    global joint_state_stream
+
+    if joint_state_stream is None:
+        joint_state_stream = JointStateStream(rcm=get_rcm())
+
+    return joint_state_stream
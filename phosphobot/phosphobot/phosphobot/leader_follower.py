@@ -12,10 +12,14 @@ from phosphobot.hardware import (
     BaseManipulator,
     RemotePhosphobot,
     SO100Hardware,
-    get_sim,
 )
 from phosphobot.hardware.piper import PiperHardware
-from phosphobot.hardware.sim import PyBulletSimulation
+from phosphobot.metrics import (
+    RollingWindow,
+    leader_follower_loop_seconds,
+    leader_follower_overruns_total,
+    leader_follower_period_seconds,
+)
 from phosphobot.utils import background_task_log_exceptions
 
 
@@ -24,12 +28,85 @@ class RobotPair:
     leader: Union[BaseManipulator, RemotePhosphobot]
     follower: Union[BaseManipulator, RemotePhosphobot]
 
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.leader.name}:{getattr(self.leader, 'device_name', None)} -> "
+            f"{self.follower.name}:{getattr(self.follower, 'device_name', None)}"
+        )
+
+
+def _bus_key(robot: Union[BaseManipulator, RemotePhosphobot]) -> Any:
+    """The serial port (or address) of the robot, or the robot itself."""
+    return getattr(robot, "device_name", None) or id(robot)
+
+
+def group_pairs_by_bus(robot_pairs: List[RobotPair]) -> List[List[RobotPair]]:
+    """
+    Split the pairs into groups that don't share any bus, so that each bus is
+    only used by one thread. Pairs that share a robot or a port end up in the
+    same group. The order of the pairs is kept.
+    """
+    groups: List[List[RobotPair]] = []
+    group_buses: List[set] = []
+    for pair in robot_pairs:
+        buses = {_bus_key(pair.leader), _bus_key(pair.follower)}
+        # Merge all the groups that share a bus with this pair
+        merged_pairs: List[RobotPair] = []
+        for i in reversed(range(len(groups))):
+            if group_buses[i] & buses:
+                buses |= group_buses.pop(i)
+                merged_pairs = groups.pop(i) + merged_pairs
+        groups.append(merged_pairs + [pair])
+        group_buses.append(buses)
+    return groups
+
+
+class PairTiming:
+    """
+    Achieved rate and step latency of a leader-follower pair.
+    """
+
+    def __init__(self, pair: RobotPair) -> None:
+        self.name = pair.name
+        self.periods = RollingWindow(1000)
+        self.latencies = RollingWindow(1000)
+        self.overruns = 0
+        self.last_start_time: Optional[float] = None
+        # Children of the metrics, to skip the label lookup in the loop
+        self._loop_seconds = leader_follower_loop_seconds.labels(pair=self.name)
+        self._period_seconds = leader_follower_period_seconds.labels(pair=self.name)
+        self._overruns_total = leader_follower_overruns_total.labels(pair=self.name)
+
+    def observe(self, start_time: float, end_time: float) -> None:
+        if self.last_start_time is not None:
+            self.periods.add(start_time - self.last_start_time)
+            self._period_seconds.observe(start_time - self.last_start_time)
+        self.last_start_time = start_time
+        self.latencies.add(end_time - start_time)
+        self._loop_seconds.observe(end_time - start_time)
+
+    def overrun(self) -> None:
+        self.overruns += 1
+        self._overruns_total.inc()
+
+    def summary(self) -> dict:
+        periods = self.periods.summary()
+        return {
+            "rate_hz": 1 / periods["mean"] if periods["mean"] > 0 else 0.0,
+            "latency_ms": self.latencies.summary(scale=1000),
+            "overruns": self.overruns,
+        }
+
 
 class LeaderFollowerThread(threading.Thread):
     """
-    A dedicated thread to run the leader-follower control loop.
-    This offloads the intensive loop from the main asyncio event loop,
-    allowing for better performance and parallelism.
+    A dedicated thread to run the leader-follower control loop of a group of
+    pairs. This offloads the intensive loop from the main asyncio event loop.
+
+    Each group of pairs that share a bus gets its own thread (see
+    group_pairs_by_bus), so adding pairs doesn't slow down the others. The
+    ticks are scheduled on absolute deadlines.
     """
 
     def __init__(
@@ -39,15 +116,14 @@ class LeaderFollowerThread(threading.Thread):
         invert_controls: bool,
         enable_gravity_compensation: bool,
         compensation_values: Optional[Dict[str, int]],
-        sim: PyBulletSimulation,
     ) -> None:
-        super().__init__()
+        super().__init__(name="leader-follower")
         self.robot_pairs = robot_pairs
+        self.timings = [PairTiming(pair) for pair in robot_pairs]
         self.control_signal = control_signal
         self.invert_controls = invert_controls
         self.enable_gravity_compensation = enable_gravity_compensation
         self.compensation_values = compensation_values
-        self.sim = sim
         self.loop_period = 1 / 60 if self.enable_gravity_compensation else 1 / 150
         self.original_pid_gains: Dict[str, list] = {}
         self.warning_dropping_joints_displayed = False
@@ -197,44 +273,77 @@ class LeaderFollowerThread(threading.Thread):
             )
         )
 
+        deadline = time.perf_counter()
         try:
             while self.control_signal.is_in_loop():
-                start_time = time.perf_counter()
-
-                for pair in self.robot_pairs:
-                    leader, follower = pair.leader, pair.follower
-                    pos_rad = leader.read_joints_position(unit="rad", source="robot")
-
-                    if any(np.isnan(pos_rad)):
-                        logger.warning(
-                            "Leader joint positions contain NaN values. Skipping."
-                        )
-                        continue
-
-                    if self.enable_gravity_compensation:
-                        assert isinstance(
-                            leader, SO100Hardware
-                        ), "Gravity compensation is only supported for SO100Hardware."
-                        assert isinstance(
-                            follower, SO100Hardware
-                        ), "Gravity compensation is only supported for SO100Hardware."
-                        self._gravity_compensation_step(
-                            leader=leader, follower=follower, pos_rad=pos_rad
-                        )
-                    else:
-                        self._simple_mirroring_step(
-                            leader=leader, follower=follower, pos_rad=pos_rad
-                        )
-
-                elapsed = time.perf_counter() - start_time
-                sleep_time = max(0, self.loop_period - elapsed)
-                time.sleep(sleep_time)
+                for pair, timing in zip(self.robot_pairs, self.timings):
+                    start_time = time.perf_counter()
+                    self._step(pair)
+                    timing.observe(start_time, time.perf_counter())
+
+                deadline += self.loop_period
+                now = time.perf_counter()
+                if now > deadline:
+                    # Missed the deadline: restart the schedule from now instead of
+                    # running the late ticks back to back
+                    for timing in self.timings:
+                        timing.overrun()
+                    deadline = now
+                else:
+                    time.sleep(deadline - now)
         except Exception as e:
             logger.error(f"Error in leader-follower control loop: {e}")
             self.control_signal.stop()
         finally:
             self._cleanup_robots()
-            logger.info("Leader-follower control stopped.")
+            logger.info(
+                "Leader-follower control stopped. Timing: "
+                + ", ".join(
+                    f"{timing.name}: {timing.summary()}" for timing in self.timings
+                )
+            )
+
+    def timing_summary(self) -> Dict[str, dict]:
+        """Achieved rate and step latency of each pair."""
+        return {timing.name: timing.summary() for timing in self.timings}
+
+    def _step(self, pair: RobotPair) -> None:
+        leader, follower = pair.leader, pair.follower
+        pos_rad = leader.read_joints_position(unit="rad", source="robot")
+
+        if any(np.isnan(pos_rad)):
+            logger.warning("Leader joint positions contain NaN values. Skipping.")
+            return
+
+        if self.enable_gravity_compensation:
+            assert isinstance(
+                leader, SO100Hardware
+            ), "Gravity compensation is only supported for SO100Hardware."
+            assert isinstance(
+                follower, SO100Hardware
+            ), "Gravity compensation is only supported for SO100Hardware."
+            self._gravity_compensation_step(
+                leader=leader, follower=follower, pos_rad=pos_rad
+            )
+        else:
+            self._simple_mirroring_step(
+                leader=leader, follower=follower, pos_rad=pos_rad
+            )
+
+    def _write_follower(
+        self,
+        follower: Union[BaseManipulator, RemotePhosphobot],
+        q_target_rad: np.ndarray,
+        open_command: float,
+    ) -> None:
+        """Sends the joints and the gripper goals, in one write when possible."""
+        if isinstance(follower, BaseManipulator):
+            follower.set_motors_positions_and_gripper(q_target_rad, open_command)
+        else:
+            follower.control_gripper(open_command=open_command)
+            follower.set_motors_positions(
+                q_target_rad=q_target_rad, enable_gripper=False
+            )
 
     def _simple_mirroring_step(
         self,
@@ -246,11 +355,7 @@ class LeaderFollowerThread(threading.Thread):
         if self.invert_controls:
             pos_rad[0] = -pos_rad[0]
 
-        follower.control_gripper(
-            open_command=leader._rad_to_open_command(
-                pos_rad[leader.GRIPPER_JOINT_INDEX]
-            )
-        )
+        open_command = leader._rad_to_open_command(pos_rad[leader.GRIPPER_JOINT_INDEX])
 
         if len(pos_rad) > len(follower.SERVO_IDS):
             if not self.warning_dropping_joints_displayed:
@@ -261,7 +366,7 @@ class LeaderFollowerThread(threading.Thread):
                 self.warning_dropping_joints_displayed = True
             pos_rad = pos_rad[: len(follower.SERVO_IDS)]
 
-        follower.set_motors_positions(q_target_rad=pos_rad, enable_gripper=False)
+        self._write_follower(follower, pos_rad, open_command)
 
     def _gravity_compensation_step(
         self,
@@ -284,21 +389,8 @@ class LeaderFollowerThread(threading.Thread):
             follower, SO100Hardware
         ), "Gravity compensation is only supported for SO100Hardware."
 
-        # Control loop parameters
-        num_joints = len(leader.actuated_joints)
-        joint_indices = list(range(num_joints))
-
-        # Update PyBullet simulation to calculate gravity torque
-        for i, idx in enumerate(joint_indices):
-            self.sim.set_joint_state(leader.p_robot_id, idx, pos_rad[i])
-
-        tau_g = self.sim.inverse_dynamics(
-            leader.p_robot_id,
-            positions=list(pos_rad),
-            velocities=[0.0] * num_joints,
-            accelerations=[0.0] * num_joints,
-        )
-        tau_g = list(tau_g)
+        num_joints = len(pos_rad)
+        tau_g = list(leader.gravity_torques(pos_rad)[:num_joints])
 
         # Apply custom compensation values if they exist
         if self.compensation_values is not None:
@@ -320,11 +412,8 @@ class LeaderFollowerThread(threading.Thread):
         if self.invert_controls:
             theta_des_rad[0] = -theta_des_rad[0]
 
-        # Mirror the leader's gripper position to the follower
-        follower.control_gripper(
-            open_command=leader._rad_to_open_command(
-                theta_des_rad[leader.GRIPPER_JOINT_INDEX]
-            )
+        open_command = leader._rad_to_open_command(
+            theta_des_rad[leader.GRIPPER_JOINT_INDEX]
         )
 
         # Ensure follower receives commands for the correct number of joints
@@ -340,8 +429,8 @@ class LeaderFollowerThread(threading.Thread):
             # Truncate the position array to match the follower's joint count
             theta_des_rad = theta_des_rad[: len(follower.SERVO_IDS)]
 
-        # Command the follower to mirror the leader's final position
-        follower.set_motors_positions(q_target_rad=theta_des_rad, enable_gripper=False)
+        # Command the follower to mirror the leader's final position and gripper
+        self._write_follower(follower, theta_des_rad, open_command)
 
 
 @background_task_log_exceptions
@@ -353,23 +442,18 @@ async def start_leader_follower_loop(
     compensation_values: Optional[Dict[str, int]],
 ) -> None:
     """
-    FastAPI background task that starts and manages the leader-follower
-    control loop in a dedicated thread.
+    FastAPI background task that starts the leader-follower control loop, with
+    one dedicated thread per group of pairs that share a bus.
     """
-    sim = get_sim()
-
-    # Create and start the dedicated thread
-    control_thread = LeaderFollowerThread(
-        robot_pairs=robot_pairs,
-        control_signal=control_signal,
-        invert_controls=invert_controls,
-        enable_gravity_compensation=enable_gravity_compensation,
-        compensation_values=compensation_values,
-        sim=sim,
-    )
-    control_thread.start()
-
-    # The background task can return immediately, the thread will continue to run.
-    # If you need to wait for the thread to finish (e.g., in a script),
-    # you could add `control_thread.join()`. For FastAPI, we let it run.
-    logger.info("Leader-follower control thread has been started.")
+    for group in group_pairs_by_bus(robot_pairs):
+        control_thread = LeaderFollowerThread(
+            robot_pairs=group,
+            control_signal=control_signal,
+            invert_controls=invert_controls,
+            enable_gravity_compensation=enable_gravity_compensation,
+            compensation_values=compensation_values,
+        )
+        control_thread.start()
+
+    # The background task can return immediately, the threads will continue to run.
+    logger.info("Leader-follower control threads have been started.")
@@ -222,6 +222,12 @@ def run(
             help="Run the simulation in headless or gui mode.",
         ),
     ] = SimulationMode.headless,
+    kinematic_simulation: Annotated[
+        bool,
+        typer.Option(
+            help="In headless mode, move the simulated joints directly instead of stepping the physics. Uses much less CPU.",
+        ),
+    ] = True,
     only_simulation: Annotated[
         bool, typer.Option(help="Only run the simulation.")
     ] = False,
@@ -245,6 +251,12 @@ def run(
             help="Enable the cameras. If False, no camera will be detected. Useful in case of conflicts.",
         ),
     ] = True,
+    shm_frames: Annotated[
+        bool,
+        typer.Option(
+            help="Share the camera frames with the processes running on this machine through shared memory.",
+        ),
+    ] = True,
     max_can_interfaces: Annotated[
         int,
         typer.Option(
@@ -269,6 +281,18 @@ def run(
             help="(dev) Enable performance profiling. This generates profile.html."
         ),
     ] = False,
+    profile_startup: Annotated[
+        bool,
+        typer.Option(
+            help="(dev) Log the import and initialization time of each module and subsystem at startup."
+        ),
+    ] = False,
+    lazy_startup: Annotated[
+        bool,
+        typer.Option(
+            help="Initialize the simulation, robots and Hugging Face login on first use instead of at startup. Useful on Raspberry Pi."
+        ),
+    ] = False,
     crash_telemetry: Annotated[
         bool,
         typer.Option(help="Disable crash reporting."),
@@ -285,6 +309,12 @@ def run(
     """
     🧪 [green]Run the phosphobot dashboard and API server.[/green] Control your robot and record datasets.
     """
+    if profile_startup:
+        # Install the import profiler before importing the app and its dependencies
+        from phosphobot.startup import startup_profiler
+
+        startup_profiler.start()
+
     from phosphobot.app import start_server
 
     kwargs = {
@@ -292,14 +322,18 @@ def run(
         "port": port,
         "reload": reload,
         "simulation": simulation,
+        "kinematic_simulation": kinematic_simulation,
         "only_simulation": only_simulation,
         "simulate_cameras": simulate_cameras,
         "realsense": realsense,
         "can": can,
         "cameras": cameras,
+        "shm_frames": shm_frames,
         "max_opencv_index": max_opencv_index,
         "max_can_interfaces": max_can_interfaces,
         "profile": profile,
+        "profile_startup": profile_startup,
+        "lazy_startup": lazy_startup,
         "crash_telemetry": crash_telemetry,
         "usage_telemetry": usage_telemetry,
         "telemetry": telemetry,
@@ -0,0 +1,609 @@
+"""
+Lightweight latency metrics used to instrument the control and recording loops.
+
+The Prometheus registry at the bottom of this file is exposed on `GET /metrics`.
+Recording a sample doesn't take any lock: every thread writes into its own shard,
+and shards are only summed when the metrics are scraped.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+DEFAULT_LATENCY_BUCKETS_MS: List[float] = [1, 2, 5, 10, 20, 33, 50, 100, 200, 500]
+
+
+class RollingWindow:
+    """
+    Fixed size ring buffer of the last samples, with percentiles and histograms.
+    Adding a sample is O(1) and doesn't allocate.
+    """
+
+    def __init__(self, size: int = 1000) -> None:
+        self._values = np.zeros(size, dtype=np.float64)
+        self._size = size
+        self._index = 0
+        self.count = 0  # Total number of samples ever added
+        self.total = 0.0  # Sum of all samples ever added
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._values[self._index] = value
+            self._index = (self._index + 1) % self._size
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def values(self) -> np.ndarray:
+        """
+        Samples currently in the window (unordered).
+        """
+        with self._lock:
+            return self._values[: min(self.count, self._size)].copy()
+
+    def percentiles(self, q: List[float]) -> List[float]:
+        values = self.values()
+        if values.size == 0:
+            return [0.0 for _ in q]
+        return np.percentile(values, q).tolist()
+
+    def histogram(self, buckets: List[float], scale: float = 1.0) -> List[int]:
+        """
+        Number of samples in the window in each bucket. The last bucket counts
+        the samples above the last upper bound.
+        """
+        values = self.values() * scale
+        counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        if values.size > 0:
+            indices = np.searchsorted(np.asarray(buckets), values, side="left")
+            counts += np.bincount(indices, minlength=len(buckets) + 1)
+        return counts.tolist()
+
+    def summary(self, scale: float = 1.0, buckets: Optional[List[float]] = None) -> dict:
+        """
+        Summary of the window. Values are multiplied by scale (eg: 1000 for s -> ms).
+        """
+        p50, p90, p99 = self.percentiles([50, 90, 99])
+        result: Dict[str, Any] = {
+            "count": self.count,
+            "mean": (self.total / self.count) * scale if self.count else 0.0,
+            "p50": p50 * scale,
+            "p90": p90 * scale,
+            "p99": p99 * scale,
+            "max": self.max * scale,
+        }
+        if buckets is not None:
+            result["histogram"] = {
+                "buckets_upper_bounds": buckets,
+                "counts": self.histogram(buckets, scale=scale),
+            }
+        return result
+
+
+class RecordingMetrics:
+    """
+    Per-stage timings of the recording loop for one episode.
+
+    Stages are timed in seconds and reported in milliseconds. A deadline is missed
+    when a loop iteration takes longer than 1 / freq. A frame is dropped when a camera
+    doesn't return a frame for a step.
+    """
+
+    def __init__(self, freq: int, window_size: int = 1000) -> None:
+        self.freq = freq
+        self.window_size = window_size
+        self.stages: Dict[str, RollingWindow] = {}
+        self.steps = 0
+        self.missed_deadlines = 0
+        self.dropped_frames: Dict[int, int] = {}
+        self.started_at = time.time()
+        self._last_iteration_start: Optional[float] = None
+
+    def _window(self, stage: str) -> RollingWindow:
+        window = self.stages.get(stage)
+        if window is None:
+            window = self.stages.setdefault(stage, RollingWindow(self.window_size))
+        return window
+
+    def record(self, stage: str, duration_s: float) -> None:
+        self._window(stage).add(duration_s)
+
+    @contextmanager
+    def time(self, stage: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def start_iteration(self, now: float) -> None:
+        """
+        Call at the start of every loop iteration to track the period jitter.
+        """
+        if self._last_iteration_start is not None:
+            period = now - self._last_iteration_start
+            self.record("period", period)
+            self.record("jitter", abs(period - 1 / self.freq))
+        self._last_iteration_start = now
+
+    def end_iteration(self, elapsed_s: float) -> None:
+        self.steps += 1
+        self.record("loop", elapsed_s)
+        if elapsed_s > 1 / self.freq:
+            self.missed_deadlines += 1
+
+    def add_dropped_frame(self, camera_id: int) -> None:
+        self.dropped_frames[camera_id] = self.dropped_frames.get(camera_id, 0) + 1
+
+    def summary(self) -> dict:
+        return {
+            "freq": self.freq,
+            "started_at": self.started_at,
+            "steps": self.steps,
+            "missed_deadlines": self.missed_deadlines,
+            "missed_deadlines_ratio": self.missed_deadlines / self.steps
+            if self.steps
+            else 0.0,
+            "dropped_frames": {
+                str(camera_id): count
+                for camera_id, count in self.dropped_frames.items()
+            },
+            "stages_ms": {
+                stage: window.summary(scale=1000, buckets=DEFAULT_LATENCY_BUCKETS_MS)
+                for stage, window in self.stages.items()
+            },
+        }
+
+
+# Upper bounds of the Prometheus latency histogram buckets, in seconds
+DEFAULT_PROMETHEUS_BUCKETS_S: List[float] = [
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.02,
+    0.033,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels)
+        + "}"
+    )
+
+
+class _ShardedValues:
+    """
+    One list of floats per thread. A thread only ever writes into its own shard,
+    so updates don't need a lock. The lock is only taken the first time a thread
+    writes, to register its shard.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._shards: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def shard(self) -> List[float]:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(ident, [0.0] * self._size)
+        return shard
+
+    def sum(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards.values())
+        total = [0.0] * self._size
+        for shard in shards:
+            for i, value in enumerate(shard):
+                total[i] += value
+        return total
+
+
+class CounterChild:
+    def __init__(self) -> None:
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._values.shard()[0] += amount
+
+    def get(self) -> float:
+        return self._values.sum()[0]
+
+
+class GaugeChild:
+    """
+    A gauge is a single value: setting it is an atomic assignment. inc and dec
+    are meant to be called from a single thread.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._value -= amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class HistogramChild:
+    def __init__(self, buckets: List[float]) -> None:
+        self.buckets = buckets
+        # Shard layout: [count per bucket..., count above the last bucket, sum, count]
+        self._values = _ShardedValues(len(buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        shard = self._values.shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    @contextmanager
+    def time(self) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def get(self) -> Tuple[List[float], float, float]:
+        """
+        Cumulative bucket counts (the last one is +Inf), sum and count.
+        """
+        values = self._values.sum()
+        cumulative = []
+        running = 0.0
+        for count in values[: len(self.buckets) + 1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, values[-2], values[-1]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, **labels: object) -> object:
+        """
+        Get the child of the metric with these label values. Keep a reference to
+        the child in hot loops to skip the lookup.
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _default_child(self) -> object:
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} has labels, call .labels() first")
+        return self.labels()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def _items(self) -> List[Tuple[List[Tuple[str, str]], object]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(list(zip(self.labelnames, key)), child) for key, child in items]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def labels(self, **labels: object) -> CounterChild:  # type: ignore[override]
+        return super().labels(**labels)  # type: ignore[return-value]
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default_child().inc(amount)  # type: ignore[attr-defined]
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(child.get())}"  # type: ignore[attr-defined]
+            for labels, child in self._items()
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def labels(self, **labels: object) -> GaugeChild:  # type: ignore[override]
+        return super().labels(**labels)  # type: ignore[return-value]
+
+    def set(self, value: float) -> None:
+        self._default_child().set(value)  # type: ignore[attr-defined]
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(child.get())}"  # type: ignore[attr-defined]
+            for labels, child in self._items()
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[List[float]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets or DEFAULT_PROMETHEUS_BUCKETS_S)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def labels(self, **labels: object) -> HistogramChild:  # type: ignore[override]
+        return super().labels(**labels)  # type: ignore[return-value]
+
+    def observe(self, value: float) -> None:
+        self._default_child().observe(value)  # type: ignore[attr-defined]
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, child in self._items():
+            cumulative, total, count = child.get()  # type: ignore[attr-defined]
+            upper_bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+            for upper_bound, bucket_count in zip(upper_bounds, cumulative):
+                bucket_labels = labels + [("le", upper_bound)]
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels)} {_format_value(bucket_count)}"
+                )
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            )
+            lines.append(
+                f"{self.name}_count{_format_labels(labels)} {_format_value(count)}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered in the Prometheus text format.
+    Creating a metric that already exists returns the existing one.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(
+                        f"Metric {metric.name} is already registered as a {existing.type_name}"
+                    )
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[List[float]] = None,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """
+        Render all the metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Motor buses
+motor_bus_transaction_seconds = registry.histogram(
+    "phosphobot_motor_bus_transaction_seconds",
+    "Duration of a motor bus transaction (read, write, ...).",
+    ["bus", "port", "operation"],
+)
+motor_bus_errors_total = registry.counter(
+    "phosphobot_motor_bus_errors_total",
+    "Number of motor bus transactions that raised an error.",
+    ["bus", "port", "operation"],
+)
+
+# Cameras
+camera_frames_total = registry.counter(
+    "phosphobot_camera_frames_total",
+    "Number of frames delivered by a camera.",
+    ["camera_id"],
+)
+camera_failed_frames_total = registry.counter(
+    "phosphobot_camera_failed_frames_total",
+    "Number of times a camera failed to deliver a frame.",
+    ["camera_id"],
+)
+camera_fps = registry.gauge(
+    "phosphobot_camera_fps",
+    "Frames per second actually delivered by a camera over the last second.",
+    ["camera_id"],
+)
+camera_stream_send_seconds = registry.histogram(
+    "phosphobot_camera_stream_send_seconds",
+    "Time for the client of a video stream to take a frame, congestion included.",
+    ["camera"],
+)
+
+# Leader follower
+leader_follower_loop_seconds = registry.histogram(
+    "phosphobot_leader_follower_loop_seconds",
+    "Time spent in one step of a leader follower pair, from the read to the write.",
+    ["pair"],
+)
+leader_follower_period_seconds = registry.histogram(
+    "phosphobot_leader_follower_period_seconds",
+    "Time between the start of two steps of a leader follower pair.",
+    ["pair"],
+)
+leader_follower_overruns_total = registry.counter(
+    "phosphobot_leader_follower_overruns_total",
+    "Number of leader follower ticks that missed their deadline.",
+    ["pair"],
+)
+
+# Gravity compensation
+gravity_compensation_loop_seconds = registry.histogram(
+    "phosphobot_gravity_compensation_loop_seconds",
+    "Time spent in one iteration of the gravity compensation loop, without sleep.",
+)
+gravity_compensation_period_seconds = registry.histogram(
+    "phosphobot_gravity_compensation_period_seconds",
+    "Time between the start of two iterations of the gravity compensation loop.",
+)
+gravity_compensation_overruns_total = registry.counter(
+    "phosphobot_gravity_compensation_overruns_total",
+    "Number of gravity compensation iterations that missed their deadline.",
+)
+
+# Teleoperation
+teleop_packets_total = registry.counter(
+    "phosphobot_teleop_packets_total",
+    "Number of teleoperation commands, by status (processed, dropped) and reason.",
+    ["status", "reason"],
+)
+teleop_motion_loop_seconds = registry.histogram(
+    "phosphobot_teleop_motion_loop_seconds",
+    "Time spent in one tick of the teleoperation motion engine, without sleep.",
+)
+teleop_motion_overruns_total = registry.counter(
+    "phosphobot_teleop_motion_overruns_total",
+    "Number of teleoperation motion engine ticks that missed their deadline.",
+)
+
+# AI control
+ai_inference_seconds = registry.histogram(
+    "phosphobot_ai_inference_seconds",
+    "Round trip time of an inference request to the model server.",
+    ["model"],
+)
+ai_inference_errors_total = registry.counter(
+    "phosphobot_ai_inference_errors_total",
+    "Number of inference requests that failed.",
+    ["model"],
+)
+ai_action_queue_depth = registry.gauge(
+    "phosphobot_ai_action_queue_depth",
+    "Number of actions left in the queue of the AI control loop.",
+    ["model"],
+)
+ai_robot_bus_seconds = registry.histogram(
+    "phosphobot_ai_robot_bus_seconds",
+    "Duration of the joints reads and writes of each robot in the AI control loop.",
+    ["model", "robot", "operation"],
+)
+
+
+@contextmanager
+def time_motor_bus_transaction(
+    bus: str, port: str, operation: str
+) -> Generator[None, None, None]:
+    """
+    Record the duration of a motor bus transaction, and count it as an error if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        motor_bus_errors_total.labels(bus=bus, port=port, operation=operation).inc()
+        raise
+    finally:
+        motor_bus_transaction_seconds.labels(
+            bus=bus, port=port, operation=operation
+        ).observe(time.perf_counter() - start)
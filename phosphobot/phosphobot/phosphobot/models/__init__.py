@@ -343,6 +343,24 @@ class JointsWriteRequest(BaseModel):
     )
 
 
+class JointsStreamRequest(BaseModel):
+    """
+    Subscription to the binary joint state websocket /joints/stream/ws.
+    Send it as a JSON text message to change the subscription.
+    """
+
+    robot_ids: Optional[List[int]] = Field(
+        None,
+        description="Ids of the robots to stream. If None, stream all the connected robots.",
+    )
+    rate: float = Field(
+        30.0,
+        gt=0,
+        le=200,
+        description="Number of frames per second sent to this client.",
+    )
+
+
 class JointsReadResponse(BaseModel):
     """
     Response to read the joints of the robot.
@@ -613,6 +631,55 @@ class RecordingStopResponse(BaseModel):
     )
 
 
+class LatencyHistogram(BaseModel):
+    buckets_upper_bounds: List[float] = Field(
+        ..., description="Upper bounds of the buckets, in milliseconds."
+    )
+    counts: List[int] = Field(
+        ...,
+        description="Number of samples in each bucket. The last count is for samples above the last upper bound.",
+    )
+
+
+class StageLatency(BaseModel):
+    """
+    Latency of a stage of a loop, in milliseconds, over a rolling window of samples.
+    """
+
+    count: int = Field(..., description="Total number of samples.")
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+    histogram: Optional[LatencyHistogram] = None
+
+
+class RecordingMetricsResponse(BaseModel):
+    """
+    Per-stage timings of the recording loop for the current or last episode.
+    """
+
+    is_recording: bool
+    episode_index: Optional[int] = None
+    freq: int = Field(..., description="Target frequency of the recording loop (Hz).")
+    started_at: float = Field(..., description="Start of the recording (unix time).")
+    steps: int = Field(..., description="Number of steps recorded.")
+    missed_deadlines: int = Field(
+        ...,
+        description="Number of steps where the loop took longer than 1/freq.",
+    )
+    missed_deadlines_ratio: float
+    dropped_frames: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Number of steps without a frame, by camera id.",
+    )
+    stages_ms: Dict[str, StageLatency] = Field(
+        default_factory=dict,
+        description="Latency of each stage: cameras, camera_<id>, robots, step_build, rerun, append_step, loop, period and jitter.",
+    )
+
+
 class RecordingPlayRequest(BaseModel):
     """
     Request to play a recorded episode.
@@ -741,11 +808,44 @@ class BrowserFilesRequest(BaseModel):
 
 class DeleteEpisodeRequest(BaseModel):
     """
-    Request to delete an episode.
+    Request to delete one or several episodes.
     """
 
     path: str
-    episode_id: int
+    episode_id: Optional[int] = None
+    episode_ids: List[int] = Field(
+        default_factory=list,
+        description="Delete several episodes at once. Combined with episode_id if both are set.",
+    )
+    compact: bool = Field(
+        False,
+        description="Renumber the remaining episodes right away. Otherwise, this is done before the next push to the Hub.",
+    )
+
+    @model_validator(mode="after")
+    def check_episode_ids(self) -> "DeleteEpisodeRequest":
+        if self.episode_id is None and not self.episode_ids:
+            raise ValueError("Either episode_id or episode_ids must be set.")
+        return self
+
+    @property
+    def all_episode_ids(self) -> List[int]:
+        if self.episode_id is None:
+            return self.episode_ids
+        return [self.episode_id] + self.episode_ids
+
+
+class DeleteEpisodesResponse(BaseModel):
+    """
+    Response to the deletion of episodes.
+    """
+
+    status: Literal["ok", "error"] = "ok"
+    deleted_episodes: List[int]
+    compacted: bool = Field(
+        ...,
+        description="False if the deleted episodes are tombstoned until the next compaction.",
+    )
 
 
 class ModelConfigurationRequest(BaseModel):
@@ -1235,6 +1335,11 @@ class TeleopSettings(BaseModel):
         gt=0,
         examples=[1.0, 0.5, 2.0],
     )
+    motion_smoothing: bool = Field(
+        False,
+        description="Command the robot at a fixed rate from a smoothed and "
+        "extrapolated target, instead of on every packet.",
+    )
 
 
 class TeleopSettingsRequest(BaseModel):
@@ -1248,6 +1353,11 @@ class TeleopSettingsRequest(BaseModel):
         gt=0,
         examples=[1.0, 0.5, 2.0],
     )
+    motion_smoothing: Optional[bool] = Field(
+        None,
+        description="Command the robot at a fixed rate from a smoothed and "
+        "extrapolated target, instead of on every packet. Unchanged if not set.",
+    )
 
 
 class ChatRequest(BaseModel):
@@ -1269,6 +1379,12 @@ class ChatRequest(BaseModel):
     command_history: Optional[List[str]] = Field(
         None, description="List of previous commands to provide context for the chat."
     )
+    max_steps: int = Field(
+        1,
+        ge=1,
+        le=10,
+        description="Maximum number of commands to plan in one response. The commands after the first one are returned in next_commands.",
+    )
 
 
 class ChatResponse(BaseModel):
@@ -1284,3 +1400,7 @@ class ChatResponse(BaseModel):
     endpoint_params: Optional[Dict[str, Any]] = Field(
         None, description="Parameters to pass to the endpoint."
     )
+    next_commands: List[str] = Field(
+        default_factory=list,
+        description="Commands to execute after command, when several steps were planned at once.",
+    )
@@ -0,0 +1,327 @@
+"""
+Training-ready export of a LeRobot dataset: chunked, memory-mappable NumPy arrays.
+
+Training and validation read every frame of every epoch. Reading them from the
+arrays is a memory map of the file, instead of a parquet read and a video decode.
+
+Layout of an export:
+```
+export_folder/
+    index.json
+    episode_000000/
+        observation.state.npy   float32 (num_frames, state_dim)
+        action.npy              float32 (num_frames, action_dim)
+        observation.images.main.npy   uint8 (num_frames, height, width, 3), RGB
+        ...
+    episode_000001/
+    ...
+```
+
+index.json lists the episodes in order with their offset in the concatenation of
+all the frames, so a global frame index maps to an episode and a row with a
+binary search. The export is incremental: an episode is only exported again if
+its parquet or videos changed, or if the resolution changed. The index is saved
+after each episode, so an interrupted export resumes where it stopped.
+"""
+
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+ARRAY_EXPORT_VERSION = 1
+INDEX_FILE_NAME = "index.json"
+ARRAY_COLUMNS = ("observation.state", "action")
+# Default layout of the files of a LeRobot dataset (data_path and video_path of
+# meta/info.json)
+DEFAULT_DATA_PATH = "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet"
+DEFAULT_VIDEO_PATH = (
+    "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
+)
+
+
+def _episode_folder_name(episode_index: int) -> str:
+    return f"episode_{episode_index:06d}"
+
+
+def _fingerprint(paths: List[str]) -> List[List]:
+    """Size and modification time of the source files of an episode."""
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path) if os.path.exists(path) else None
+        fingerprint.append(
+            [os.path.basename(path), stat.st_size, stat.st_mtime_ns]
+            if stat is not None
+            else [os.path.basename(path), None, None]
+        )
+    return fingerprint
+
+
+def decode_video_frames(video_path: str, frames: np.ndarray) -> None:
+    """
+    Decode a video into frames, a (num_frames, height, width, 3) uint8 array, in RGB
+    and resized to (width, height). Missing frames repeat the last frame, extra
+    frames are dropped, so that the frames line up with the rows of the parquet.
+    """
+    import cv2
+
+    num_frames, height, width, _ = frames.shape
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video at path: {video_path}")
+
+    nb_decoded = 0
+    try:
+        while nb_decoded < num_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frames[nb_decoded])
+            nb_decoded += 1
+    finally:
+        cap.release()
+
+    if nb_decoded < num_frames:
+        logger.warning(
+            f"{video_path} has {nb_decoded} frames for {num_frames} rows. "
+            "Repeating the last frame."
+        )
+        if nb_decoded > 0:
+            frames[nb_decoded:] = frames[nb_decoded - 1]
+
+
+def _write_index(index_path: str, index: dict) -> None:
+    tmp_index_path = index_path + ".tmp"
+    with open(tmp_index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=4)
+    os.replace(tmp_index_path, index_path)
+
+
+def export_episode(
+    parquet_path: str,
+    video_paths: Dict[str, str],
+    output_folder: str,
+    resolution: Tuple[int, int],
+) -> int:
+    """
+    Export one episode into output_folder. Returns its number of frames.
+
+    The arrays are written to a temporary folder which is then renamed, so an
+    interrupted export never leaves a partial episode behind.
+    """
+    df = pd.read_parquet(parquet_path, columns=list(ARRAY_COLUMNS))
+    num_frames = len(df)
+
+    tmp_folder = output_folder + ".tmp"
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    os.makedirs(tmp_folder)
+    for column in ARRAY_COLUMNS:
+        values = np.stack(list(df[column])) if num_frames else np.zeros((0, 0))
+        np.save(os.path.join(tmp_folder, f"{column}.npy"), values.astype(np.float32))
+    width, height = resolution
+    for camera_key, video_path in video_paths.items():
+        # Decoded straight into the file: a long episode doesn't fill the memory
+        frames = np.lib.format.open_memmap(
+            os.path.join(tmp_folder, f"{camera_key}.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(num_frames, height, width, 3),
+        )
+        decode_video_frames(video_path, frames)
+        frames.flush()
+        del frames
+
+    shutil.rmtree(output_folder, ignore_errors=True)
+    os.replace(tmp_folder, output_folder)
+    return num_frames
+
+
+def export_array_dataset(
+    dataset_path: str,
+    output_path: str,
+    episode_indexes: List[int],
+    camera_keys: List[str],
+    resolution: Tuple[int, int] = (320, 240),
+    fps: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    data_path: str = DEFAULT_DATA_PATH,
+    video_path: str = DEFAULT_VIDEO_PATH,
+    chunks_size: int = 1000,
+) -> dict:
+    """
+    Export the episodes of the LeRobot dataset at dataset_path into output_path.
+    Returns the index of the export.
+
+    Args:
+        dataset_path: Root folder of the LeRobot dataset.
+        output_path: Folder of the export. Created if needed.
+        episode_indexes: Episodes to export, in order.
+        camera_keys: Video keys to export, e.g. "observation.images.main".
+        resolution: (width, height) of the exported frames.
+        fps: Frame rate of the dataset, stored in the index.
+        max_workers: Number of episodes exported in parallel. Defaults to the
+            number of CPUs.
+        data_path, video_path, chunks_size: Layout of the files of the dataset,
+            from its meta/info.json.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    index_path = os.path.join(output_path, INDEX_FILE_NAME)
+    previous: Dict[int, dict] = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            previous_index = json.load(f)
+        if (
+            previous_index.get("version") == ARRAY_EXPORT_VERSION
+            and previous_index.get("resolution") == list(resolution)
+            and previous_index.get("cameras") == camera_keys
+        ):
+            previous = {
+                episode["episode_index"]: episode
+                for episode in previous_index["episodes"]
+            }
+
+    episodes: List[Dict[str, Any]] = []
+    to_export: List[Tuple[Dict[str, Any], str, Dict[str, str]]] = []
+    for episode_index in episode_indexes:
+        file_name = _episode_folder_name(episode_index)
+        episode_chunk = episode_index // chunks_size
+        parquet_path = os.path.join(
+            dataset_path,
+            data_path.format(episode_chunk=episode_chunk, episode_index=episode_index),
+        )
+        video_paths = {
+            camera_key: os.path.join(
+                dataset_path,
+                video_path.format(
+                    episode_chunk=episode_chunk,
+                    video_key=camera_key,
+                    episode_index=episode_index,
+                ),
+            )
+            for camera_key in camera_keys
+        }
+        episode: Dict[str, Any] = {
+            "episode_index": episode_index,
+            "source": _fingerprint([parquet_path, *video_paths.values()]),
+        }
+        episodes.append(episode)
+
+        done = previous.get(episode_index)
+        if (
+            done is not None
+            and done["source"] == episode["source"]
+            and os.path.isdir(os.path.join(output_path, file_name))
+        ):
+            episode["num_frames"] = done["num_frames"]
+        else:
+            to_export.append((episode, parquet_path, video_paths))
+
+    index = {
+        "version": ARRAY_EXPORT_VERSION,
+        "resolution": list(resolution),
+        "fps": fps,
+        "cameras": camera_keys,
+        "complete": False,
+    }
+    logger.info(
+        f"Exporting {len(to_export)} of {len(episodes)} episodes of {dataset_path} "
+        f"to {output_path}"
+    )
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [
+            (
+                episode,
+                executor.submit(
+                    export_episode,
+                    parquet_path,
+                    video_paths,
+                    os.path.join(
+                        output_path, _episode_folder_name(episode["episode_index"])
+                    ),
+                    resolution,
+                ),
+            )
+            for episode, parquet_path, video_paths in to_export
+        ]
+        for episode, future in futures:
+            episode["num_frames"] = future.result()
+            # Checkpoint: the exported episodes are not exported again on resume
+            _write_index(
+                index_path,
+                {
+                    **index,
+                    "episodes": [e for e in episodes if "num_frames" in e],
+                },
+            )
+
+    # Remove the episodes that are not in the dataset anymore
+    kept = {_episode_folder_name(episode["episode_index"]) for episode in episodes}
+    for name in os.listdir(output_path):
+        if name.startswith("episode_") and name not in kept:
+            shutil.rmtree(os.path.join(output_path, name), ignore_errors=True)
+
+    offset = 0
+    for episode in episodes:
+        episode["offset"] = offset
+        offset += episode["num_frames"]
+    index.update(complete=True, total_frames=offset, episodes=episodes)
+    _write_index(index_path, index)
+    return index
+
+
+class ArrayDataset:
+    """
+    Read an export of export_array_dataset. The arrays are memory mapped: only
+    the frames that are accessed are read from the disk.
+
+    Example:
+    ```python
+    arrays = ArrayDataset(path)
+    sample = arrays[1234]  # {"observation.state": ..., "action": ..., cameras...}
+    frames = arrays.episode(3)["observation.images.main"]  # (T, H, W, 3) uint8
+    ```
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        with open(self.path / INDEX_FILE_NAME, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if not self.index.get("complete"):
+            raise ValueError(f"The export in {path} is incomplete. Run it again.")
+        self.episodes: List[dict] = self.index["episodes"]
+        self.camera_keys: List[str] = self.index["cameras"]
+        self._offsets = np.array([episode["offset"] for episode in self.episodes])
+        self._arrays: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.index["total_frames"]
+
+    def episode(self, position: int) -> Dict[str, np.ndarray]:
+        """Arrays of the episode at this position in the index."""
+        arrays = self._arrays.get(position)
+        if arrays is None:
+            folder = self.path / _episode_folder_name(
+                self.episodes[position]["episode_index"]
+            )
+            arrays = {
+                name: np.load(folder / f"{name}.npy", mmap_mode="r")
+                for name in (*ARRAY_COLUMNS, *self.camera_keys)
+            }
+            self._arrays[position] = arrays
+        return arrays
+
+    def __getitem__(self, frame: int) -> Dict[str, np.ndarray]:
+        """Values of a frame, by its index in the concatenation of the episodes."""
+        if not 0 <= frame < len(self):
+            raise IndexError(f"Frame {frame} out of range for {len(self)} frames")
+        position = int(np.searchsorted(self._offsets, frame, side="right")) - 1
+        row = frame - self.episodes[position]["offset"]
+        return {name: array[row] for name, array in self.episode(position).items()}
@@ -38,3 +38,23 @@ class AllCamerasStatus(BaseModel):
         default_factory=list,
         description="List of camera ids that are video cameras.",
     )
+
+
+class FrameRingInfo(BaseModel):
+    """
+    Shared memory ring where the frames of a camera are written.
+    """
+
+    camera_id: int
+    camera_type: CameraTypes
+    name: str = Field(description="Name of the shared memory block.")
+    height: int
+    width: int
+    channels: int
+
+
+class FrameRingsResponse(BaseModel):
+    rings: List[FrameRingInfo] = Field(default_factory=list)
+    complete: bool = Field(
+        description="Whether all the active video cameras have a ring. If False, use the /frames endpoint."
+    )
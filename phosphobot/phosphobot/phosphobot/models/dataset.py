@@ -6,21 +6,16 @@ import os
 import shutil
 import time
 from abc import ABC, abstractmethod
-from concurrent.futures import Future
 from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional, cast
 
 import numpy as np
-from huggingface_hub import (
-    CommitInfo,
-    HfApi,
-    create_repo,
-    delete_folder,
-    delete_repo,
-)
+from huggingface_hub import HfApi, create_repo, delete_repo
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from phosphobot.hub_sync import get_hub_sync
+from phosphobot.models.meta_writer import TOMBSTONES_FILE_NAME, meta_writer
 from phosphobot.models.robot import BaseRobot
 from phosphobot.utils import (
     NumpyEncoder,
@@ -127,6 +122,11 @@ class BaseEpisode(BaseModel, ABC):
             # The action of the previous step is the joints_position of the current observation
             self.steps[-1].action = current_step_data.observation.joints_position.copy()
 
+    @property
+    def num_steps(self) -> int:
+        """Number of steps recorded in the episode."""
+        return len(self.steps)
+
     @property
     @abstractmethod
     def dataset_path(self) -> Path:
@@ -515,8 +515,24 @@ class BaseDataset:
         repo_id = repo_id or self.repo_id
         return self.HF_API.repo_exists(repo_id=repo_id, repo_type="dataset")
 
+    def compact_if_needed(self) -> bool:
+        """
+        Renumber the episodes if some were deleted since the last compaction.
+        Returns True if the dataset was compacted.
+        """
+        if not os.path.exists(
+            os.path.join(self.folder_full_path, "meta", TOMBSTONES_FILE_NAME)
+        ):
+            return False
+
+        from phosphobot.models.lerobot_dataset import LeRobotDataset
+
+        return LeRobotDataset(path=self.path).compact()
+
     def sync_local_to_hub(self) -> None:
-        """Reupload the dataset folder to Hugging Face"""
+        """Make the dataset on Hugging Face match the local dataset folder"""
+        self.compact_if_needed()
+        meta_writer.flush()
         username_or_orgid = get_hf_username_or_orgid()
         if username_or_orgid is None:
             logger.warning(
@@ -532,34 +548,12 @@ class BaseDataset:
         if not repository_exists:
             self.push_dataset_to_hub()
 
-        # else, Delete the folders and reupload the dataset.
+        # else, upload the modified files and delete the ones that are not local
+        # anymore, comparing with the files on the Hub
         else:
-            # Delete the dataset folders from Hugging Face
-            try:
-                delete_folder(
-                    repo_id=self.repo_id, path_in_repo="./data", repo_type="dataset"
-                )
-            except Exception:
-                logger.debug("No data folder to delete")
-            try:
-                delete_folder(
-                    repo_id=self.repo_id, path_in_repo="./videos", repo_type="dataset"
-                )
-            except Exception:
-                logger.debug("No videos folder to delete")
-            try:
-                delete_folder(
-                    repo_id=self.repo_id, path_in_repo="./meta", repo_type="dataset"
-                )
-            except Exception:
-                logger.debug("No meta folder to delete")
-            # Reupload the dataset folder to Hugging Face
-            self.HF_API.upload_folder(
-                folder_path=self.folder_full_path,
-                repo_id=self.repo_id,
-                repo_type="dataset",
-                run_as_future=True,
-            )
+            get_hub_sync(
+                self.folder_full_path, self.repo_id, api=self.HF_API
+            ).request_sync(full=True)
 
     def delete(self) -> None:
         """Delete the dataset from the local folder and Hugging Face"""
@@ -612,6 +606,9 @@ To get started in robotics, [get your own phospho starter pack.](https://robots.
         Args:
             branch_path (str, optional): Additional branch to push to besides main
         """
+        # Renumber the deleted episodes and write the pending meta files before uploading them
+        self.compact_if_needed()
+        meta_writer.flush()
         try:
             # Initialize HF API with token
 
@@ -662,68 +659,15 @@ To get started in robotics, [get your own phospho starter pack.](https://robots.
                 )
                 logger.info(f"Repository {dataset_repo_name} created.")
 
-            # Push to main branch
+            # Push to main branch, then copy main to the branches
             logger.info(
                 f"Pushing the dataset to the main branch in repository {dataset_repo_name}"
             )
-            future = self.HF_API.upload_folder(
-                folder_path=self.folder_full_path,
-                repo_id=dataset_repo_name,
-                revision="main",
-                repo_type="dataset",
-                run_as_future=True,
-            )
-
-            def sync_branch(fut: Future[CommitInfo]) -> None:
-                try:
-                    fut.result()  # raises if upload failed
-
-                    # Force-sync v2.1 with main
-                    try:
-                        self.HF_API.delete_branch(
-                            repo_id=dataset_repo_name,
-                            repo_type="dataset",
-                            branch="v2.1",
-                        )
-                        logger.info("Deleted existing branch v2.1 before re-creating.")
-                    except Exception:
-                        logger.info("Branch v2.1 did not exist, creating fresh.")
-
-                    self.HF_API.create_branch(
-                        repo_id=dataset_repo_name,
-                        repo_type="dataset",
-                        revision="main",  # copy from updated main
-                        branch="v2.1",
-                    )
-                    logger.info("Branch v2.1 synced with main.")
-
-                    if branch_path:
-                        try:
-                            self.HF_API.delete_branch(
-                                repo_id=dataset_repo_name,
-                                repo_type="dataset",
-                                branch=branch_path,
-                            )
-                            logger.info(
-                                f"Deleted existing branch {branch_path} before re-creating."
-                            )
-                        except Exception:
-                            logger.info(
-                                f"Branch {branch_path} did not exist, creating fresh."
-                            )
-
-                        self.HF_API.create_branch(
-                            repo_id=dataset_repo_name,
-                            repo_type="dataset",
-                            revision="main",
-                            branch=branch_path,
-                        )
-                        logger.info(f"Branch {branch_path} synced with main.")
-
-                except Exception as e:
-                    logger.error(f"Failed to sync branch: {e}")
-
-            future.add_done_callback(sync_branch)
+            branches = ["v2.1", branch_path] if branch_path else ["v2.1"]
+            # Only the new and modified files are uploaded, in the background
+            get_hub_sync(
+                self.folder_full_path, dataset_repo_name, api=self.HF_API
+            ).request_sync(branches=branches)
 
         except Exception as e:
             logger.warning(f"An error occurred: {e}")
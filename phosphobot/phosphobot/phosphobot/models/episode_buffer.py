@@ -0,0 +1,342 @@
+"""
+Compact, array-backed storage of the steps of an episode being recorded.
+
+Instead of keeping one pydantic Step per frame, the recorder appends every step
+into preallocated NumPy columns that grow by doubling. Camera frames are kept by
+reference (no copy). At save time, the columns are written to parquet directly
+through Arrow, without going through Python lists or a pandas DataFrame.
+"""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+from loguru import logger
+
+from phosphobot.models.dataset import Step
+
+# Number of rows allocated for a new episode. 10 s at 30 Hz.
+DEFAULT_EPISODE_CAPACITY = 300
+
+
+class GrowableColumn:
+    """
+    A column of fixed width rows stored in a NumPy array that doubles its capacity
+    when full. Appending a row is amortized O(1).
+
+    The row width is set by the first appended row. Missing values (None, empty
+    rows, and rows of another width after a failed read) are stored as NaN (0 for
+    integer columns), to be repaired at save time.
+    """
+
+    def __init__(
+        self,
+        dtype: type = np.float64,
+        capacity: int = DEFAULT_EPISODE_CAPACITY,
+    ) -> None:
+        self.dtype = dtype
+        self._fill_value = np.nan if np.issubdtype(dtype, np.floating) else 0
+        self._capacity = max(capacity, 1)
+        self._data: Optional[np.ndarray] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def width(self) -> Optional[int]:
+        if self._data is None:
+            return None
+        return self._data.shape[1] if self._data.ndim == 2 else 0
+
+    def _allocate(self, row: np.ndarray) -> np.ndarray:
+        # Capacity must cover the rows appended before the first value
+        capacity = self._capacity
+        while capacity <= self._size:
+            capacity *= 2
+        shape: tuple = (capacity,) if row.ndim == 0 else (capacity, row.shape[0])
+        return np.full(shape, self._fill_value, dtype=self.dtype)
+
+    def _grow(self, data: np.ndarray) -> np.ndarray:
+        new_data = np.full(
+            (data.shape[0] * 2,) + data.shape[1:],
+            self._fill_value,
+            dtype=self.dtype,
+        )
+        new_data[: self._size] = data[: self._size]
+        return new_data
+
+    def _as_row(
+        self, value: Optional[Union[np.ndarray, float]]
+    ) -> Optional[np.ndarray]:
+        if value is None:
+            return None
+        row: np.ndarray = np.asarray(value, dtype=self.dtype)
+        # An empty read is a missing value, not a row of width 0
+        if row.ndim > 0 and row.size == 0:
+            return None
+        return row
+
+    def _fits(self, data: np.ndarray, row: np.ndarray) -> bool:
+        if row.shape == data.shape[1:]:
+            return True
+        logger.warning(
+            f"Row of shape {row.shape} doesn't match the rows of shape "
+            f"{data.shape[1:]} already in the column. Storing it as missing."
+        )
+        return False
+
+    def append(self, value: Optional[Union[np.ndarray, float]]) -> None:
+        row = self._as_row(value)
+        data = self._data
+        if data is None:
+            if row is None:
+                # The width is unknown until the first value. Keep track of the
+                # missing rows to fill them with NaN once we know it.
+                self._size += 1
+                return
+            data = self._allocate(row)
+        elif self._size == data.shape[0]:
+            data = self._grow(data)
+
+        if row is not None and self._fits(data, row):
+            data[self._size] = row
+        else:
+            data[self._size] = self._fill_value
+        self._data = data
+        self._size += 1
+
+    def set(self, index: int, value: Optional[Union[np.ndarray, float]]) -> None:
+        row = self._as_row(value)
+        if row is None and self._data is None:
+            # Still missing, with an unknown width
+            return
+        data = self._data
+        if data is None:
+            assert row is not None
+            data = self._allocate(row)
+        if row is not None and self._fits(data, row):
+            data[index] = row
+        else:
+            data[index] = self._fill_value
+        self._data = data
+
+    def values(self) -> np.ndarray:
+        """
+        View on the filled rows. Empty if no value was ever appended.
+        """
+        if self._data is None:
+            return np.empty((0,), dtype=self.dtype)
+        return self._data[: self._size]
+
+
+def _fixed_width_list_array(values: np.ndarray) -> pa.ListArray:
+    """
+    Convert a 2D array of shape (n_rows, width) to an Arrow list array, without
+    going through Python objects.
+    """
+    n_rows, width = values.shape
+    offsets = pa.array(np.arange(0, (n_rows + 1) * width, width, dtype=np.int32))
+    return pa.ListArray.from_arrays(
+        offsets, pa.array(np.ascontiguousarray(values).reshape(-1))
+    )
+
+
+class EpisodeBuffer:
+    """
+    Columns of the steps of an episode: joint positions, actions, cartesian states,
+    timestamps and task index, plus references to the camera frames of each step.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_EPISODE_CAPACITY) -> None:
+        # Same dtypes as the existing datasets: list<double> actions, list<float>
+        # states and cartesian columns, the float32 declared in info.json
+        self.joints_position = GrowableColumn(np.float32, capacity)
+        self.action = GrowableColumn(np.float64, capacity)
+        self.state = GrowableColumn(np.float32, capacity)
+        self.action_cartesian = GrowableColumn(np.float32, capacity)
+        self.timestamp = GrowableColumn(np.float64, capacity)
+        self.created_at = GrowableColumn(np.float64, capacity)
+        # Largest offset between the samples of a step and its reference tick
+        self.sync_skew = GrowableColumn(np.float64, capacity)
+        self.task_index = GrowableColumn(np.int64, capacity)
+        # Frame slots: references to the frames returned by the cameras
+        self.main_images: List[np.ndarray] = []
+        self.secondary_images: List[List[np.ndarray]] = []
+        self.language_instruction: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.joints_position)
+
+    def append_step(self, step: Step, task_index: int) -> None:
+        """
+        Store the content of a step. The step object itself is not kept.
+        """
+        joints_position = step.observation.joints_position
+        # Handle NaN or partial joint positions by copying from the previous step
+        width = self.joints_position.width
+        if width is not None and (
+            np.all(np.isnan(joints_position)) or joints_position.shape[-1:] != (width,)
+        ):
+            logger.warning(
+                f"Step {len(self)} has NaN or {joints_position.shape} joint_positions. "
+                "Copying from previous step."
+            )
+            joints_position = self.joints_position.values()[-1]
+
+        self.joints_position.append(joints_position)
+        self.action.append(step.action)
+        state = step.observation.state
+        self.state.append(state if state is not None and state.size > 0 else None)
+        self.action_cartesian.append(step.action_cartesian)
+        self.timestamp.append(step.observation.timestamp)
+        self.created_at.append(step.metadata.get("created_at"))
+        self.sync_skew.append(step.metadata.get("sync_skew"))
+        self.task_index.append(task_index)
+
+        self.main_images.append(step.observation.main_image)
+        self.secondary_images.append(step.observation.secondary_images)
+        if self.language_instruction is None:
+            self.language_instruction = step.observation.language_instruction
+
+    def sync_skew_ms(self) -> Optional[List[Optional[float]]]:
+        """
+        Per-step skew in milliseconds, None for the steps without synchronization.
+        Returns None if no step was synchronized.
+        """
+        if len(self) == 0:
+            return None
+        skew = self.sync_skew.values()
+        if np.isnan(skew).all():
+            return None
+        return [
+            None if np.isnan(value) else round(float(value) * 1000, 3) for value in skew
+        ]
+
+    def set_previous_action(self, action: np.ndarray) -> None:
+        """
+        Set the action of the last appended step.
+        """
+        if len(self) > 0:
+            self.action.set(len(self) - 1, action)
+
+    @classmethod
+    def from_steps(cls, steps: List[Step], task_index: int) -> "EpisodeBuffer":
+        buffer = cls(capacity=len(steps))
+        for step in steps:
+            buffer.append_step(step, task_index=task_index)
+        return buffer
+
+    def main_camera_frames(self) -> List[np.ndarray]:
+        return [
+            frame for frame in self.main_images if frame is not None and frame.size > 0
+        ]
+
+    def secondary_camera_frames(self) -> List[List[np.ndarray]]:
+        """
+        Frames of the secondary cameras, grouped by camera.
+        """
+        if not self.secondary_images or not self.secondary_images[0]:
+            return []
+        frames: List[List[np.ndarray]] = [
+            [] for _ in range(len(self.secondary_images[0]))
+        ]
+        for step_images in self.secondary_images:
+            for i, image in enumerate(step_images):
+                if i < len(frames) and image is not None and image.size > 0:
+                    frames[i].append(image)
+        return frames
+
+    def repair_missing_values(self, episode_index: int) -> None:
+        """
+        Fill NaN actions with the observed joint positions and NaN observations
+        with the actions. Raise a ValueError if both are missing for a step.
+        """
+        joints_position = self.joints_position.values()
+        if self.action.width is None:
+            # No action was ever set: the actions are the joint positions
+            for i in range(len(self)):
+                self.action.set(i, joints_position[i])
+        action = self.action.values()
+
+        missing_action = np.isnan(action).any(axis=1)
+        missing_observation = np.isnan(joints_position).any(axis=1)
+        if (missing_action & missing_observation).any():
+            raise ValueError(
+                f"Step action and observation in episode {episode_index} are None or NaN"
+            )
+        if (
+            missing_action.any() or missing_observation.any()
+        ) and action.shape != joints_position.shape:
+            raise ValueError(
+                f"Missing values in episode {episode_index} can't be filled: actions "
+                f"of shape {action.shape} and observations of shape "
+                f"{joints_position.shape} don't match"
+            )
+        if missing_action.any():
+            logger.warning(
+                f"{missing_action.sum()} actions in episode {episode_index} are None or NaN, automatically filling in the value."
+            )
+            action[missing_action] = joints_position[missing_action]
+        if missing_observation.any():
+            logger.warning(
+                f"{missing_observation.sum()} observations in episode {episode_index} are None or NaN, automatically filling in the value."
+            )
+            joints_position[missing_observation] = action[missing_observation]
+
+    def to_arrow_table(
+        self,
+        episode_index: int,
+        global_frame_offset: int,
+        freq: int,
+        is_cartesian: bool = False,
+        add_metadata: Optional[Dict[str, list]] = None,
+    ) -> pa.Table:
+        """
+        Build the LeRobot parquet table of the episode.
+
+        global_frame_offset is the total number of frames in the dataset before this episode.
+        """
+        n_steps = len(self)
+        frame_index = np.arange(n_steps, dtype=np.int64)
+        columns: Dict[str, pa.Array] = {
+            "action": _fixed_width_list_array(self.action.values()),
+            "observation.state": _fixed_width_list_array(self.joints_position.values()),
+            # We rewrite the timestamps based on the frequency to validate LeRobot tests
+            "timestamp": pa.array(frame_index / freq),
+            "task_index": pa.array(self.task_index.values()),
+            "episode_index": pa.array(np.full(n_steps, episode_index, dtype=np.int64)),
+            "frame_index": pa.array(frame_index),
+            # "index" is the global frame index across the entire dataset
+            "index": pa.array(frame_index + global_frame_offset),
+        }
+        if is_cartesian:
+            for key, column in [
+                ("action.cartesian", self.action_cartesian),
+                ("observation.cartesian.state", self.state),
+            ]:
+                if column.width is not None:
+                    columns[key] = _fixed_width_list_array(column.values())
+        if add_metadata:
+            for key, values_list in add_metadata.items():
+                columns[key] = pa.array([values_list] * n_steps)
+        return pa.table(columns)
+
+    def write_parquet(
+        self,
+        path: str,
+        episode_index: int,
+        global_frame_offset: int,
+        freq: int,
+        is_cartesian: bool = False,
+        add_metadata: Optional[Dict[str, list]] = None,
+    ) -> None:
+        table = self.to_arrow_table(
+            episode_index=episode_index,
+            global_frame_offset=global_frame_offset,
+            freq=freq,
+            is_cartesian=is_cartesian,
+            add_metadata=add_metadata,
+        )
+        pq.write_table(table, path)
@@ -4,11 +4,22 @@ import shutil
 import tempfile
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Tuple, Union, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 import numpy as np
-import pandas as pd
-from huggingface_hub import delete_file, upload_folder
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from huggingface_hub import delete_file
 from loguru import logger
 from pydantic import (
     AliasChoices,
@@ -19,8 +30,15 @@ from pydantic import (
     model_validator,
 )
 
+from phosphobot.hub_sync import get_hub_sync
 from phosphobot.models.dataset import BaseDataset, BaseEpisode, Step
+from phosphobot.models.episode_buffer import EpisodeBuffer
+from phosphobot.models.meta_writer import TOMBSTONES_FILE_NAME, meta_writer
 from phosphobot.models.robot import BaseRobot
+from phosphobot.parquet_validation import (
+    repair_parquet_folder,
+    validate_parquet_folder,
+)
 from phosphobot.types import VideoCodecs
 from phosphobot.utils import (
     NdArrayAsList,
@@ -30,7 +48,24 @@ from phosphobot.utils import (
     get_home_app_path,
 )
 
+if TYPE_CHECKING:
+    # pandas is slow to import: it is imported in the methods that use it
+    import pandas as pd
+
 DEFAULT_FILE_ENCODING = "utf-8"
+# Metrics of the recording loop of each episode, one line per episode
+RECORDING_METRICS_FILE_NAME = "recording_metrics.jsonl"
+
+
+def load_tombstones(meta_folder_path: str) -> List[int]:
+    """
+    Read the indexes of the episodes deleted since the last compaction.
+    """
+    tombstones_path = os.path.join(meta_folder_path, TOMBSTONES_FILE_NAME)
+    if not os.path.exists(tombstones_path):
+        return []
+    with open(tombstones_path, "r", encoding=DEFAULT_FILE_ENCODING) as f:
+        return sorted(json.load(f).get("deleted_episodes", []))
 
 
 class LeRobotDataset(BaseDataset):
@@ -45,6 +80,8 @@ class LeRobotDataset(BaseDataset):
         super().__init__(
             path, enforce_path=enforce_path
         )  # This sets self.folder_full_path etc.
+        # Make sure the meta files on disk are up to date before reading them
+        meta_writer.flush()
 
         # Determine format version from path
         if len(Path(path).parts) < 2:
@@ -90,6 +127,9 @@ class LeRobotDataset(BaseDataset):
         logger.debug(
             f"Initializing/loading meta models for dataset: {self.dataset_name}"
         )
+        if force:
+            # The files are read again from disk: write the pending ones first
+            meta_writer.flush()
         if self.info_model is None or force:
             self.info_model = InfoModel.from_json(
                 meta_folder_path=self.meta_folder_full_path,  # Correct path to 'meta' dir
@@ -182,15 +222,47 @@ class LeRobotDataset(BaseDataset):
             raise ValueError(
                 "InfoModel not initialized in LeRobotDataset. Call initialize_meta_models_if_needed first."
             )
-        return self.info_model.total_episodes  # total_episodes is 0-indexed for next
+        # Deleted episodes keep their index until the dataset is compacted
+        return self.info_model.total_episodes + len(self.load_tombstones())
 
     def get_current_total_frames(self) -> int:
         if self.info_model is None:
             raise ValueError("InfoModel not initialized in LeRobotDataset.")
         return self.info_model.total_frames
 
+    def get_next_frame_index(self) -> int:
+        """
+        Global index of the first frame of the next recorded episode.
+
+        The frames of the episodes after a deleted one keep their indexes until the
+        dataset is compacted: with tombstones, the next index follows the last
+        episode on disk instead of the total number of frames.
+        """
+        total_frames = self.get_current_total_frames()
+        if (
+            not self.load_tombstones()
+            or self.episodes_model is None
+            or not self.episodes_model.episodes
+        ):
+            return total_frames
+        # The episode being saved can already be listed, without its parquet file
+        for episode_index in sorted(
+            (episode.episode_index for episode in self.episodes_model.episodes),
+            reverse=True,
+        ):
+            path = self.get_episode_data_path(episode_index)
+            if not os.path.exists(path):
+                continue
+            indexes = pq.read_table(path, columns=["index"])["index"]
+            if len(indexes) > 0:
+                return max(total_frames, pc.max(indexes).as_py() + 1)
+        return total_frames
+
     def save_all_meta_models(self) -> None:
-        """Saves all currently loaded meta models to disk."""
+        """
+        Saves all currently loaded meta models to disk. This rewrites every meta file in full:
+        use save_new_episode_meta_models after recording an episode.
+        """
         logger.debug(f"Saving all meta models for dataset: {self.dataset_name}")
         if self.info_model:
             self.info_model.save(self.meta_folder_full_path)
@@ -204,6 +276,239 @@ class LeRobotDataset(BaseDataset):
             self.tasks_model.save(self.meta_folder_full_path)
         logger.debug("All meta models saved.")
 
+    def save_new_episode_meta_models(self) -> None:
+        """
+        Persist the meta models after a new episode was recorded.
+
+        The jsonl files only get the lines of the new episodes appended, and info.json
+        is written in the background by the debounced meta writer. The cost doesn't
+        depend on the number of episodes in the dataset.
+        """
+        logger.debug(f"Saving new episode meta models for dataset: {self.dataset_name}")
+        if self.episodes_stats_model:
+            self.episodes_stats_model.save(
+                self.meta_folder_full_path, save_mode="append"
+            )
+        if self.stats_model:
+            # v2 only. stats.json aggregates all the episodes, its size is constant
+            self.stats_model.save(self.meta_folder_full_path)
+        if self.episodes_model:
+            self.episodes_model.save(self.meta_folder_full_path, save_mode="append")
+        if self.tasks_model:
+            self.tasks_model.save(self.meta_folder_full_path, save_mode="append")
+        if self.info_model:
+            self.info_model.save(self.meta_folder_full_path, debounce=True)
+
+    @property
+    def tombstones_path(self) -> str:
+        return os.path.join(self.meta_folder_full_path, TOMBSTONES_FILE_NAME)
+
+    def load_tombstones(self) -> List[int]:
+        return load_tombstones(self.meta_folder_full_path)
+
+    def save_tombstones(self, tombstones: List[int]) -> None:
+        if not tombstones:
+            if os.path.exists(self.tombstones_path):
+                os.remove(self.tombstones_path)
+            return
+        meta_writer.write_now(
+            self.tombstones_path,
+            json.dumps({"deleted_episodes": sorted(tombstones)}, indent=4),
+        )
+
+    @property
+    def recording_metrics_path(self) -> str:
+        return os.path.join(self.meta_folder_full_path, RECORDING_METRICS_FILE_NAME)
+
+    def update_recording_metrics(
+        self,
+        deleted: Optional[List[int]] = None,
+        old_index_to_new_index: Optional[Dict[int, int]] = None,
+    ) -> None:
+        """
+        Drop the recording metrics of the deleted episodes and renumber the others,
+        like episodes_stats.jsonl.
+        """
+        if not os.path.exists(self.recording_metrics_path):
+            return
+        deleted_indexes = set(deleted or [])
+        lines = []
+        with open(
+            self.recording_metrics_path, "r", encoding=DEFAULT_FILE_ENCODING
+        ) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                metrics = json.loads(line)
+                episode_index = metrics.get("episode_index")
+                if episode_index in deleted_indexes:
+                    continue
+                if old_index_to_new_index and episode_index in old_index_to_new_index:
+                    metrics["episode_index"] = old_index_to_new_index[episode_index]
+                lines.append(json.dumps(metrics) + "\n")
+        meta_writer.write_now(self.recording_metrics_path, "".join(lines))
+
+    def _delete_episode_files(self, episode_id: int) -> None:
+        """
+        Remove the parquet file and the videos of an episode, without touching the meta files.
+        """
+        paths = [self.get_episode_data_path(episode_id)] + [
+            os.path.join(camera_folder_full_path, f"episode_{episode_id:06d}.mp4")
+            for camera_folder_full_path in self.get_camera_folders_full_paths()
+        ]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                logger.warning(f"File {path} not found. Skipping deletion.")
+
+    def delete_episodes(
+        self, episode_ids: List[int], compact: bool = False
+    ) -> List[int]:
+        """
+        Delete several episodes at once. The deleted episodes are recorded as tombstones
+        in meta/tombstones.json: their files are removed and their lines are dropped from the
+        meta files, but the remaining episodes are not renumbered. The indexes have gaps
+        until compact() is called, which is done automatically before pushing to the Hub.
+
+        The cost doesn't depend on the number of episodes after the deleted ones: no parquet
+        file is read or rewritten.
+
+        Returns the sorted list of deleted episode indexes.
+        """
+        self.load_meta_models(force=True)
+        assert self.info_model is not None
+        assert self.episodes_model is not None
+
+        if self.format_version == "lerobot_v2":
+            raise NotImplementedError(
+                "Episode deletion is not implemented for LeRobot v2 format. Please use v2.1 format."
+            )
+        assert self.episodes_stats_model is not None
+
+        episodes_features = {
+            episode.episode_index: episode for episode in self.episodes_model.episodes
+        }
+        tombstones = set(self.load_tombstones())
+        to_delete = sorted(set(episode_ids) - tombstones)
+        missing = [index for index in to_delete if index not in episodes_features]
+        if missing:
+            raise ValueError(
+                f"Episodes {missing} not found in dataset {self.dataset_name}"
+            )
+        if not to_delete:
+            return []
+
+        logger.info(
+            f"Deleting episodes {to_delete} from dataset {self.dataset_name} (tombstoned until compaction)"
+        )
+        # Record the tombstones first: if we crash midway, the missing files are expected
+        self.save_tombstones(sorted(tombstones.union(to_delete)))
+        for episode_id in to_delete:
+            self._delete_episode_files(episode_id)
+
+        deleted = set(to_delete)
+        self.episodes_model.episodes = [
+            episode
+            for episode in self.episodes_model.episodes
+            if episode.episode_index not in deleted
+        ]
+        self.episodes_model._episodes_features = {
+            episode.episode_index: episode for episode in self.episodes_model.episodes
+        }
+        self.episodes_stats_model.episodes_stats = [
+            episode_stats
+            for episode_stats in self.episodes_stats_model.episodes_stats
+            if episode_stats.episode_index not in deleted
+        ]
+        # The lengths are in episodes.jsonl: no need to read the deleted parquets
+        self.info_model.total_episodes -= len(to_delete)
+        self.info_model.total_frames -= sum(
+            episodes_features[index].length for index in to_delete
+        )
+        self.info_model.total_videos -= len(to_delete) * len(
+            self.info_model.features.observation_images
+        )
+        self.info_model.splits = {"train": f"0:{self.info_model.total_episodes}"}
+
+        self.episodes_model.save(self.meta_folder_full_path, save_mode="overwrite")
+        self.episodes_stats_model.save(self.meta_folder_full_path)
+        self.info_model.save(self.meta_folder_full_path)
+        self.update_recording_metrics(deleted=to_delete)
+
+        if compact:
+            self.compact()
+        return to_delete
+
+    def compact(self) -> bool:
+        """
+        Renumber the episodes to close the gaps left by the tombstoned episodes.
+        The data and videos folders are reindexed in a single pass, then the meta files
+        are rewritten and the tombstones are cleared. Unused tasks are removed.
+
+        Returns True if the dataset was compacted, False if there was nothing to do.
+        """
+        tombstones = self.load_tombstones()
+        if not tombstones:
+            return False
+
+        logger.info(
+            f"Compacting dataset {self.dataset_name}: {len(tombstones)} deleted episodes"
+        )
+        self.load_meta_models(force=True)
+        assert self.info_model is not None
+        assert self.episodes_model is not None
+        assert self.tasks_model is not None
+
+        old_index_to_new_index = self.reindex_episodes(
+            folder_path=self.data_folder_full_path
+        )
+        for camera_folder_full_path in self.get_camera_folders_full_paths():
+            self.reindex_episodes(
+                folder_path=camera_folder_full_path,
+                old_index_to_new_index=old_index_to_new_index,
+            )
+
+        self.episodes_model.update_for_episode_removal(
+            episode_to_delete_index=-1,
+            old_index_to_new_index=old_index_to_new_index,
+        )
+        if self.episodes_stats_model is not None:
+            self.episodes_stats_model.update_for_episode_removal(
+                episode_to_delete_index=-1,
+                old_index_to_new_index=old_index_to_new_index,
+            )
+        self.update_recording_metrics(old_index_to_new_index=old_index_to_new_index)
+
+        used_tasks = {
+            task for episode in self.episodes_model.episodes for task in episode.tasks
+        }
+        self.tasks_model.tasks = [
+            task for task in self.tasks_model.tasks if task.task in used_tasks
+        ]
+
+        self.info_model.total_episodes = len(self.episodes_model.episodes)
+        self.info_model.total_frames = sum(
+            episode.length for episode in self.episodes_model.episodes
+        )
+        self.info_model.total_videos = self.info_model.total_episodes * len(
+            self.info_model.features.observation_images
+        )
+        self.info_model.splits = {"train": f"0:{self.info_model.total_episodes}"}
+
+        self.save_all_meta_models()
+        self.save_tombstones([])
+        return True
+
+    def compact_if_needed(self) -> bool:
+        """
+        Compact the dataset if episodes were deleted since the last compaction.
+        Returns True if the dataset was compacted.
+        """
+        if not os.path.exists(self.tombstones_path):
+            return False
+        return self.compact()
+
     def delete_episode(self, episode_id: int, update_hub: bool = True) -> None:
         """
         Delete the episode data from the dataset.
@@ -211,8 +516,15 @@ class LeRobotDataset(BaseDataset):
         and updates the meta data.
         JSON format not supported
 
+        The remaining episodes are renumbered immediately, which rewrites every later
+        episode. To delete many episodes, use delete_episodes instead.
+
         If update_hub is True, also delete the episode data from the Hugging Face repository
         """
+        import pandas as pd
+
+        # Renumber the previously deleted episodes first, the code below expects no gaps
+        self.compact()
 
         episode_data_path = self.get_episode_data_path(episode_id)
         episode_to_delete = LeRobotEpisode.from_parquet(
@@ -279,8 +591,9 @@ class LeRobotDataset(BaseDataset):
         info_model.save(meta_folder_path=self.meta_folder_full_path)
         logger.info("Info model updated")
 
-        # Delete the actual episode files (parquet and mp4 video)
-        episode_to_delete.delete(update_hub=update_hub, repo_id=self.repo_id)
+        # Delete the actual episode files (parquet and mp4 video). The Hub is
+        # synced at the end, with the renamed episodes and the meta files.
+        episode_to_delete.delete(update_hub=False)
 
         # Rename the remaining episodes to keep the numbering consistent
         # be sure to reindex AFTER deleting the episode data
@@ -319,13 +632,14 @@ class LeRobotDataset(BaseDataset):
             stats_model.save(meta_folder_path=self.meta_folder_full_path)
             logger.info("Stats model updated")
 
+        self.update_recording_metrics(
+            deleted=[episode_id], old_index_to_new_index=old_index_to_new_index
+        )
+
         if update_hub:
-            upload_folder(
-                folder_path=self.meta_folder_full_path,
-                repo_id=self.repo_id,
-                repo_type="dataset",
-                path_in_repo="meta",
-            )
+            get_hub_sync(
+                self.folder_full_path, self.repo_id, api=self.HF_API
+            ).request_sync()
 
     def merge_datasets(
         self,
@@ -369,6 +683,8 @@ class LeRobotDataset(BaseDataset):
             ├── episodes_stats.jsonl
         / README.md
         """
+        import pandas as pd
+
         # Check that all datasets have the same format
         if check_format:
             if second_dataset.format_version != self.format_version:
@@ -386,6 +702,9 @@ class LeRobotDataset(BaseDataset):
                 f"Dataset {new_dataset_name} already exists in {path_result_dataset}"
             )
         os.makedirs(path_result_dataset, exist_ok=True)
+        # The merge expects contiguous episode indexes
+        self.compact()
+        second_dataset.compact()
 
         path_to_videos = os.path.join(
             path_result_dataset,
@@ -592,8 +911,12 @@ class LeRobotDataset(BaseDataset):
             ├── episodes_stats.jsonl
         / README.md
         """
+        import pandas as pd
+
         if split_ratio <= 0 or split_ratio >= 1:
             raise ValueError(f"Split ratio {split_ratio} should be between 0 and 1")
+        # The split expects contiguous episode indexes
+        self.compact()
 
         first_dataset_path = os.path.join(
             os.path.dirname(self.folder_full_path),
@@ -941,6 +1264,7 @@ class LeRobotDataset(BaseDataset):
         Expects a dataset in v2.1 format.
         This will pick a random shuffle of the episodes and apply it to the videos, data and meta files.
         """
+        self.compact()
         # Get the number of episodes from the info.json file
         info = InfoModel.from_json(meta_folder_path=self.meta_folder_full_path)
         if info.codebase_version != "v2.1":
@@ -1040,6 +1364,7 @@ class LeRobotDataset(BaseDataset):
         episodes in data are [episode_000000.parquet, episode_000001.parquet, episode_000003.parquet] after we removed episode_000002.parquet
         the result will be [episode_000000.parquet, episode_000001.parquet, episode_000002.parquet]
         """
+        import pandas as pd
 
         # Create a mapping of old index to new index
         if old_index_to_new_index is None:
@@ -1121,6 +1446,63 @@ class LeRobotDataset(BaseDataset):
 
         return old_index_to_new_index
 
+    def export_arrays(
+        self,
+        output_path: Optional[str] = None,
+        resolution: Tuple[int, int] = (320, 240),
+        camera_keys: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ) -> str:
+        """
+        Export the dataset to chunked, memory-mappable arrays for training (see
+        phosphobot.models.array_dataset). Only the new or modified episodes are
+        exported again. Returns the path of the export, to open with ArrayDataset.
+
+        Args:
+            output_path: Defaults to ~/phosphobot/arrays/<format>/<dataset_name>.
+                Not in the dataset folder, so that it's not pushed to the Hub.
+            resolution: (width, height) of the exported frames.
+            camera_keys: Video keys to export. Defaults to all of them.
+            max_workers: Number of episodes exported in parallel.
+        """
+        from phosphobot.models.array_dataset import export_array_dataset
+
+        meta_writer.flush()
+        info = InfoModel.from_json(
+            meta_folder_path=self.meta_folder_full_path, format=self.format_version
+        )
+        if camera_keys is None:
+            camera_keys = list(info.features.observation_images.keys())
+        if output_path is None:
+            output_path = str(
+                get_home_app_path() / "arrays" / self.format_version / self.dataset_name
+            )
+
+        # The episodes of every chunk, located with the path templates of info.json
+        episodes_model = EpisodesModel.from_jsonl(
+            meta_folder_path=self.meta_folder_full_path, format=self.format_version
+        )
+        deleted = set(self.load_tombstones())
+        episode_indexes = sorted(
+            episode.episode_index
+            for episode in episodes_model.episodes
+            if episode.episode_index not in deleted
+        )
+
+        export_array_dataset(
+            dataset_path=str(self.folder_full_path),
+            output_path=output_path,
+            episode_indexes=episode_indexes,
+            camera_keys=camera_keys,
+            resolution=resolution,
+            fps=info.fps,
+            max_workers=max_workers,
+            data_path=info.data_path,
+            video_path=info.video_path,
+            chunks_size=info.chunks_size,
+        )
+        return output_path
+
     def get_episode_data_path(self, episode_id: int) -> str:
         """Get the full path to the data with episode id"""
         return os.path.join(
@@ -1173,6 +1555,14 @@ class LeRobotEpisode(BaseEpisode):
     target_size: tuple[int, int]  # For video creation (width, height)
     is_cartesian: bool = False  # Whether to save cartesian coordinates
     add_metadata: Optional[Dict[str, list]] = None  # Extra metadata to save
+    # Columns of the recorded steps. When set, steps are stored here instead of in self.steps
+    buffer: Optional[EpisodeBuffer] = None
+
+    @property
+    def num_steps(self) -> int:
+        if self.buffer is not None:
+            return len(self.buffer)
+        return len(self.steps)
 
     # Paths are derived from the dataset_manager and episode_index (from metadata)
     @property
@@ -1292,14 +1682,19 @@ class LeRobotEpisode(BaseEpisode):
             target_size=target_size,
             is_cartesian=save_cartesian,
             add_metadata=add_metadata,
+            buffer=EpisodeBuffer(),
         )
         return episode
 
     async def append_step(self, step: Step, **kwargs: Dict[str, Any]) -> None:
-        self.add_step(step)  # Appends to self.steps, manages is_first/is_last flags
+        if self.buffer is not None:
+            # The step is copied into the buffer columns and not kept
+            self.buffer.append_step(step, task_index=self.metadata["task_index"])
+        else:
+            self.add_step(step)  # Appends to self.steps, manages is_first/is_last flags
 
         current_step_in_episode_index = (
-            len(self.steps) - 1
+            self.num_steps - 1
         )  # 0-indexed count of steps in this episode
 
         # Update live meta models stored in the dataset_manager
@@ -1327,102 +1722,26 @@ class LeRobotEpisode(BaseEpisode):
         # tasks_model.update will add the instruction as a new task if it's not already present
         self.dataset_manager.tasks_model.update(step=step)
 
-    def _convert_to_le_robot_episode_model(self) -> "LeRobotEpisodeModel":
-        """Converts internal steps to the LeRobotEpisodeModel for Parquet saving."""
-        assert self.dataset_manager.info_model is not None
-        # global_frame_offset is the total number of frames in the dataset *before* this episode's frames.
-        global_frame_offset = self.dataset_manager.info_model.total_frames
-
-        episode_data_dict: Dict[str, List] = {
-            "action": [],
-            "observation.state": [],
-            "timestamp": [],
-            "task_index": [],
-            "episode_index": [],
-            "frame_index": [],
-            "index": [],
-        }
-        if self.is_cartesian:
-            episode_data_dict["action.cartesian"] = []
-            episode_data_dict["observation.cartesian.state"] = []
-        if self.add_metadata:
-            for key in self.add_metadata.keys():
-                episode_data_dict[key] = []
-
-        # We rewrite the timestamps based on the frequency to validate LeRobot tests
-        timestamps_for_episode = (np.arange(len(self.steps)) / self.freq).tolist()
-
-        episode_data_dict["timestamp"] = timestamps_for_episode
-
-        for local_frame_idx, step_item in enumerate(self.steps):
-            episode_data_dict["episode_index"].append(
-                self.episode_index
-            )  # from self.metadata
-            episode_data_dict["frame_index"].append(
-                local_frame_idx
-            )  # 0 to N-1 for this episode
-            # LeRobot's "observation.state" is our "joints_position"
-            episode_data_dict["observation.state"].append(
-                step_item.observation.joints_position.astype(np.float32)
-            )
-            # "index" is the global frame index across the entire dataset
-            episode_data_dict["index"].append(local_frame_idx + global_frame_offset)
-            episode_data_dict["task_index"].append(self.metadata["task_index"])
-            # If cartesian, add those fields too
-            if self.is_cartesian:
-                episode_data_dict["observation.cartesian.state"].append(
-                    step_item.observation.state.astype(np.float32)
-                )
-                if step_item.action_cartesian is not None:
-                    episode_data_dict["action.cartesian"].append(
-                        step_item.action_cartesian.astype(np.float32)
-                    )
+    def update_previous_step(self, current_step_data: Step) -> None:
+        if self.buffer is not None:
+            self.buffer.set_previous_action(
+                current_step_data.observation.joints_position.copy()
+            )
+        else:
+            super().update_previous_step(current_step_data)
 
-            # Additional metadata fields, if any
-            if self.add_metadata:
-                for key, values_list in self.add_metadata.items():
-                    episode_data_dict[key].append(values_list)
+    def get_episode_frames_main_camera(self) -> List[np.ndarray]:
+        if self.buffer is not None:
+            return self.buffer.main_camera_frames()
+        return super().get_episode_frames_main_camera()
 
-            if (
-                step_item.action is None
-            ):  # Should have been set by update_previous_step, except for the very last step
-                if (
-                    local_frame_idx == len(self.steps) - 1
-                ):  # Last step, action can be a placeholder (e.g., repeat joints_position)
-                    logger.debug(
-                        f"Last step (idx {local_frame_idx}) of episode {self.episode_index} has no action; using its own joints_position."
-                    )
-                    episode_data_dict["action"].append(
-                        step_item.observation.joints_position.astype(
-                            np.float32
-                        ).tolist()
-                    )
-                else:  # Should not happen for intermediate steps
-                    raise ValueError(
-                        f"Step {local_frame_idx} in episode {self.episode_index} has no action set before saving."
-                    )
-            else:
-                episode_data_dict["action"].append(
-                    step_item.action.astype(np.float32).tolist()
-                )
-
-        # Basic validation for main camera frames (if any)
-        main_cam_frames = self.get_episode_frames_main_camera()
-        if main_cam_frames:
-            first_frame_shape = main_cam_frames[0].shape
-            if not all(
-                f.shape == first_frame_shape and f.ndim == 3 for f in main_cam_frames
-            ):
-                logger.warning(
-                    "Main camera frames have inconsistent shapes or dimensions."
-                )
-                # This could be an error depending on strictness:
-                # raise ValueError("All main_image frames must have the same dimensions and be 3-channel RGB images.")
-
-        return LeRobotEpisodeModel(**episode_data_dict)
+    def get_episode_frames_secondary_cameras(self) -> List[List[np.ndarray]]:
+        if self.buffer is not None:
+            return self.buffer.secondary_camera_frames()
+        return super().get_episode_frames_secondary_cameras()
 
     async def save(self, **kwargs: Dict[str, Any]) -> None:
-        if not self.steps:
+        if self.num_steps == 0:
             logger.warning(
                 f"LeRobotEpisode {self.episode_index} has no steps. Skipping save."
             )
@@ -1435,48 +1754,42 @@ class LeRobotEpisode(BaseEpisode):
             self.dataset_manager.info_model is not None
         )  # Should have been initialized
 
+        # Episodes recorded without a buffer (eg: built step by step) are converted once here
+        buffer = self.buffer or EpisodeBuffer.from_steps(
+            self.steps, task_index=self.metadata["task_index"]
+        )
+
         # Sanity check: make sure the actions and observations don't have any null or nan values
-        for step in self.steps:
-            if step.action is None or np.isnan(step.action).any():
-                # Attempt to repair the action by using the observation's joints_position
-                if (
-                    step.observation.joints_position is not None
-                    and not np.isnan(step.observation.joints_position).any()
-                ):
-                    logger.warning(
-                        f"Action in episode {self.episode_index} is None or NaN, automatically filling in the value."
-                    )
-                    step.action = step.observation.joints_position
-                else:
-                    raise ValueError(
-                        f"Step action in episode {self.episode_index} is None or NaN"
-                    )
-            if (
-                step.observation.joints_position is None
-                or np.isnan(step.observation.joints_position).any()
+        buffer.repair_missing_values(episode_index=self.episode_index)
+
+        # Basic validation for main camera frames (if any)
+        main_camera_frames = buffer.main_camera_frames()
+        if main_camera_frames:
+            first_frame_shape = main_camera_frames[0].shape
+            if not all(
+                f.shape == first_frame_shape and f.ndim == 3 for f in main_camera_frames
             ):
-                # Attempt to repair the observation by using the action
-                if step.action is not None and not np.isnan(step.action).any():
-                    logger.warning(
-                        f"Observation in episode {self.episode_index} is None or NaN, automatically filling in the value."
-                    )
-                    step.observation.joints_position = step.action
-                else:
-                    raise ValueError(
-                        f"Step observation in episode {self.episode_index} is None or NaN"
-                    )
+                logger.warning(
+                    "Main camera frames have inconsistent shapes or dimensions."
+                )
 
-        # 1. Save Parquet data for the episode
-        lerobot_parquet_model = self._convert_to_le_robot_episode_model()
-        lerobot_parquet_model.to_parquet(str(self._parquet_path))
+        # 1. Save Parquet data for the episode, straight from the buffer columns
+        buffer.write_parquet(
+            str(self._parquet_path),
+            episode_index=self.episode_index,
+            # Index of the first frame, after the frames already in the dataset
+            global_frame_offset=self.dataset_manager.get_next_frame_index(),
+            freq=self.freq,
+            is_cartesian=self.is_cartesian,
+            add_metadata=self.add_metadata,
+        )
         logger.debug(
             f"Episode data for {self.episode_index} saved to {self._parquet_path}"
         )
 
         # 2. Save Videos for the episode
-        main_camera_frames = self.get_episode_frames_main_camera()
         secondary_camera_frames_by_cam = (
-            self.get_episode_frames_secondary_cameras()
+            buffer.secondary_camera_frames()
         )  # List of frame lists
 
         # Iterate through camera configurations in InfoModel to ensure all expected videos are handled
@@ -1535,10 +1848,13 @@ class LeRobotEpisode(BaseEpisode):
                 )
 
         # 3. Update Dataset-level InfoModel (after this episode is fully processed)
-        self.dataset_manager.info_model.total_frames += len(self.steps)
+        self.dataset_manager.info_model.total_frames += len(buffer)
         # total_episodes should be the count of saved episodes. If this is episode N, total_episodes becomes N+1.
         # This assumes episodes are saved sequentially and episode_index is 0-based.
-        self.dataset_manager.info_model.total_episodes = self.episode_index + 1
+        # Episodes deleted since the last compaction still hold their index.
+        self.dataset_manager.info_model.total_episodes = (
+            self.episode_index + 1 - len(self.dataset_manager.load_tombstones())
+        )
         self.dataset_manager.info_model.total_videos += len(
             self.dataset_manager.info_model.features.observation_images
         )
@@ -1553,8 +1869,26 @@ class LeRobotEpisode(BaseEpisode):
                 self.metadata["task_index"] + 1
             )
 
-        # 4. Save all (potentially updated) meta models from the dataset manager
-        self.dataset_manager.save_all_meta_models()
+        # 4. Save the (potentially updated) meta models from the dataset manager
+        self.dataset_manager.save_new_episode_meta_models()
+
+        # 5. Save the recording loop metrics next to the meta files
+        recording_metrics = self.metadata.get("recording_metrics")
+        if recording_metrics is not None:
+            sync_skew_ms = buffer.sync_skew_ms()
+            if sync_skew_ms is not None:
+                recording_metrics = {**recording_metrics, "sync_skew_ms": sync_skew_ms}
+            with open(
+                self.dataset_manager.recording_metrics_path,
+                "a",
+                encoding=DEFAULT_FILE_ENCODING,
+            ) as f:
+                f.write(
+                    json.dumps(
+                        {"episode_index": self.episode_index, **recording_metrics}
+                    )
+                    + "\n"
+                )
         logger.success(
             f"LeRobotEpisode {self.episode_index} and all dataset meta files saved for '{self.dataset_manager.dataset_name}'."
         )
@@ -1570,6 +1904,8 @@ class LeRobotEpisode(BaseEpisode):
         Load an episode data file. We only extract the information from the parquet data file.
         TODO(adle): Add more information in the Episode when loading from parquet data file from metafiles and videos
         """
+        import pandas as pd
+
         logger.debug(f"Loading episode from {episode_data_path} with format {format}")
         # Check that the file exists
         if not os.path.exists(episode_data_path):
@@ -1655,10 +1991,12 @@ class LeRobotEpisode(BaseEpisode):
         )
         return episode_model
 
-    def parquet(self) -> pd.DataFrame:
+    def parquet(self) -> "pd.DataFrame":
         """
         Load the .parquet file of the episode. Only works for LeRobot format.
         """
+        import pandas as pd
+
         return pd.read_parquet(self._parquet_path)
 
     def delete(self, update_hub: bool = True, repo_id: Optional[str] = None) -> None:
@@ -1723,67 +2061,6 @@ class LeRobotEpisode(BaseEpisode):
             )
 
 
-class LeRobotEpisodeModel(BaseModel):
-    model_config = ConfigDict(extra="allow")
-
-    action: List[List[float]]
-    observation_state: List[List[float]] = Field(
-        validation_alias=AliasChoices("observation.state", "observation_state")
-    )
-    timestamp: List[float]
-    task_index: List[int]
-    episode_index: List[int]
-    frame_index: List[int]
-    index: List[int]
-
-    @model_validator(mode="before")
-    def validate_lengths(cls, values: Dict[str, Any]) -> Dict[str, Any]:
-        fields_to_check = [
-            "action",
-            "observation_state",
-            "timestamp",
-            "task_index",
-            "episode_index",
-            "frame_index",
-            "index",
-        ]
-        # Adjust for alias, Pydantic v2 uses the defined field name 'observation_state' internally
-        # For validation, ensure the actual data key (could be 'observation.state') is handled by AliasChoices
-        # and here we check the Pydantic model field name.
-
-        lengths = []
-        for field_name in fields_to_check:
-            # Pydantic v2's AliasChoices handles mapping from 'observation.state' to 'observation_state' on input.
-            # So 'values' dict here will have 'observation_state' as key if alias was used.
-            val = values.get(field_name)
-            if (
-                val is None and field_name == "observation_state"
-            ):  # Try the alias if not found
-                val = values.get("observation.state")
-
-            if val is not None:
-                lengths.append(len(val))
-            else:  # Field is missing, which might be an issue depending on requirements
-                # For now, let's assume all these fields are mandatory for a valid parquet row
-                raise ValueError(
-                    f"Missing data for field '{field_name}' in LeRobotEpisodeModel."
-                )
-
-        if len(set(lengths)) > 1:
-            raise ValueError(
-                f"All items in LeRobotEpisodeModel must have the same length. Got lengths: {lengths}"
-            )
-        return values
-
-    def to_parquet(self, filename: str) -> None:
-        """
-        Save the episode to a Parquet file
-        """
-        df = pd.DataFrame(self.model_dump(mode="python"))
-        df.rename(columns={"observation_state": "observation.state"}, inplace=True)
-        df.to_parquet(filename, index=False)
-
-
 class TasksFeatures(BaseModel):
     """
     Features of the lines in tasks.jsonl.
@@ -1851,6 +2128,8 @@ class TasksModel(BaseModel):
                 # Only append the new tasks to the file
                 for task in self.tasks[self._initial_nb_total_tasks :]:
                     f.write(task.model_dump_json() + "\n")
+        # The tasks are now all on disk
+        self._initial_nb_total_tasks = len(self.tasks)
 
     def update(self, step: Step) -> None:
         """
@@ -1871,13 +2150,15 @@ class TasksModel(BaseModel):
             )
 
     def update_for_episode_removal(
-        self, df_episode_to_delete: pd.DataFrame, data_folder_full_path: str
+        self, df_episode_to_delete: "pd.DataFrame", data_folder_full_path: str
     ) -> None:
         """
         Update the tasks when removing an episode from the dataset.
         We count the number of occurences of task_index in the dataset.
         If the episode is the only one with this task_index, we remove it from the tasks.jsonl file.
         """
+        import pandas as pd
+
         if df_episode_to_delete.empty:
             return
 
@@ -1896,11 +2177,15 @@ class TasksModel(BaseModel):
                     task for task in self.tasks if task.task_index != task_index
                 ]
 
-    def save(self, meta_folder_path: str) -> None:
+    def save(
+        self,
+        meta_folder_path: str,
+        save_mode: Literal["append", "overwrite"] = "overwrite",
+    ) -> None:
         """
-        Save the episodes to the meta folder path.
+        Save the tasks to the meta folder path.
         """
-        self.to_jsonl(meta_folder_path)
+        self.to_jsonl(meta_folder_path, save_mode=save_mode)
 
     def merge_with(
         self, second_task_model: "TasksModel", meta_folder_to_save_to: str
@@ -2074,6 +2359,8 @@ class EpisodesModel(BaseModel):
                     f.write(episode.model_dump_json() + "\n")
         else:
             raise ValueError("save_mode must be 'append' or 'overwrite'")
+        # The episodes are now all on disk
+        self._original_nb_total_episodes = len(self.episodes)
 
     @classmethod
     def from_jsonl(
@@ -2087,6 +2374,8 @@ class EpisodesModel(BaseModel):
 
         incorrect_episodes = False
         _episodes_features: dict[int, EpisodesFeatures] = {}
+        # Deleted episodes leave gaps in the indexes until the dataset is compacted
+        tombstones = set(load_tombstones(meta_folder_path))
 
         with open(
             f"{meta_folder_path}/episodes.jsonl", "r", encoding=DEFAULT_FILE_ENCODING
@@ -2100,7 +2389,7 @@ class EpisodesModel(BaseModel):
                     missing_indexes = [
                         i
                         for i in range(last_index + 1, episodes_feature.episode_index)
-                        if i not in _episodes_features
+                        if i not in _episodes_features and i not in tombstones
                     ]
                     if missing_indexes:
                         incorrect_episodes = True
@@ -2280,39 +2569,30 @@ class EpisodesModel(BaseModel):
         This function will attempt to correct the parquet files in the dataset.
         It will:
         - Check if the parquets are correctly indexed
-        - Rewrite all episode_index, frame index and index
+        - Check all the parquets in parallel
+        - Rewrite the episode_index, frame index and index, and fill the NaN/null
+        actions and states, of the faulty parquets only
         """
         # Check if the parquets exist
         if not os.path.exists(parquets_path):
             logger.warning(f"Parquet path {parquets_path} does not exist.")
             return False
-        # Fetch all the parquet files
-        parquet_files = os.listdir(parquets_path)
-        parquet_files = [file for file in parquet_files if file.endswith(".parquet")]
-        parquet_files.sort()
-        # Check if the files are correctly indexed
-        for i, file in enumerate(parquet_files):
-            # Check if the file is correctly indexed
-            if f"episode_{i:06d}.parquet" not in file:
-                logger.warning(
-                    f"Parquet file {file} is not correctly indexed. Expected episode_{i:06d}.parquet"
-                )
-                return False
-
-        logger.info("Parquet files are correctly indexed. Will attempt to repair them.")
-        cumulative_index = 0
-        for i, file in enumerate(parquet_files):
-            # Read the parquet file
-            df = pd.read_parquet(os.path.join(parquets_path, file))
-            # Check if the episode_index is correct
-            df["episode_index"] = i
-            df["frame_index"] = np.arange(len(df))
-            df["index"] = np.arange(len(df)) + cumulative_index
-            cumulative_index += len(df)
-            # Save the parquet file
-            df.to_parquet(os.path.join(parquets_path, file), index=False)
-            logger.info(f"Parquet file {file} repaired.")
 
+        try:
+            report = validate_parquet_folder(parquets_path)
+            if report.ok:
+                logger.info(f"No issue found in {report.nb_files} parquet files.")
+                return True
+            logger.info(report.summary())
+            report = repair_parquet_folder(parquets_path, report=report)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"Could not repair the parquet files: {e}")
+            return False
+
+        if not report.ok:
+            logger.warning(f"Issues left after the repair:\n{report.summary()}")
+            return False
+        logger.info(f"Parquet files in {parquets_path} repaired.")
         return True
 
     def split(self, split_ratio: float) -> Tuple["EpisodesModel", "EpisodesModel"]:
@@ -2741,7 +3021,7 @@ class StatsModel(BaseModel):
         self.to_json(meta_folder_path)
 
     def _update_for_episode_removal_mean_std_count(
-        self, df_episode_to_delete: pd.DataFrame
+        self, df_episode_to_delete: "pd.DataFrame"
     ) -> None:
         """
         Update the stats before removing an episode from the dataset.
@@ -2749,6 +3029,8 @@ class StatsModel(BaseModel):
         We prefer to do it after the episode removal to directly access new indexes and episodes indexes.
         This only updates mean, std, sum, square_sum, and count.
         """
+        import pandas as pd
+
         if df_episode_to_delete.empty:
             return
 
@@ -2997,6 +3279,8 @@ class StatsModel(BaseModel):
         Update the min and max in stats after removing an episode from the dataset.
         Be sure to call this function after reindexing the data.
         """
+        import pandas as pd
+
         self.compute_count_square_sum_framecount_from_mean_std(
             meta_folder_path=meta_folder_path
         )
@@ -3154,6 +3438,8 @@ class EpisodesStatsModel(BaseModel):
     episodes_stats: List[EpisodesStatsFeatures] = Field(default_factory=list)
     save_cartesian: bool = False
     add_metadata: Optional[Dict[str, list]] = None
+    # Number of episodes_stats already written to episodes_stats.jsonl
+    _nb_saved_episodes_stats: int = 0
 
     def update(self, step: Step, episode_index: int, current_step_index: int) -> None:
         """
@@ -3186,17 +3472,27 @@ class EpisodesStatsModel(BaseModel):
         )
         self.episodes_stats.append(new_episode_stats)
 
-    def to_jsonl(self, meta_folder_path: str) -> None:
+    def to_jsonl(
+        self,
+        meta_folder_path: str,
+        save_mode: Literal["append", "overwrite"] = "overwrite",
+    ) -> None:
         """
         Write the episodes_stats.jsonl file in the meta folder path.
+        In append mode, only the episodes that were not saved yet are written.
         """
+        if save_mode == "append":
+            episodes_stats = self.episodes_stats[self._nb_saved_episodes_stats :]
+        else:
+            episodes_stats = self.episodes_stats
         with open(
             f"{meta_folder_path}/episodes_stats.jsonl",
-            "w",
+            "a" if save_mode == "append" else "w",
             encoding=DEFAULT_FILE_ENCODING,
         ) as f:
-            for episode_stats in self.episodes_stats:
+            for episode_stats in episodes_stats:
                 f.write(episode_stats.to_json() + "\n")
+        self._nb_saved_episodes_stats = len(self.episodes_stats)
 
     @classmethod
     def from_jsonl(
@@ -3252,15 +3548,27 @@ class EpisodesStatsModel(BaseModel):
         )
         episodes_stats_model.add_metadata = add_metadata
         episodes_stats_model.save_cartesian = save_cartesian
+        episodes_stats_model._nb_saved_episodes_stats = len(
+            episodes_stats_model.episodes_stats
+        )
 
         return episodes_stats_model
 
-    def save(self, meta_folder_path: str) -> None:
+    def save(
+        self,
+        meta_folder_path: str,
+        save_mode: Literal["append", "overwrite"] = "overwrite",
+    ) -> None:
         """
         Save the episodes_stats to the meta folder path.
         Also computes the final mean and std for the Stats objects.
+        In append mode, only the new episodes are computed and written.
         """
-        for episode_stats in self.episodes_stats:
+        if save_mode == "append":
+            episodes_stats = self.episodes_stats[self._nb_saved_episodes_stats :]
+        else:
+            episodes_stats = self.episodes_stats
+        for episode_stats in episodes_stats:
             for field_key, field_value in episode_stats.stats.__dict__.items():
                 # if field is a Stats object, call .compute_from_rolling() to get the final mean and std
                 if isinstance(field_value, Stats):
@@ -3275,7 +3583,7 @@ class EpisodesStatsModel(BaseModel):
                         except ValueError as e:
                             logger.error(f"Error computing mean and std for {key}: {e}")
 
-        self.to_jsonl(meta_folder_path)
+        self.to_jsonl(meta_folder_path, save_mode=save_mode)
 
     def update_for_episode_removal(
         self, episode_to_delete_index: int, old_index_to_new_index: Dict[int, int]
@@ -3750,6 +4058,8 @@ class InfoModel(BaseModel):
     def recompute_from_parquets(
         cls, infos: "InfoModel", dataset_path: Path
     ) -> "InfoModel":
+        import pandas as pd
+
         data_folder_path = dataset_path / "data" / "chunk-000"
         all_episodes_df = list(data_folder_path.rglob("episode_*.parquet"))
         infos.total_episodes = len(all_episodes_df)
@@ -3860,14 +4170,17 @@ class InfoModel(BaseModel):
 
         return info_model
 
-    def to_json(self, meta_folder_path: str) -> None:
+    def to_json(self, meta_folder_path: str, debounce: bool = False) -> None:
         """
-        Write the info.json file in the meta folder path.
+        Write the info.json file in the meta folder path. The file is replaced atomically.
+        If debounce is True, the file is written in the background by the meta writer.
         """
-        with open(
-            f"{meta_folder_path}/info.json", "w", encoding=DEFAULT_FILE_ENCODING
-        ) as f:
-            f.write(json.dumps(self.to_dict(), indent=4))
+        path = f"{meta_folder_path}/info.json"
+        content = json.dumps(self.to_dict(), indent=4)
+        if debounce:
+            meta_writer.schedule(path, content)
+        else:
+            meta_writer.write_now(path, content)
 
     def update(self, episode: LeRobotEpisode) -> None:
         """
@@ -3885,7 +4198,7 @@ class InfoModel(BaseModel):
         )
 
         self.total_episodes = nb_episodes
-        self.total_frames += len(episode.steps)
+        self.total_frames += episode.num_steps
         # Count the number of videos in every subfolder
         video_path = os.path.join(episode.dataset_path, "videos", "chunk-000")
         total_videos = 0
@@ -3914,13 +4227,14 @@ class InfoModel(BaseModel):
     def save(
         self,
         meta_folder_path: str,
+        debounce: bool = False,
     ) -> None:
         """
         Save the info to the meta folder path.
         """
-        self.to_json(meta_folder_path)
+        self.to_json(meta_folder_path, debounce=debounce)
 
-    def update_for_episode_removal(self, df_episode_to_delete: pd.DataFrame) -> None:
+    def update_for_episode_removal(self, df_episode_to_delete: "pd.DataFrame") -> None:
         """
         Update the info before removing an episode from the dataset.
         """
@@ -0,0 +1,134 @@
+"""
+Persistence helpers for the dataset meta files.
+
+Files that are rewritten in full (eg: meta/info.json) are written to a temporary
+file and renamed, so that a crash never leaves a truncated file behind. Writes
+that happen in bursts (one per recorded episode) go through the debounced
+background flusher: only the last content scheduled for a path is written.
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+# Indexes of the episodes deleted since the last compaction of the dataset
+TOMBSTONES_FILE_NAME = "tombstones.json"
+
+
+def atomic_write_text(path: str, content: str) -> None:
+    """
+    Write content to path atomically: readers see either the old or the new file.
+    """
+    # Imported here: phosphobot.models.dataset imports this module
+    from phosphobot.models.dataset import DEFAULT_FILE_ENCODING
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding=DEFAULT_FILE_ENCODING) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class DebouncedMetaWriter:
+    """
+    Writes files in a background thread, once no new content was scheduled for
+    delay_s seconds (or at most max_delay_s after the first pending write).
+
+    The content is serialized by the caller when scheduling, so the background
+    thread never reads models that are being updated by the recording loop.
+    """
+
+    def __init__(self, delay_s: float = 2.0, max_delay_s: float = 10.0) -> None:
+        self.delay_s = delay_s
+        self.max_delay_s = max_delay_s
+        self._pending: Dict[str, str] = {}
+        self._first_scheduled_at: Optional[float] = None
+        self._last_scheduled_at = 0.0
+        self._condition = threading.Condition()
+        # Held while files are written, so that flush() waits for in-flight writes
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, path: str, content: str) -> None:
+        with self._condition:
+            self._pending[path] = content
+            now = time.monotonic()
+            self._last_scheduled_at = now
+            if self._first_scheduled_at is None:
+                self._first_scheduled_at = now
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="meta-writer", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def write_now(self, path: str, content: str) -> None:
+        """
+        Write a file immediately, replacing any pending write of the same path.
+        """
+        with self._write_lock:
+            with self._condition:
+                self._pending.pop(path, None)
+            atomic_write_text(path, content)
+
+    def pending(self) -> Dict[str, str]:
+        with self._condition:
+            return dict(self._pending)
+
+    def _take_pending(self) -> Dict[str, str]:
+        pending = self._pending
+        self._pending = {}
+        self._first_scheduled_at = None
+        return pending
+
+    def _write(self, pending: Dict[str, str]) -> None:
+        for path, content in pending.items():
+            try:
+                atomic_write_text(path, content)
+            except Exception as e:
+                logger.error(f"Failed to write meta file {path}: {e}")
+
+    def flush(self) -> None:
+        """
+        Write all the pending files now.
+        """
+        with self._write_lock:
+            with self._condition:
+                pending = self._take_pending()
+            self._write(pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                now = time.monotonic()
+                assert self._first_scheduled_at is not None
+                deadline = min(
+                    self._last_scheduled_at + self.delay_s,
+                    self._first_scheduled_at + self.max_delay_s,
+                )
+                if now < deadline:
+                    self._condition.wait(timeout=deadline - now)
+                    continue
+            self.flush()
+
+
+meta_writer = DebouncedMetaWriter()
+# Don't lose the last writes when the server stops
+atexit.register(meta_writer.flush)
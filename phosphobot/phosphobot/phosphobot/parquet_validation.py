@@ -0,0 +1,473 @@
+"""
+Validation and repair of the parquet files of a LeRobot dataset.
+
+The checks run on the Arrow columns with pyarrow compute, file by file in a pool
+of threads (pyarrow releases the GIL), and collect every problem with its episode
+and rows instead of stopping at the first one:
+- NaN or null values in the action and observation.state columns
+- episode_index different from the episode of the file name
+- frame_index that doesn't go from 0 to n - 1
+- index that doesn't continue the index of the previous episode
+
+The repair rewrites each faulty file once: the index columns are recomputed and
+the NaN/null values are filled with the previous valid value of the same joint
+(the next one at the start of the episode), so that the rows stay aligned with
+the frames of the videos.
+
+Scripts can use a pool of processes instead (processes=True), from a
+`if __name__ == "__main__":` block: the spawned workers import the main module.
+The server keeps the threads: in its frozen executable, each spawned worker would
+start the server again. This module doesn't import the rest of the package: the
+worker processes start fast.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+VALUE_COLUMNS = ("action", "observation.state")
+INDEX_COLUMNS = ("episode_index", "frame_index", "index")
+EPISODE_FILE_PATTERN = re.compile(r"episode_(\d+)\.parquet$")
+# Below this number of files, the checks run in the calling process: starting the
+# worker processes would take longer than the checks. Not used for the threads.
+MIN_FILES_PER_PROCESS_POOL = 16
+
+
+@dataclass
+class ParquetIssue:
+    """
+    A problem in a parquet file.
+
+    kind is one of "unreadable", "missing_column", "nan", "null", "ragged",
+    "episode_index", "frame_index", "index", "file_name".
+    """
+
+    file_name: str
+    episode_index: Optional[int]
+    kind: str
+    column: Optional[str] = None
+    rows: List[int] = field(default_factory=list)
+    fixable: bool = True
+    message: Optional[str] = None
+
+    def __str__(self) -> str:
+        location = self.file_name
+        if self.column is not None:
+            location += f" [{self.column}]"
+        message = f"{location}: {self.kind}"
+        if self.rows:
+            shown = ", ".join(str(row) for row in self.rows[:10])
+            more = f", ... ({len(self.rows)} rows)" if len(self.rows) > 10 else ""
+            message += f" at rows {shown}{more}"
+        if self.message:
+            message += f" ({self.message})"
+        return message
+
+
+@dataclass
+class ParquetValidationReport:
+    """Issues found in a folder of parquet files."""
+
+    folder_path: str
+    nb_files: int = 0
+    nb_rows: int = 0
+    issues: List[ParquetIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    @property
+    def value_issues(self) -> List[ParquetIssue]:
+        """Issues of the values, that make the dataset unusable for training."""
+        return [
+            issue
+            for issue in self.issues
+            if issue.kind not in (*INDEX_COLUMNS, "file_name")
+            and issue.column not in INDEX_COLUMNS
+        ]
+
+    @property
+    def fixable(self) -> bool:
+        return all(issue.fixable for issue in self.issues)
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.nb_files} parquet files, {self.nb_rows} rows in "
+            f"{self.folder_path}: {len(self.issues)} issues"
+        ]
+        lines.extend(f"  {issue}" for issue in self.issues)
+        return "\n".join(lines)
+
+
+def _episode_index_of(file_name: str) -> Optional[int]:
+    match = EPISODE_FILE_PATTERN.search(file_name)
+    return int(match.group(1)) if match else None
+
+
+def _value_issues(
+    file_name: str, episode_index: Optional[int], name: str, column: pa.ChunkedArray
+) -> List[ParquetIssue]:
+    """NaN and null values of a column of lists of floats (or of floats)."""
+    array = column.combine_chunks()
+    issues = []
+    null_rows = np.flatnonzero(array.is_null().to_numpy(zero_copy_only=False))
+
+    if pa.types.is_list(array.type) or pa.types.is_fixed_size_list(array.type):
+        values = pc.list_flatten(array)
+        lengths = pc.list_value_length(array).drop_null()
+        if len(lengths) and pc.min(lengths).as_py() != pc.max(lengths).as_py():
+            issues.append(
+                ParquetIssue(file_name, episode_index, "ragged", name, fixable=False)
+            )
+    else:
+        values = array
+    # Fast path: the statistics of the whole column
+    has_nan = pa.types.is_floating(values.type) and pc.any(pc.is_nan(values)).as_py()
+    if not values.null_count and not has_nan and not len(null_rows):
+        return issues
+
+    nan_mask = (
+        pc.fill_null(pc.is_nan(values), False).to_numpy(zero_copy_only=False)
+        if has_nan
+        else np.zeros(len(values), dtype=bool)
+    )
+    if values is not array:
+        # Row of each value of the lists
+        parents = pc.list_parent_indices(array).to_numpy()
+        value_nulls = values.is_null().to_numpy(zero_copy_only=False)
+        null_rows = np.union1d(null_rows, parents[value_nulls])
+        nan_rows = np.unique(parents[nan_mask])
+    else:
+        nan_rows = np.flatnonzero(nan_mask)
+    for kind, rows in (("null", null_rows), ("nan", nan_rows)):
+        if len(rows):
+            issues.append(
+                ParquetIssue(
+                    file_name,
+                    episode_index,
+                    kind,
+                    name,
+                    rows=[int(row) for row in rows],
+                    fixable=len(rows) < len(array),
+                )
+            )
+    return issues
+
+
+def _index_issues(
+    file_name: str,
+    episode_index: Optional[int],
+    table: pa.Table,
+    index_offset: Optional[int],
+) -> List[ParquetIssue]:
+    num_rows = table.num_rows
+    expected = {
+        "episode_index": np.full(num_rows, episode_index)
+        if episode_index is not None
+        else None,
+        "frame_index": np.arange(num_rows),
+        "index": np.arange(num_rows) + index_offset
+        if index_offset is not None
+        else None,
+    }
+    issues = []
+    for name in INDEX_COLUMNS:
+        if name not in table.column_names:
+            issues.append(
+                ParquetIssue(file_name, episode_index, "missing_column", name)
+            )
+            continue
+        if expected[name] is None:
+            continue
+        values = table[name].to_numpy()
+        rows = np.flatnonzero(values != expected[name])
+        if len(rows):
+            issues.append(
+                ParquetIssue(
+                    file_name,
+                    episode_index,
+                    name,
+                    name,
+                    rows=[int(row) for row in rows],
+                )
+            )
+    return issues
+
+
+def validate_parquet_file(
+    path: str,
+    episode_index: Optional[int] = None,
+    index_offset: Optional[int] = None,
+    check_indexes: bool = True,
+) -> Tuple[int, List[ParquetIssue]]:
+    """
+    Check one parquet file. Returns its number of rows and its issues.
+
+    Args:
+        path: Path to the parquet file.
+        episode_index: Expected episode_index. Defaults to the one of the file name.
+        index_offset: Expected index of the first row. Not checked if None.
+        check_indexes: Check the episode_index, frame_index and index columns.
+    """
+    file_name = os.path.basename(path)
+    if episode_index is None:
+        episode_index = _episode_index_of(file_name)
+    columns = list(VALUE_COLUMNS) + (list(INDEX_COLUMNS) if check_indexes else [])
+    try:
+        schema_names = pq.read_schema(path).names
+        table = pq.read_table(path, columns=[c for c in columns if c in schema_names])
+    except Exception as e:
+        return 0, [
+            ParquetIssue(
+                file_name, episode_index, "unreadable", message=str(e), fixable=False
+            )
+        ]
+
+    issues: List[ParquetIssue] = []
+    for name in VALUE_COLUMNS:
+        if name not in table.column_names:
+            issues.append(
+                ParquetIssue(
+                    file_name, episode_index, "missing_column", name, fixable=False
+                )
+            )
+        else:
+            issues.extend(_value_issues(file_name, episode_index, name, table[name]))
+    if check_indexes:
+        issues.extend(_index_issues(file_name, episode_index, table, index_offset))
+    return table.num_rows, issues
+
+
+def _fill_missing_values(column: pa.ChunkedArray) -> pa.Array:
+    """
+    Replace the NaN/null values of a column of lists of floats with the previous
+    valid value of the same joint, or the next one at the start of the column.
+    """
+    import pandas as pd
+
+    array = column.combine_chunks()
+    if not (pa.types.is_list(array.type) or pa.types.is_fixed_size_list(array.type)):
+        values = pd.Series(array.to_numpy(zero_copy_only=False), dtype=np.float64)
+        return pa.array(values.ffill().bfill().to_numpy()).cast(array.type)
+    length = pc.list_value_length(array).drop_null()
+    dim = pc.max(length).as_py() if len(length) else 0
+    valid_rows = array.is_valid().to_numpy(zero_copy_only=False)
+    matrix = np.full((len(array), dim), np.nan)
+    matrix[valid_rows] = (
+        pc.list_flatten(array).to_numpy(zero_copy_only=False).reshape(-1, dim)
+    )
+    matrix = pd.DataFrame(matrix).ffill().bfill().to_numpy()
+
+    value_type = array.type.value_type
+    filled = pa.FixedSizeListArray.from_arrays(
+        pa.array(matrix.ravel(), type=value_type), dim
+    )
+    return filled.cast(array.type)
+
+
+def repair_parquet_file(
+    path: str,
+    episode_index: int,
+    index_offset: int,
+    fill_columns: Tuple[str, ...] = VALUE_COLUMNS,
+) -> int:
+    """
+    Rewrite a parquet file with correct index columns and without NaN/null values
+    in fill_columns. The file is replaced atomically. Returns its number of rows.
+    """
+    table = pq.read_table(path)
+    num_rows = table.num_rows
+    index_values = {
+        "episode_index": np.full(num_rows, episode_index, dtype=np.int64),
+        "frame_index": np.arange(num_rows, dtype=np.int64),
+        "index": np.arange(num_rows, dtype=np.int64) + index_offset,
+    }
+    for name, values in index_values.items():
+        if name in table.column_names:
+            position = table.column_names.index(name)
+            table = table.set_column(
+                position,
+                table.schema.field(name),
+                pa.array(values).cast(table.schema.field(name).type),
+            )
+        else:
+            table = table.append_column(name, pa.array(values))
+    for name in fill_columns:
+        if name in table.column_names:
+            position = table.column_names.index(name)
+            table = table.set_column(
+                position, table.schema.field(name), _fill_missing_values(table[name])
+            )
+
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return num_rows
+
+
+def _episode_files(folder_path: str) -> List[Tuple[int, str]]:
+    """Episode index and path of the parquet files of the folder, in order."""
+    files = []
+    for file_name in os.listdir(folder_path):
+        episode_index = _episode_index_of(file_name)
+        if episode_index is not None:
+            files.append((episode_index, os.path.join(folder_path, file_name)))
+    return sorted(files)
+
+
+def _run(
+    function, args_list: List[tuple], max_workers: Optional[int], processes: bool
+) -> list:
+    """Call function on each args, in a pool of threads or of processes."""
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(args_list) <= 1:
+        return [function(*args) for args in args_list]
+    if not processes:
+        with ThreadPoolExecutor(max_workers=max_workers) as thread_executor:
+            return list(thread_executor.map(function, *zip(*args_list)))
+    if len(args_list) < MIN_FILES_PER_PROCESS_POOL:
+        return [function(*args) for args in args_list]
+    # spawn: the workers don't inherit the locks of the threads of the caller
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=get_context("spawn")
+    ) as executor:
+        chunksize = max(1, len(args_list) // (4 * max_workers))
+        return list(executor.map(function, *zip(*args_list), chunksize=chunksize))
+
+
+def _index_offsets(files: List[Tuple[int, str]]) -> List[int]:
+    """Index of the first row of each file, from the row counts of the footers."""
+    offsets = []
+    offset = 0
+    for _, path in files:
+        offsets.append(offset)
+        try:
+            offset += pq.read_metadata(path).num_rows
+        except Exception:
+            pass
+    return offsets
+
+
+def validate_parquet_folder(
+    folder_path: str,
+    check_indexes: bool = True,
+    max_workers: Optional[int] = None,
+    processes: bool = False,
+) -> ParquetValidationReport:
+    """
+    Check all the episode_*.parquet files of a folder, in parallel.
+
+    Args:
+        folder_path: Folder of the parquet files, e.g. data/chunk-000.
+        check_indexes: Check the index columns and that the episodes are
+            numbered from 0 without gaps.
+        max_workers: Number of threads or processes. Defaults to the number of
+            CPUs.
+        processes: Check the files in a pool of processes instead of threads.
+            Only from a script with a __main__ guard.
+
+    Raises:
+        FileNotFoundError: if the folder doesn't exist or has no parquet file.
+    """
+    folder_path = str(folder_path)
+    if not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"Folder '{folder_path}' does not exist.")
+    files = _episode_files(folder_path)
+    if not files:
+        raise FileNotFoundError(f"No parquet files found in '{folder_path}'")
+
+    report = ParquetValidationReport(folder_path=folder_path, nb_files=len(files))
+    if check_indexes:
+        for position, (episode_index, path) in enumerate(files):
+            if episode_index != position:
+                report.issues.append(
+                    ParquetIssue(
+                        os.path.basename(path),
+                        episode_index,
+                        "file_name",
+                        fixable=False,
+                    )
+                )
+        offsets: List[Optional[int]] = list(_index_offsets(files))
+    else:
+        offsets = [None] * len(files)
+
+    results = _run(
+        validate_parquet_file,
+        [
+            (path, episode_index, offset, check_indexes)
+            for (episode_index, path), offset in zip(files, offsets)
+        ],
+        max_workers,
+        processes,
+    )
+    for num_rows, issues in results:
+        report.nb_rows += num_rows
+        report.issues.extend(issues)
+    return report
+
+
+def repair_parquet_folder(
+    folder_path: str,
+    report: Optional[ParquetValidationReport] = None,
+    max_workers: Optional[int] = None,
+    processes: bool = False,
+) -> ParquetValidationReport:
+    """
+    Rewrite, in parallel, the parquet files of the folder that have fixable
+    issues. Returns the report of the folder after the repair.
+
+    Args:
+        folder_path: Folder of the parquet files, e.g. data/chunk-000.
+        report: Report of validate_parquet_folder on this folder, if already
+            computed.
+        max_workers: Number of threads or processes. Defaults to the number of
+            CPUs.
+        processes: Rewrite the files in a pool of processes instead of threads.
+            Only from a script with a __main__ guard.
+
+    Raises:
+        ValueError: if the issues can't be fixed, e.g. the episodes are not
+            numbered from 0 without gaps.
+    """
+    if report is None:
+        report = validate_parquet_folder(
+            folder_path, max_workers=max_workers, processes=processes
+        )
+    if report.ok:
+        return report
+    if not report.fixable:
+        raise ValueError(
+            "Some issues can't be repaired:\n"
+            + "\n".join(str(issue) for issue in report.issues if not issue.fixable)
+        )
+
+    files = _episode_files(str(folder_path))
+    offsets = _index_offsets(files)
+    faulty: Dict[str, Tuple[str, ...]] = {}
+    for issue in report.issues:
+        columns = faulty.setdefault(issue.file_name, ())
+        if issue.kind in ("nan", "null") and issue.column not in columns:
+            faulty[issue.file_name] = columns + (issue.column,)  # type: ignore
+    _run(
+        repair_parquet_file,
+        [
+            (path, episode_index, offset, faulty[os.path.basename(path)])
+            for (episode_index, path), offset in zip(files, offsets)
+            if os.path.basename(path) in faulty
+        ],
+        max_workers,
+        processes,
+    )
+    return validate_parquet_folder(
+        folder_path, max_workers=max_workers, processes=processes
+    )
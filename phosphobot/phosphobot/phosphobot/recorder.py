@@ -11,6 +11,7 @@ from loguru import logger
 from phosphobot.camera import AllCameras, BaseCamera, get_all_cameras
 from phosphobot.configs import config
 from phosphobot.hardware import BaseRobot
+from phosphobot.metrics import RecordingMetrics
 
 # New imports for refactored Episode structure
 from phosphobot.models import (
@@ -24,6 +25,7 @@ from phosphobot.models import (
 )
 from phosphobot.rerun_visualizer import RerunVisualizer
 from phosphobot.robot import RobotConnectionManager, get_rcm
+from phosphobot.step_sync import StepSync, timed_call
 from phosphobot.types import VideoCodecs
 from phosphobot.utils import background_task_log_exceptions, get_home_app_path
 
@@ -42,6 +44,9 @@ class Recorder:
     cameras: AllCameras
     robots: list[BaseRobot]
 
+    # Per-stage timings of the current (or last) episode's record loop
+    metrics: Optional[RecordingMetrics] = None
+
     # Performance optimization: thread pools for concurrent operations
     _image_thread_pool: Optional[ThreadPoolExecutor] = None
     _robot_thread_pool: Optional[ThreadPoolExecutor] = None
@@ -68,9 +73,9 @@ class Recorder:
         self._max_image_workers = max(
             4, len(cameras.camera_ids)
         )  # At least one per camera
-        self._max_robot_workers = min(
-            2, len(robots) + 1
-        )  # Adaptive based on robot count
+        # One worker per read (observation and action of each robot), so that all the
+        # bus reads of a step start at the tick
+        self._max_robot_workers = max(2, 2 * len(robots))
 
         self._image_thread_pool = ThreadPoolExecutor(
             max_workers=self._max_image_workers, thread_name_prefix="recorder_images"
@@ -173,6 +178,7 @@ class Recorder:
             episode_index = self.episode.episode_index if self.episode else 0
             self.rerun_visualizer.initialize(dataset_name, episode_index)
 
+        self.metrics = RecordingMetrics(freq=freq)
         self.is_recording = True
         self.start_ts = time.perf_counter()
 
@@ -214,7 +220,7 @@ class Recorder:
             )
             return None
 
-        if not self.episode.steps:
+        if self.episode.num_steps == 0:
             logger.warning("Episode contains no steps. Nothing to save.")
             self.episode = None  # Clear the empty episode
             return None
@@ -237,6 +243,10 @@ class Recorder:
             f"Starting to save episode for dataset '{dataset_name_for_log}' (format: {episode_format_for_log})..."
         )
 
+        if self.metrics is not None:
+            # Saved with the episode to size the hardware of recording stations
+            episode_to_save.metadata["recording_metrics"] = self.metrics.summary()
+
         try:
             await episode_to_save.save()  # The episode handles all its saving logic
             logger.success(
@@ -307,14 +317,36 @@ class Recorder:
             f"Record loop engaged for episode {self.episode.episode_index if self.episode else 'N/A'}. Cameras: {self.cameras.camera_ids=} ({self.cameras.main_camera=})"
         )
 
+        metrics = self.metrics or RecordingMetrics(freq=self.freq)
+        self.metrics = metrics
+
         step_count = 0
         while self.is_recording:  # This flag is controlled by self.stop()
             loop_iteration_start_time = time.perf_counter()
+            metrics.start_iteration(loop_iteration_start_time)
+
+            # The samples of the step are the ones nearest to the start of the tick
+            step_sync = StepSync(reference_ts=loop_iteration_start_time)
+
+            # --- Optimized Robot Observation with Parallel Processing ---
+            # The robots are read first: the bus reads start at the tick
+            with metrics.time("robots"):
+                (
+                    final_observation_state,
+                    final_observation_joints_position,
+                    final_action_state,
+                    final_action_joints_position,
+                ) = await self._gather_robot_observations_parallel(
+                    save_cartesian=save_cartesian, step_sync=step_sync
+                )
 
             # --- Optimized Image Gathering with Parallel Processing ---
-            main_frames, secondary_frames = await self._gather_frames_parallel(
-                target_size=target_size,
-            )
+            # The cameras run freely: pick their frames captured nearest to the tick,
+            # including the frames captured during the robot reads
+            with metrics.time("cameras"):
+                main_frames, secondary_frames = await self._gather_frames_parallel(
+                    target_size=target_size, step_sync=step_sync
+                )
 
             if main_frames and len(main_frames) > 0:
                 main_frame = main_frames[0]
@@ -322,16 +354,8 @@ class Recorder:
                 main_frame = np.zeros(
                     (target_size[1], target_size[0], 3), dtype=np.uint8
                 )
-
-            # --- Optimized Robot Observation with Parallel Processing ---
-            (
-                final_observation_state,
-                final_observation_joints_position,
-                final_action_state,
-                final_action_joints_position,
-            ) = await self._gather_robot_observations_parallel(
-                save_cartesian=save_cartesian
-            )
+            metrics.record("sync_skew", step_sync.skew)
+            step_build_start_time = time.perf_counter()
 
             current_time_in_episode = loop_iteration_start_time - self.start_ts
 
@@ -361,16 +385,22 @@ class Recorder:
                 observation=observation,
                 action=final_action_joints_position,  # Will be filled by update_previous_step for the *previous* step
                 action_cartesian=final_action_state,
-                metadata={"created_at": loop_iteration_start_time},
+                metadata={
+                    "created_at": loop_iteration_start_time,
+                    **step_sync.to_metadata(),
+                },
             )
 
+            metrics.record("step_build", time.perf_counter() - step_build_start_time)
+
             if self.rerun_visualizer and self.rerun_visualizer.enabled:
-                self.rerun_visualizer.log_step(
-                    step=step,
-                    robots=self.robots,
-                    cameras=self.cameras,
-                    step_index=step_count,
-                )
+                with metrics.time("rerun"):
+                    self.rerun_visualizer.log_step(
+                        step=step,
+                        robots=self.robots,
+                        cameras=self.cameras,
+                        step_index=step_count,
+                    )
 
             if step_count % 20 == 0:  # Log every 20 steps
                 logger.debug(
@@ -379,22 +409,25 @@ class Recorder:
 
             # Order: update previous, then add current.
             if (
-                self.episode.steps and final_action_joints_position is None
+                self.episode.num_steps > 0 and final_action_joints_position is None
             ):  # If there's a previous step
                 # The 'action' of the previous step is the 'joints_position' of the current observation
                 self.episode.update_previous_step(step)
 
             # Append the current step. Episode's append_step will handle its internal logic
             # (like updating meta files for LeRobot format).
-            await self.episode.append_step(step)
+            with metrics.time("append_step"):
+                await self.episode.append_step(step)
 
             elapsed_this_iteration = time.perf_counter() - loop_iteration_start_time
             time_to_wait = max((1 / self.freq) - elapsed_this_iteration, 0)
+            metrics.end_iteration(elapsed_this_iteration)
 
             # Log performance metrics every 100 steps
             if step_count % 100 == 0:
                 logger.debug(
-                    f"Step {step_count}: Processing time: {elapsed_this_iteration:.3f}s, Target: {1 / self.freq:.3f}s"
+                    f"Step {step_count}: Processing time: {elapsed_this_iteration:.3f}s, Target: {1 / self.freq:.3f}s, "
+                    + f"Missed deadlines: {metrics.missed_deadlines}/{metrics.steps}"
                 )
 
             await asyncio.sleep(time_to_wait)
@@ -408,13 +441,20 @@ class Recorder:
         )
 
     async def _gather_frames_parallel(
-        self, target_size: tuple[int, int]
+        self,
+        target_size: tuple[int, int],
+        step_sync: Optional[StepSync] = None,
     ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
         """
         Simple parallel frame capture - each camera runs independently.
+        With a step_sync, each camera returns its frame captured nearest to the
+        reference tick and the offsets of the frames are recorded in step_sync.
         Returns (main_frames, secondary_frames).
         """
         loop = asyncio.get_event_loop()
+        reference_ts = (
+            step_sync.reference_ts if step_sync is not None else time.perf_counter()
+        )
 
         # Get all cameras and their roles
         main_camera = self.cameras.main_camera
@@ -434,6 +474,7 @@ class Recorder:
                 self._capture_single_camera,
                 main_camera,
                 target_size,
+                reference_ts,
             )
             camera_futures.append(("main", main_camera.camera_id, future))
 
@@ -445,6 +486,7 @@ class Recorder:
                     self._capture_single_camera,
                     camera,
                     target_size,
+                    reference_ts,
                 )
                 camera_futures.append(("secondary", camera.camera_id, future))
 
@@ -454,37 +496,58 @@ class Recorder:
 
         for role, camera_id, future in camera_futures:
             try:
-                frame = await future
+                frame, timestamp = await future
+                if step_sync is not None:
+                    step_sync.add(f"camera_{camera_id}", timestamp)
                 if frame is not None:
                     if role == "main":
                         main_frames.append(frame)
                     else:
                         secondary_frames.append(frame)
+                elif self.metrics is not None:
+                    self.metrics.add_dropped_frame(camera_id)
             except Exception as e:
                 logger.warning(f"Failed to capture frame from camera {camera_id}: {e}")
+                if self.metrics is not None:
+                    self.metrics.add_dropped_frame(camera_id)
 
         return main_frames, secondary_frames
 
     def _capture_single_camera(
-        self, camera: BaseCamera, target_size: tuple[int, int]
-    ) -> Optional[np.ndarray]:
+        self,
+        camera: BaseCamera,
+        target_size: tuple[int, int],
+        reference_ts: float,
+    ) -> Tuple[Optional[np.ndarray], Optional[float]]:
         """
-        Capture frame from a single camera.
+        Capture the frame of a single camera nearest to reference_ts.
+        Returns the frame and its acquisition timestamp.
         This runs in the thread pool.
         """
+        start_time = time.perf_counter()
         try:
-            return camera.get_rgb_frame(resize=target_size)
+            return camera.get_rgb_frame_near(reference_ts, resize=target_size)
         except Exception as e:
             logger.warning(
                 f"Exception capturing frame from camera {getattr(camera, 'camera_id', 'unknown')}: {e}"
             )
-            return None
+            return None, None
+        finally:
+            if self.metrics is not None:
+                self.metrics.record(
+                    f"camera_{getattr(camera, 'camera_id', 'unknown')}",
+                    time.perf_counter() - start_time,
+                )
 
     async def _gather_robot_observations_parallel(
-        self, save_cartesian: Optional[bool] = False
+        self,
+        save_cartesian: Optional[bool] = False,
+        step_sync: Optional[StepSync] = None,
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """
         Simple parallel robot observation gathering - each robot runs independently.
+        Each read is timestamped in the middle of the bus transaction, and its offset
+        is recorded in step_sync.
         Returns (final_state, final_joints_position).
         """
         if (
@@ -507,25 +570,27 @@ class Recorder:
                 source = self.observations_robots_mapping[idx]
                 future_observations_real = loop.run_in_executor(
                     self._robot_thread_pool,
+                    timed_call,
                     self._get_single_robot_observation,
                     robot,
                     idx,
                     source,
                     save_cartesian,
                 )
-                robot_observations_futures.append(future_observations_real)
+                robot_observations_futures.append((idx, future_observations_real))
             # A robot can be both in action and observation mappings
             if idx in self.actions_robots_mapping:
                 source = self.actions_robots_mapping[idx]
                 future_actions_real = loop.run_in_executor(
                     self._robot_thread_pool,
+                    timed_call,
                     self._get_single_robot_observation,
                     robot,
                     idx,
                     source,
                     save_cartesian,
                 )
-                robot_actions_future.append(future_actions_real)
+                robot_actions_future.append((idx, future_actions_real))
 
         # Wait for all robot observations
         all_robots_observation_states = []
@@ -533,18 +598,22 @@ class Recorder:
         all_robots_actions_states = []
         all_robots_actions_joints_positions = []
 
-        for future in robot_observations_futures:
+        for idx, future in robot_observations_futures:
             try:
-                robot_state, robot_joints = await future
+                timestamp, (robot_state, robot_joints) = await future
                 if robot_state is not None and robot_joints is not None:
+                    if step_sync is not None:
+                        step_sync.add(f"robot_{idx}", timestamp)
                     all_robots_observation_states.append(robot_state)
                     all_robots_observation_joints_positions.append(robot_joints)
             except Exception as e:
                 logger.warning(f"Failed to get robot observation: {e}")
-        for future in robot_actions_future:
+        for idx, future in robot_actions_future:
             try:
-                robot_state, robot_joints = await future
+                timestamp, (robot_state, robot_joints) = await future
                 if robot_state is not None and robot_joints is not None:
+                    if step_sync is not None:
+                        step_sync.add(f"robot_{idx}_action", timestamp)
                     all_robots_actions_states.append(robot_state)
                     all_robots_actions_joints_positions.append(robot_joints)
             except Exception as e:
@@ -1,3 +1,4 @@
+import threading
 import time
 from dataclasses import dataclass
 from functools import lru_cache
@@ -11,6 +12,7 @@ from serial.tools.list_ports_common import ListPortInfo
 
 from phosphobot.configs import config
 from phosphobot.hardware import (
+    BaseManipulator,
     BaseRobot,
     KochHardware,
     LeKiwi,
@@ -26,6 +28,7 @@ from phosphobot.models import RobotConfigStatus
 from phosphobot.utils import is_can_plugged
 
 rcm = None
+_rcm_lock = threading.Lock()
 
 robot_name_to_class = {
     SO100Hardware.name: SO100Hardware,
@@ -66,7 +69,23 @@ class RobotConnectionManager:
     def __del__(self) -> None:
         # Disconnect all robots
         for robot in self._all_robots:
-            robot.disconnect()
+            self._disconnect_robot(robot)
+
+    @staticmethod
+    def _disconnect_robot(robot: BaseRobot) -> None:
+        """
+        Disconnect the robot and free what the server holds for it.
+        """
+        if isinstance(robot, BaseManipulator):
+            # Local import: the teleoperation depends on this module
+            from phosphobot import teleoperation
+
+            # Stop the smoothing thread before it writes to a closed bus
+            if teleoperation.teleop_manager is not None:
+                teleoperation.teleop_manager.drop_motion_engine(robot)
+        robot.disconnect()
+        if isinstance(robot, BaseManipulator):
+            robot.close_sim_client()
 
     def _scan_ports(self) -> tuple[list, list]:
         """
@@ -249,7 +268,7 @@ class RobotConnectionManager:
             ):
                 # First, disconnect all robots
                 for robot in self._all_robots:
-                    robot.disconnect()
+                    self._disconnect_robot(robot)
                 self.available_ports = ports
                 self.available_can_ports = can_ports
                 await self._find_robots()
@@ -341,7 +360,7 @@ class RobotConnectionManager:
             )
 
         robot = await self.get_robot(robot_id=robot_id)
-        robot.disconnect()
+        self._disconnect_robot(robot)
         self._all_robots.remove(robot)
         if robot in self._manually_added_robots:
             # Remove from manually added robots if it was added manually
@@ -353,7 +372,9 @@ class RobotConnectionManager:
 def get_rcm() -> RobotConnectionManager:
     global rcm
 
-    if rcm is None:
-        rcm = RobotConnectionManager()
+    # With the lazy startup, the first requests can ask for it concurrently
+    with _rcm_lock:
+        if rcm is None:
+            rcm = RobotConnectionManager()
 
     return rcm
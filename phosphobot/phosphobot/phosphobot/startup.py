@@ -0,0 +1,218 @@
+"""
+Startup profiling and lazy initialization of the server subsystems.
+
+Run the server with `phosphobot run --profile-startup` to log how long each
+module takes to import and how long each subsystem (simulation, robots, UDP
+server, Hugging Face login) takes to initialize.
+"""
+
+import importlib.abc
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    # Time spent importing the module, including its own imports
+    cumulative_s: float = 0.0
+    # Time spent in the module body only
+    self_s: float = 0.0
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """
+    Wraps a module loader to measure the time spent in exec_module.
+    """
+
+    def __init__(self, loader: Any, profiler: "ImportProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+    def __getattr__(self, name: str) -> Any:
+        # Forward get_resource_reader, is_package, etc. to the wrapped loader
+        return getattr(self._loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder that times every module imported while it is installed.
+    Both the cumulative time (with nested imports) and the self time are recorded.
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, ImportTiming] = {}
+        # Imports can happen concurrently in several threads: keep one stack per thread
+        self._local = threading.local()
+        self._installed = False
+
+    def install(self) -> None:
+        if not self._installed:
+            sys.meta_path.insert(0, self)
+            self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            sys.meta_path.remove(self)
+            self._installed = False
+
+    def find_spec(
+        self, fullname: str, path: Optional[Sequence[str]], target: Any = None
+    ) -> Any:
+        # Avoid recursing into ourselves while we look up the real spec
+        if getattr(self._local, "busy", False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.busy = False
+
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    @property
+    def _stack(self) -> List[Tuple[str, float, float]]:
+        # (module name, start time, time spent in children)
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _enter(self, module: str) -> None:
+        self._stack.append((module, time.perf_counter(), 0.0))
+
+    def _exit(self, module: str) -> None:
+        name, start, children_s = self._stack.pop()
+        cumulative_s = time.perf_counter() - start
+        self.timings[name] = ImportTiming(
+            module=name,
+            cumulative_s=cumulative_s,
+            self_s=max(cumulative_s - children_s, 0.0),
+        )
+        stack = self._stack
+        if stack:
+            parent, parent_start, parent_children_s = stack[-1]
+            stack[-1] = (parent, parent_start, parent_children_s + cumulative_s)
+
+    def top(self, n: int = 15, by: str = "self_s") -> List[ImportTiming]:
+        return sorted(
+            self.timings.values(), key=lambda t: getattr(t, by), reverse=True
+        )[:n]
+
+    def total_s(self) -> float:
+        """
+        Sum of the self time of every profiled module.
+        """
+        return sum(t.self_s for t in self.timings.values())
+
+
+@dataclass
+class StartupProfiler:
+    """
+    Collects import and initialization timings during the server startup.
+    """
+
+    enabled: bool = False
+    imports: ImportProfiler = field(default_factory=ImportProfiler)
+    init_times: Dict[str, float] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def start(self) -> None:
+        """
+        Start profiling imports. Call this as early as possible.
+        """
+        self.enabled = True
+        self.started_at = time.perf_counter()
+        self.imports.install()
+
+    def stop_imports(self) -> None:
+        self.imports.uninstall()
+
+    @contextmanager
+    def measure(self, name: str) -> Generator[None, None, None]:
+        """
+        Measure the initialization time of a subsystem.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.init_times[name] = time.perf_counter() - start
+
+    def report(self, n: int = 15) -> str:
+        """
+        Log a summary of the slowest imports and subsystem initializations.
+        """
+        lines = [
+            f"Startup profile: {time.perf_counter() - self.started_at:.2f}s since profiling started, "
+            f"{self.imports.total_s():.2f}s spent in {len(self.imports.timings)} imports"
+        ]
+        lines.append(f"Slowest imports (top {n}, self / cumulative):")
+        for timing in self.imports.top(n):
+            lines.append(
+                f"  {timing.module:<45} {timing.self_s * 1000:8.1f}ms {timing.cumulative_s * 1000:8.1f}ms"
+            )
+        if self.init_times:
+            lines.append("Subsystem initialization:")
+            for name, duration in sorted(
+                self.init_times.items(), key=lambda item: item[1], reverse=True
+            ):
+                lines.append(f"  {name:<45} {duration * 1000:8.1f}ms")
+        report = "\n".join(lines)
+        logger.info(report)
+        return report
+
+
+startup_profiler = StartupProfiler()
+
+
+def init_subsystem(name: str, init: Callable[[], Any]) -> Any:
+    """
+    Initialize a subsystem and record its initialization time when profiling.
+    """
+    if not startup_profiler.enabled:
+        return init()
+    with startup_profiler.measure(name):
+        return init()
+
+
+def init_subsystem_in_background(name: str, init: Callable[[], Any]) -> threading.Thread:
+    """
+    Initialize a subsystem in a daemon thread so that it doesn't delay the startup.
+    Exceptions are logged, not raised.
+    """
+
+    def _run() -> None:
+        try:
+            init_subsystem(name, init)
+        except Exception as e:
+            logger.debug(f"Failed to initialize {name} in background: {e}")
+
+    thread = threading.Thread(target=_run, name=f"init-{name}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,63 @@
+"""
+Time synchronization of the samples of a recorded step.
+
+Every camera frame and every robot read is timestamped when it is acquired, with the
+time.perf_counter() clock. Each step of a recording has a reference tick: the samples
+nearest to the tick are assembled into the step, and the offset of each sample to the
+tick is recorded. The skew of the step is the largest absolute offset.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def nearest_sample(
+    samples: Iterable[Tuple[float, T]], reference_ts: float
+) -> Optional[Tuple[float, T]]:
+    """
+    Return the (timestamp, value) sample nearest to reference_ts, or None if there
+    is no sample.
+    """
+    best: Optional[Tuple[float, T]] = None
+    for sample in samples:
+        if best is None or abs(sample[0] - reference_ts) < abs(best[0] - reference_ts):
+            best = sample
+    return best
+
+
+def timed_call(function: Callable[..., T], *args: Any) -> Tuple[float, T]:
+    """
+    Call function(*args). Returns the acquisition timestamp, taken in the middle of
+    the call (eg: a bus read), and the result.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return (start + time.perf_counter()) / 2, result
+
+
+@dataclass
+class StepSync:
+    """
+    Offsets in seconds of the samples of a step to its reference tick, by source
+    (eg: "camera_0", "robot_1").
+    """
+
+    reference_ts: float
+    offsets: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, source: str, timestamp: Optional[float]) -> None:
+        if timestamp is not None:
+            self.offsets[source] = timestamp - self.reference_ts
+
+    @property
+    def skew(self) -> float:
+        return max((abs(offset) for offset in self.offsets.values()), default=0.0)
+
+    def to_metadata(self) -> dict:
+        """
+        Stored in the metadata of the Step.
+        """
+        return {"sync_skew": self.skew, "sync_offsets": dict(self.offsets)}
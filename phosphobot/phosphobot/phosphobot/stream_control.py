@@ -0,0 +1,116 @@
+"""
+Adaptive quality of the MJPEG video streams.
+
+A frame of a stream is only encoded when the previous one is sent: the sender
+waits while the connection of the client is congested, so the stream never
+queues frames, it skips them. The time each frame takes to send measures how
+fast the client reads. A controller per client turns it into the JPEG quality,
+the resolution and the frame rate of the next frames:
+- a send longer than the target latency lowers the level multiplicatively
+- fast sends raise it a bit, frame after frame
+From the top, a lower level lowers first the quality, then the resolution, then
+the frame rate: a client on a slow Wi-Fi link keeps a live image instead of a
+sharp but late one.
+
+The frames are encoded in a small pool of threads, off the event loop, and in
+parallel with the recording.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+# Share of the level used by each setting, from the top: quality, scale, fps
+QUALITY_LEVELS = (2 / 3, 1.0)
+SCALE_LEVELS = (1 / 3, 2 / 3)
+FPS_LEVELS = (0.0, 1 / 3)
+
+
+@dataclass
+class StreamSettings:
+    quality: int
+    # Ratio of the width and height of the frames to the requested size
+    scale: float
+    fps: float
+
+
+def _interpolate(level: float, bounds: tuple, low: float, high: float) -> float:
+    """low below bounds[0], high above bounds[1], linear in between."""
+    start, end = bounds
+    ratio = min(max((level - start) / (end - start), 0.0), 1.0)
+    return low + ratio * (high - low)
+
+
+class AdaptiveStreamController:
+    """
+    Settings of the next frame of a stream, from the send time of the previous
+    frames.
+
+    Args:
+        max_fps: Frame rate when the client keeps up, usually the camera fps.
+        max_quality: JPEG quality when the client keeps up.
+        min_quality: Lowest JPEG quality.
+        min_scale: Lowest ratio of the resolution to the requested one.
+        min_fps: Lowest frame rate.
+        target_latency: Longest acceptable send time of a frame, in seconds.
+        increase_step: Increase of the level after a fast send.
+        decrease_factor: Factor of the level after a slow send.
+    """
+
+    def __init__(
+        self,
+        max_fps: float,
+        max_quality: int = 95,
+        min_quality: int = 30,
+        min_scale: float = 0.4,
+        min_fps: float = 2.0,
+        target_latency: float = 0.1,
+        increase_step: float = 0.02,
+        decrease_factor: float = 0.7,
+    ) -> None:
+        self.max_fps = max_fps
+        self.max_quality = max_quality
+        self.min_quality = min(min_quality, max_quality)
+        self.min_scale = min_scale
+        self.min_fps = min(min_fps, max_fps)
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.level = 1.0
+
+    @property
+    def settings(self) -> StreamSettings:
+        return StreamSettings(
+            quality=round(
+                _interpolate(
+                    self.level, QUALITY_LEVELS, self.min_quality, self.max_quality
+                )
+            ),
+            scale=_interpolate(self.level, SCALE_LEVELS, self.min_scale, 1.0),
+            fps=_interpolate(self.level, FPS_LEVELS, self.min_fps, self.max_fps),
+        )
+
+    def observe(self, send_seconds: float) -> None:
+        """
+        Record the send time of a frame. The sender already waits for the client
+        before the next frame, so the frame rate never exceeds what the link
+        carries: the send time is enough to pick the level.
+        """
+        if send_seconds > self.target_latency:
+            self.level *= self.decrease_factor
+        elif send_seconds < self.target_latency / 4:
+            self.level = min(1.0, self.level + self.increase_step)
+
+
+_encode_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Threads that encode the frames of the streams. OpenCV releases the GIL."""
+    global _encode_executor
+    if _encode_executor is None:
+        _encode_executor = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="mjpeg"
+        )
+    return _encode_executor
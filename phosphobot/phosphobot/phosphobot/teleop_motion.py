@@ -0,0 +1,287 @@
+"""
+Motion engine between the teleoperation packets and the motor writes.
+
+Without it, every packet from the VR headset or the app becomes a motor write
+as soon as it arrives, so the jitter of the Wi-Fi becomes the jitter of the arm.
+The engine stamps each target on arrival and commands the robot from its own
+thread at a fixed rate:
+- the target pose is extrapolated with the velocity of the recent targets, for
+  at most `max_extrapolation` seconds, to hide the gaps between packets
+- a one-euro filter removes the hand tremor without lagging fast moves
+- after the inverse kinematics, the joints are limited in velocity and in
+  acceleration
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+from scipy.spatial.transform import Rotation as R  # type: ignore
+
+from phosphobot.hardware.base import BaseManipulator
+from phosphobot.metrics import (
+    teleop_motion_loop_seconds,
+    teleop_motion_overruns_total,
+)
+
+# The velocity of the targets is measured over this time span, at least
+VELOCITY_MIN_SPAN = 0.02
+VELOCITY_MAX_SPAN = 0.2
+
+
+def _wrap_angles(angles: np.ndarray) -> np.ndarray:
+    """Wrap angles to [-pi, pi)."""
+    return (angles + np.pi) % (2 * np.pi) - np.pi
+
+
+class OneEuroFilter:
+    """
+    One-euro filter (Casiez et al., 2012) over a vector: a low pass filter whose
+    cutoff frequency rises with the speed of the signal. Slow moves are smoothed,
+    fast moves are followed without lag.
+
+    Args:
+        min_cutoff: Cutoff frequency at rest, in Hz. Lower is smoother.
+        beta: Increase of the cutoff frequency with the speed. Higher is less lag.
+        d_cutoff: Cutoff frequency of the speed estimate, in Hz.
+    """
+
+    def __init__(
+        self, min_cutoff: float = 1.0, beta: float = 10.0, d_cutoff: float = 1.0
+    ) -> None:
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t: Optional[float] = None
+
+    @staticmethod
+    def _alpha(cutoff: Union[float, np.ndarray], dt: float) -> Union[float, np.ndarray]:
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, x: np.ndarray, t: float) -> np.ndarray:
+        """Filter the sample x taken at time t (in seconds)."""
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None or self._dx is None or self._t is None or t <= self._t:
+            self._x, self._dx, self._t = x.copy(), np.zeros_like(x), t
+            return x.copy()
+
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        self._dx += self._alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        self._x += self._alpha(cutoff, dt) * (x - self._x)
+        self._t = t
+        return self._x.copy()
+
+
+class JointMotionLimiter:
+    """
+    Moves the joints towards their targets without exceeding a maximum velocity
+    and a maximum acceleration per joint. Close to the target, the velocity is
+    also limited so that the joint can stop without overshooting.
+    """
+
+    def __init__(
+        self,
+        max_velocity: Union[float, np.ndarray],
+        max_acceleration: Union[float, np.ndarray],
+    ) -> None:
+        self.max_velocity = np.asarray(max_velocity, dtype=np.float64)
+        self.max_acceleration = np.asarray(max_acceleration, dtype=np.float64)
+        self.q: Optional[np.ndarray] = None
+        self.v: Optional[np.ndarray] = None
+
+    def reset(self, q: np.ndarray) -> None:
+        self.q = np.asarray(q, dtype=np.float64).copy()
+        self.v = np.zeros_like(self.q)
+
+    def step(self, q_target: np.ndarray, dt: float) -> np.ndarray:
+        """Position of the joints after dt seconds."""
+        if self.q is None or self.v is None:
+            self.reset(q_target)
+            return self.q.copy()  # type: ignore[union-attr]
+
+        error = np.asarray(q_target, dtype=np.float64) - self.q
+        # Fastest speed from which the joint can still stop on the target:
+        # v * dt + v^2 / (2 * a) = |error|
+        a = self.max_acceleration
+        stopping_speed = np.sqrt((a * dt) ** 2 + 2 * a * np.abs(error)) - a * dt
+        speed = np.minimum(
+            np.minimum(np.abs(error) / dt, self.max_velocity), stopping_speed
+        )
+        max_dv = self.max_acceleration * dt
+        self.v += np.clip(np.sign(error) * speed - self.v, -max_dv, max_dv)
+        self.q += self.v * dt
+        return self.q.copy()
+
+
+class TeleopMotionEngine(threading.Thread):
+    """
+    Commands a manipulator at a fixed rate toward the latest teleoperation target.
+
+    Call `set_target` from the packet handler; the thread does the IK and the
+    writes. When no target arrives for `idle_timeout` seconds, the engine stops
+    writing and forgets its state, so the next session starts from the actual
+    joint positions.
+    """
+
+    def __init__(
+        self,
+        robot: BaseManipulator,
+        frequency: float = 100.0,
+        max_extrapolation: float = 0.05,
+        max_velocity: Union[float, np.ndarray] = 4.0,
+        max_acceleration: Union[float, np.ndarray] = 40.0,
+        min_cutoff: float = 1.0,
+        beta: float = 10.0,
+        idle_timeout: float = 1.0,
+    ) -> None:
+        super().__init__(name=f"teleop-motion-{robot.name}", daemon=True)
+        self.robot = robot
+        self.period = 1 / frequency
+        self.max_extrapolation = max_extrapolation
+        self.idle_timeout = idle_timeout
+        self.pose_filter = OneEuroFilter(min_cutoff=min_cutoff, beta=beta)
+        self.limiter = JointMotionLimiter(max_velocity, max_acceleration)
+
+        self._lock = threading.Lock()
+        self._new_target = threading.Event()
+        self._running = True
+        self._reset_requested = False
+        # Recent targets: arrival time and [x, y, z, rx, ry, rz]
+        self._targets: Deque[Tuple[float, np.ndarray]] = deque(maxlen=32)
+        self._open_command = 0.0
+        self._filtered_pose: Optional[np.ndarray] = None
+
+    def set_target(
+        self,
+        position: np.ndarray,
+        orientation_rad: np.ndarray,
+        open_command: float,
+        arrival_time: Optional[float] = None,
+    ) -> None:
+        """New target pose and gripper command, stamped with its arrival time."""
+        pose = np.concatenate([position, orientation_rad]).astype(np.float64)
+        if arrival_time is None:
+            arrival_time = time.perf_counter()
+        with self._lock:
+            self._targets.append((arrival_time, pose))
+            self._open_command = open_command
+        self._new_target.set()
+
+    def reset(self) -> None:
+        """Forget the targets, for instance when the robot is moved by someone else."""
+        with self._lock:
+            self._targets.clear()
+            self._reset_requested = True
+
+    def _reset_state(self) -> None:
+        self.pose_filter.reset()
+        self.limiter.q = None
+        self._filtered_pose = None
+
+    def stop(self) -> None:
+        self._running = False
+        self._new_target.set()
+
+    def predicted_pose(self, now: float) -> Optional[np.ndarray]:
+        """
+        Latest target, extrapolated to now with the velocity of the recent
+        targets. None if there is no recent target.
+
+        The extrapolation grows for max_extrapolation seconds after the latest
+        target, then decays back to it: a lost packet is hidden, a stop is not
+        overshot for long.
+        """
+        with self._lock:
+            if not self._targets:
+                return None
+            target_time, target = self._targets[-1]
+            # Oldest target in the velocity window, but not too close to the latest
+            reference = None
+            for past_time, past_target in self._targets:
+                span = target_time - past_time
+                if span <= VELOCITY_MAX_SPAN:
+                    if span >= VELOCITY_MIN_SPAN:
+                        reference = (past_time, past_target)
+                    break
+        if now - target_time > self.idle_timeout:
+            return None
+        if reference is None:
+            return target.copy()
+
+        past_time, past_target = reference
+        delta = target - past_target
+        delta[3:] = _wrap_angles(delta[3:])
+        velocity = delta / (target_time - past_time)
+        age = max(now - target_time, 0.0)
+        horizon = max(min(age, 2 * self.max_extrapolation - age), 0.0)
+        return target + velocity * horizon
+
+    def _step(self, now: float) -> bool:
+        """One output tick. Returns False when there is nothing to command."""
+        if self._reset_requested:
+            self._reset_requested = False
+            self._reset_state()
+        pose = self.predicted_pose(now)
+        if pose is None:
+            if self.limiter.q is not None:
+                self._reset_state()
+            return False
+
+        # Filter the orientation on a continuous path, not across the wrap
+        if self._filtered_pose is not None:
+            pose[3:] = self._filtered_pose[3:] + _wrap_angles(
+                pose[3:] - self._filtered_pose[3:]
+            )
+        self._filtered_pose = self.pose_filter.filter(pose, now)
+
+        q_target = self.robot.inverse_kinematics(
+            self._filtered_pose[:3],
+            R.from_euler("xyz", self._filtered_pose[3:]).as_quat(),
+        )
+        if self.limiter.q is None:
+            self.limiter.reset(self.robot.read_joints_position(unit="rad"))
+            if len(self.limiter.q) != len(q_target):  # type: ignore[arg-type]
+                self.limiter.reset(q_target)
+        q_command = self.limiter.step(q_target, self.period)
+
+        self.robot.is_moving = True
+        self.robot.set_motors_positions_and_gripper(q_command, self._open_command)
+        self.robot.is_moving = False
+        return True
+
+    def run(self) -> None:
+        deadline = time.perf_counter()
+        while self._running:
+            start_time = time.perf_counter()
+            try:
+                active = self._step(start_time)
+            except Exception as e:
+                logger.warning(f"Teleop motion engine of {self.robot.name}: {e}")
+                active = False
+
+            if not active:
+                # Sleep until the next target
+                self._new_target.wait()
+                self._new_target.clear()
+                deadline = time.perf_counter()
+                continue
+
+            end_time = time.perf_counter()
+            teleop_motion_loop_seconds.observe(end_time - start_time)
+            deadline += self.period
+            if end_time > deadline:
+                teleop_motion_overruns_total.inc()
+                deadline = end_time
+            else:
+                time.sleep(deadline - end_time)
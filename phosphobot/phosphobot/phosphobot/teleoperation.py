@@ -12,8 +12,10 @@ from fastapi import WebSocket
 from loguru import logger
 from pydantic import ValidationError
 
+from phosphobot.configs import config
 from phosphobot.hardware import BaseManipulator
 from phosphobot.hardware.base import BaseMobileRobot
+from phosphobot.metrics import teleop_packets_total
 from phosphobot.models import (
     AppControlData,
     RobotStatus,
@@ -21,6 +23,7 @@ from phosphobot.models import (
     UDPServerInformationResponse,
 )
 from phosphobot.robot import RobotConnectionManager
+from phosphobot.teleop_motion import TeleopMotionEngine
 from phosphobot.utils import get_local_network_ip
 
 
@@ -61,6 +64,37 @@ class TeleopManager:
         self._robots: list[BaseManipulator | BaseMobileRobot] = []
         self.is_initializing: bool = False
 
+        # Motion engine of each manipulator, when the motion smoothing is enabled
+        self._motion_smoothing: bool = config.TELEOP_MOTION_SMOOTHING
+        self._motion_engines: Dict[int, TeleopMotionEngine] = {}
+
+    @property
+    def motion_smoothing(self) -> bool:
+        return self._motion_smoothing
+
+    @motion_smoothing.setter
+    def motion_smoothing(self, value: bool) -> None:
+        self._motion_smoothing = value
+        if not value:
+            for engine in self._motion_engines.values():
+                engine.stop()
+            self._motion_engines = {}
+
+    def get_motion_engine(self, robot: BaseManipulator) -> TeleopMotionEngine:
+        """Motion engine of the robot, started on first use."""
+        engine = self._motion_engines.get(id(robot))
+        if engine is None:
+            engine = TeleopMotionEngine(robot)
+            engine.start()
+            self._motion_engines[id(robot)] = engine
+        return engine
+
+    def drop_motion_engine(self, robot: BaseManipulator) -> None:
+        """Stop the motion engine of the robot, for instance when it's disconnected."""
+        engine = self._motion_engines.pop(id(robot), None)
+        if engine is not None:
+            engine.stop()
+
     def allow_instruction(self) -> bool:
         """Simple 1-second sliding window rate limiter."""
         if self.is_initializing:
@@ -127,6 +161,9 @@ class TeleopManager:
             return
 
         self.is_initializing = True
+        # The engines must not pull the robots back to the previous targets
+        for engine in self._motion_engines.values():
+            engine.reset()
         for i, robot in enumerate(await self.rcm.robots):
             logger.debug(f"Initializing robot {i}: {robot.name}")
             if robot_id is not None and i != robot_id:
@@ -179,6 +216,14 @@ class TeleopManager:
         target_position *= self.vr_scaling
         target_orientation_rad = np.deg2rad(target_orient_deg) + initial_orientation_rad
 
+        if self.motion_smoothing:
+            # The motion engine moves the robot from its own thread
+            self.get_motion_engine(robot).set_target(
+                target_position, target_orientation_rad, target_open
+            )
+            self.action_counter += 1
+            return True
+
         # if robot.is_moving, wait for it to stop
         start_wait_time = time.perf_counter()
         while (
@@ -276,6 +321,7 @@ class TeleopManager:
         """
         if self.is_initializing:
             logger.debug("Initialization in progress, skipping control data processing")
+            teleop_packets_total.labels(status="dropped", reason="initializing").inc()
             return False
 
         state = self.states[control_data.source]
@@ -285,12 +331,14 @@ class TeleopManager:
         # Check timestamp freshness
         if control_data.timestamp is not None:
             if control_data.timestamp <= state.last_timestamp:
+                teleop_packets_total.labels(status="dropped", reason="out_of_order").inc()
                 return False
             # Check if the timestamp is too old
             if time.time() - control_data.timestamp > self.MOVE_TIMEOUT:
                 logger.warning(
                     f"Control data timestamp {control_data.timestamp} is too old, skipping command"
                 )
+                teleop_packets_total.labels(status="dropped", reason="stale").inc()
                 return False
 
             state.last_timestamp = time.time()
@@ -302,15 +350,19 @@ class TeleopManager:
                 robot = self._robots[self.robot_id]
             except IndexError:
                 logger.warning(f"Robot ID {self.robot_id} not found in the robot list")
+                teleop_packets_total.labels(status="dropped", reason="no_robot").inc()
                 return False
             if isinstance(robot, BaseManipulator):
                 await self._process_control_data_manipulator(control_data, robot)
+                teleop_packets_total.labels(status="processed", reason="").inc()
                 return True
             elif isinstance(robot, BaseMobileRobot):
                 await self._process_control_data_mobile_robot(control_data, robot)
+                teleop_packets_total.labels(status="processed", reason="").inc()
                 return True
             else:
                 logger.error(f"Unknown robot type for robot_id {self.robot_id}")
+                teleop_packets_total.labels(status="dropped", reason="no_robot").inc()
                 return False
 
         # Otherwise (ex: VR control), fetch the manipulators and mobile robots based on control_data.source
@@ -319,6 +371,7 @@ class TeleopManager:
 
         # No robot -> nothing to do
         if manipulator_robot is None and mobile_robot is None:
+            teleop_packets_total.labels(status="dropped", reason="no_robot").inc()
             return False
 
         # Manipulator -> move it
@@ -331,6 +384,7 @@ class TeleopManager:
         if mobile_robot is not None:
             await self._process_control_data_mobile_robot(control_data, mobile_robot)
 
+        teleop_packets_total.labels(status="processed", reason="").inc()
         return True
 
     async def send_status_updates(
@@ -374,7 +428,9 @@ class TeleopManager:
         """Return current teleop settings."""
         from phosphobot.models import TeleopSettings
 
-        return TeleopSettings(vr_scaling=self.vr_scaling)
+        return TeleopSettings(
+            vr_scaling=self.vr_scaling, motion_smoothing=self.motion_smoothing
+        )
 
 
 teleop_manager = None
@@ -439,6 +495,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
         if not self.manager.allow_instruction():
             if self.transport:
                 self.transport.sendto(self.error_responses["rate_limited"], addr)
+            teleop_packets_total.labels(status="dropped", reason="rate_limited").inc()
             return
 
         # Try to queue packet (non-blocking)
@@ -450,6 +507,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
             if self.transport:
                 self.transport.sendto(self.error_responses["queue_full"], addr)
             logger.warning(f"Packet queue full, dropping packet from {addr}")
+            teleop_packets_total.labels(status="dropped", reason="queue_full").inc()
 
     async def _worker(self, worker_name: str) -> None:
         """Worker coroutine that processes packets from the queue"""
@@ -481,6 +539,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
 
         # Check packet age (drop stale packets)
         if time.time() - packet.timestamp > 0.1:  # 100ms timeout
+            teleop_packets_total.labels(status="dropped", reason="stale").inc()
             return
 
         # Fast decode - most packets should be valid UTF-8
@@ -488,6 +547,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
             text = data.decode("utf-8")
         except UnicodeDecodeError:
             self.transport.sendto(self.error_responses["invalid_encoding"], addr)
+            teleop_packets_total.labels(status="dropped", reason="invalid").inc()
             return
 
         # Parse JSON
@@ -498,6 +558,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
                 "utf-8"
             )
             self.transport.sendto(error_msg, addr)
+            teleop_packets_total.labels(status="dropped", reason="invalid").inc()
             return
 
         # Validate schema
@@ -508,6 +569,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
                 {"error": "validation_error", "detail": str(e)}
             ).encode("utf-8")
             self.transport.sendto(error_msg, addr)
+            teleop_packets_total.labels(status="dropped", reason="invalid").inc()
             return
 
         # Process control data
@@ -524,6 +586,7 @@ class _TeleopProtocol(asyncio.DatagramProtocol):
                 {"error": "internal_server_error", "detail": str(e)}
             ).encode("utf-8")
             self.transport.sendto(error_msg, addr)
+            teleop_packets_total.labels(status="dropped", reason="error").inc()
             logger.exception("Error processing control data")
 
 
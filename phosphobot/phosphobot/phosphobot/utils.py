@@ -15,23 +15,33 @@ import traceback
 import zipfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated, Any, Callable, Dict, Literal, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import av
 import netifaces
 import numpy as np
-import pandas as pd
 import requests
 import toml
 from fastapi import HTTPException
-from huggingface_hub import HfApi, login
 from loguru import logger
 from pydantic import BaseModel, BeforeValidator, PlainSerializer
 
 from phosphobot.types import VideoCodecs
 
-# Disable pyav logs
-av.logging.set_level(None)
+if TYPE_CHECKING:
+    # av, pandas and huggingface_hub are slow to import. They are imported
+    # in the functions that need them to keep the server startup fast.
+    import av
+    import pandas as pd
 
 ALLOWED_TO_RUN_SCAPY = True
 
@@ -208,6 +218,8 @@ def login_to_hf(revalidate: bool = True) -> bool:
         hf_token = file.read().strip()
 
     if hf_token:
+        from huggingface_hub import HfApi, login
+
         try:
             login(hf_token)
             logger.debug("Successfully logged in to Hugging Face.")
@@ -444,6 +456,11 @@ def create_video_file(
         ValueError: If frames array is empty or has incorrect shape.
         RuntimeError: If writing fails unexpectedly.
     """
+    import av
+
+    # Disable pyav logs
+    av.logging.set_level(None)
+
     # Map FourCC-style codec literals to PyAV codec names
     CODEC_MAP = {
         "avc1": "h264",
@@ -472,7 +489,7 @@ def create_video_file(
 
     def open_container(
         path: str, size: Tuple[int, int]
-    ) -> Tuple[av.container.output.OutputContainer, av.VideoStream]:  # type: ignore
+    ) -> Tuple["av.container.output.OutputContainer", "av.VideoStream"]:  # type: ignore
         os.makedirs(os.path.dirname(path), exist_ok=True)
         container = av.open(path, mode="w")
 
@@ -515,8 +532,8 @@ def create_video_file(
 
     def process_and_encode(
         frame: np.ndarray,
-        stream: av.VideoStream,  # type: ignore
-        container: av.container.output.OutputContainer,
+        stream: "av.VideoStream",  # type: ignore
+        container: "av.container.output.OutputContainer",
         size: Tuple[int, int],
     ) -> None:
         # Convert to uint8 RGB if needed
@@ -665,7 +682,7 @@ def compute_sum_squaresum_framecount_from_video(
     return (total_sum_rgb, total_sum_squares, nb_pixel)
 
 
-def get_field_min_max(df: pd.DataFrame, field_name: str) -> tuple:
+def get_field_min_max(df: "pd.DataFrame", field_name: str) -> tuple:
     """
     Compute the minimum value for the given field in the DataFrame.
 
@@ -762,6 +779,8 @@ def get_hf_username_or_orgid() -> Optional[str]:
     with open(token_file, "r") as file:
         hf_token = file.read().strip()
     if hf_token:
+        from huggingface_hub import HfApi
+
         try:
             api = HfApi()
             user_info = api.whoami(token=hf_token)
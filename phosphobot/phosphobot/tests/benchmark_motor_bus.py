@@ -0,0 +1,113 @@
+"""
+Benchmark of the sync reads of the motor buses, on the in-memory mock SDKs.
+
+For each bus, prints the reads per second of:
+- a sync read transaction built on every call (lookups, address checks, group and
+  params created, like the buses did before the read plans)
+- the precompiled read plan of the same transaction
+- `bus.read()` end to end, raw and calibrated
+
+```
+uv run python tests/benchmark_motor_bus.py --duration 2 --latency-ms 0
+```
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tests.mock_scservo_sdk as mock_sdk
+from phosphobot.hardware.motors.dynamixel import DynamixelMotorsBus
+from phosphobot.hardware.motors.feetech import FeetechMotorsBus, assert_same_address
+
+NB_MOTORS = 6
+DATA_NAME = "Present_Position"
+
+
+def degree_calibration(motor_names: list) -> dict:
+    return {
+        "motor_names": motor_names,
+        "calib_mode": ["DEGREE"] * len(motor_names),
+        "drive_mode": [0] * len(motor_names),
+        "homing_offset": [-2048] * len(motor_names),
+        "start_pos": [0] * len(motor_names),
+        "end_pos": [0] * len(motor_names),
+    }
+
+
+def reads_per_second(read, duration: float) -> float:
+    nb_reads = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        read()
+        nb_reads += 1
+    return nb_reads / (time.perf_counter() - start)
+
+
+def rebuilt_read(bus) -> np.ndarray:
+    motor_ids = []
+    models = []
+    for name in bus.motor_names:
+        motor_idx, model = bus.motors[name]
+        motor_ids.append(motor_idx)
+        models.append(model)
+    assert_same_address(bus.model_ctrl_table, models, DATA_NAME)
+    addr, bytes = bus.model_ctrl_table[models[0]][DATA_NAME]
+
+    group = mock_sdk.GroupSyncRead(bus.port_handler, bus.packet_handler, addr, bytes)
+    for idx in motor_ids:
+        group.addParam(idx)
+    if group.txRxPacket() != mock_sdk.COMM_SUCCESS:
+        raise ConnectionError(f"Read failed on port {bus.port}")
+    return np.array([group.getData(idx, addr, bytes) for idx in motor_ids])
+
+
+def benchmark(bus_class, model: str, duration: float) -> None:
+    port = f"/dev/mock_{bus_class.__name__}"
+    motors = {f"motor_{i}": (i, model) for i in range(1, NB_MOTORS + 1)}
+    bus = bus_class(port=port, motors=motors, mock=True)
+    address = bus.model_ctrl_table[model][DATA_NAME][0]
+    table = mock_sdk.get_motor_table(port)
+    for motor_id, _ in motors.values():
+        table[motor_id] = {address: 2048 + motor_id}
+
+    bus.connect()
+    # The read plan is compiled by the first read
+    bus.read(DATA_NAME)
+    plan = bus.group_readers[(DATA_NAME, *bus.motor_names)]
+
+    results = {
+        "group built per read": reads_per_second(lambda: rebuilt_read(bus), duration),
+        "read plan": reads_per_second(lambda: plan.read(1), duration),
+        "bus.read()": reads_per_second(lambda: bus.read(DATA_NAME), duration),
+    }
+    bus.set_calibration(degree_calibration(list(motors)))
+    results["bus.read() calibrated"] = reads_per_second(
+        lambda: bus.read(DATA_NAME), duration
+    )
+    bus.disconnect()
+
+    print(f"{bus_class.__name__} ({NB_MOTORS} motors)")
+    for name, value in results.items():
+        print(f"  {name:<24} {value:>12,.0f} reads/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated duration of a packet on the bus",
+    )
+    args = parser.parse_args()
+
+    mock_sdk.PACKET_LATENCY_S = args.latency_ms / 1000
+    benchmark(FeetechMotorsBus, "sts3215", args.duration)
+    benchmark(DynamixelMotorsBus, "xl430-w250", args.duration)
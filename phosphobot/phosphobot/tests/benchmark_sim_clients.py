@@ -0,0 +1,125 @@
+"""
+Benchmark of the kinematics of several arms: one shared physics client versus one
+physics client per arm.
+
+Each arm runs IK + FK solves for a fixed duration. Prints the total solves per second
+for 1 to --max-arms arms with:
+- shared: all the arms in one client, solved one after the other
+- threads: one client per arm, one thread per arm
+- processes: one client per arm, one process per arm
+
+PyBullet holds the GIL during a call: the threads isolate the arms but don't add
+throughput, the processes scale with the number of cores.
+
+```
+uv run python tests/benchmark_sim_clients.py --max-arms 4 --duration 2
+```
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.hardware.sim import PyBulletSimulation
+from phosphobot.utils import get_resources_path
+
+URDF_PATH = str(get_resources_path() / "urdf" / "so-100" / "urdf" / "so-100.urdf")
+END_EFFECTOR_LINK_INDEX = 5
+
+
+def solve(sim: PyBulletSimulation, robot_id: int, actuated_joints: List[int]) -> None:
+    q = sim.inverse_kinematics(
+        robot_id,
+        END_EFFECTOR_LINK_INDEX,
+        target_position=[0.15, 0.05, 0.1],
+        target_orientation=None,
+        rest_poses=[0.0] * len(actuated_joints),
+        lower_limits=[-3.14] * len(actuated_joints),
+        upper_limits=[3.14] * len(actuated_joints),
+        joint_ranges=[6.28] * len(actuated_joints),
+    )
+    sim.set_joints_states(robot_id, actuated_joints, list(q)[: len(actuated_joints)])
+    sim.get_link_state(robot_id, END_EFFECTOR_LINK_INDEX)
+
+
+def load_arm(sim: PyBulletSimulation, index: int):
+    robot_id, _, actuated_joints = sim.load_urdf(URDF_PATH, axis=[index, 0, 0])
+    return robot_id, actuated_joints
+
+
+def run_arm(duration: float, results: list, index: int, sim=None) -> None:
+    if sim is None:
+        sim = PyBulletSimulation(kinematic=True)
+    robot_id, actuated_joints = load_arm(sim, index)
+    nb_solves = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        solve(sim, robot_id, actuated_joints)
+        nb_solves += 1
+    results[index] = nb_solves / (time.perf_counter() - start)
+    sim.stop()
+
+
+def shared(nb_arms: int, duration: float) -> float:
+    sim = PyBulletSimulation(kinematic=True)
+    arms = [load_arm(sim, i) for i in range(nb_arms)]
+    nb_solves = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for robot_id, actuated_joints in arms:
+            solve(sim, robot_id, actuated_joints)
+            nb_solves += 1
+    sim.stop()
+    return nb_solves / (time.perf_counter() - start)
+
+
+def threads(nb_arms: int, duration: float) -> float:
+    results = [0.0] * nb_arms
+    sim = PyBulletSimulation(kinematic=True)
+    workers = [
+        threading.Thread(
+            target=run_arm, args=(duration, results, i, sim.create_client())
+        )
+        for i in range(nb_arms)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    sim.stop()
+    return sum(results)
+
+
+def processes(nb_arms: int, duration: float) -> float:
+    results = multiprocessing.Manager().list([0.0] * nb_arms)
+    workers = [
+        multiprocessing.Process(target=run_arm, args=(duration, results, i))
+        for i in range(nb_arms)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-arms", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'arms':>4} {'shared':>12} {'threads':>12} {'processes':>12}  solves/s")
+    for nb_arms in range(1, args.max_arms + 1):
+        print(
+            f"{nb_arms:>4} {shared(nb_arms, args.duration):>12,.0f} "
+            f"{threads(nb_arms, args.duration):>12,.0f} "
+            f"{processes(nb_arms, args.duration):>12,.0f}"
+        )
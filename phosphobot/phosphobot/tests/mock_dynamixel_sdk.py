@@ -0,0 +1,16 @@
+"""
+In-memory replacement of dynamixel_sdk, used by DynamixelMotorsBus(mock=True).
+
+The group reads and writes behave like the ones of the scservo_sdk mock.
+"""
+
+from tests.mock_scservo_sdk import (  # noqa: F401
+    COMM_SUCCESS,
+    COMM_TX_FAIL,
+    GroupSyncRead,
+    GroupSyncWrite,
+    PacketHandler,
+    PortHandler,
+    get_motor_table,
+    reset_motor_tables,
+)
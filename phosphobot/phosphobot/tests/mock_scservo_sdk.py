@@ -0,0 +1,123 @@
+"""
+In-memory replacement of scservo_sdk, used by FeetechMotorsBus(mock=True).
+
+The motors of a port are a table {motor_id: {address: value}} shared by all the
+PortHandler of this port. Values are stored as ints: with mock=True, the buses don't
+convert the values to bytes.
+"""
+
+import time
+from typing import Dict
+
+COMM_SUCCESS = 0
+COMM_TX_FAIL = -1001
+
+# Simulated duration of a packet on the bus, in seconds
+PACKET_LATENCY_S = 0.0
+
+_motor_tables: Dict[str, Dict[int, Dict[int, int]]] = {}
+
+
+def get_motor_table(port_name: str) -> Dict[int, Dict[int, int]]:
+    return _motor_tables.setdefault(port_name, {})
+
+
+def reset_motor_tables() -> None:
+    _motor_tables.clear()
+
+
+def _wait_packet() -> None:
+    if PACKET_LATENCY_S > 0:
+        time.sleep(PACKET_LATENCY_S)
+
+
+class PortHandler:
+    def __init__(self, port_name: str):
+        self.port_name = port_name
+        self.is_open = False
+        self.baudrate = 1_000_000
+        self.packet_timeout_ms = 0
+        self.table = get_motor_table(port_name)
+
+    def openPort(self) -> bool:
+        self.is_open = True
+        return True
+
+    def closePort(self) -> None:
+        self.is_open = False
+
+    def setPacketTimeoutMillis(self, timeout_ms: int) -> None:
+        self.packet_timeout_ms = timeout_ms
+
+    def getBaudRate(self) -> int:
+        return self.baudrate
+
+    def setBaudRate(self, baudrate: int) -> bool:
+        self.baudrate = baudrate
+        return True
+
+
+class PacketHandler:
+    def __init__(self, protocol_version: float = 0):
+        self.protocol_version = protocol_version
+
+    def getTxRxResult(self, result: int) -> str:
+        if result == COMM_SUCCESS:
+            return "[TxRxResult] Communication success!"
+        return "[TxRxResult] Incorrect status packet!"
+
+
+class GroupSyncRead:
+    def __init__(self, port, ph, start_address: int, data_length: int):
+        self.port = port
+        self.ph = ph
+        self.start_address = start_address
+        self.data_length = data_length
+        self.motor_ids: list = []
+        self.data: Dict[int, int] = {}
+
+    def addParam(self, motor_id: int) -> bool:
+        if motor_id in self.motor_ids:
+            return False
+        self.motor_ids.append(motor_id)
+        return True
+
+    def txRxPacket(self) -> int:
+        _wait_packet()
+        for motor_id in self.motor_ids:
+            registers = self.port.table.get(motor_id)
+            if registers is None:
+                # The motor doesn't answer
+                return COMM_TX_FAIL
+            self.data[motor_id] = registers.get(self.start_address, 0)
+        return COMM_SUCCESS
+
+    def getData(self, motor_id: int, address: int, data_length: int) -> int:
+        return self.data[motor_id]
+
+
+class GroupSyncWrite:
+    def __init__(self, port, ph, start_address: int, data_length: int):
+        self.port = port
+        self.ph = ph
+        self.start_address = start_address
+        self.data_length = data_length
+        self.data: Dict[int, int] = {}
+
+    def addParam(self, motor_id: int, data: int) -> bool:
+        if motor_id in self.data:
+            return False
+        self.data[motor_id] = data
+        return True
+
+    def changeParam(self, motor_id: int, data: int) -> bool:
+        if motor_id not in self.data:
+            return False
+        self.data[motor_id] = data
+        return True
+
+    def txPacket(self) -> int:
+        _wait_packet()
+        for motor_id, value in self.data.items():
+            self.port.table.setdefault(motor_id, {})[self.start_address] = value
+        return COMM_SUCCESS
@@ -0,0 +1,75 @@
+"""
+Fixtures shared by the tests of phosphobot.
+"""
+
+import os
+import sys
+from typing import Awaitable, Callable
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.dataset import Observation, Step
+from phosphobot.models.lerobot_dataset import (
+    BaseRobotInfo,
+    FeatureDetails,
+    LeRobotDataset,
+    LeRobotEpisode,
+)
+
+
+class FakeRobot:
+    name = "so-100"
+
+    def get_info_for_dataset(self) -> BaseRobotInfo:
+        feature = FeatureDetails(
+            dtype="float32", shape=[6], names=[f"motor_{i}" for i in range(6)]
+        )
+        return BaseRobotInfo(
+            robot_type="so-100", action=feature, observation_state=feature
+        )
+
+
+@pytest.fixture
+def camera_key() -> str:
+    """Video key of the episodes recorded with record_episode."""
+    return "observation.images.main"
+
+
+@pytest.fixture
+def record_episode(
+    camera_key: str,
+) -> Callable[[LeRobotDataset, int, str], Awaitable[int]]:
+    """
+    Records an episode of nb_steps steps with one camera in the dataset, without
+    a robot. The joints of step i are all i. Returns the index of the episode.
+    """
+
+    async def record(dataset: LeRobotDataset, nb_steps: int, task: str) -> int:
+        episode = await LeRobotEpisode.start_new(
+            dataset_manager=dataset,
+            robots=[FakeRobot()],  # type: ignore
+            codec="avc1",
+            freq=30,
+            target_size=(64, 48),
+            instruction=task,
+            all_camera_key_names=[camera_key],
+        )
+        for i in range(nb_steps):
+            step = Step(
+                observation=Observation(
+                    main_image=np.zeros((48, 64, 3), dtype=np.uint8),
+                    joints_position=np.full(6, i, dtype=np.float32),
+                    timestamp=i / 30,
+                    language_instruction=task,
+                )
+            )
+            if episode.num_steps > 0:
+                episode.update_previous_step(step)
+            await episode.append_step(step)
+        await episode.save()
+        return episode.episode_index
+
+    return record
@@ -0,0 +1,131 @@
+"""
+Tests for the export of a dataset to memory-mappable arrays.
+
+```
+uv run pytest tests/phosphobot/test_array_dataset.py
+```
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.array_dataset import (
+    INDEX_FILE_NAME,
+    ArrayDataset,
+    export_array_dataset,
+)
+from phosphobot.models.lerobot_dataset import LeRobotDataset
+from phosphobot.models.meta_writer import meta_writer
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return LeRobotDataset(path=str(tmp_path / "lerobot_v2.1" / "arrays"))
+
+
+@pytest.mark.asyncio
+async def test_export_and_read_arrays(dataset, tmp_path, record_episode, camera_key):
+    for i in range(3):
+        await record_episode(dataset, nb_steps=10 + i, task="pick")
+    output_path = str(tmp_path / "export")
+
+    path = dataset.export_arrays(output_path=output_path, resolution=(32, 24))
+    arrays = ArrayDataset(path)
+    assert len(arrays) == 10 + 11 + 12
+    assert [episode["offset"] for episode in arrays.episodes] == [0, 10, 21]
+
+    episode = arrays.episode(1)
+    assert episode[camera_key].shape == (11, 24, 32, 3)
+    assert episode[camera_key].dtype == np.uint8
+    assert isinstance(episode[camera_key], np.memmap)
+    assert episode["observation.state"].dtype == np.float32
+    np.testing.assert_array_equal(episode["observation.state"][:, 0], np.arange(11))
+
+    # Global frame index -> episode 2, row 3
+    sample = arrays[24]
+    assert sample["observation.state"][0] == 3
+    assert sample[camera_key].shape == (24, 32, 3)
+    with pytest.raises(IndexError):
+        arrays[len(arrays)]
+
+
+@pytest.mark.asyncio
+async def test_export_is_incremental(dataset, tmp_path, record_episode, camera_key):
+    for i in range(2):
+        await record_episode(dataset, nb_steps=10, task="pick")
+    output_path = str(tmp_path / "export")
+    dataset.export_arrays(output_path=output_path, resolution=(32, 24))
+    first_file = os.path.join(output_path, "episode_000000", f"{camera_key}.npy")
+    mtime = os.stat(first_file).st_mtime_ns
+
+    # A new episode and a deleted one: only the new episode is exported
+    await record_episode(dataset, nb_steps=5, task="place")
+    dataset.delete_episodes([1])
+    dataset.export_arrays(output_path=output_path, resolution=(32, 24))
+    assert os.stat(first_file).st_mtime_ns == mtime
+    assert sorted(os.listdir(output_path)) == [
+        "episode_000000",
+        "episode_000002",
+        INDEX_FILE_NAME,
+    ]
+    assert len(ArrayDataset(output_path)) == 15
+
+    # An interrupted export is not read
+    with open(os.path.join(output_path, INDEX_FILE_NAME)) as f:
+        index = json.load(f)
+    index["complete"] = False
+    with open(os.path.join(output_path, INDEX_FILE_NAME), "w") as f:
+        json.dump(index, f)
+    with pytest.raises(ValueError, match="incomplete"):
+        ArrayDataset(output_path)
+
+
+@pytest.mark.asyncio
+async def test_export_follows_the_layout_of_the_dataset(
+    dataset, tmp_path, record_episode, camera_key
+):
+    for i in range(2):
+        await record_episode(dataset, nb_steps=10 + i, task="pick")
+    # One episode per chunk: episode 1 moves to chunk-001
+    root = str(dataset.folder_full_path)
+    for chunk_folder, file_name in [
+        (os.path.join(root, "data", "{}"), "episode_000001.parquet"),
+        (os.path.join(root, "videos", "{}", camera_key), "episode_000001.mp4"),
+    ]:
+        os.makedirs(chunk_folder.format("chunk-001"))
+        os.replace(
+            os.path.join(chunk_folder.format("chunk-000"), file_name),
+            os.path.join(chunk_folder.format("chunk-001"), file_name),
+        )
+
+    output_path = str(tmp_path / "export")
+    export_array_dataset(
+        dataset_path=root,
+        output_path=output_path,
+        episode_indexes=[0, 1],
+        camera_keys=[camera_key],
+        resolution=(32, 24),
+        chunks_size=1,
+    )
+    arrays = ArrayDataset(output_path)
+    assert [episode["num_frames"] for episode in arrays.episodes] == [10, 11]
+
+    # The dataset lists the episodes of every chunk
+    meta_writer.flush()
+    info_path = os.path.join(root, "meta", "info.json")
+    with open(info_path) as f:
+        info = json.load(f)
+    info["chunks_size"] = 1
+    with open(info_path, "w") as f:
+        json.dump(info, f)
+    path = dataset.export_arrays(
+        output_path=str(tmp_path / "dataset_export"), resolution=(32, 24)
+    )
+    arrays = ArrayDataset(path)
+    assert [episode["num_frames"] for episode in arrays.episodes] == [10, 11]
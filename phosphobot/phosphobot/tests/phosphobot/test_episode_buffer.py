@@ -0,0 +1,168 @@
+"""
+Tests for the array-backed episode buffer used while recording.
+
+```
+uv run pytest tests/phosphobot/test_episode_buffer.py -s
+```
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.dataset import Observation, Step
+from phosphobot.models.episode_buffer import EpisodeBuffer, GrowableColumn
+
+
+def make_step(i: int, n_joints: int = 6) -> Step:
+    return Step(
+        observation=Observation(
+            main_image=np.zeros((4, 4, 3), dtype=np.uint8),
+            joints_position=np.full(n_joints, i, dtype=np.float32),
+            timestamp=i / 30,
+            language_instruction="pick up the cube",
+        ),
+        metadata={"created_at": float(i)},
+    )
+
+
+def test_growable_column_keeps_rows_when_growing():
+    column = GrowableColumn(np.float32, capacity=2)
+    # Missing values before the first value are stored as NaN
+    column.append(None)
+    for i in range(5):
+        column.append(np.array([i, i], dtype=np.float32))
+
+    values = column.values()
+    assert values.shape == (6, 2)
+    assert np.isnan(values[0]).all()
+    np.testing.assert_array_equal(values[1:, 0], np.arange(5))
+
+
+def test_buffer_actions_and_repair():
+    buffer = EpisodeBuffer(capacity=2)
+    for i in range(4):
+        if i > 0:
+            # The action of the previous step is the current joint positions
+            buffer.set_previous_action(make_step(i).observation.joints_position)
+        buffer.append_step(make_step(i), task_index=0)
+
+    nan_step = make_step(4)
+    nan_step.observation.joints_position[:] = np.nan
+    buffer.append_step(nan_step, task_index=0)
+
+    assert len(buffer) == 5
+    # NaN joint positions are copied from the previous step
+    np.testing.assert_array_equal(buffer.joints_position.values()[-1], np.full(6, 3))
+    buffer.repair_missing_values(episode_index=0)
+    # The last action defaults to the last joint positions
+    np.testing.assert_array_equal(buffer.action.values()[:, 0], [1, 2, 3, 3, 3])
+    assert len(buffer.main_camera_frames()) == 5
+
+
+def test_buffer_repair_raises_when_everything_is_missing():
+    buffer = EpisodeBuffer()
+    step = make_step(0)
+    step.observation.joints_position[:] = np.nan
+    buffer.append_step(step, task_index=0)
+    with pytest.raises(ValueError):
+        buffer.repair_missing_values(episode_index=0)
+
+
+def test_rows_of_unequal_width():
+    column = GrowableColumn(capacity=2)
+    column.append(np.zeros(6))
+    # A failed read is stored as missing, for the repair at save time
+    column.append(np.zeros(5))
+    column.append(np.array([]))
+    assert len(column) == 3
+    assert np.isnan(column.values()[1:]).all()
+
+    # A 5-joint action can't replace a missing 6-joint observation
+    buffer = EpisodeBuffer()
+    step = make_step(0)
+    step.action = np.zeros(5)
+    step.observation.joints_position[0] = np.nan
+    buffer.append_step(step, task_index=0)
+    with pytest.raises(ValueError):
+        buffer.repair_missing_values(episode_index=0)
+
+
+def test_empty_or_short_rows_are_repaired():
+    buffer = EpisodeBuffer()
+    for i in range(3):
+        step = make_step(i)
+        step.action = np.full(6, i + 1, dtype=np.float32)
+        if i == 1:
+            # Transient read failures
+            step.action = np.array([], dtype=np.float32)
+            step.observation.joints_position = np.zeros(4, dtype=np.float32)
+        buffer.append_step(step, task_index=0)
+
+    assert len(buffer) == 3
+    # Short joint positions are copied from the previous step
+    np.testing.assert_array_equal(buffer.joints_position.values()[:, 0], [0, 0, 2])
+    assert np.isnan(buffer.action.values()[1]).all()
+    buffer.repair_missing_values(episode_index=0)
+    np.testing.assert_array_equal(buffer.action.values()[:, 0], [1, 0, 3])
+
+
+def test_write_parquet(tmp_path):
+    n_steps = 10_000
+    buffer = EpisodeBuffer()
+    for i in range(n_steps):
+        step = make_step(i)
+        step.action = step.observation.joints_position + 1
+        buffer.append_step(step, task_index=2)
+
+    path = str(tmp_path / "episode_000003.parquet")
+    start = time.perf_counter()
+    buffer.write_parquet(
+        path,
+        episode_index=3,
+        global_frame_offset=100,
+        freq=30,
+        add_metadata={"robot": ["so-100"]},
+    )
+    print(f"Saved {n_steps} steps in {time.perf_counter() - start:.3f}s")
+
+    df = pd.read_parquet(path)
+    assert len(df) == n_steps
+    assert list(df["frame_index"][:3]) == [0, 1, 2]
+    assert df["index"].iloc[0] == 100
+    assert (df["episode_index"] == 3).all()
+    assert (df["task_index"] == 2).all()
+    assert np.isclose(df["timestamp"].iloc[30], 1.0)
+    np.testing.assert_array_equal(df["observation.state"].iloc[5], np.full(6, 5))
+    np.testing.assert_array_equal(df["action"].iloc[5], np.full(6, 6))
+    assert list(df["robot"].iloc[0]) == ["so-100"]
+    # Same schema as the episodes already in the datasets
+    schema = pq.read_schema(path)
+    assert schema.field("action").type == pa.list_(pa.float64())
+    assert schema.field("observation.state").type == pa.list_(pa.float32())
+
+
+def test_write_parquet_cartesian_columns_are_float32(tmp_path):
+    buffer = EpisodeBuffer()
+    for i in range(3):
+        step = make_step(i)
+        step.observation.state = np.full(6, i, dtype=np.float64)
+        step.action_cartesian = np.full(6, i, dtype=np.float64)
+        buffer.append_step(step, task_index=0)
+    buffer.repair_missing_values(episode_index=0)
+
+    path = str(tmp_path / "episode_000000.parquet")
+    buffer.write_parquet(
+        path, episode_index=0, global_frame_offset=0, freq=30, is_cartesian=True
+    )
+    schema = pq.read_schema(path)
+    assert schema.field("observation.cartesian.state").type == pa.list_(pa.float32())
+    assert schema.field("action.cartesian").type == pa.list_(pa.float32())
@@ -0,0 +1,137 @@
+"""
+Tests for the shared memory ring of camera frames.
+
+```
+uv run pytest tests/phosphobot/test_frame_ring.py
+```
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.frame_ring import FrameRing, LocalFrameReader, unlink_stale_rings
+from phosphobot.models.camera import FrameRingInfo, FrameRingsResponse
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(f"phosphobot_test_{uuid.uuid4().hex[:8]}", (4, 6, 3))
+    yield ring
+    ring.close()
+
+
+def test_write_and_read_latest(ring):
+    reader = FrameRing.attach(ring.name)
+    assert reader.shape == (4, 6, 3)
+    assert reader.read() is None
+
+    for value in range(1, 7):
+        ring.write(np.full((4, 6, 3), value, dtype=np.uint8), timestamp=float(value))
+    latest = reader.read()
+    assert latest is not None
+    frame, timestamp, seq = latest
+    assert seq == 6 and timestamp == 6.0
+    assert (frame == 6).all()
+
+    # A zero-copy view is valid until the writer wraps around the ring
+    view, _, seq = reader.read(copy=False)  # type: ignore
+    for value in range(7, 7 + ring.slots - 1):
+        ring.write(np.full((4, 6, 3), value, dtype=np.uint8))
+    assert reader.is_current(seq) and (view == 6).all()
+    del view
+    ring.write(np.zeros((4, 6, 3), dtype=np.uint8))
+    assert not reader.is_current(seq)
+    reader.close()
+
+    with pytest.raises(FileNotFoundError):
+        FrameRing.attach(f"phosphobot_test_missing_{uuid.uuid4().hex[:8]}")
+
+
+def test_reader_process_does_not_remove_the_ring(ring):
+    ring.write(np.full((4, 6, 3), 42, dtype=np.uint8))
+    code = textwrap.dedent(
+        f"""
+        import sys
+        sys.path.insert(0, {os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))!r})
+        from phosphobot.frame_ring import FrameRing
+        reader = FrameRing.attach({ring.name!r})
+        frame, _, _ = reader.read()
+        print(int(frame.mean()))
+        reader.close()
+        """
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "42"
+    # The block still exists after the reader exited
+    FrameRing.attach(ring.name).close()
+
+
+def test_local_frame_reader_splits_stereo_and_resizes():
+    name = f"phosphobot_test_{uuid.uuid4().hex[:8]}"
+    ring = FrameRing.create(name, (4, 8, 3))
+    frame = np.zeros((4, 8, 3), dtype=np.uint8)
+    frame[:, 4:] = 200
+    ring.write(frame)
+    rings = FrameRingsResponse(
+        rings=[
+            FrameRingInfo(
+                camera_id=1,
+                camera_type="stereo",
+                name=name,
+                height=4,
+                width=8,
+                channels=3,
+            )
+        ],
+        complete=True,
+    )
+    try:
+        reader = LocalFrameReader(rings)
+        frames = reader.read(resize=(2, 2))
+        assert frames is not None
+        assert set(frames) == {"1_left", "1_right"}
+        assert frames["1_left"].shape == (2, 2, 3) and (frames["1_left"] == 0).all()
+        assert (frames["1_right"] == 200).all()
+        # Stale frames are not returned
+        assert reader.read(max_age_s=-1.0, wait_s=0.0) is None
+        reader.close()
+    finally:
+        ring.close()
+
+
+def test_readers_stamp_the_ring(ring):
+    # A new ring counts as read: it is created for a reader
+    assert ring.idle_s < 1.0
+    ring._last_read[0] -= 100.0
+    assert ring.idle_s >= 100.0
+    # Reading from the writer side doesn't count
+    ring.read()
+    assert ring.idle_s >= 100.0
+
+    reader = FrameRing.attach(ring.name)
+    reader.read()
+    assert ring.idle_s < 1.0
+    reader.close()
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="Linux only")
+def test_unlink_stale_rings():
+    prefix = f"phosphobot_test_{uuid.uuid4().hex[:8]}_camera_"
+    stale = FrameRing.create(f"{prefix}0", (4, 6, 3))
+    # The server crashed: the block was not removed
+    stale.owner = False
+    stale.close()
+
+    assert unlink_stale_rings(prefix) == [f"{prefix}0"]
+    with pytest.raises(FileNotFoundError):
+        FrameRing.attach(f"{prefix}0")
@@ -0,0 +1,147 @@
+"""
+Tests for the batched frames of all the cameras, used by the AI control loops.
+
+```
+uv run pytest tests/phosphobot/test_frames_batch.py
+```
+"""
+
+import os
+import sys
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.camera import AllCameras, BaseCamera, VideoCamera
+
+
+class FakeVideoCamera:
+    """Frames are stored in BGR, like the VideoCamera."""
+
+    get_frame_into = VideoCamera.get_frame_into
+
+    def __init__(self, camera_id: int, bgr: Tuple[int, int, int]) -> None:
+        self.camera_id = camera_id
+        self.last_frame = np.empty((48, 64, 3), dtype=np.uint8)
+        self.last_frame[...] = bgr
+
+    def stop(self) -> None:
+        pass
+
+
+class FakeRGBCamera(BaseCamera):
+    camera_type = "dummy"
+
+    def __init__(self, camera_id: int) -> None:
+        super().__init__()
+        self.camera_id = camera_id
+
+    def get_rgb_frame(
+        self, resize: Optional[Tuple[int, int]] = None
+    ) -> Optional[np.ndarray]:
+        width, height = resize or (64, 48)
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = 200
+        return frame
+
+    def stop(self) -> None:
+        pass
+
+
+class RGBOnlyVideoCamera(VideoCamera):
+    """Built like the RealSense virtual cameras: no capture thread, no last_frame."""
+
+    def __init__(self, camera_id: int) -> None:
+        threading.Thread.__init__(self)
+        self.camera_id = camera_id
+
+    def get_rgb_frame(
+        self, resize: Optional[Tuple[int, int]] = None
+    ) -> Optional[np.ndarray]:
+        width, height = resize or (64, 48)
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[..., 1] = 100
+        return frame
+
+    def stop(self) -> None:
+        pass
+
+
+def make_all_cameras(*cameras) -> AllCameras:
+    # Don't detect the cameras plugged in the computer
+    all_cameras = object.__new__(AllCameras)
+    all_cameras.video_cameras = list(cameras)  # type: ignore
+    all_cameras.realsense_cameras = []
+    all_cameras.zmq_cameras = []
+    all_cameras.camera_ids = [camera.camera_id for camera in cameras]
+    return all_cameras
+
+
+def test_frames_batch_channel_order_and_missing_cameras():
+    all_cameras = make_all_cameras(
+        FakeVideoCamera(0, bgr=(10, 20, 30)), FakeRGBCamera(1)
+    )
+
+    batch, available = all_cameras.get_frames_batch(
+        [1, 0, 5], resize=(32, 24), channel_order="rgb"
+    )
+    assert batch.shape == (3, 24, 32, 3) and batch.dtype == np.uint8
+    assert available == [True, True, False]
+    assert tuple(batch[0, 0, 0]) == (200, 0, 0)
+    assert tuple(batch[1, 0, 0]) == (30, 20, 10)
+    assert (batch[2] == 0).all()
+
+    # The buffer of the previous tick is filled in place
+    same_batch, _ = all_cameras.get_frames_batch(
+        [1, 0, 5], resize=(32, 24), channel_order="bgr", out=batch
+    )
+    assert same_batch is batch
+    assert tuple(batch[0, 0, 0]) == (0, 0, 200)
+    assert tuple(batch[1, 0, 0]) == (10, 20, 30)
+
+    # Without resizing, the frame is copied as is
+    batch, _ = all_cameras.get_frames_batch([0], resize=(64, 48), channel_order="bgr")
+    assert tuple(batch[0, 0, 0]) == (10, 20, 30)
+    all_cameras.stop()
+
+
+def test_frames_by_key_are_grouped_by_size():
+    all_cameras = make_all_cameras(
+        FakeVideoCamera(0, bgr=(1, 2, 3)), FakeVideoCamera(1, bgr=(4, 5, 6))
+    )
+    buffers: dict = {}
+    cameras = {
+        "wrist": (0, (32, 24)),
+        "context": (1, (32, 24)),
+        "image_for_bboxes": (1, (16, 16)),
+    }
+
+    frames = all_cameras.get_frames_by_key(
+        cameras, channel_order="bgr", buffers=buffers
+    )
+    assert set(buffers) == {(32, 24), (16, 16)}
+    assert buffers[(32, 24)].shape == (2, 24, 32, 3)
+    assert frames["wrist"].shape == (24, 32, 3)
+    assert frames["image_for_bboxes"].shape == (16, 16, 3)
+    assert np.shares_memory(frames["context"], buffers[(32, 24)])
+    assert tuple(frames["context"][0, 0]) == (4, 5, 6)
+
+    # The buffers are reused by the next tick
+    batch = buffers[(32, 24)]
+    all_cameras.get_frames_by_key(cameras, channel_order="bgr", buffers=buffers)
+    assert buffers[(32, 24)] is batch
+    all_cameras.stop()
+
+
+def test_frames_batch_of_a_video_camera_overriding_get_rgb_frame():
+    all_cameras = make_all_cameras(RGBOnlyVideoCamera(0))
+
+    batch, available = all_cameras.get_frames_batch(
+        [0], resize=(32, 24), channel_order="bgr"
+    )
+    assert available == [True]
+    assert tuple(batch[0, 0, 0]) == (0, 100, 0)
+    all_cameras.stop()
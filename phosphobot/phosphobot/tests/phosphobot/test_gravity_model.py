@@ -0,0 +1,131 @@
+"""
+Tests for the NumPy gravity model and the gravity compensation thread.
+
+```
+uv run pytest tests/phosphobot/test_gravity_model.py
+```
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.control_signal import ControlSignal
+from phosphobot.gravity_compensation import ALPHA, GravityCompensationThread
+from phosphobot.hardware.dynamics import GravityModel
+from phosphobot.hardware.sim import PYBULLET_AVAILABLE
+from phosphobot.utils import get_resources_path
+
+URDF_DIR = get_resources_path() / "urdf"
+URDF_PATHS = [
+    str(URDF_DIR / "so-100" / "urdf" / "so-100.urdf"),
+    str(URDF_DIR / "koch" / "robot.urdf"),
+    str(URDF_DIR / "excavator" / "simple.urdf"),
+]
+
+
+@pytest.mark.skipif(not PYBULLET_AVAILABLE, reason="PyBullet is not installed")
+@pytest.mark.parametrize("urdf_path", URDF_PATHS)
+@pytest.mark.parametrize("orientation", [[0, 0, 0, 1], [0, 0, 1, 1]])
+def test_gravity_torques_match_pybullet(urdf_path, orientation):
+    import pybullet as p
+
+    client = p.connect(p.DIRECT)
+    try:
+        p.setGravity(0, 0, -9.81, physicsClientId=client)
+        robot_id = p.loadURDF(
+            urdf_path,
+            baseOrientation=orientation,
+            useFixedBase=True,
+            flags=p.URDF_MAINTAIN_LINK_ORDER,
+            physicsClientId=client,
+        )
+        model = GravityModel.from_urdf(urdf_path, base_orientation=orientation)
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            q = rng.uniform(-1.2, 1.2, model.num_dofs).tolist()
+            zeros = [0.0] * model.num_dofs
+            expected = p.calculateInverseDynamics(
+                robot_id, q, zeros, zeros, physicsClientId=client
+            )
+            np.testing.assert_allclose(model.gravity_torques(q), expected, atol=1e-9)
+    finally:
+        p.disconnect(client)
+
+
+def test_gravity_torques_follow_the_gravity():
+    model = GravityModel.from_urdf(URDF_PATHS[0], base_orientation=[0, 0, 1, 1])
+    q = np.array([0.1, -0.8, 0.6, 0.3, 0.0, 0.0])
+    np.testing.assert_allclose(
+        GravityModel.from_urdf(
+            URDF_PATHS[0], base_orientation=[0, 0, 1, 1], gravity=(0, 0, 9.81)
+        ).gravity_torques(q),
+        -model.gravity_torques(q),
+    )
+    # No gravity, no torque
+    zero_gravity = GravityModel.from_urdf(URDF_PATHS[0], gravity=(0, 0, 0))
+    np.testing.assert_allclose(zero_gravity.gravity_torques(q), 0.0)
+
+
+class FakeSO100:
+    """The bus calls of a SO-100 used by the gravity compensation."""
+
+    name = "so-100"
+
+    def __init__(self) -> None:
+        self.model = GravityModel.from_urdf(URDF_PATHS[0], [0, 0, 1, 1])
+        self.position = np.array([0.0, -0.5, 0.5, 0.2, 0.0, 0.0])
+        self.pid_gains: list = []
+        self.commands: list = []
+
+    def current_voltage(self) -> np.ndarray:
+        return np.array([12.0] * 6)
+
+    def enable_torque(self) -> None:
+        pass
+
+    def _set_pid_gains_motors(self, servo_id, p_gain, i_gain, d_gain) -> None:
+        self.pid_gains.append((servo_id, p_gain, d_gain))
+
+    def read_joints_position(self, unit: str = "rad") -> np.ndarray:
+        return self.position.copy()
+
+    def gravity_torques(self, pos_rad: np.ndarray) -> np.ndarray:
+        return self.model.gravity_torques(pos_rad)
+
+    def write_joint_positions(self, angles: list, unit: str) -> None:
+        self.commands.append(angles)
+
+
+def test_gravity_compensation_thread():
+    robot = FakeSO100()
+    signal = ControlSignal()
+    signal.start()
+    thread = GravityCompensationThread(
+        robot, signal, frequency=200  # type: ignore[arg-type]
+    )
+    thread.start()
+    # The PID gains take 0.3s to set
+    time.sleep(0.8)
+    signal.stop()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+
+    # 12V gains during the loop, 12V defaults restored after
+    p_gains, d_gains = [1, 3, 3, 1, 1, 1], [4] * 6
+    assert robot.pid_gains[:6] == list(zip(range(1, 7), p_gains, d_gains))
+    p_gains, d_gains = [6, 6, 6, 10, 10, 10], [30, 15, 15, 30, 30, 30]
+    assert robot.pid_gains[-6:] == list(zip(range(1, 7), p_gains, d_gains))
+
+    expected = robot.position + ALPHA * robot.model.gravity_torques(robot.position)
+    np.testing.assert_allclose(robot.commands[-1], expected)
+
+    # Scheduled on deadlines: the mean period is the loop period
+    summary = thread.timing_summary()
+    assert summary["period_ms"]["count"] > 50
+    assert summary["period_ms"]["mean"] == pytest.approx(5.0, rel=0.2)
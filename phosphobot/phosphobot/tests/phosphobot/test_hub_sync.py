@@ -0,0 +1,242 @@
+"""
+Tests for the incremental upload of datasets to the Hub, against a local fake hub.
+
+```
+uv run pytest tests/phosphobot/test_hub_sync.py
+```
+"""
+
+import hashlib
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from huggingface_hub import CommitOperationAdd, CommitOperationDelete
+
+from phosphobot.hub_sync import HubSync, RateLimiter, file_hashes, get_hub_sync
+
+REPO_ID = "user/dataset"
+
+
+class FakeHub:
+    """
+    In-memory dataset repository with the methods of HfApi used by HubSync.
+    The parquet and mp4 files are stored as LFS files, the others as git blobs.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[str, bytes] = {}
+        self.head = "commit-0"
+        self.branches: Dict[str, str] = {}
+        self.nb_commits = 0
+        self.uploaded_bytes = 0
+        # Fail the commit with this number, to simulate an interruption
+        self.fail_at_commit: Optional[int] = None
+
+    def repo_info(self, repo_id, repo_type):
+        return SimpleNamespace(sha=self.head)
+
+    def list_repo_tree(self, repo_id, recursive, repo_type):
+        for path, content in self.files.items():
+            git_sha1 = hashlib.sha1(
+                f"blob {len(content)}\0".encode() + content
+            ).hexdigest()
+            lfs = (
+                SimpleNamespace(sha256=hashlib.sha256(content).hexdigest())
+                if path.endswith((".parquet", ".mp4"))
+                else None
+            )
+            yield SimpleNamespace(path=path, blob_id=git_sha1, lfs=lfs)
+
+    def preupload_lfs_files(self, repo_id, additions, repo_type):
+        for addition in additions:
+            with open(addition.path_or_fileobj, "rb") as f:
+                self.uploaded_bytes += len(f.read())
+
+    def create_commit(
+        self, repo_id, repo_type, operations, commit_message, parent_commit
+    ):
+        assert parent_commit == self.head, "The manifest is out of date"
+        if self.fail_at_commit == self.nb_commits:
+            self.fail_at_commit = None
+            raise ConnectionError("Connection lost")
+        for operation in operations:
+            if isinstance(operation, CommitOperationAdd):
+                with open(operation.path_or_fileobj, "rb") as f:
+                    self.files[operation.path_in_repo] = f.read()
+            else:
+                assert isinstance(operation, CommitOperationDelete)
+                del self.files[operation.path_in_repo]
+        self.nb_commits += 1
+        self.head = f"commit-{self.nb_commits}"
+        return SimpleNamespace(oid=self.head)
+
+    def delete_branch(self, repo_id, repo_type, branch):
+        del self.branches[branch]
+
+    def create_branch(self, repo_id, repo_type, revision, branch):
+        self.branches[branch] = self.head
+
+
+def write_file(folder, path: str, content: bytes) -> None:
+    full_path = os.path.join(folder, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as f:
+        f.write(content)
+
+
+def write_episode(folder, episode_index: int) -> None:
+    name = f"episode_{episode_index:06d}"
+    write_file(folder, f"data/chunk-000/{name}.parquet", os.urandom(1000))
+    write_file(
+        folder, f"videos/chunk-000/observation.images.main/{name}.mp4", os.urandom(5000)
+    )
+    info = f'{{"total_episodes": {episode_index + 1}}}'
+    write_file(folder, "meta/info.json", info.encode())
+
+
+def local_files(folder) -> Dict[str, bytes]:
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, folder)] = f.read()
+    return files
+
+
+@pytest.fixture
+def dataset_folder(tmp_path):
+    folder = tmp_path / "dataset"
+    for episode_index in range(5):
+        write_episode(folder, episode_index)
+    return folder
+
+
+def make_hub_sync(folder, hub, tmp_path, **kwargs) -> HubSync:
+    return HubSync(
+        folder_path=str(folder),
+        repo_id=REPO_ID,
+        api=hub,  # type: ignore[arg-type]
+        manifest_path=str(tmp_path / "manifest.json"),
+        **kwargs,
+    )
+
+
+def test_file_hashes(tmp_path):
+    write_file(tmp_path, "file.bin", b"hello")
+    sha256, git_sha1 = file_hashes(str(tmp_path / "file.bin"))
+    assert sha256 == hashlib.sha256(b"hello").hexdigest()
+    # git hash-object
+    assert git_sha1 == "b6fc4c620b67d95f953a5c1c1230aaab5db5a1b0"
+
+
+def test_only_new_files_are_uploaded(dataset_folder, tmp_path):
+    hub = FakeHub()
+    hub_sync = make_hub_sync(dataset_folder, hub, tmp_path, batch_max_files=3)
+
+    result = hub_sync.sync(branches=["v2.1"])
+    assert hub.files == local_files(dataset_folder)
+    # 10 episode files in batches of 3, then the meta files
+    assert result.nb_commits == 5
+    # The meta files are committed last
+    assert result.uploaded[-1] == "meta/info.json"
+    assert hub.branches == {"v2.1": hub.head}
+
+    # Nothing changed: no commit
+    assert hub_sync.sync(branches=["v2.1"]).nb_commits == 0
+
+    # A new episode: only its files and the meta files are uploaded
+    write_episode(dataset_folder, 5)
+    uploaded_bytes = hub.uploaded_bytes
+    result = hub_sync.sync(branches=["v2.1"])
+    assert sorted(result.uploaded) == [
+        "data/chunk-000/episode_000005.parquet",
+        "meta/info.json",
+        "videos/chunk-000/observation.images.main/episode_000005.mp4",
+    ]
+    assert hub.uploaded_bytes - uploaded_bytes == 6000
+    assert hub.files == local_files(dataset_folder)
+    assert hub.branches == {"v2.1": hub.head}
+
+
+def test_deleted_files_are_deleted_on_the_hub(dataset_folder, tmp_path):
+    hub = FakeHub()
+    hub.files[".gitattributes"] = b"*.mp4 filter=lfs"
+    hub_sync = make_hub_sync(dataset_folder, hub, tmp_path)
+    hub_sync.sync()
+
+    os.remove(dataset_folder / "data" / "chunk-000" / "episode_000004.parquet")
+    result = hub_sync.sync()
+    assert result.deleted == ["data/chunk-000/episode_000004.parquet"]
+    # The files that were not uploaded by the sync are kept
+    assert hub.files.pop(".gitattributes")
+    assert hub.files == local_files(dataset_folder)
+
+
+def test_interrupted_sync_resumes(dataset_folder, tmp_path):
+    hub = FakeHub()
+    hub.fail_at_commit = 2
+    hub_sync = make_hub_sync(dataset_folder, hub, tmp_path, batch_max_files=2)
+    with pytest.raises(ConnectionError):
+        hub_sync.sync()
+    assert len(hub.files) == 4
+
+    # A new process: the manifest saved after each commit is loaded
+    hub_sync = make_hub_sync(dataset_folder, hub, tmp_path, batch_max_files=2)
+    result = hub_sync.sync()
+    assert len(result.uploaded) == 7
+    assert hub.files == local_files(dataset_folder)
+
+
+def test_changes_on_the_hub_are_read_again(dataset_folder, tmp_path):
+    hub = FakeHub()
+    make_hub_sync(dataset_folder, hub, tmp_path).sync()
+
+    # Another client pushes: the state of the Hub is read from its file tree
+    hub.files["meta/info.json"] = b"{}"
+    hub.files["data/chunk-000/episode_000009.parquet"] = b"other"
+    hub.head = "other-client"
+    result = make_hub_sync(dataset_folder, hub, tmp_path).sync()
+    assert result.uploaded == ["meta/info.json"]
+    assert result.deleted == ["data/chunk-000/episode_000009.parquet"]
+
+    # Without a manifest, the files already on the Hub are not uploaded again
+    os.remove(tmp_path / "manifest.json")
+    assert make_hub_sync(dataset_folder, hub, tmp_path).sync().nb_commits == 0
+
+
+def test_background_sync(dataset_folder, tmp_path):
+    hub = FakeHub()
+    hub_sync = make_hub_sync(dataset_folder, hub, tmp_path)
+    hub_sync.request_sync(branches=["v2.1"])
+    hub_sync.request_sync(branches=["main-copy"])
+    assert hub_sync.wait(timeout=10)
+    assert hub.files == local_files(dataset_folder)
+    assert set(hub.branches) == {"v2.1", "main-copy"}
+
+
+def test_folders_pushed_to_the_same_repo_have_their_own_manifest(tmp_path):
+    hub = FakeHub()
+    syncs = [
+        get_hub_sync(tmp_path / name, REPO_ID, api=hub)  # type: ignore[arg-type]
+        for name in ["first", "second"]
+    ]
+    assert syncs[0].manifest.path != syncs[1].manifest.path
+    # The same folder, as a str or a Path, has a single HubSync
+    assert get_hub_sync(str(tmp_path / "first"), REPO_ID) is syncs[0]
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(bytes_per_second=1000)
+    start = time.perf_counter()
+    # The first second is a burst, then 1000 bytes per second
+    for _ in range(3):
+        limiter.acquire(500)
+    assert time.perf_counter() - start == pytest.approx(0.5, abs=0.1)
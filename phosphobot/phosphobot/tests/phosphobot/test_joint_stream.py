@@ -0,0 +1,110 @@
+"""
+Tests for the binary joint state websocket.
+
+```
+uv run pytest tests/phosphobot/test_joint_stream.py
+```
+"""
+
+import os
+import sys
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.endpoints.control import router
+from phosphobot.joint_stream import (
+    JointStateStream,
+    RobotState,
+    decode_joint_state_frame,
+    encode_joint_state_frame,
+    get_joint_state_stream,
+)
+
+
+class FakeRobot:
+    closing_gripper_value = 0.5
+
+    def __init__(self, offset: float) -> None:
+        self.offset = offset
+        self.nb_reads = 0
+
+    def read_joints_position(self, unit: str = "rad", source: str = "robot"):
+        self.nb_reads += 1
+        return np.arange(6, dtype=np.float32) + self.offset
+
+
+class FakeRCM:
+    def __init__(self) -> None:
+        self._robots = [FakeRobot(0.0), FakeRobot(10.0)]
+
+    @property
+    async def robots(self):
+        return self._robots
+
+    async def get_robot(self, robot_id: int = 0):
+        return self._robots[robot_id]
+
+
+def test_encode_decode_frame():
+    states = [
+        RobotState(
+            robot_id=3,
+            joints=np.array([0.1, 0.2], dtype=np.float32),
+            end_effector=np.array([1, 2, 3, 4, 5, 6, np.nan], dtype=np.float32),
+        )
+    ]
+    frame = encode_joint_state_frame(12.5, states)
+    assert len(frame) == 16 + 4 + 4 * 9
+
+    timestamp, decoded = decode_joint_state_frame(frame)
+    assert timestamp == 12.5
+    assert decoded[0].robot_id == 3
+    np.testing.assert_allclose(decoded[0].joints, [0.1, 0.2])
+    np.testing.assert_allclose(decoded[0].end_effector[:6], [1, 2, 3, 4, 5, 6])
+    assert np.isnan(decoded[0].end_effector[6])
+
+
+def test_subscribers_share_the_robot_reads():
+    rcm = FakeRCM()
+    app = FastAPI()
+    app.include_router(router)
+    streams = []
+
+    def get_stream() -> JointStateStream:
+        # Created in the event loop of the test client
+        if not streams:
+            streams.append(JointStateStream(rcm=rcm))  # type: ignore
+        return streams[0]
+
+    app.dependency_overrides[get_joint_state_stream] = get_stream
+
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            "/joints/stream/ws?robot_ids=1&rate=50"
+        ) as first, client.websocket_connect("/joints/stream/ws?rate=50") as second:
+            for _ in range(5):
+                _, first_states = decode_joint_state_frame(first.receive_bytes())
+                _, second_states = decode_joint_state_frame(second.receive_bytes())
+
+            assert [state.robot_id for state in first_states] == [1]
+            np.testing.assert_allclose(
+                first_states[0].joints, np.arange(6) + 10.0, rtol=1e-6
+            )
+            assert first_states[0].end_effector[6] == 0.5
+            assert [state.robot_id for state in second_states] == [0, 1]
+
+            # Change the subscription of the first client
+            first.send_text('{"robot_ids": [0], "rate": 50}')
+            for _ in range(5):
+                _, first_states = decode_joint_state_frame(first.receive_bytes())
+            assert [state.robot_id for state in first_states] == [0]
+
+    stream = streams[0]
+    assert stream.subscriptions == []
+    # Both clients are served by the same reads of the robots
+    assert rcm._robots[1].nb_reads == stream.nb_reads
+    assert stream.nb_reads < 20
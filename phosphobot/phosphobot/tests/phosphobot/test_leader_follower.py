@@ -0,0 +1,115 @@
+"""
+Tests for the per-bus threads and the deadline scheduling of the leader-follower
+control.
+
+```
+uv run pytest tests/phosphobot/test_leader_follower.py
+```
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.control_signal import ControlSignal
+from phosphobot.leader_follower import (
+    LeaderFollowerThread,
+    RobotPair,
+    group_pairs_by_bus,
+)
+
+
+class FakeArm:
+    """An arm on its own bus. Every transaction takes `latency` seconds."""
+
+    name = "fake-arm"
+    GRIPPER_JOINT_INDEX = 5
+    SERVO_IDS = [1, 2, 3, 4, 5, 6]
+
+    def __init__(self, device_name: str, latency: float = 0.001) -> None:
+        self.device_name = device_name
+        self.latency = latency
+        self.initial_position = np.zeros(3)
+        self.initial_orientation_rad = np.zeros(3)
+        self.position = np.linspace(0, 0.5, 6)
+        self.nb_writes = 0
+        self.gripper_commands: list = []
+
+    def enable_torque(self) -> None:
+        pass
+
+    def disable_torque(self) -> None:
+        pass
+
+    def read_joints_position(self, unit: str = "rad", source: str = "robot"):
+        time.sleep(self.latency)
+        return self.position.copy()
+
+    def _rad_to_open_command(self, radians: float) -> float:
+        return float(np.clip(radians, 0, 1))
+
+    def control_gripper(self, open_command: float) -> None:
+        time.sleep(self.latency)
+        self.gripper_commands.append(open_command)
+
+    def set_motors_positions(self, q_target_rad, enable_gripper: bool = False):
+        time.sleep(self.latency)
+        self.nb_writes += 1
+        self.position = np.array(q_target_rad)
+
+
+def test_pairs_are_grouped_by_bus():
+    arms = {name: FakeArm(f"/dev/{name}") for name in "abcdef"}
+    pairs = [
+        RobotPair(arms["a"], arms["b"]),
+        RobotPair(arms["c"], arms["d"]),
+        # Shares the leader of the first pair
+        RobotPair(arms["a"], arms["e"]),
+        RobotPair(FakeArm("/dev/d"), arms["f"]),
+    ]
+    groups = group_pairs_by_bus(pairs)
+    assert [[pairs.index(pair) for pair in group] for group in groups] == [
+        [0, 2],
+        [1, 3],
+    ]
+    # Arms without a port are on their own bus
+    pairs = [RobotPair(FakeArm(""), FakeArm("")) for _ in range(3)]
+    assert len(group_pairs_by_bus(pairs)) == 3
+
+
+def test_each_pair_runs_at_the_loop_rate():
+    signal = ControlSignal()
+    signal.start()
+    threads = []
+    for i in range(4):
+        pair = RobotPair(FakeArm(f"/dev/leader{i}"), FakeArm(f"/dev/follower{i}"))
+        threads.append(
+            LeaderFollowerThread(
+                robot_pairs=[pair],
+                control_signal=signal,
+                invert_controls=False,
+                enable_gravity_compensation=False,
+                compensation_values=None,
+            )
+        )
+    for thread in threads:
+        thread.start()
+    time.sleep(1.0)
+    signal.stop()
+    for thread in threads:
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+
+    for thread in threads:
+        ((name, summary),) = thread.timing_summary().items()
+        assert name.startswith("fake-arm:/dev/leader")
+        # Scheduled on deadlines at 150 Hz, even with 3 transactions of 1ms
+        assert 130 < summary["rate_hz"] < 155
+        assert summary["latency_ms"]["p50"] >= 3
+        follower = thread.robot_pairs[0].follower
+        np.testing.assert_allclose(follower.position, np.linspace(0, 0.5, 6))
+        assert follower.gripper_commands[-1] == 0.5
@@ -0,0 +1,54 @@
+"""
+Tests for the atomic and debounced writes of the dataset meta files.
+
+```
+uv run pytest tests/phosphobot/test_meta_writer.py
+```
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.meta_writer import DebouncedMetaWriter, atomic_write_text
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = str(tmp_path / "info.json")
+    atomic_write_text(path, "old")
+    atomic_write_text(path, "new")
+
+    assert open(path).read() == "new"
+    # No temporary file is left behind
+    assert os.listdir(tmp_path) == ["info.json"]
+
+
+def test_debounced_writes_are_coalesced(tmp_path):
+    writer = DebouncedMetaWriter(delay_s=0.1, max_delay_s=1.0)
+    path = str(tmp_path / "info.json")
+    for i in range(10):
+        writer.schedule(path, f"content {i}")
+
+    # Nothing is written before the delay
+    assert not os.path.exists(path)
+    time.sleep(0.5)
+    assert open(path).read() == "content 9"
+    assert writer.pending() == {}
+
+
+def test_flush_and_write_now(tmp_path):
+    writer = DebouncedMetaWriter(delay_s=60)
+    info_path = str(tmp_path / "info.json")
+    stats_path = str(tmp_path / "stats.json")
+
+    writer.schedule(info_path, "scheduled")
+    writer.schedule(stats_path, "scheduled")
+    # A full rewrite replaces the pending write of the same file
+    writer.write_now(info_path, "rewritten")
+    assert list(writer.pending()) == [stats_path]
+
+    writer.flush()
+    assert open(info_path).read() == "rewritten"
+    assert open(stats_path).read() == "scheduled"
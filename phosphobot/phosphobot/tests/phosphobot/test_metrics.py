@@ -0,0 +1,128 @@
+"""
+Tests for the loop latency metrics.
+
+```
+uv run pytest tests/phosphobot/test_metrics.py
+```
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.metrics import (
+    MetricsRegistry,
+    RecordingMetrics,
+    RollingWindow,
+    registry,
+    time_motor_bus_transaction,
+)
+
+
+def test_rolling_window_keeps_last_samples():
+    window = RollingWindow(size=10)
+    for value in range(25):
+        window.add(float(value))
+
+    assert window.count == 25
+    assert window.max == 24
+    # Only the last 10 samples are in the window
+    assert sorted(window.values().tolist()) == list(range(15, 25))
+    p50, p99 = window.percentiles([50, 99])
+    assert np.isclose(p50, 19.5)
+    assert p99 <= 24
+
+
+def test_rolling_window_histogram():
+    window = RollingWindow(size=100)
+    for value in [0.5, 1.5, 1.5, 7, 1000]:
+        window.add(value)
+
+    # Buckets: <=1, <=2, <=10, >10
+    assert window.histogram([1, 2, 10]) == [1, 2, 1, 1]
+    # Scaled from seconds to milliseconds
+    assert window.histogram([1000, 2000], scale=1000) == [1, 2, 2]
+
+
+def test_recording_metrics_deadlines_and_dropped_frames():
+    metrics = RecordingMetrics(freq=10)
+    start = 0.0
+    for i in range(10):
+        metrics.start_iteration(start + i * 0.1)
+        metrics.record("cameras", 0.01)
+        # Every other iteration is slower than the 100ms deadline
+        metrics.end_iteration(0.15 if i % 2 else 0.05)
+    metrics.add_dropped_frame(camera_id=1)
+    metrics.add_dropped_frame(camera_id=1)
+
+    summary = metrics.summary()
+    assert summary["steps"] == 10
+    assert summary["missed_deadlines"] == 5
+    assert summary["missed_deadlines_ratio"] == 0.5
+    assert summary["dropped_frames"] == {"1": 2}
+    assert summary["stages_ms"]["cameras"]["count"] == 10
+    assert np.isclose(summary["stages_ms"]["cameras"]["p50"], 10)
+    # The loop period was exactly 1/freq: no jitter
+    assert summary["stages_ms"]["period"]["count"] == 9
+    assert np.isclose(summary["stages_ms"]["jitter"]["max"], 0, atol=1e-6)
+
+
+def test_counter_is_summed_across_threads():
+    counter = MetricsRegistry().counter("test_total", "Test counter", ["status"])
+    child = counter.labels(status="ok")
+
+    def _work() -> None:
+        for _ in range(1000):
+            child.inc()
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert child.get() == 8000
+    assert counter.labels(status="ok") is child
+
+
+def test_histogram_and_prometheus_rendering():
+    test_registry = MetricsRegistry()
+    histogram = test_registry.histogram(
+        "test_seconds", "Test histogram", ["bus"], buckets=[0.01, 0.1]
+    )
+    gauge = test_registry.gauge("test_fps", "Test gauge", ["camera_id"])
+    for value in [0.005, 0.01, 0.05, 1.0]:
+        histogram.labels(bus="feetech").observe(value)
+    gauge.labels(camera_id=0).set(29.5)
+
+    text = test_registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{bus="feetech",le="0.01"} 2' in text
+    assert 'test_seconds_bucket{bus="feetech",le="0.1"} 3' in text
+    assert 'test_seconds_bucket{bus="feetech",le="+Inf"} 4' in text
+    assert 'test_seconds_count{bus="feetech"} 4' in text
+    assert 'test_fps{camera_id="0"} 29.5' in text
+
+    with pytest.raises(ValueError):
+        histogram.labels(port="/dev/ttyACM0")
+
+
+def test_motor_bus_transaction_errors_are_counted():
+    with pytest.raises(ConnectionError):
+        with time_motor_bus_transaction("feetech", "/dev/test", "read"):
+            raise ConnectionError("No status packet")
+
+    text = registry.render()
+    assert (
+        'phosphobot_motor_bus_errors_total{bus="feetech",port="/dev/test",operation="read"} 1'
+        in text
+    )
+    assert (
+        'phosphobot_motor_bus_transaction_seconds_count{bus="feetech",port="/dev/test",operation="read"} 1'
+        in text
+    )
@@ -0,0 +1,161 @@
+"""
+Tests for the precompiled read and write plans of the motor buses, on the mock SDKs.
+
+```
+uv run pytest tests/phosphobot/test_motor_bus_plans.py
+```
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tests.mock_scservo_sdk as mock_sdk
+from phosphobot.hardware.motors.dynamixel import DynamixelMotorsBus
+from phosphobot.hardware.motors.feetech import FeetechMotorsBus, JointOutOfRangeError
+
+MOTORS = {f"motor_{i}": (i, "sts3215") for i in range(1, 5)}
+CALIBRATION = {
+    "motor_names": list(MOTORS),
+    "calib_mode": ["DEGREE", "DEGREE", "DEGREE", "LINEAR"],
+    "drive_mode": [0, 1, 0, 0],
+    "homing_offset": [-2048, 2048, -1000, 0],
+    "start_pos": [0, 0, 0, 1000],
+    "end_pos": [0, 0, 0, 3000],
+}
+
+
+def expected_calibration(steps: list) -> list:
+    """The calibration of each motor, computed one by one."""
+    expected = []
+    for i, value in enumerate(steps):
+        if CALIBRATION["calib_mode"][i] == "DEGREE":
+            if CALIBRATION["drive_mode"][i]:
+                value = -value
+            value = (value + CALIBRATION["homing_offset"][i]) / 2048 * 180
+        else:
+            start_pos, end_pos = CALIBRATION["start_pos"][i], CALIBRATION["end_pos"][i]
+            value = (value - start_pos) / (end_pos - start_pos) * 100
+        expected.append(value)
+    return expected
+
+
+@pytest.fixture
+def feetech_bus():
+    mock_sdk.reset_motor_tables()
+    table = mock_sdk.get_motor_table("/dev/mock")
+    for i, (motor_id, _) in enumerate(MOTORS.values()):
+        table[motor_id] = {56: 2000 + 10 * i}
+
+    bus = FeetechMotorsBus(port="/dev/mock", motors=MOTORS, mock=True)
+    bus.connect()
+    yield bus
+    bus.disconnect()
+
+
+def test_plans_are_compiled_once(feetech_bus):
+    first = feetech_bus.read("Present_Position")
+    second = feetech_bus.read("Present_Position")
+    assert first.tolist() == [2000, 2010, 2020, 2030]
+    # The returned values are not the buffer of the plan
+    assert first is not second
+
+    plan = feetech_bus.group_readers[("Present_Position", *MOTORS)]
+    assert len(feetech_bus.group_readers) == 1
+    assert plan.nb_calls == 2
+    assert plan.group.motor_ids == [1, 2, 3, 4]
+
+    feetech_bus.read("Present_Position", "motor_2")
+    assert len(feetech_bus.group_readers) == 2
+
+    feetech_bus.write("Goal_Position", [1, 2, 3, 4])
+    feetech_bus.write("Goal_Position", 7)
+    plan = feetech_bus.group_writers[("Goal_Position", *MOTORS)]
+    assert plan.nb_calls == 2
+    table = mock_sdk.get_motor_table("/dev/mock")
+    assert [table[motor_id][42] for motor_id in range(1, 5)] == [7, 7, 7, 7]
+
+
+def test_vectorized_calibration_matches_each_motor():
+    bus = FeetechMotorsBus(port="/dev/mock", motors=MOTORS, mock=True)
+    bus.set_calibration(CALIBRATION)
+    steps = [2100, 1900, 1500, 2500]
+
+    values = bus.apply_calibration(np.array(steps, dtype=np.int32), None)
+    assert values.dtype == np.float32
+    np.testing.assert_allclose(values, expected_calibration(steps), rtol=1e-6)
+    assert bus.revert_calibration(values, None).tolist() == steps
+
+    # A subset of the motors, in another order
+    values = bus.apply_calibration(
+        np.array([2500, 2100]), ["motor_4", "motor_1"]
+    ).tolist()
+    assert values == pytest.approx([75.0, 4.5703125])
+
+    with pytest.raises(JointOutOfRangeError, match="motor_3.*degrees"):
+        bus.apply_calibration(np.array([2100, 1900, 5000, 2500]), None)
+    with pytest.raises(JointOutOfRangeError, match="motor_4.*%"):
+        bus.apply_calibration(np.array([2100, 1900, 1500, 6000]), None)
+
+    # A new calibration is compiled again
+    bus.set_calibration({**CALIBRATION, "drive_mode": [1, 1, 0, 0]})
+    assert bus.apply_calibration(np.array([-2100]), ["motor_1"]).tolist() == [4.5703125]
+
+
+def test_rotation_reset_is_unwrapped():
+    bus = FeetechMotorsBus(port="/dev/mock", motors=MOTORS, mock=True)
+    bus.avoid_rotation_reset(np.array([4090, 10]), ["motor_1", "motor_3"], "pos")
+    values = bus.avoid_rotation_reset(
+        np.array([5, 4080]), ["motor_1", "motor_3"], "pos"
+    )
+    assert values.tolist() == [4101, -16]
+
+    # The other motors have no previous position
+    values = bus.avoid_rotation_reset(np.array([4000]), ["motor_2"], "pos")
+    assert values.tolist() == [4000]
+
+
+def test_dynamixel_plans():
+    mock_sdk.reset_motor_tables()
+    motors = {"shoulder": (1, "xl430-w250"), "gripper": (2, "xl330-m077")}
+    table = mock_sdk.get_motor_table("/dev/mock_dxl")
+    table[1] = {132: 1024}
+    table[2] = {132: 3072}
+
+    bus = DynamixelMotorsBus(port="/dev/mock_dxl", motors=motors, mock=True)
+    bus.connect()
+    assert bus.read("Present_Position").tolist() == [1024, 3072]
+    bus.read("Present_Position")
+    assert bus.group_readers[("Present_Position", "shoulder", "gripper")].nb_calls == 2
+
+    bus.write("Goal_Position", np.array([10, 20]))
+    bus.write("Goal_Position", np.array([30, 40]))
+    assert table[1][116] == 30 and table[2][116] == 40
+    bus.disconnect()
+
+
+def test_dynamixel_reads_from_several_threads():
+    mock_sdk.reset_motor_tables()
+    motors = {"shoulder": (1, "xl430-w250"), "gripper": (2, "xl330-m077")}
+    table = mock_sdk.get_motor_table("/dev/mock_dxl")
+    table[1] = {132: 1024}
+    table[2] = {132: 3072}
+
+    bus = DynamixelMotorsBus(port="/dev/mock_dxl", motors=motors, mock=True)
+    bus.connect()
+
+    def read_positions() -> list:
+        return [bus.read("Present_Position").tolist() for _ in range(200)]
+
+    # The threads share the read plan: its group and its output array
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: read_positions(), range(4)))
+    assert all(values == [1024, 3072] for reads in results for values in reads)
+    plan = bus.group_readers[("Present_Position", "shoulder", "gripper")]
+    assert plan.nb_calls == 800
+    bus.disconnect()
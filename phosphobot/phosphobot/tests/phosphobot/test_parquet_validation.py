@@ -0,0 +1,149 @@
+"""
+Tests for the validation and repair of the parquet files of a dataset.
+
+```
+uv run pytest tests/phosphobot/test_parquet_validation.py
+```
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.lerobot_dataset import EpisodesModel
+from phosphobot.parquet_validation import (
+    repair_parquet_folder,
+    validate_parquet_folder,
+)
+
+
+def write_episodes(folder, nb_episodes: int, nb_frames: int = 20) -> None:
+    os.makedirs(folder, exist_ok=True)
+    index = 0
+    for episode_index in range(nb_episodes):
+        values = np.arange(nb_frames * 6, dtype=np.float32).reshape(nb_frames, 6)
+        pd.DataFrame(
+            {
+                "action": list(values),
+                "observation.state": list(values + 1),
+                "timestamp": np.arange(nb_frames) / 30,
+                "episode_index": episode_index,
+                "frame_index": np.arange(nb_frames),
+                "index": np.arange(nb_frames) + index,
+            }
+        ).to_parquet(os.path.join(folder, f"episode_{episode_index:06d}.parquet"))
+        index += nb_frames
+
+
+def edit_episode(folder, episode_index: int, edit) -> None:
+    path = os.path.join(folder, f"episode_{episode_index:06d}.parquet")
+    df = pd.read_parquet(path)
+    edit(df)
+    df.to_parquet(path)
+
+
+def break_dataset(folder) -> None:
+    def nan_action(df):
+        action = np.stack(df["action"])
+        action[3, 2] = np.nan
+        df["action"] = list(action)
+
+    def null_state(df):
+        df.loc[4, "observation.state"] = None
+
+    def wrong_index(df):
+        df["index"] = df["index"] + 1
+
+    edit_episode(folder, 0, nan_action)
+    edit_episode(folder, 1, null_state)
+    edit_episode(folder, 2, wrong_index)
+
+
+def test_clean_dataset(tmp_path):
+    write_episodes(tmp_path, 3)
+    report = validate_parquet_folder(str(tmp_path))
+    assert report.ok
+    assert report.nb_files == 3 and report.nb_rows == 60
+
+
+def test_all_issues_are_reported_and_repaired(tmp_path):
+    write_episodes(tmp_path, 3)
+    break_dataset(tmp_path)
+
+    report = validate_parquet_folder(str(tmp_path))
+    issues = {(i.episode_index, i.kind, i.column): i.rows for i in report.issues}
+    assert issues == {
+        # pandas writes the NaN inside the lists as nulls
+        (0, "null", "action"): [3],
+        (1, "null", "observation.state"): [4],
+        (2, "index", "index"): list(range(20)),
+    }
+    assert len(report.value_issues) == 2
+    assert report.fixable
+
+    assert repair_parquet_folder(str(tmp_path), report=report).ok
+    # The missing values are the previous values of the same joint
+    action = np.stack(pd.read_parquet(tmp_path / "episode_000000.parquet")["action"])
+    assert action[3, 2] == action[2, 2]
+    state = np.stack(
+        pd.read_parquet(tmp_path / "episode_000001.parquet")["observation.state"]
+    )
+    np.testing.assert_array_equal(state[4], state[3])
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_pools_match_serial(tmp_path, processes):
+    write_episodes(tmp_path, 20, nb_frames=5)
+    break_dataset(tmp_path)
+
+    serial = validate_parquet_folder(str(tmp_path), max_workers=1)
+    parallel = validate_parquet_folder(
+        str(tmp_path), max_workers=2, processes=processes
+    )
+    assert parallel.issues == serial.issues and len(serial.issues) == 3
+    assert repair_parquet_folder(str(tmp_path), max_workers=2, processes=processes).ok
+
+
+def test_nan_written_by_pyarrow_is_repaired(tmp_path):
+    write_episodes(tmp_path, 2, nb_frames=5)
+    # pyarrow keeps the NaN of a float list, unlike pandas which writes a null
+    path = tmp_path / "episode_000001.parquet"
+    table = pq.read_table(path)
+    action = table.column("action").to_pylist()
+    action[0][1] = float("nan")
+    action[2][4] = float("nan")
+    table = table.set_column(
+        table.schema.get_field_index("action"),
+        "action",
+        pa.array(action, type=table.schema.field("action").type),
+    )
+    pq.write_table(table, path)
+
+    report = validate_parquet_folder(str(tmp_path))
+    issues = {(i.episode_index, i.kind, i.column): i.rows for i in report.issues}
+    assert issues == {(1, "nan", "action"): [0, 2]}
+
+    assert repair_parquet_folder(str(tmp_path), report=report).ok
+    repaired = np.stack(pd.read_parquet(path)["action"])
+    assert not np.isnan(repaired).any()
+    # At the start of the episode, the next value; later, the previous one
+    assert repaired[0, 1] == repaired[1, 1]
+    assert repaired[2, 4] == repaired[1, 4]
+
+
+def test_gap_in_episodes_is_not_repaired(tmp_path):
+    write_episodes(tmp_path, 3)
+    os.remove(tmp_path / "episode_000001.parquet")
+
+    report = validate_parquet_folder(str(tmp_path))
+    assert not report.fixable
+    with pytest.raises(ValueError, match="file_name"):
+        repair_parquet_folder(str(tmp_path), report=report)
+    assert EpisodesModel.repair_parquets(str(tmp_path)) is False
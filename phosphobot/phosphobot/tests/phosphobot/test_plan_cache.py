@@ -0,0 +1,201 @@
+"""
+Tests for the plan cache and the multi-step plans of the chat agent.
+
+```
+uv run pytest tests/phosphobot/test_plan_cache.py
+```
+"""
+
+import base64
+import os
+import sys
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.chat.agent import RoboticAgent
+from phosphobot.chat.plan_cache import PlanCache, hamming_distance, image_fingerprint
+from phosphobot.models import ChatRequest, ChatResponse
+
+
+def encode_image(image: np.ndarray) -> str:
+    _, buffer = cv2.imencode(".jpg", image)
+    return base64.b64encode(buffer.tobytes()).decode("utf-8")
+
+
+def gradient_image(flip: bool = False, noise: int = 0) -> np.ndarray:
+    image = np.tile(np.linspace(0, 255, 64, dtype=np.uint8), (48, 1))
+    if flip:
+        image = image[:, ::-1]
+    if noise:
+        rng = np.random.default_rng(0)
+        image = np.clip(
+            image.astype(np.int16) + rng.integers(-noise, noise, image.shape), 0, 255
+        ).astype(np.uint8)
+    return np.ascontiguousarray(np.stack([image] * 3, axis=-1))
+
+
+def test_plan_cache_matches_similar_images():
+    fingerprint = image_fingerprint(encode_image(gradient_image()))
+    noisy = image_fingerprint(encode_image(gradient_image(noise=5)))
+    flipped = image_fingerprint(encode_image(gradient_image(flip=True)))
+    assert fingerprint is not None and noisy is not None and flipped is not None
+    assert image_fingerprint("not an image") is None
+    assert hamming_distance(fingerprint, noisy) <= 3
+    assert hamming_distance(fingerprint, flipped) > 3
+
+    cache = PlanCache(maxsize=2)
+    cache.put("pick the cube", fingerprint, ["move_left", "move_down"])
+    # The scene didn't change since the plan was made
+    assert cache.get("pick the cube", noisy) is None
+    assert cache.get("pick the cube", flipped) is None
+    # Back to the scene of the plan
+    assert cache.get("pick the cube", noisy) == ["move_left", "move_down"]
+    assert cache.get("push the cube", fingerprint) is None
+    assert cache.get("pick the cube", None) is None
+
+    cache.get("pick the cube", flipped)
+    # Plans made while other commands were pending or after other commands are for
+    # another state of the robot
+    assert cache.get("pick the cube", fingerprint, ["move_up"]) is None
+    assert cache.get("pick the cube", fingerprint, recent_commands=["move_up"]) is None
+    assert cache.get("pick the cube", fingerprint) == ["move_left", "move_down"]
+
+    cache.put("a", 1, ["move_up"])
+    cache.put("b", 2, ["move_up"])
+    # The least recently used plan is evicted
+    assert len(cache) == 2
+    cache.get("pick the cube", flipped)
+    assert cache.get("pick the cube", fingerprint) is None
+
+
+def test_plan_cache_does_not_replay_a_plan_on_a_frozen_frame():
+    fingerprint = image_fingerprint(encode_image(gradient_image()))
+    cache = PlanCache()
+    cache.put("pick the cube", fingerprint, ["move_left"])
+    # The robot is stuck or the camera is frozen: the model must be asked again
+    for _ in range(10):
+        assert cache.get("pick the cube", fingerprint) is None
+
+
+class FakeClient:
+    def __init__(
+        self,
+        plan: List[str],
+        scenes: Optional[List[np.ndarray]] = None,
+        shared_memory: bool = False,
+    ):
+        self.plan = plan
+        # Images returned by the camera, in turn
+        self.scenes = scenes or [gradient_image()]
+        self.shared_memory = shared_memory
+        self.nb_images = 0
+        self.chat_requests: List[ChatRequest] = []
+        self.moves: List[Dict[str, float]] = []
+
+    def next_scene(self) -> np.ndarray:
+        self.nb_images += 1
+        return self.scenes[(self.nb_images - 1) % len(self.scenes)]
+
+    async def status(self) -> dict:
+        return {"status": "ok"}
+
+    async def start_recording(self, **kwargs) -> None:
+        pass
+
+    async def stop_recording(self) -> None:
+        pass
+
+    async def log_chat(self, chat_request: ChatRequest) -> None:
+        pass
+
+    async def get_camera_frames(self, resize=None) -> Optional[Dict[int, np.ndarray]]:
+        if not self.shared_memory:
+            return None
+        return {0: self.next_scene()}
+
+    async def get_camera_image(self, resize=None) -> Dict[str, str]:
+        return {"0": encode_image(self.next_scene())}
+
+    async def chat(self, chat_request: ChatRequest) -> ChatResponse:
+        self.chat_requests.append(chat_request)
+        return ChatResponse(
+            command=self.plan[0],
+            endpoint="move_relative",
+            endpoint_params={"rz": 10.0},
+            next_commands=self.plan[1 : chat_request.max_steps],
+        )
+
+    async def move_relative(self, **kwargs: float) -> None:
+        self.moves.append(kwargs)
+
+
+@pytest.mark.asyncio
+async def test_agent_executes_plans_and_asks_again_on_a_static_scene():
+    agent = RoboticAgent(plan_steps=3)
+    client = FakeClient(plan=["move_left", "move_down", "close_gripper"])
+    agent.phosphobot_client = client  # type: ignore
+    agent.task_description = "pick the cube"
+
+    events = [event async for event in agent.run()]
+
+    assert len(client.moves) == 50
+    assert client.moves[:3] == [{"rz": 10.0}, {"z": -5.0}, {"open": 0.0}]
+    # The commands don't change the image: the cached plan is never replayed
+    assert agent.nb_ai_calls == client.nb_images == 17
+    assert all(request.max_steps == 3 for request in client.chat_requests)
+    # Speculative requests know about the commands that are not executed yet
+    assert client.chat_requests[1].command_history == [
+        "move_left",
+        "move_down",
+        "close_gripper",
+    ]
+    assert not any("(cached)" in str(payload) for _, payload in events)
+    assert len(agent.action_queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_reuses_cached_plans_when_the_scene_comes_back():
+    agent = RoboticAgent(plan_steps=3)
+    client = FakeClient(
+        plan=["move_left", "move_down", "close_gripper"],
+        scenes=[gradient_image(), gradient_image(flip=True)],
+    )
+    agent.phosphobot_client = client  # type: ignore
+    agent.task_description = "pick the cube"
+
+    events = [event async for event in agent.run()]
+
+    assert len(client.moves) == 50
+    assert agent.nb_ai_calls < client.nb_images
+    assert any("(cached)" in str(payload) for _, payload in events)
+    # Cached plans are in the chat history, like the replies of the model
+    assert len(agent.chat_history) == 2 * client.nb_images
+
+
+@pytest.mark.asyncio
+async def test_agent_encodes_shared_memory_frames_only_for_the_model():
+    agent = RoboticAgent(plan_steps=3)
+    client = FakeClient(
+        plan=["move_left", "move_down", "close_gripper"],
+        scenes=[gradient_image(), gradient_image(flip=True)],
+        shared_memory=True,
+    )
+    agent.phosphobot_client = client  # type: ignore
+    agent.task_description = "pick the cube"
+
+    events = [event async for event in agent.run()]
+
+    assert any("(cached)" in str(payload) for _, payload in events)
+    requests = [
+        request for request in agent.chat_history if isinstance(request, ChatRequest)
+    ]
+    # The requests sent to the model have the JPEG images, the cached ones have none
+    assert all(request.images for request in client.chat_requests)
+    assert sum(request.images is None for request in requests) == (
+        client.nb_images - agent.nb_ai_calls
+    )
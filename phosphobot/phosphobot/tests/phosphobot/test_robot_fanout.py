@@ -0,0 +1,81 @@
+"""
+Tests for the parallel reads and writes of the robots in the AI control loops.
+
+```
+uv run pytest tests/phosphobot/test_robot_fanout.py
+```
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.am.fanout import RobotFanout
+
+
+class SlowRobot:
+    def __init__(self, index: int, latency: float = 0.05, fail: bool = False):
+        self.index = index
+        self.latency = latency
+        self.fail = fail
+        self.written_at = None
+        self.written = None
+
+    def read_joints_position(self, unit: str = "rad", **kwargs):
+        time.sleep(self.latency)
+        return np.full(6, self.index, dtype=np.float32)
+
+    def write_joint_positions(self, angles, unit: str = "rad", **kwargs):
+        self.written_at = time.perf_counter()
+        if self.fail:
+            raise RuntimeError("bus error")
+        time.sleep(self.latency)
+        self.written = angles
+
+
+@pytest.mark.asyncio
+async def test_reads_are_parallel_and_ordered():
+    robots = [SlowRobot(i) for i in range(3)]
+    fanout = RobotFanout(robots, model="test")  # type: ignore
+
+    start = time.perf_counter()
+    states = await fanout.read_joints_position(unit="rad")
+    duration = time.perf_counter() - start
+
+    assert [int(state[0]) for state in states] == [0, 1, 2]
+    # Sequential reads would take 3 * 50ms
+    assert duration < 0.12
+    assert all(latency >= 0.05 for latency in fanout.latencies["read"])
+    fanout.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_start_at_the_same_deadline():
+    robots = [SlowRobot(i) for i in range(3)]
+    fanout = RobotFanout(robots, model="test")  # type: ignore
+
+    deadline = time.perf_counter() + 0.02
+    await fanout.write_joint_positions(
+        [{"angles": [0.0] * 6}, None, {"angles": [2.0] * 6}], deadline=deadline
+    )
+
+    assert robots[0].written == [0.0] * 6 and robots[2].written == [2.0] * 6
+    # The robot without a command is not written
+    assert robots[1].written_at is None
+    assert robots[0].written_at >= deadline and robots[2].written_at >= deadline
+    assert abs(robots[0].written_at - robots[2].written_at) < 0.01
+    # The latency doesn't include the wait for the deadline
+    assert fanout.latencies["write"][0] < 0.07
+
+    # A failing arm doesn't prevent the others from being written
+    robots = [SlowRobot(0, fail=True), SlowRobot(1)]
+    fanout = RobotFanout(robots, model="test")  # type: ignore
+    with pytest.raises(RuntimeError):
+        await fanout.write_joint_positions([{"angles": [0.0]}, {"angles": [1.0]}])
+    assert robots[1].written == [1.0]
+    fanout.close()
@@ -0,0 +1,91 @@
+"""
+Tests for the kinematic mode and the physics clients of the simulation.
+
+```
+uv run pytest tests/phosphobot/test_sim_kinematic.py
+```
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.hardware.sim import PYBULLET_AVAILABLE, PyBulletSimulation
+from phosphobot.utils import get_resources_path
+
+URDF_PATH = str(get_resources_path() / "urdf" / "so-100" / "urdf" / "so-100.urdf")
+
+
+@pytest.mark.skipif(not PYBULLET_AVAILABLE, reason="PyBullet is not installed")
+def test_joint_states_are_set_without_stepping():
+    sim = PyBulletSimulation(kinematic=True)
+    try:
+        # No background stepping thread
+        assert sim._step_thread is None
+
+        robot_id, _, actuated_joints = sim.load_urdf(URDF_PATH, axis=[0, 0, 0])
+        end_effector = actuated_joints[-1]
+        link_before = np.array(sim.get_link_state(robot_id, end_effector)[4])
+
+        targets = [0.3, -0.5, 0.4, 0.2, -0.1, 0.6][: len(actuated_joints)]
+        sim.set_joints_states(robot_id, actuated_joints, targets)
+        sim.step()
+        assert sim._pending_steps == 0
+
+        # The joints are at their target right away
+        np.testing.assert_allclose(
+            sim.get_joints_states(robot_id, actuated_joints), targets, atol=1e-9
+        )
+        # The link states are computed on demand
+        link_after = np.array(sim.get_link_state(robot_id, end_effector)[4])
+        assert np.linalg.norm(link_after - link_before) > 1e-3
+    finally:
+        sim.stop()
+
+
+@pytest.mark.skipif(not PYBULLET_AVAILABLE, reason="PyBullet is not installed")
+def test_physics_clients_are_isolated():
+    sim = PyBulletSimulation(kinematic=True)
+    clients = [sim.create_client() for _ in range(2)]
+    try:
+        assert len({sim.client_id, *(client.client_id for client in clients)}) == 3
+        arms = [client.load_urdf(URDF_PATH, axis=[0, 0, 0]) for client in clients]
+        # Each client numbers its own bodies
+        assert arms[0][0] == arms[1][0]
+
+        robot_id, _, actuated_joints = arms[0]
+        clients[0].set_joints_states(robot_id, actuated_joints, [0.5] * 6)
+        np.testing.assert_allclose(
+            clients[0].get_joints_states(robot_id, actuated_joints), [0.5] * 6
+        )
+        # No cross-talk with the other arm
+        np.testing.assert_allclose(
+            clients[1].get_joints_states(robot_id, actuated_joints), [0.0] * 6
+        )
+
+        clients[0].stop()
+        assert not clients[0].is_connected() and clients[1].is_connected()
+    finally:
+        for client in clients:
+            client.stop()
+        sim.stop()
+
+
+@pytest.mark.skipif(not PYBULLET_AVAILABLE, reason="PyBullet is not installed")
+def test_robot_client_is_stopped_on_disconnect(monkeypatch):
+    from phosphobot.configs import config
+    from phosphobot.hardware import SO100Hardware, get_sim
+    from phosphobot.robot import RobotConnectionManager
+
+    monkeypatch.setattr(config, "SIM_CLIENT_PER_ROBOT", True)
+    robot = SO100Hardware(only_simulation=True)
+    assert robot.sim is not get_sim()
+
+    RobotConnectionManager._disconnect_robot(robot)
+    assert not robot.sim.is_connected()
+    # The shared simulation is still used by the other robots
+    assert get_sim().is_connected()
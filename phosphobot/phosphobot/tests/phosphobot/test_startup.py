@@ -0,0 +1,114 @@
+"""
+Tests for the startup profiler and cold start benchmark.
+
+```
+uv run pytest tests/phosphobot/test_startup.py -s
+```
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.startup import ImportProfiler, StartupProfiler
+
+# Cold start budget in seconds. Override it on slow machines (eg: Raspberry Pi).
+COLD_START_BUDGET_S = float(os.environ.get("PHOSPHOBOT_COLD_START_BUDGET_S", 20))
+
+
+def test_import_profiler_records_nested_imports(tmp_path, monkeypatch):
+    """
+    The profiler records both the self and cumulative time of nested imports.
+    """
+    package = tmp_path / "startup_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.02)\n")
+    (package / "child.py").write_text(
+        "import time\nimport startup_pkg\ntime.sleep(0.05)\n"
+    )
+    (tmp_path / "startup_parent.py").write_text("import startup_pkg.child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        import startup_parent  # noqa: F401
+    finally:
+        profiler.uninstall()
+        for name in ["startup_parent", "startup_pkg", "startup_pkg.child"]:
+            sys.modules.pop(name, None)
+
+    assert profiler not in sys.meta_path
+    timings = profiler.timings
+    assert {"startup_parent", "startup_pkg", "startup_pkg.child"} <= set(timings)
+    assert timings["startup_pkg.child"].self_s >= 0.05
+    # The parent only imports, so almost all its time is spent in its children
+    parent = timings["startup_parent"]
+    assert parent.cumulative_s >= 0.07
+    assert parent.self_s < parent.cumulative_s
+
+
+def test_startup_profiler_measure_and_report():
+    profiler = StartupProfiler()
+    with profiler.measure("simulation"):
+        time.sleep(0.01)
+
+    assert profiler.init_times["simulation"] >= 0.01
+    report = profiler.report()
+    assert "simulation" in report
+
+
+def test_cold_start_benchmark():
+    """
+    Regression benchmark: importing the server modules in a fresh interpreter
+    with the lazy startup must stay below COLD_START_BUDGET_S.
+    """
+    code = (
+        "import time; start = time.perf_counter();"
+        "from phosphobot.configs import config; config.LAZY_STARTUP = True;"
+        "import phosphobot.endpoints, phosphobot.robot, phosphobot.recorder;"
+        "print(time.perf_counter() - start)"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+    )
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        pytest.skip(f"Server modules can't be imported here: {result.stderr[-500:]}")
+
+    import_time = float(result.stdout.strip().splitlines()[-1])
+    print(f"Cold start: import {import_time:.2f}s, total {wall_time:.2f}s")
+    assert (
+        wall_time < COLD_START_BUDGET_S
+    ), f"Cold start took {wall_time:.2f}s, budget is {COLD_START_BUDGET_S:.2f}s"
+
+
+def test_server_modules_do_not_import_pandas():
+    """
+    pandas takes ~0.1s to import: it is only imported by the dataset operations
+    that use it, not when the server starts.
+    """
+    code = (
+        "import sys;"
+        "import phosphobot.endpoints, phosphobot.robot, phosphobot.recorder;"
+        "print('pandas' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+    )
+    if result.returncode != 0:
+        pytest.skip(f"Server modules can't be imported here: {result.stderr[-500:]}")
+
+    assert result.stdout.strip().splitlines()[-1] == "False"
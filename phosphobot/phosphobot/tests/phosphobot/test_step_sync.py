@@ -0,0 +1,138 @@
+"""
+Tests for the time synchronization of the cameras and robots of a recorded step.
+
+```
+uv run pytest tests/phosphobot/test_step_sync.py
+```
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.camera import VideoCamera
+from phosphobot.models.dataset import Observation, Step
+from phosphobot.models.episode_buffer import EpisodeBuffer
+from phosphobot.recorder import Recorder
+from phosphobot.step_sync import StepSync, nearest_sample
+
+
+class FakeCamera:
+    """Free running camera: BGR frames timestamped at acquisition."""
+
+    get_rgb_frame_near = VideoCamera.get_rgb_frame_near
+
+    def __init__(self, camera_id: int, timestamps: list) -> None:
+        self.camera_id = camera_id
+        self.frame_history: deque = deque(maxlen=4)
+        for value, timestamp in enumerate(timestamps):
+            frame = np.zeros((8, 8, 3), dtype=np.uint8)
+            # Blue channel in BGR
+            frame[..., 0] = value
+            self.frame_history.append((timestamp, frame))
+        self.last_frame = frame
+
+
+class RGBOnlyVideoCamera(VideoCamera):
+    """Built like the RealSense virtual cameras: no capture thread, no history."""
+
+    def __init__(self, camera_id: int) -> None:
+        threading.Thread.__init__(self)
+        self.camera_id = camera_id
+
+    def get_rgb_frame(
+        self, resize: Optional[Tuple[int, int]] = None
+    ) -> Optional[np.ndarray]:
+        width, height = resize or (8, 8)
+        return np.full((height, width, 3), 7, dtype=np.uint8)
+
+    def stop(self) -> None:
+        pass
+
+
+class FakeCameras:
+    def __init__(self, main_camera, secondary_cameras) -> None:
+        self.main_camera = main_camera
+        self.secondary_cameras = secondary_cameras
+
+    def get_secondary_cameras(self):
+        return self.secondary_cameras
+
+
+def test_nearest_sample_and_skew():
+    assert nearest_sample([], 1.0) is None
+    assert nearest_sample([(0.9, "a"), (1.02, "b"), (1.2, "c")], 1.0) == (1.02, "b")
+
+    step_sync = StepSync(reference_ts=10.0)
+    step_sync.add("robot_0", 10.004)
+    step_sync.add("camera_0", 9.99)
+    # Sources without a sample are ignored
+    step_sync.add("camera_1", None)
+    assert step_sync.skew == pytest.approx(0.01)
+    assert set(step_sync.to_metadata()["sync_offsets"]) == {"robot_0", "camera_0"}
+
+
+@pytest.mark.asyncio
+async def test_recorder_picks_the_frames_nearest_to_the_tick():
+    tick = time.perf_counter()
+    # Cameras out of phase: 30 fps and 15 fps
+    main_camera = FakeCamera(0, [tick - 0.066, tick - 0.033, tick, tick + 0.033])
+    secondary_camera = FakeCamera(1, [tick - 0.1, tick - 0.04, tick + 0.027])
+
+    recorder = object.__new__(Recorder)
+    recorder.cameras = FakeCameras(main_camera, [secondary_camera])  # type: ignore
+    recorder._image_thread_pool = ThreadPoolExecutor(max_workers=4)
+    recorder.metrics = None
+
+    step_sync = StepSync(reference_ts=tick)
+    main_frames, secondary_frames = await recorder._gather_frames_parallel(
+        target_size=(4, 4), step_sync=step_sync
+    )
+    recorder._image_thread_pool.shutdown()
+
+    # Converted to RGB and resized
+    assert main_frames[0].shape == (4, 4, 3)
+    assert main_frames[0][0, 0, 2] == 2
+    assert secondary_frames[0][0, 0, 2] == 2
+    assert step_sync.offsets["camera_0"] == pytest.approx(0.0)
+    assert step_sync.offsets["camera_1"] == pytest.approx(0.027)
+    assert step_sync.skew == pytest.approx(0.027)
+
+
+def test_camera_overriding_get_rgb_frame_returns_its_latest_frame():
+    camera = RGBOnlyVideoCamera(0)
+    before = time.perf_counter()
+
+    frame, timestamp = camera.get_rgb_frame_near(before - 1.0, resize=(4, 4))
+
+    assert frame is not None and frame.shape == (4, 4, 3)
+    assert frame[0, 0, 0] == 7
+    # Timestamped when read
+    assert timestamp is not None and timestamp >= before
+
+
+def test_episode_buffer_keeps_the_skew_of_each_step():
+    buffer = EpisodeBuffer()
+    for i, metadata in enumerate([{}, {"sync_skew": 0.0125}]):
+        step = Step(
+            observation=Observation(
+                main_image=np.zeros((4, 4, 3), dtype=np.uint8),
+                joints_position=np.zeros(6, dtype=np.float32),
+                timestamp=i / 30,
+                language_instruction="pick up the cube",
+            ),
+            metadata={"created_at": float(i), **metadata},
+        )
+        buffer.append_step(step, task_index=0)
+
+    assert buffer.sync_skew_ms() == [None, 12.5]
+    assert EpisodeBuffer().sync_skew_ms() is None
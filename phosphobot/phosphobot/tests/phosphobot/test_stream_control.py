@@ -0,0 +1,80 @@
+"""
+Tests for the adaptive quality of the MJPEG video streams.
+
+```
+uv run pytest tests/phosphobot/test_stream_control.py
+```
+"""
+
+import asyncio
+import os
+import sys
+from typing import Optional
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.camera import DummyCamera
+from phosphobot.stream_control import AdaptiveStreamController
+
+
+class NoiseCamera(DummyCamera):
+    """Frames of noise, which don't compress."""
+
+    def get_rgb_frame(self, resize: Optional[tuple[int, int]] = None) -> np.ndarray:
+        width, height = resize or (self.width, self.height)
+        return np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def test_settings_are_lowered_in_order():
+    controller = AdaptiveStreamController(max_fps=30, max_quality=90)
+    settings = controller.settings
+    assert (settings.quality, settings.scale, settings.fps) == (90, 1.0, 30)
+
+    # Slow sends: the quality goes down first, then the resolution, then the fps
+    history = []
+    for _ in range(20):
+        controller.observe(send_seconds=0.5)
+        history.append(controller.settings)
+    first_scaled = next(i for i, s in enumerate(history) if s.scale < 1)
+    first_slowed = next(i for i, s in enumerate(history) if s.fps < 30)
+    assert history[first_scaled].quality == controller.min_quality
+    assert history[first_slowed].scale == pytest.approx(controller.min_scale)
+    assert history[-1].fps == pytest.approx(controller.min_fps, abs=0.1)
+
+    # Fast sends: back to the maximums
+    for _ in range(60):
+        controller.observe(send_seconds=0.001)
+    settings = controller.settings
+    assert (settings.quality, settings.scale, settings.fps) == (90, 1.0, 30)
+
+
+def test_stream_adapts_to_a_slow_client():
+    camera = NoiseCamera(camera_type="dummy", width=320, height=240, fps=100)
+    camera.is_active = True
+
+    async def read(nb_frames: int, delay: float) -> list:
+        frames = []
+        stream = camera.generate_rgb_frames(target_size=None, quality=None)
+        async for chunk in stream:
+            jpeg = chunk.split(b"\r\n\r\n", 1)[1]
+            frames.append(cv2.imdecode(np.frombuffer(jpeg, np.uint8), 1))
+            if len(frames) == nb_frames:
+                break
+            # The client takes time to read the frame
+            await asyncio.sleep(delay)
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(read(nb_frames=8, delay=0.2))
+    assert frames[0].shape == (240, 320, 3)
+    # The resolution dropped
+    assert frames[-1].shape[1] < 320 * 0.5
+
+    # A fast client gets the full resolution
+    frames = asyncio.run(read(nb_frames=3, delay=0))
+    assert all(frame.shape == (240, 320, 3) for frame in frames)
+    camera.stop()
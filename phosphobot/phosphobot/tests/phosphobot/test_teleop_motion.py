@@ -0,0 +1,130 @@
+"""
+Tests for the teleoperation motion engine: filter, joint limits and fixed rate
+output.
+
+```
+uv run pytest tests/phosphobot/test_teleop_motion.py
+```
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.teleop_motion import (
+    JointMotionLimiter,
+    OneEuroFilter,
+    TeleopMotionEngine,
+)
+
+
+def test_one_euro_filter_smooths_at_rest_and_follows_moves():
+    rng = np.random.default_rng(0)
+    one_euro = OneEuroFilter(min_cutoff=1.0, beta=10.0)
+    times = np.arange(0, 2, 0.01)
+
+    # At rest: the noise is strongly attenuated
+    noisy = 0.2 + rng.normal(0, 0.005, size=(times.size, 3))
+    filtered = np.array([one_euro.filter(x, t) for x, t in zip(noisy, times)])
+    assert filtered[50:].std(axis=0).max() < noisy.std(axis=0).min() / 3
+
+    # Fast move: the cutoff rises, so the filter doesn't lag much behind
+    one_euro.reset()
+    ramp = np.stack([0.5 * times] * 3, axis=1)
+    filtered = np.array([one_euro.filter(x, t) for x, t in zip(ramp, times)])
+    assert np.abs(filtered[-1] - ramp[-1]).max() < 0.02
+
+
+def test_joint_limiter_respects_velocity_and_acceleration():
+    dt = 0.01
+    limiter = JointMotionLimiter(max_velocity=2.0, max_acceleration=20.0)
+    limiter.reset(np.zeros(2))
+    target = np.array([1.0, -0.3])
+    positions = np.array([limiter.step(target, dt) for _ in range(200)])
+
+    velocities = np.diff(positions, axis=0, prepend=[[0.0, 0.0]]) / dt
+    accelerations = np.diff(velocities, axis=0) / dt
+    assert np.abs(velocities).max() <= 2.0 + 1e-9
+    assert np.abs(accelerations).max() <= 20.0 + 1e-6
+    # Reaches the target without overshoot
+    np.testing.assert_allclose(positions[-1], target, atol=1e-3)
+    assert positions[:, 0].max() <= 1.0 + 1e-3
+    assert positions[:, 1].min() >= -0.3 - 1e-3
+
+
+class FakeManipulator:
+    """IK is the identity on the position, padded to 6 joints."""
+
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.is_moving = False
+        self.commands: list = []
+
+    def inverse_kinematics(self, position, orientation_quaternion):
+        return np.concatenate([position, np.zeros(3)])
+
+    def read_joints_position(self, unit: str = "rad"):
+        return np.zeros(6)
+
+    def set_motors_positions_and_gripper(self, q_target_rad, open_command):
+        self.commands.append((time.perf_counter(), q_target_rad, open_command))
+
+
+def test_engine_commands_at_a_fixed_rate_from_bursty_packets():
+    robot = FakeManipulator()
+    engine = TeleopMotionEngine(
+        robot,  # type: ignore[arg-type]
+        frequency=100,
+        max_velocity=1.0,
+        max_acceleration=10.0,
+        idle_timeout=0.2,
+    )
+    engine.start()
+    try:
+        # A hand moving at 0.2 m/s, sent in bursts of 3 packets every 60ms
+        start = time.perf_counter()
+        for burst in range(10):
+            for _ in range(3):
+                elapsed = time.perf_counter() - start
+                engine.set_target(
+                    np.array([0.2 * elapsed, 0.0, 0.1]), np.zeros(3), 0.5
+                )
+            time.sleep(0.06)
+        last_target = engine._targets[-1][1]
+        time.sleep(0.4)
+    finally:
+        engine.stop()
+        engine.join(timeout=1)
+
+    times = np.array([command[0] for command in robot.commands])
+    q = np.array([command[1] for command in robot.commands])
+    assert robot.commands[-1][2] == 0.5
+    # Steady output during the move, not one write per packet
+    periods = np.diff(times[times < start + 0.6])
+    assert 0.009 < np.median(periods) < 0.012
+    assert len(robot.commands) > 45
+    # Smooth: no step larger than the velocity limit allows
+    assert np.abs(np.diff(q, axis=0)).max() <= 1.0 * 0.01 + 1e-9
+    # Settles on the last target, then stops writing once the target is stale
+    np.testing.assert_allclose(q[-1, :3], last_target[:3], atol=5e-3)
+    assert times[-1] < start + 0.6 + 0.25
+
+
+def test_engine_is_stopped_when_the_robot_is_dropped():
+    from phosphobot.teleoperation import TeleopManager
+
+    manager = TeleopManager(rcm=None)  # type: ignore[arg-type]
+    robot = FakeManipulator()
+    engine = manager.get_motion_engine(robot)  # type: ignore[arg-type]
+    assert engine.is_alive()
+
+    manager.drop_motion_engine(robot)  # type: ignore[arg-type]
+    engine.join(timeout=1)
+    assert not engine.is_alive()
+    # A new robot at the same address gets a new engine
+    assert id(robot) not in manager._motion_engines
@@ -0,0 +1,149 @@
+"""
+Tests for the deletion of episodes with tombstones and the compaction of the dataset.
+
+```
+uv run pytest tests/phosphobot/test_tombstones.py
+```
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from phosphobot.models.lerobot_dataset import EpisodesModel, LeRobotDataset
+
+
+def episode_files(dataset: LeRobotDataset) -> list:
+    return sorted(os.listdir(dataset.data_folder_full_path))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return LeRobotDataset(path=str(tmp_path / "lerobot_v2.1" / "tombstones"))
+
+
+@pytest.mark.asyncio
+async def test_delete_episodes_tombstones_without_renumbering(
+    dataset, record_episode, camera_key
+):
+    for i in range(5):
+        await record_episode(dataset, nb_steps=10 + i, task=f"task {i % 2}")
+    parquet_4 = os.path.getmtime(dataset.get_episode_data_path(4))
+
+    deleted = dataset.delete_episodes([3, 1])
+
+    assert deleted == [1, 3]
+    assert dataset.load_tombstones() == [1, 3]
+    assert episode_files(dataset) == [
+        "episode_000000.parquet",
+        "episode_000002.parquet",
+        "episode_000004.parquet",
+    ]
+    # The later episodes are not rewritten
+    assert os.path.getmtime(dataset.get_episode_data_path(4)) == parquet_4
+    camera_folder = os.path.join(dataset.videos_folder_full_path, camera_key)
+    assert sorted(os.listdir(camera_folder)) == [
+        "episode_000000.mp4",
+        "episode_000002.mp4",
+        "episode_000004.mp4",
+    ]
+
+    dataset.load_meta_models(force=True)
+    assert dataset.info_model is not None and dataset.episodes_model is not None
+    assert dataset.info_model.total_episodes == 3
+    assert dataset.info_model.total_frames == 10 + 12 + 14
+    assert [e.episode_index for e in dataset.episodes_model.episodes] == [0, 2, 4]
+    # Deleted indexes are not reused before the compaction
+    assert dataset.get_next_episode_index() == 5
+
+    # Unknown or already deleted episodes
+    with pytest.raises(ValueError):
+        dataset.delete_episodes([7])
+    assert dataset.delete_episodes([1]) == []
+
+
+@pytest.mark.asyncio
+async def test_compact_renumbers_in_one_pass(dataset, record_episode):
+    for i in range(5):
+        await record_episode(dataset, nb_steps=10 + i, task=f"task {i}")
+    dataset.delete_episodes([0, 3])
+    # Recording after a deletion uses a fresh index
+    assert await record_episode(dataset, nb_steps=20, task="task 5") == 5
+    # and its frames follow the frames of the last episode, not the frame count
+    df = pd.read_parquet(dataset.get_episode_data_path(5))
+    assert df["index"].tolist() == list(range(60, 80))
+
+    assert dataset.compact() is True
+    assert dataset.compact() is False
+
+    assert dataset.load_tombstones() == []
+    assert episode_files(dataset) == [f"episode_{i:06d}.parquet" for i in range(4)]
+    lengths = [11, 12, 14, 20]
+    offset = 0
+    for i, length in enumerate(lengths):
+        df = pd.read_parquet(dataset.get_episode_data_path(i))
+        assert len(df) == length
+        assert (df["episode_index"] == i).all()
+        assert df["index"].tolist() == list(range(offset, offset + length))
+        offset += length
+
+    episodes_model = EpisodesModel.from_jsonl(
+        meta_folder_path=dataset.meta_folder_full_path, format="lerobot_v2.1"
+    )
+    assert [e.episode_index for e in episodes_model.episodes] == [0, 1, 2, 3]
+    assert [e.length for e in episodes_model.episodes] == lengths
+
+    dataset.load_meta_models(force=True)
+    assert dataset.info_model is not None and dataset.tasks_model is not None
+    assert dataset.info_model.total_episodes == 4
+    assert dataset.info_model.total_frames == sum(lengths)
+    # The tasks of the deleted episodes are removed
+    assert {task.task for task in dataset.tasks_model.tasks} == {
+        "task 1",
+        "task 2",
+        "task 4",
+        "task 5",
+    }
+    assert dataset.get_next_episode_index() == 4
+
+
+@pytest.mark.asyncio
+async def test_recording_metrics_follow_the_deletions(dataset, record_episode):
+    for i in range(4):
+        await record_episode(dataset, nb_steps=10, task="pick")
+    with open(dataset.recording_metrics_path, "w") as f:
+        for i in range(4):
+            f.write(json.dumps({"episode_index": i, "dropped_frames": i}) + "\n")
+
+    def read_metrics() -> list:
+        with open(dataset.recording_metrics_path) as f:
+            return [
+                (metrics["episode_index"], metrics["dropped_frames"])
+                for metrics in map(json.loads, f)
+            ]
+
+    dataset.delete_episodes([1])
+    assert read_metrics() == [(0, 0), (2, 2), (3, 3)]
+    assert dataset.compact_if_needed() is True
+    assert read_metrics() == [(0, 0), (1, 2), (2, 3)]
+    # Deleting a single episode renumbers the next ones right away
+    dataset.delete_episode(0, update_hub=False)
+    assert read_metrics() == [(0, 2), (1, 3)]
+
+
+@pytest.mark.asyncio
+async def test_compact_if_needed_without_tombstones(
+    dataset, record_episode, monkeypatch
+):
+    await record_episode(dataset, nb_steps=10, task="pick")
+
+    def compact() -> bool:
+        raise AssertionError("Nothing to compact")
+
+    monkeypatch.setattr(dataset, "compact", compact)
+    assert dataset.compact_if_needed() is False
@@ -1,24 +1,200 @@
 import json
 import os
+from collections import OrderedDict
 from copy import deepcopy
 from math import ceil
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import einops
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import torch
 import torchvision
 import tqdm
 from loguru import logger
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, Sampler
 import argparse
 
+# LRUCache, SequentialVideoDecoder and EpisodeBatchSampler are also defined in
+# modal/act/src/helper.py: this script runs in its own uv project, without
+# phosphobot. Keep the two copies in sync.
+
+
+class LRUCache:
+    """Mapping with a maximum number of entries. The least recently used entry is evicted first."""
+
+    def __init__(self, maxsize: int, on_evict: Optional[Callable[[Any], None]] = None):
+        self.maxsize = max(maxsize, 1)
+        self.on_evict = on_evict
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def get(self, key: Any) -> Any:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            _, evicted = self._data.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+
+
+class SequentialVideoDecoder:
+    """
+    Decode the video of an episode in order, keeping the container open between calls.
+
+    The frame of a row is the frame closest to the row timestamp. Decoded frames are kept
+    as uint8 in a bounded LRU cache. Reading the rows in order decodes every frame once,
+    instead of reopening the video and seeking to a keyframe for every row. Going back
+    past the cache reopens the video from the start.
+    """
+
+    def __init__(
+        self,
+        video_path: Path | str,
+        timestamps: List[float],
+        max_cached_frames: int = 256,
+        tolerance_s: float = 1,
+        backend: str = "pyav",
+    ):
+        self.video_path = str(video_path)
+        self.timestamps = timestamps
+        self.tolerance_s = tolerance_s
+        self.backend = backend
+        self.frames = LRUCache(max_cached_frames)
+        self._reader: Any = None
+        self._frames_iterator: Optional[Iterator[dict]] = None
+        # Index of the next row to decode
+        self._next_row = 0
+        # Last two frames read from the video, as (pts, data)
+        self._previous: Optional[tuple] = None
+        self._current: Optional[tuple] = None
+
+    def _open(self) -> None:
+        self.close()
+        torchvision.set_video_backend(self.backend)
+        self._reader = torchvision.io.VideoReader(self.video_path, "video")
+        self._frames_iterator = iter(self._reader)
+        self._next_row = 0
+        self._previous = None
+        self._current = None
+
+    def close(self) -> None:
+        if self._reader is not None and self.backend == "pyav":
+            self._reader.container.close()
+        self._reader = None
+        self._frames_iterator = None
+
+    def _decode_next_row(self) -> torch.Tensor:
+        assert self._frames_iterator is not None
+        timestamp = self.timestamps[self._next_row]
+        # Read frames until we reach the timestamp of the row
+        while self._current is None or self._current[0] < timestamp:
+            try:
+                frame = next(self._frames_iterator)
+            except StopIteration:
+                break
+            self._previous = self._current
+            self._current = (frame["pts"], frame["data"])
+
+        if self._current is None:
+            raise ValueError(f"No frame could be decoded from {self.video_path}")
+        closest = self._current
+        if self._previous is not None and abs(self._previous[0] - timestamp) < abs(
+            self._current[0] - timestamp
+        ):
+            closest = self._previous
+        if abs(closest[0] - timestamp) >= self.tolerance_s:
+            logger.warning(
+                f"Query timestamp {timestamp} is {abs(closest[0] - timestamp):.4f}s away from the closest frame "
+                f"({self.tolerance_s=}). This might be due to synchronization issues during data collection."
+                f"\nvideo: {self.video_path}"
+            )
+        return closest[1]
+
+    def get_frame(self, row_idx: int) -> torch.Tensor:
+        """Frame of the row as a uint8 tensor in channel-first format"""
+        frame = self.frames.get(row_idx)
+        if frame is not None:
+            return frame
+
+        if self._frames_iterator is None or row_idx < self._next_row:
+            self._open()
+        while self._next_row <= row_idx:
+            self.frames.put(self._next_row, self._decode_next_row())
+            self._next_row += 1
+        return self.frames.get(row_idx)
+
+
+def close_decoders(decoders: Dict[str, SequentialVideoDecoder]) -> None:
+    for decoder in decoders.values():
+        decoder.close()
+
+
+class EpisodeBatchSampler(Sampler):
+    """
+    Yield batches of indexes such that all the steps of an episode are loaded by the same
+    DataLoader worker, in order.
+
+    The DataLoader hands the batch i to the worker i % num_workers. The episodes are split in
+    num_workers groups of similar number of steps, and the batches of the groups are interleaved.
+    """
+
+    def __init__(self, episode_nb_steps: List[int], batch_size: int, num_workers: int = 0):
+        nb_groups = max(num_workers, 1)
+        groups: List[List[int]] = [[] for _ in range(nb_groups)]
+        group_nb_steps = [0] * nb_groups
+        episode_start = 0
+        for nb_steps in episode_nb_steps:
+            group = int(np.argmin(group_nb_steps))
+            groups[group].extend(range(episode_start, episode_start + nb_steps))
+            group_nb_steps[group] += nb_steps
+            episode_start += nb_steps
+
+        group_batches = [
+            [indexes[i : i + batch_size] for i in range(0, len(indexes), batch_size)]
+            for indexes in groups
+        ]
+        self.batches: List[List[int]] = []
+        for i in range(max(len(batches) for batches in group_batches)):
+            for batches in group_batches:
+                if i < len(batches):
+                    self.batches.append(batches[i])
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self.batches)
+
 
 class ParquetEpisodesDataset(Dataset):
-    """Custom Dataset for loading parquet files from a directory."""
+    """
+    Custom Dataset for loading parquet files from a directory.
 
-    def __init__(self, dataset_dir: str):
+    Use it with EpisodeBatchSampler: the videos of each episode are then decoded once, sequentially.
+    The memory used by each worker is bounded by the parquet and video decoders LRU caches.
+    """
+
+    def __init__(
+        self,
+        dataset_dir: str,
+        max_cached_parquets: int = 16,
+        max_cached_episodes: int = 2,
+        max_cached_frames: int = 256,
+    ):
         """
         dataset dir is the path to the folder containing data, videos, meta subfolder
         """
@@ -34,7 +210,10 @@ class ParquetEpisodesDataset(Dataset):
         self.file_paths = sorted(self.data_dir.rglob("*.parquet"))
         self.video_paths = sorted(self.videos_dir.rglob("*.mp4"))
 
-        self.parquet_cache: dict[str, pd.DataFrame] = {}
+        self.max_cached_frames = max_cached_frames
+        self.parquet_cache = LRUCache(max_cached_parquets)
+        # episode_idx -> {video_key: SequentialVideoDecoder}
+        self.video_decoders = LRUCache(max_cached_episodes, on_evict=close_decoders)
 
         if not self.file_paths:
             raise ValueError(f"No parquet files found in {dataset_dir}")
@@ -58,8 +237,8 @@ class ParquetEpisodesDataset(Dataset):
         for file_path in self.file_paths:
             # The filepath is expected to be in the format "chunk-000/episode_000000.parquet"
             episode_idx = int(file_path.stem.split("_")[-1])
-            df = self.read_parquet(str(file_path))
-            nb_steps = len(df)
+            # Only read the footer of the parquet file to get the number of rows
+            nb_steps = pq.ParquetFile(file_path).metadata.num_rows
             self.episode_nb_steps.append(nb_steps)
 
             # Needed for episodes.jsonl
@@ -100,30 +279,56 @@ class ParquetEpisodesDataset(Dataset):
         return self.total_length
 
     def read_parquet(self, file_path: str):
-        # Cache the parquet files to avoid reading them multiple times
-        if file_path not in self.parquet_cache:
-            self.parquet_cache[file_path] = pd.read_parquet(file_path)
-        return self.parquet_cache[file_path]
+        # Cache the recently used parquet files to avoid reading them for every row
+        df = self.parquet_cache.get(file_path)
+        if df is None:
+            df = pd.read_parquet(file_path)
+            self.parquet_cache.put(file_path, df)
+        return df
+
+    def get_video_decoders(
+        self, episode_idx: int, file_path: str, videos_paths: Dict[str, Path]
+    ) -> Dict[str, SequentialVideoDecoder]:
+        decoders = self.video_decoders.get(episode_idx)
+        if decoders is None:
+            timestamps = self.read_parquet(file_path)["timestamp"].tolist()
+            decoders = {
+                key: SequentialVideoDecoder(
+                    video_path, timestamps, max_cached_frames=self.max_cached_frames
+                )
+                for key, video_path in videos_paths.items()
+            }
+            self.video_decoders.put(episode_idx, decoders)
+        return decoders
+
+    def get_batch_sampler(
+        self, batch_size: int, num_workers: int = 0
+    ) -> EpisodeBatchSampler:
+        return EpisodeBatchSampler(
+            self.episode_nb_steps, batch_size=batch_size, num_workers=num_workers
+        )
 
     def __getitem__(self, idx: int):
         if idx >= self.total_length:
             raise IndexError("Index out of bounds")
 
-        file_path: str = self.index_mapping[idx]["file_path"]
+        file_path: str = str(self.index_mapping[idx]["file_path"])
         row_idx: int = self.index_mapping[idx]["row_idx"]
 
         # Read the specific row
         df = self.read_parquet(file_path)
         row_data = df.iloc[row_idx]
 
-        # Get the related video files
-        videos_paths = self.index_mapping[idx]["videos_paths"]
+        # Get the related video frames
+        decoders = self.get_video_decoders(
+            episode_idx=self.index_mapping[idx]["episode_idx"],
+            file_path=file_path,
+            videos_paths=self.index_mapping[idx]["videos_paths"],
+        )
         video_key_to_path = {}
-        for key, video_path in videos_paths.items():
-            # Load the video and store it in the row_data
-            video_key_to_path[key] = decode_video_frames_torchvision(
-                video_path, timestamp=[row_data["timestamp"]]
-            ).squeeze(0)
+        for key, decoder in decoders.items():
+            # convert to the pytorch format which is float32 in [0,1] range (and channel first)
+            video_key_to_path[key] = decoder.get_frame(row_idx).type(torch.float32) / 255
 
         # Convert each column to a Tensor
         # If it's a list/np.ndarray, turn it into a float32 tensor of that shape
@@ -271,18 +476,16 @@ def compute_stats(dataset_path, batch_size=128, num_workers=2, max_num_samples=N
     if max_num_samples is None:
         max_num_samples = len(dataset)
 
-    # for more info on why we need to set the same number of workers, see `load_from_videos`
-    dataset = ParquetEpisodesDataset(dataset_path)
+    # Each worker decodes the videos of its own episodes, sequentially
+    batch_sampler = dataset.get_batch_sampler(
+        batch_size=batch_size, num_workers=num_workers
+    )
 
     # Example DataLoader that returns dictionaries of tensors
-    generator = torch.Generator()
-    generator.manual_seed(1337)
     dataloader = torch.utils.data.DataLoader(
         dataset,
         num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
+        batch_sampler=batch_sampler,
     )
     stats_patterns = get_stats_einops_patterns(dataset, dataloader)
 
@@ -303,7 +506,7 @@ def compute_stats(dataset_path, batch_size=128, num_workers=2, max_num_samples=N
 
     for i, batch in tqdm.tqdm(
         enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
+        total=min(len(dataloader), ceil(max_num_samples / batch_size)),
         desc="Compute mean, min, max",
     ):
         this_batch_size = len(batch["index"])
@@ -330,21 +533,19 @@ def compute_stats(dataset_path, batch_size=128, num_workers=2, max_num_samples=N
                 min[key], einops.reduce(batch[key], pattern, "min")
             )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
+        if running_item_count >= max_num_samples:
             break
 
     dataloader = torch.utils.data.DataLoader(
         dataset,
         num_workers=num_workers,
-        batch_size=batch_size,
-        drop_last=False,
-        generator=generator,
+        batch_sampler=batch_sampler,
     )
     first_batch_ = None
     running_item_count = 0  # for online std computation
     for i, batch in tqdm.tqdm(
         enumerate(dataloader),
-        total=ceil(max_num_samples / batch_size),
+        total=min(len(dataloader), ceil(max_num_samples / batch_size)),
         desc="Compute std",
     ):
         this_batch_size = len(batch["index"])
@@ -363,7 +564,7 @@ def compute_stats(dataset_path, batch_size=128, num_workers=2, max_num_samples=N
                 std[key] + this_batch_size * (batch_std - std[key]) / running_item_count
             )
 
-        if i == ceil(max_num_samples / batch_size) - 1:
+        if running_item_count >= max_num_samples:
             break
 
     for key in stats_patterns:
@@ -521,7 +722,7 @@ if __name__ == "__main__":
     dataset = ParquetEpisodesDataset(DATASET_PATH)
 
     # Find the data that has changed
-    total_episodes = len(dataset.parquet_cache)
+    total_episodes = len(dataset.steps_per_episode)
     total_frames = dataset.total_length
     total_videos = len(dataset.video_paths)
     splits = {"train": f"0:{total_episodes}"}
@@ -12,7 +12,10 @@ import glob
 import tyro
 import json
 import subprocess
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 
 
@@ -69,6 +72,42 @@ def delete_DS_Store(dataset_path):
     print(".DS_Store files deleted")
 
 
+def rewrite_parquet_indexes(file_path, episode_number, index_offset):
+    """
+    Rewrite the episode_index, frame_index and index columns of a parquet file.
+    Returns False if they were already correct and the file was left as is.
+    """
+    table = pq.read_table(file_path)
+    num_rows = table.num_rows
+    expected = {
+        # episode_index matches the number in the filename
+        "episode_index": np.full(num_rows, episode_number, dtype=np.int64),
+        # frame_index goes from 0 to n-1
+        "frame_index": np.arange(num_rows, dtype=np.int64),
+        # index is a rolling index across the files
+        "index": np.arange(num_rows, dtype=np.int64) + index_offset,
+    }
+    if all(
+        name in table.column_names and np.array_equal(table[name].to_numpy(), values)
+        for name, values in expected.items()
+    ):
+        return False
+
+    for name, values in expected.items():
+        if name in table.column_names:
+            field = table.schema.field(name)
+            table = table.set_column(
+                table.column_names.index(name),
+                field,
+                pa.array(values).cast(field.type),
+            )
+        else:
+            table = table.append_column(name, pa.array(values))
+    pq.write_table(table, file_path + ".tmp")
+    os.replace(file_path + ".tmp", file_path)
+    return True
+
+
 def process_parquet_files(folder_path):
     """
     Process all parquet files in the given folder by correcting the episode_index column.
@@ -134,41 +173,34 @@ def process_parquet_files(folder_path):
         )
         print("Updated parquet files list after renaming")
 
-    # Process each parquet file
+    # Index of the first row of each file, from the row counts of the footers
+    index_offsets = []
     total_index = 0
     for file_path in parquet_files:
-        # Extract episode number from filename using regex
-        filename = os.path.basename(file_path)
-        match = re.search(r"episode_(\d+)\.parquet", filename)
-
-        if match:
-            episode_number = int(match.group(1))
-            print(f"Processing {filename} - Episode {episode_number}")
-
+        index_offsets.append(total_index)
+        total_index += pq.read_metadata(file_path).num_rows
+
+    # Process the parquet files in parallel
+    with ProcessPoolExecutor() as executor:
+        futures = {
+            executor.submit(
+                rewrite_parquet_indexes,
+                file_path,
+                int(re.search(r"episode_(\d+)\.parquet", file_path).group(1)),
+                index_offset,
+            ): file_path
+            for file_path, index_offset in zip(parquet_files, index_offsets)
+        }
+        for future in as_completed(futures):
+            filename = os.path.basename(futures[future])
             try:
-                # Read the parquet file
-                df = pd.read_parquet(file_path, engine="pyarrow")
-
-                # Add episode_index column with the extracted number
-                df["episode_index"] = episode_number
-
-                # Rewrite frame_index column to go from 0 to n-1
-                df["frame_index"] = range(len(df))
-
-                # Rewrite index column to be a rolling index
-                df["index"] = range(total_index, total_index + len(df))
-                total_index += len(df)
-
-                # Save the modified DataFrame back to the same file
-                df.to_parquet(file_path, index=False)
-
-                print(f"Successfully updated {filename}")
-
+                if future.result():
+                    print(f"Successfully updated {filename}")
+                else:
+                    print(f"{filename} is already correct")
             except Exception as e:
                 print(f"Error processing {filename}: {str(e)}")
                 sys.exit(1)
-        else:
-            print(f"Skipping {filename} - doesn't match expected pattern")
 
     print("Parquet processing complete")
 